@@ -0,0 +1,86 @@
+"""download_job_checkpoints
+
+Revision ID: 52b9d1cbda72
+Revises: fb4299563748
+Create Date: 2026-10-19 09:12:04.318207
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "52b9d1cbda72"
+down_revision = "fb4299563748"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "download_jobs",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("type", sa.String(length=50), nullable=False),
+        sa.Column(
+            "status", sa.String(length=20), server_default="queued", nullable=True
+        ),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("total_items", sa.Integer(), server_default="0", nullable=True),
+        sa.Column("completed_items", sa.Integer(), server_default="0", nullable=True),
+        sa.Column("failed_items", sa.Integer(), server_default="0", nullable=True),
+        sa.Column("skipped_items", sa.Integer(), server_default="0", nullable=True),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "download_job_items",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("job_id", sa.String(length=36), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.Column("code", sa.String(length=50), nullable=False),
+        sa.Column("release", sa.String(length=255), nullable=True),
+        sa.Column(
+            "status", sa.String(length=20), server_default="pending", nullable=True
+        ),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["job_id"],
+            ["download_jobs.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("job_id", "code", name="uq_download_job_item"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("download_job_items")
+    op.drop_table("download_jobs")
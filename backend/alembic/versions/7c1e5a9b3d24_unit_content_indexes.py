@@ -0,0 +1,60 @@
+"""unit_content_indexes
+
+Revision ID: 7c1e5a9b3d24
+Revises: 52b9d1cbda72
+Create Date: 2026-10-19 11:02:37.614920
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "7c1e5a9b3d24"
+down_revision = "52b9d1cbda72"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_unit_elements_unit_id_element_num",
+        "unit_elements",
+        ["unit_id", "element_num"],
+    )
+    op.create_index(
+        "ix_unit_performance_criteria_element_id_pc_num",
+        "unit_performance_criteria",
+        ["element_id", "pc_num"],
+    )
+    op.create_index(
+        "ix_unit_performance_criteria_unit_id",
+        "unit_performance_criteria",
+        ["unit_id"],
+    )
+    op.create_index(
+        op.f("ix_unit_critical_aspects_unit_id"), "unit_critical_aspects", ["unit_id"]
+    )
+    op.create_index(
+        op.f("ix_unit_required_skills_unit_id"), "unit_required_skills", ["unit_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_unit_required_skills_unit_id"), table_name="unit_required_skills"
+    )
+    op.drop_index(
+        op.f("ix_unit_critical_aspects_unit_id"), table_name="unit_critical_aspects"
+    )
+    op.drop_index(
+        "ix_unit_performance_criteria_unit_id", table_name="unit_performance_criteria"
+    )
+    op.drop_index(
+        "ix_unit_performance_criteria_element_id_pc_num",
+        table_name="unit_performance_criteria",
+    )
+    op.drop_index(
+        "ix_unit_elements_unit_id_element_num", table_name="unit_elements"
+    )
@@ -0,0 +1,37 @@
+"""unit_content_documents
+
+Revision ID: d4f2b8e61a07
+Revises: 7c1e5a9b3d24
+Create Date: 2026-10-19 12:24:51.208337
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "d4f2b8e61a07"
+down_revision = "7c1e5a9b3d24"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "units",
+        sa.Column(
+            "content_json", postgresql.JSONB(astext_type=sa.Text()), nullable=True
+        ),
+    )
+    op.add_column(
+        "units", sa.Column("content_etag", sa.String(length=32), nullable=True)
+    )
+    op.add_column("units", sa.Column("content_version", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("units", "content_version")
+    op.drop_column("units", "content_etag")
+    op.drop_column("units", "content_json")
@@ -0,0 +1,37 @@
+"""question_content_hashes
+
+Revision ID: e9a3c7d15f42
+Revises: d4f2b8e61a07
+Create Date: 2026-10-19 15:02:37.481920
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e9a3c7d15f42"
+down_revision = "d4f2b8e61a07"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "assessment_questions",
+        sa.Column("content_hash", sa.String(length=64), nullable=True),
+    )
+    op.create_index(
+        "ix_assessment_questions_assessment_id_content_hash",
+        "assessment_questions",
+        ["assessment_id", "content_hash"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_assessment_questions_assessment_id_content_hash",
+        table_name="assessment_questions",
+    )
+    op.drop_column("assessment_questions", "content_hash")
@@ -0,0 +1,32 @@
+"""progress_heatmap_index
+
+Revision ID: f1b6d8a2c930
+Revises: e9a3c7d15f42
+Create Date: 2026-10-19 15:48:06.219553
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "f1b6d8a2c930"
+down_revision = "e9a3c7d15f42"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_user_element_progress_unit_id_user_id",
+        "user_element_progress",
+        ["unit_id", "user_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_user_element_progress_unit_id_user_id",
+        table_name="user_element_progress",
+    )
@@ -23,11 +23,47 @@ if not DATABASE_URL:
     DB_NAME = os.getenv('DB_NAME', 'learnonline')
     DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+_engine = None
+
+
+def get_engine():
+    """
+    The application engine, created (loading the DB driver) on first use.
+    An engine patched in as `database.engine` takes its place.
+    """
+    global _engine
+    patched = globals().get('engine')
+    if patched is not None:
+        return patched
+    if _engine is None:
+        _engine = create_engine(DATABASE_URL)
+    return _engine
+
+
+class _LazySessionmaker(sessionmaker):
+    """sessionmaker whose sessions bind to the application engine when they are made"""
+
+    def __call__(self, **local_kw):
+        if self.kw.get('bind') is None:
+            local_kw.setdefault('bind', get_engine())
+        return super().__call__(**local_kw)
+
+
+SessionLocal = _LazySessionmaker(autocommit=False, autoflush=False)
 
 Base = declarative_base()
 
+
+def __getattr__(name):
+    # `database.engine` / `from database import engine` keep working; the
+    # engine is cached as a real module attribute, and get_engine() and new
+    # sessions follow it when it is patched
+    if name == 'engine':
+        globals()['engine'] = get_engine()
+        return globals()['engine']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def get_db():
     db = SessionLocal()
     try:
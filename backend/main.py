@@ -1,6 +1,7 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-import os
 from dotenv import load_dotenv
 
 # Import routers
@@ -21,21 +22,34 @@ from routers import (
 )
 from routers.quiz import router as quiz_router
 from routers.packs import router as packs_router
+from routers.monitoring import router as monitoring_router
+from database import get_engine
+from services.request_timing import RequestTimingMiddleware, install_sql_instrumentation
+from services.metrics import install_pool_metrics, render_metrics
+from services.profiler import ProfilerMiddleware
+from services.slow_queries import install_slow_query_log
 
 # Load environment variables
 load_dotenv()
 
-# Create the database tables (only in non-test environments)
-if os.getenv("ENVIRONMENT") != "test":
-    from database import engine
-    import models.tables as models
 
-    models.Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The engine is created here rather than at import so workers start
+    # quickly; the schema is managed by Alembic (`alembic upgrade head`)
+    engine = get_engine()
+    install_sql_instrumentation(engine)
+    install_pool_metrics(engine)
+    install_slow_query_log(engine)
+    yield
+    engine.dispose()
+
 
 app = FastAPI(
     title="LearnOnline API",
     description="Backend API for LearnOnline platform",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -47,6 +61,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# On-demand request profiles, off unless armed (inside request timing)
+app.add_middleware(ProfilerMiddleware)
+
+# Per-request latency, SQL counts and Server-Timing headers (outermost);
+# the engine's SQL, pool and slow query hooks are installed by the lifespan
+app.add_middleware(RequestTimingMiddleware)
+
 
 # Root endpoint for health checks
 @app.get("/")
@@ -59,6 +80,13 @@ async def api_ready():
     return {"status": "ready"}
 
 
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, headers={"Content-Type": content_type})
+
+
 # Include all routers
 app.include_router(auth.router)
 app.include_router(users.router)
@@ -75,6 +103,7 @@ app.include_router(badges.router)
 app.include_router(gamification.router)
 app.include_router(quiz_router)
 app.include_router(packs_router)
+app.include_router(monitoring_router)
 
 if __name__ == "__main__":
     import uvicorn
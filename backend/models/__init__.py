@@ -23,6 +23,8 @@ from .tables import (
     UserElementProgress,
     UserAnswer,
     QuestionPack,
+    DownloadJob,
+    DownloadJobItem,
 )
 
 __all__ = [
@@ -50,4 +52,6 @@ __all__ = [
     "UserElementProgress",
     "UserAnswer",
     "QuestionPack",
+    "DownloadJob",
+    "DownloadJobItem",
 ]
@@ -567,12 +567,20 @@ class PackImportRequest(BaseSchema):
     source_url: str
 
 
+class PackImportDiff(BaseSchema):
+    added: int
+    unchanged: int
+    restored: int
+    deactivated: int
+
+
 class PackImportResponse(BaseSchema):
     pack_id: int
     training_package_code: str
     unit_count: int
     question_count: int
     status: str
+    diff: PackImportDiff
 
 
 class QuestionAdminItem(BaseSchema):
@@ -591,3 +599,9 @@ class QuestionPatchRequest(BaseSchema):
     options: Optional[dict] = None
     review_status: Optional[str] = None
     is_active: Optional[bool] = None
+
+
+class ProfilingSettings(BaseSchema):
+    sample_rate: Optional[float] = None
+    routes: Optional[List[str]] = None
+    token: Optional[str] = None
@@ -125,6 +125,10 @@ class Unit(Base, TimestampMixin):
     plain_english_description = Column(Text)
     processed = Column(String(1), default="N")
     visible = Column(Boolean, default=True)
+    # Precomputed elements/PCs/aspects/skills document, see services.unit_documents
+    content_json = Column(JSONB)
+    content_etag = Column(String(32))
+    content_version = Column(Integer)
 
     training_package = relationship("TrainingPackage", back_populates="units")
     elements = relationship("UnitElement", back_populates="unit")
@@ -151,6 +155,10 @@ class UnitElement(Base, TimestampMixin):
     )
     assessments = relationship("Assessment", back_populates="element")
 
+    __table_args__ = (
+        sa.Index("ix_unit_elements_unit_id_element_num", "unit_id", "element_num"),
+    )
+
 
 class UnitPerformanceCriteria(Base, TimestampMixin):
     __tablename__ = "unit_performance_criteria"
@@ -164,12 +172,17 @@ class UnitPerformanceCriteria(Base, TimestampMixin):
     element = relationship("UnitElement", back_populates="performance_criteria")
     unit = relationship("Unit", back_populates="performance_criteria")
 
+    __table_args__ = (
+        sa.Index("ix_unit_performance_criteria_element_id_pc_num", "element_id", "pc_num"),
+        sa.Index("ix_unit_performance_criteria_unit_id", "unit_id"),
+    )
+
 
 class UnitCriticalAspect(Base, TimestampMixin):
     __tablename__ = "unit_critical_aspects"
 
     id = Column(Integer, primary_key=True)
-    unit_id = Column(Integer, ForeignKey("units.id"))
+    unit_id = Column(Integer, ForeignKey("units.id"), index=True)
     section = Column(String(255))
     critical_aspect = Column(Text, nullable=False)
 
@@ -180,7 +193,7 @@ class UnitRequiredSkill(Base, TimestampMixin):
     __tablename__ = "unit_required_skills"
 
     id = Column(Integer, primary_key=True)
-    unit_id = Column(Integer, ForeignKey("units.id"))
+    unit_id = Column(Integer, ForeignKey("units.id"), index=True)
     skill_type = Column(String(100))
     skill_section = Column(String(255))
     skill_text = Column(Text, nullable=False)
@@ -280,11 +293,21 @@ class AssessmentQuestion(Base, TimestampMixin):
     source = Column(String(20), default="teacher")
     review_status = Column(String(20), default="draft")
     is_active = Column(Boolean, default=True)
+    # Hash of the pack content a question was imported from, see services.pack_import
+    content_hash = Column(String(64))
 
     assessment = relationship("Assessment", back_populates="questions")
     performance_criterion = relationship("UnitPerformanceCriteria")
     user_answers = relationship("UserAnswer", back_populates="question")
 
+    __table_args__ = (
+        sa.Index(
+            "ix_assessment_questions_assessment_id_content_hash",
+            "assessment_id",
+            "content_hash",
+        ),
+    )
+
 
 class Achievement(Base, TimestampMixin):
     __tablename__ = "achievements"
@@ -352,6 +375,7 @@ class UserElementProgress(Base, TimestampMixin):
 
     __table_args__ = (
         sa.UniqueConstraint("user_id", "element_id", name="uq_user_element"),
+        sa.Index("ix_user_element_progress_unit_id_user_id", "unit_id", "user_id"),
     )
 
 
@@ -380,3 +404,39 @@ class QuestionPack(Base, TimestampMixin):
     imported_at = Column(DateTime(timezone=True), default=func.now())
     question_count = Column(Integer, default=0)
     status = Column(String(20), default="pending")
+
+
+class DownloadJob(Base, TimestampMixin):
+    __tablename__ = "download_jobs"
+
+    id = Column(String(36), primary_key=True)
+    type = Column(String(50), nullable=False)
+    status = Column(String(20), default="queued")
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    total_items = Column(Integer, default=0)
+    completed_items = Column(Integer, default=0)
+    failed_items = Column(Integer, default=0)
+    skipped_items = Column(Integer, default=0)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+    items = relationship(
+        "DownloadJobItem", back_populates="job", order_by="DownloadJobItem.position"
+    )
+
+
+class DownloadJobItem(Base, TimestampMixin):
+    __tablename__ = "download_job_items"
+
+    id = Column(Integer, primary_key=True)
+    job_id = Column(String(36), ForeignKey("download_jobs.id"), nullable=False)
+    position = Column(Integer, nullable=False)
+    code = Column(String(50), nullable=False)
+    release = Column(String(255), nullable=True)
+    status = Column(String(20), default="pending")
+    error = Column(Text, nullable=True)
+
+    job = relationship("DownloadJob", back_populates="items")
+
+    __table_args__ = (
+        sa.UniqueConstraint("job_id", "code", name="uq_download_job_item"),
+    )
@@ -13,7 +13,7 @@ for integration with Swagger UI and ReDoc.
 
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 import uuid
 from uuid import UUID
 from datetime import datetime
@@ -21,6 +21,7 @@ from datetime import datetime
 from models.tables import Badge, UserBadge
 from models.schemas import BadgeSchema, UserBadgeSchema, BadgeCreateSchema, BadgeUpdateSchema, UserBadgeCreateSchema
 from database import get_db
+from services.query_detector import query_budget
 
 router = APIRouter(
     prefix="/badges",
@@ -162,6 +163,7 @@ async def delete_badge(
 
 # User Badge Endpoints
 @router.get("/user/{user_id}", response_model=List[UserBadgeSchema])
+@query_budget(1)
 async def get_user_badges(
     user_id: uuid.UUID,
     db: Session = Depends(get_db)
@@ -175,17 +177,14 @@ async def get_user_badges(
     Returns:
     - List of user badge objects with badge details
     """
-    user_badges = db.query(UserBadge).filter(UserBadge.user_id == user_id).all()
-    
-    result = []
-    for ub in user_badges:
-        badge = db.query(Badge).filter(Badge.id == ub.badge_id).first()
-        if badge:
-            # Create a UserBadgeSchema with the badge included
-            ub.badge = badge
-            result.append(ub)
-    
-    return result
+    user_badges = (
+        db.query(UserBadge)
+        .options(joinedload(UserBadge.badge))
+        .filter(UserBadge.user_id == user_id)
+        .all()
+    )
+
+    return [ub for ub in user_badges if ub.badge]
 
 
 @router.post("/award", status_code=status.HTTP_201_CREATED, response_model=UserBadgeSchema)
@@ -0,0 +1,118 @@
+"""
+Monitoring router - performance data for admin users
+
+Endpoints:
+- Per-route latency histograms with SQL statement counts
+- Recent query budget and repeated statement (N+1) findings
+- Request profiling settings and stored profiles (speedscope or collapsed stacks)
+- Top slow statements with their EXPLAIN plans
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+import models.tables as models
+from auth.auth_bearer import JWTBearer
+from auth.auth_handler import get_current_user
+from models.schemas import ProfilingSettings
+from services.profiler import request_profiler
+from services.query_detector import query_detector
+from services.request_timing import route_latencies
+from services.slow_queries import SORT_KEYS, slow_query_log
+
+router = APIRouter(prefix="/api/admin/monitoring", tags=["admin-monitoring"])
+
+
+def _require_admin(current_user: models.User):
+    if not hasattr(current_user, "role") or current_user.role.name != "admin":
+        raise HTTPException(
+            status_code=403, detail="Only admin users can access monitoring data"
+        )
+
+
+@router.get("/timings", dependencies=[Depends(JWTBearer())])
+async def get_route_timings(current_user: models.User = Depends(get_current_user)):
+    """Latency histograms per route, slowest total time first (admin only)"""
+    _require_admin(current_user)
+    return {"routes": route_latencies.snapshot()}
+
+
+@router.get("/queries", dependencies=[Depends(JWTBearer())])
+async def get_query_findings(
+    kind: Optional[str] = Query(None, pattern="^(budget|repeated)$"),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Recent query budget and repeated statement findings, oldest first (admin only)"""
+    _require_admin(current_user)
+    return {
+        "detection_enabled": query_detector.enabled,
+        "threshold": query_detector.threshold,
+        "findings": query_detector.findings(kind),
+    }
+
+
+@router.get("/profiling", dependencies=[Depends(JWTBearer())])
+async def get_profiling_settings(current_user: models.User = Depends(get_current_user)):
+    """What this worker profiles (admin only)"""
+    _require_admin(current_user)
+    return request_profiler.settings()
+
+
+@router.put("/profiling", dependencies=[Depends(JWTBearer())])
+async def update_profiling_settings(
+    settings: ProfilingSettings,
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Arm or disarm profiling on this worker (admin only). A sample rate of 0,
+    no routes and an empty token turn profiling off.
+    """
+    _require_admin(current_user)
+    if settings.sample_rate is not None and not 0 <= settings.sample_rate <= 1:
+        raise HTTPException(status_code=422, detail="sample_rate must be between 0 and 1")
+    request_profiler.configure(settings.sample_rate, settings.routes, settings.token)
+    return request_profiler.settings()
+
+
+@router.get("/profiles", dependencies=[Depends(JWTBearer())])
+async def list_profiles(current_user: models.User = Depends(get_current_user)):
+    """Profiles stored on this worker, newest first (admin only)"""
+    _require_admin(current_user)
+    return {"profiles": request_profiler.list()}
+
+
+@router.get("/profiles/{request_id}", dependencies=[Depends(JWTBearer())])
+async def get_profile(
+    request_id: str,
+    format: str = Query("speedscope", pattern="^(speedscope|collapsed)$"),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Profile of one request by its X-Request-ID (admin only): speedscope JSON
+    (open at speedscope.app) or collapsed stacks (flamegraph.pl, inferno).
+    """
+    _require_admin(current_user)
+    profile = request_profiler.get(request_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "collapsed":
+        return PlainTextResponse(profile.collapsed())
+    return profile.speedscope()
+
+
+@router.get("/slow-queries", dependencies=[Depends(JWTBearer())])
+async def get_slow_queries(
+    order_by: str = Query("total_ms", pattern=f"^({'|'.join(SORT_KEYS)})$"),
+    limit: int = Query(20, ge=1, le=200),
+    plans: bool = Query(True),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Slowest statement fingerprints on this worker, worst first (admin only)"""
+    _require_admin(current_user)
+    return {
+        "threshold_ms": round(slow_query_log.threshold * 1000, 1),
+        "explain_rate": slow_query_log.explain_rate,
+        "queries": slow_query_log.top(order_by, limit, plans),
+    }
@@ -1,156 +1,105 @@
 """Admin endpoints for pack import and question management."""
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+import os
+import shutil
+import tempfile
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from datetime import datetime, timezone
 
 from database import get_db
 from auth.auth_bearer import JWTBearer
+from auth.auth_handler import decode_jwt
 import models.tables as models
 from models.schemas import PackImportResponse, QuestionAdminItem, QuestionPatchRequest
+from services.pack_import import (
+    PackImporter,
+    PackImportError,
+    create_pack_record,
+    finish_pack,
+    pack_import_manager,
+)
+from services.progress_heatmap import page_students, progress_heatmaps
+from services.query_detector import query_budget
+from services.progress_export import (
+    GAP_COLUMNS,
+    PROGRESS_COLUMNS,
+    gap_statement,
+    progress_statement,
+    stream_csv,
+)
 
 router = APIRouter(prefix="/api/admin", tags=["admin-packs"])
 
+# Bytes copied per read when spooling an uploaded pack to disk
+UPLOAD_CHUNK_BYTES = 1024 * 1024
 
-def _upsert_unit(db: Session, unit_data: dict) -> models.Unit:
-    unit = db.query(models.Unit).filter_by(code=unit_data["code"]).first()
-    if unit is None:
-        unit = models.Unit(
-            code=unit_data["code"],
-            title=unit_data["title"],
-            description=unit_data.get("description", ""),
-        )
-        db.add(unit)
-        db.flush()
-    unit.plain_english_description = unit_data.get("plain_english_description")
-    db.flush()
-    return unit
-
-
-def _upsert_element(
-    db: Session, element_data: dict, unit: models.Unit
-) -> models.UnitElement:
-    element = (
-        db.query(models.UnitElement)
-        .filter_by(unit_id=unit.id, element_num=element_data["code"])
-        .first()
-    )
-    if element is None:
-        element = models.UnitElement(
-            unit_id=unit.id,
-            element_num=element_data["code"],
-            element_text=element_data["title"],
-        )
-        db.add(element)
-        db.flush()
-    return element
-
-
-def _upsert_assessment(
-    db: Session, element: models.UnitElement, unit: models.Unit
-) -> models.Assessment:
-    assessment = db.query(models.Assessment).filter_by(element_id=element.id).first()
-    if assessment is None:
-        assessment = models.Assessment(
-            unit_id=unit.id,
-            element_id=element.id,
-            title=f"{unit.code} — {element.element_text}",
-            type="quiz",
-            experience_points=50,
-        )
-        db.add(assessment)
-        db.flush()
-    return assessment
-
-
-def _upsert_pc(
-    db: Session,
-    pc_data: dict,
-    element: models.UnitElement,
-    unit: models.Unit,
-) -> models.UnitPerformanceCriteria:
-    pc = (
-        db.query(models.UnitPerformanceCriteria)
-        .filter_by(element_id=element.id, pc_num=pc_data["code"])
-        .first()
-    )
-    if pc is None:
-        pc = models.UnitPerformanceCriteria(
-            element_id=element.id,
-            unit_id=unit.id,
-            pc_num=pc_data["code"],
-            pc_text=pc_data["text"],
-        )
-        db.add(pc)
-        db.flush()
-    return pc
+# Roles that may export class progress: admins and mentors (who manage teams)
+PROGRESS_EXPORT_ROLES = ("admin", "mentor")
 
 
 @router.post("/packs/import", dependencies=[Depends(JWTBearer())])
 def import_pack(payload: dict, db: Session = Depends(get_db)) -> PackImportResponse:
     """
     Import a question pack JSON. Upserts unit structure and questions.
-    All questions imported with review_status='draft', is_active=False.
+    New questions are imported with review_status='draft', is_active=False;
+    questions already imported are kept and ones dropped from the pack are
+    retired (see ``diff`` in the response).
+    Large packs should be uploaded to /packs/import/upload instead.
     """
     pack_data = payload.get("pack_data")
     if not pack_data:
         raise HTTPException(status_code=400, detail="pack_data required")
 
-    tp_code = pack_data.get("training_package", "UNKNOWN")
-    total_questions = 0
-
-    pack_record = models.QuestionPack(
-        training_package_code=tp_code,
-        source_url=pack_data.get("source_url", ""),
-        version=pack_data.get("generated_at", ""),
-        status="pending",
-    )
-    db.add(pack_record)
-    db.flush()
-
-    unit_count = 0
-    for unit_data in pack_data.get("units", []):
-        unit = _upsert_unit(db, unit_data)
-        unit_count += 1
-
-        for element_data in unit_data.get("elements", []):
-            element = _upsert_element(db, element_data, unit)
-            assessment = _upsert_assessment(db, element, unit)
-
-            pc_map = {}
-            for pc_data in element_data.get("performance_criteria", []):
-                pc = _upsert_pc(db, pc_data, element, unit)
-                pc_map[pc_data["code"]] = pc.id
-
-            for q_data in element_data.get("questions", []):
-                q = models.AssessmentQuestion(
-                    assessment_id=assessment.id,
-                    pc_id=pc_map.get(q_data.get("pc_code")),
-                    question_text=q_data["question_text"],
-                    question_type=q_data["question_type"],
-                    options=q_data.get("options", {}),
-                    source=q_data.get("source", "ai_generated"),
-                    review_status="draft",
-                    is_active=False,
-                )
-                db.add(q)
-                total_questions += 1
-
-    pack_record.question_count = total_questions
-    pack_record.status = "imported"
-    pack_record.imported_at = datetime.now(timezone.utc)
+    pack_record = create_pack_record(db, pack_data)
+    importer = PackImporter(db, pack_record)
+    importer.run(pack_data.get("units", []))
+    finish_pack(pack_record, importer)
     db.commit()
 
     return PackImportResponse(
         pack_id=pack_record.id,
-        training_package_code=tp_code,
-        unit_count=unit_count,
-        question_count=total_questions,
+        training_package_code=pack_record.training_package_code,
+        unit_count=importer.unit_count,
+        question_count=importer.question_count,
         status="imported",
+        diff=importer.diff,
     )
 
 
+@router.post("/packs/import/upload", dependencies=[Depends(JWTBearer())])
+def upload_pack(file: UploadFile, background_tasks: BackgroundTasks):
+    """
+    Import a question pack file in the background. The file is streamed to
+    disk and parsed unit by unit; poll /packs/import/jobs/{job_id} for progress.
+    """
+    fd, path = tempfile.mkstemp(prefix="pack-", suffix=".json")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            shutil.copyfileobj(file.file, out, UPLOAD_CHUNK_BYTES)
+        job = pack_import_manager.create_job(path)
+    except PackImportError as e:
+        os.remove(path)
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        os.remove(path)
+        raise
+
+    background_tasks.add_task(pack_import_manager.run_job, job["id"])
+    return job
+
+
+@router.get("/packs/import/jobs/{job_id}", dependencies=[Depends(JWTBearer())])
+def get_pack_import_job(job_id: str):
+    """Progress of a background pack import"""
+    job = pack_import_manager.get_job_status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
+
+
 @router.get("/questions", dependencies=[Depends(JWTBearer())])
 def list_questions(
     review_status: Optional[str] = Query(None),
@@ -213,48 +162,72 @@ def patch_question(
 
 
 @router.get("/progress", dependencies=[Depends(JWTBearer())])
+@query_budget(3)
 def get_class_progress(
     unit_id: int = Query(...),
+    student_ids: Optional[List[int]] = Query(None),
+    cursor: Optional[int] = Query(None),
+    limit: int = Query(100, ge=1, le=500),
     db: Session = Depends(get_db),
 ):
-    unit = db.query(models.Unit).filter_by(id=unit_id).first()
-    if not unit:
+    """
+    Element x student progress heatmap for a unit, optionally limited to a
+    class (``student_ids``). Students are paged by ``cursor``, the
+    ``next_cursor`` of the previous page.
+    """
+    heatmap = progress_heatmaps.get(db, unit_id, student_ids)
+    if heatmap is None:
         raise HTTPException(status_code=404, detail="Unit not found")
 
-    elements = (
-        db.query(models.UnitElement)
-        .filter_by(unit_id=unit_id)
-        .order_by(models.UnitElement.element_num)
-        .all()
+    students, next_cursor = page_students(heatmap, cursor, limit)
+    return {
+        "unit_id": unit_id,
+        "elements": heatmap["elements"],
+        "students": students,
+        "summary": heatmap["summary"],
+        "total_students": len(heatmap["students"]),
+        "next_cursor": next_cursor,
+    }
+
+
+def _csv_response(rows, name: str) -> StreamingResponse:
+    return StreamingResponse(
+        rows,
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{name}.csv"'},
     )
-    element_ids = [e.id for e in elements]
 
-    all_progress = (
-        db.query(models.UserElementProgress)
-        .filter(models.UserElementProgress.element_id.in_(element_ids))
-        .all()
+
+def _require_progress_export(token: str = Depends(JWTBearer())):
+    payload = decode_jwt(token) or {}
+    if payload.get("role") not in PROGRESS_EXPORT_ROLES:
+        raise HTTPException(
+            status_code=403, detail="Only admin and mentor users can export class progress"
+        )
+
+
+@router.get("/progress/export", dependencies=[Depends(_require_progress_export)])
+def export_class_progress(
+    unit_ids: Optional[List[int]] = Query(None),
+    student_ids: Optional[List[int]] = Query(None),
+):
+    """
+    Stream student x element progress as CSV, for all units unless
+    ``unit_ids`` is given, optionally limited to a class (``student_ids``).
+    """
+    return _csv_response(
+        stream_csv(progress_statement(unit_ids, student_ids), PROGRESS_COLUMNS),
+        "class-progress",
     )
 
-    students = {}
-    for p in all_progress:
-        if p.user_id not in students:
-            user = db.query(models.User).filter_by(id=p.user_id).first()
-            students[p.user_id] = {
-                "student_id": p.user_id,
-                "email": user.email if user else "",
-                "elements": {},
-            }
-        students[p.user_id]["elements"][p.element_id] = p.status
 
-    return {
-        "unit_id": unit_id,
-        "elements": [
-            {
-                "element_id": e.id,
-                "element_num": e.element_num,
-                "element_text": e.element_text,
-            }
-            for e in elements
-        ],
-        "students": list(students.values()),
-    }
+@router.get("/gaps/export", dependencies=[Depends(_require_progress_export)])
+def export_gap_map(
+    unit_ids: Optional[List[int]] = Query(None),
+    student_ids: Optional[List[int]] = Query(None),
+):
+    """Stream per-element pass and attempt counts (the gap map) as CSV"""
+    return _csv_response(
+        stream_csv(gap_statement(unit_ids, student_ids), GAP_COLUMNS),
+        "gap-map",
+    )
@@ -21,6 +21,9 @@ from models.schemas import (
     UnitProgressResponse,
     UnitQuizStateResponse,
 )
+from services.progress_heatmap import progress_heatmaps
+from services.metrics import QUIZ_ANSWERS, XP_AWARDED
+from services.query_detector import query_budget
 
 router = APIRouter(prefix="/api/quiz", tags=["quiz"])
 
@@ -125,12 +128,14 @@ def _award_xp(db: Session, user_id: int, points: int) -> None:
         db.add(profile)
         db.flush()
     profile.experience_points = (profile.experience_points or 0) + points
+    XP_AWARDED.labels("quiz").inc(points)
 
 
 # ── endpoints ─────────────────────────────────────────────────────────────────
 
 
 @router.get("/units/{unit_id}/quiz-state")
+@query_budget(4)
 def get_quiz_state(
     unit_id: int,
     db: Session = Depends(get_db),
@@ -146,13 +151,15 @@ def get_quiz_state(
         .order_by(models.UnitElement.element_num)
         .all()
     )
+    progress = {
+        prog.element_id: prog
+        for prog in db.query(models.UserElementProgress).filter_by(
+            user_id=current_user.id, unit_id=unit_id
+        )
+    }
     element_statuses: List[ElementStatusSchema] = []
     for el in elements:
-        prog = (
-            db.query(models.UserElementProgress)
-            .filter_by(user_id=current_user.id, element_id=el.id)
-            .first()
-        )
+        prog = progress.get(el.id)
         element_statuses.append(
             ElementStatusSchema(
                 element_id=el.id,
@@ -222,6 +229,7 @@ def submit_answer(
         )
 
     is_correct, explanation = grader(question.options or {}, payload.answer)
+    QUIZ_ANSWERS.labels("correct" if is_correct else "incorrect").inc()
 
     db.add(
         models.UserAnswer(
@@ -330,6 +338,8 @@ def submit_answer(
                         badge_awarded = badge.title
 
     db.commit()
+    if element_passed:
+        progress_heatmaps.invalidate(element.unit_id)
 
     return AnswerResponse(
         is_correct=is_correct,
@@ -9,7 +9,8 @@ This module provides endpoints for:
 - Bulk download and import functionality for admin users
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, status, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional, Sequence, Dict, Any
 from database import get_db
@@ -18,8 +19,10 @@ from models.schemas import TrainingPackageSchema
 from auth.auth_bearer import JWTBearer
 from auth.auth_handler import get_current_user
 import os
-from services.tga.client import TrainingGovClient
-from services.download_manager import download_manager
+from services.tga.client import TrainingGovClient, details_summary
+from services.download_manager import DownloadJobConflict, download_manager
+from services.component_store import upsert_component, upsert_components
+from services.component_index import component_index
 
 router = APIRouter(prefix="/api/training-packages", tags=["training packages"])
 
@@ -89,17 +92,14 @@ async def get_available_training_packages(
 
         tga_packages = result.get("components", [])
 
-        # Check which packages are already in our database
+        # Check which packages are already in our database (one lookup per page)
+        states = component_index.lookup(
+            db, models.TrainingPackage, [package["code"] for package in tga_packages]
+        )
         for package in tga_packages:
-            existing_package = (
-                db.query(models.TrainingPackage)
-                .filter(models.TrainingPackage.code == package["code"])
-                .first()
-            )
-            package["in_database"] = existing_package is not None
-            package["processed"] = (
-                existing_package.processed if existing_package else "N"
-            )
+            processed = states.get(package["code"])
+            package["in_database"] = processed is not None
+            package["processed"] = processed or "N"
 
         return {
             "packages": tga_packages,
@@ -119,10 +119,17 @@ async def get_available_training_packages(
 async def bulk_download_training_packages(
     package_codes: List[str],
     background_tasks: BackgroundTasks,
+    force: bool = Query(False),
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """Queue multiple training packages for bulk download (admin only)"""
+    """
+    Queue multiple training packages for bulk download (admin only).
+
+    Packages already pending in another active job are not queued twice, and
+    packages already processed at the current TGA release are skipped unless
+    ``force`` is set.
+    """
     # Check if user has admin permissions
     if not hasattr(current_user, "role") or current_user.role.name != "admin":
         raise HTTPException(
@@ -145,6 +152,7 @@ async def bulk_download_training_packages(
         job_id,
         package_codes,
         current_user.id,
+        force=force,
     )
 
     return {
@@ -172,6 +180,93 @@ async def get_download_status(
     return job_status
 
 
+@router.get("/download-status/{job_id}/summary", dependencies=[Depends(JWTBearer())])
+async def get_download_summary(
+    job_id: str,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=500),
+    result_status: Optional[str] = Query(None, description="Only results with this status"),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Get counters, progress and a page of results for a download job (admin only)"""
+    # Check if user has admin permissions
+    if not hasattr(current_user, "role") or current_user.role.name != "admin":
+        raise HTTPException(
+            status_code=403, detail="Only admin users can check download status"
+        )
+
+    summary = download_manager.job_summary(job_id, page, page_size, result_status)
+    if not summary:
+        raise HTTPException(status_code=404, detail="Download job not found")
+
+    return summary
+
+
+@router.get("/download-events/{job_id}", dependencies=[Depends(JWTBearer())])
+async def stream_download_events(
+    job_id: str,
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID"),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Stream download job events as Server-Sent Events (admin only)"""
+    # Check if user has admin permissions
+    if not hasattr(current_user, "role") or current_user.role.name != "admin":
+        raise HTTPException(
+            status_code=403, detail="Only admin users can check download status"
+        )
+
+    if not download_manager.get_job_status(job_id):
+        raise HTTPException(status_code=404, detail="Download job not found")
+
+    return StreamingResponse(
+        download_manager.stream_events(job_id, last_event_id or 0),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/download-resume/{job_id}", dependencies=[Depends(JWTBearer())])
+async def resume_download(
+    job_id: str,
+    background_tasks: BackgroundTasks,
+    force: bool = Query(False),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Resume a failed or interrupted training package download job from its checkpoints (admin only)"""
+    # Check if user has admin permissions
+    if not hasattr(current_user, "role") or current_user.role.name != "admin":
+        raise HTTPException(
+            status_code=403, detail="Only admin users can resume downloads"
+        )
+
+    job = download_manager.get_job_status(job_id) or download_manager.load_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Download job not found")
+    if job["type"] != "training_packages":
+        raise HTTPException(
+            status_code=400, detail="Not a training package download job"
+        )
+
+    try:
+        remaining = download_manager.resume_job(job_id)
+    except DownloadJobConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    background_tasks.add_task(
+        download_manager.process_training_package_download,
+        job_id,
+        remaining,
+        current_user.id,
+        force=force,
+    )
+
+    return {
+        "job_id": job_id,
+        "message": f"Resumed download with {len(remaining)} remaining training packages",
+        "status": "queued",
+    }
+
+
 @router.get("/{training_package_id}", response_model=TrainingPackageSchema)
 async def get_training_package(training_package_id: int, db: Session = Depends(get_db)):
     """Get a specific training package by ID"""
@@ -266,52 +361,8 @@ async def search_training_packages(
     )
     tga_packages = result.get("components", [])
 
-    # For any new packages from TGA, store them in our database
-    for package in tga_packages:
-        # Check if package already exists
-        existing_package = (
-            db.query(models.TrainingPackage)
-            .filter(models.TrainingPackage.code == package["code"])
-            .first()
-        )
-
-        if existing_package:
-            # Update existing package with clean dict approach
-            updates = {"processed": "N"}
-            if "title" in package and package.get("title") is not None:
-                updates["title"] = package["title"]
-            if "description" in package and package.get("description") is not None:
-                updates["description"] = package.get("description")
-            if "status" in package and package.get("status") is not None:
-                updates["status"] = package.get("status")
-            if "release_date" in package and package.get("release_date") is not None:
-                updates["release_date"] = package.get("release_date")
-            if "xml_file" in package and package.get("xml_file") is not None:
-                updates["xml_file"] = package.get("xml_file")
-
-            # Update using direct attribute assignment
-            for key, value in updates.items():
-                setattr(existing_package, key, value)
-        else:
-            # Create new package using dictionary and ** operator
-            new_package_data = {
-                "code": package["code"],
-                "title": package["title"],
-                "processed": "N",
-            }
-
-            if "description" in package and package.get("description") is not None:
-                new_package_data["description"] = package.get("description")
-            if "status" in package and package.get("status") is not None:
-                new_package_data["status"] = package.get("status")
-            if "release_date" in package and package.get("release_date") is not None:
-                new_package_data["release_date"] = package.get("release_date")
-            if "xml_file" in package and package.get("xml_file") is not None:
-                new_package_data["xml_file"] = package.get("xml_file")
-
-            new_package = models.TrainingPackage(**new_package_data)
-            db.add(new_package)
-
+    # Store or update all returned packages in one statement
+    upsert_components(db, models.TrainingPackage, tga_packages)
     db.commit()
 
     # Return combined results, ensuring no duplicates
@@ -345,81 +396,30 @@ async def sync_training_package(
         )
 
     client = TrainingGovClient(username=username, password=password)
-    package_data = client.get_component_details(package_code)
+    package_data = details_summary(client.get_component_details(package_code))
 
-    if not package_data or not isinstance(package_data, dict):
+    if not package_data:
         raise HTTPException(
             status_code=404, detail=f"Training package {package_code} not found in TGA"
         )
 
-    # Store or update package in database
-    package = (
-        db.query(models.TrainingPackage)
-        .filter(models.TrainingPackage.code == package_code)
-        .first()
-    )
-
-    if package:
-        # Update existing package - create a clean dict of valid updates
-        updates = {}
-        if "title" in package_data and package_data.get("title") is not None:
-            updates["title"] = package_data["title"]
-        if (
-            "description" in package_data
-            and package_data.get("description") is not None
-        ):
-            updates["description"] = package_data.get("description")
-        if "status" in package_data and package_data.get("status") is not None:
-            updates["status"] = package_data.get("status")
-        if (
-            "release_date" in package_data
-            and package_data.get("release_date") is not None
-        ):
-            updates["release_date"] = package_data.get("release_date")
-        if "xml_file" in package_data and package_data.get("xml_file") is not None:
-            updates["xml_file"] = package_data.get("xml_file")
-
-        updates["processed"] = "N"  # Mark for reprocessing
-
-        # Update using direct attribute assignment
-        for key, value in updates.items():
-            setattr(package, key, value)
-    else:
-        # Create new package with a clean dict approach
-        new_package_data = {
-            "code": package_data["code"],
-            "title": package_data["title"],
-            "processed": "N",
-        }
-
-        if (
-            "description" in package_data
-            and package_data.get("description") is not None
-        ):
-            new_package_data["description"] = package_data.get("description")
-        if "status" in package_data and package_data.get("status") is not None:
-            new_package_data["status"] = package_data.get("status")
-        if (
-            "release_date" in package_data
-            and package_data.get("release_date") is not None
-        ):
-            new_package_data["release_date"] = package_data.get("release_date")
-        if "xml_file" in package_data and package_data.get("xml_file") is not None:
-            new_package_data["xml_file"] = package_data.get("xml_file")
-
-        package = models.TrainingPackage(**new_package_data)
-        db.add(package)
-
+    # Store or update package in database (marked for reprocessing)
+    package = upsert_component(db, models.TrainingPackage, package_data)
     db.commit()
     db.refresh(package)
 
-    # Build background task to sync units, qualifications, and skillsets
-    def process_package_components(package_id):
-        # Implemented in a separate task to avoid this endpoint from timing out
-        pass
-
-    # Add background task
-    background_tasks.add_task(process_package_components, package.id)
+    # Sync units, qualifications and skillsets as a download job so it is
+    # tracked, checkpointed and streamed like bulk downloads
+    job_id = download_manager.create_job(
+        "training_packages", [package_code], current_user.id
+    )
+    background_tasks.add_task(
+        download_manager.process_training_package_download,
+        job_id,
+        [package_code],
+        current_user.id,
+        force=True,
+    )
 
     # Get package_id safely
     package_id = None
@@ -438,6 +438,7 @@ async def sync_training_package(
     return {
         "message": f"Training package {package_code} sync started",
         "package_id": package_id,
+        "job_id": job_id,
     }
 
 
@@ -10,8 +10,9 @@ This module provides endpoints for:
 - Integration with TGA for comprehensive unit data population
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks, status
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, BackgroundTasks, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional, Sequence, Dict, Any
 from database import get_db, SessionLocal
@@ -27,8 +28,14 @@ import os
 from sqlalchemy import text
 from auth.auth_bearer import JWTBearer
 from auth.auth_handler import get_current_user
-from services.tga.client import TrainingGovClient
-from services.download_manager import download_manager
+from services.tga.client import TrainingGovClient, details_summary
+from services.download_manager import DownloadJobConflict, download_manager
+from services.bulk_writer import write_unit_content_orm, unit_content_from_parsed
+from services.component_store import upsert_component, upsert_components
+from services.component_index import component_index
+from services.query_detector import query_budget
+from services.tga.xml_parser import parse_unit_xml
+from services.unit_documents import get_unit_document, unit_etag, etag_matches
 
 router = APIRouter(prefix="/api/units", tags=["units"])
 
@@ -57,6 +64,7 @@ async def list_units(
 
 
 @router.get("/available", dependencies=[Depends(JWTBearer())])
+@query_budget(3)
 async def get_available_units(
     page: int = Query(1, ge=1),
     page_size: int = Query(50, le=200),
@@ -105,13 +113,14 @@ async def get_available_units(
 
         tga_units = result.get("components", [])
 
-        # Check which units are already in our database
+        # Check which units are already in our database (one lookup per page)
+        states = component_index.lookup(
+            db, models.Unit, [unit["code"] for unit in tga_units]
+        )
         for unit in tga_units:
-            existing_unit = (
-                db.query(models.Unit).filter(models.Unit.code == unit["code"]).first()
-            )
-            unit["in_database"] = existing_unit is not None
-            unit["processed"] = existing_unit.processed if existing_unit else "N"
+            processed = states.get(unit["code"])
+            unit["in_database"] = processed is not None
+            unit["processed"] = processed or "N"
 
         return {
             "units": tga_units,
@@ -131,10 +140,17 @@ async def get_available_units(
 async def bulk_download_units(
     unit_codes: List[str],
     background_tasks: BackgroundTasks,
+    force: bool = Query(False),
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """Queue multiple units for bulk download with comprehensive data population (admin only)"""
+    """
+    Queue multiple units for bulk download with comprehensive data population (admin only).
+
+    Units already pending in another active job are not queued twice, and
+    units already processed at the current TGA release are skipped unless
+    ``force`` is set.
+    """
     # Check if user has admin permissions
     if not hasattr(current_user, "role") or current_user.role.name != "admin":
         raise HTTPException(
@@ -149,7 +165,11 @@ async def bulk_download_units(
 
     # Start background processing
     background_tasks.add_task(
-        download_manager.process_units_download, job_id, unit_codes, current_user.id
+        download_manager.process_units_download,
+        job_id,
+        unit_codes,
+        current_user.id,
+        force=force,
     )
 
     return {
@@ -177,6 +197,91 @@ async def get_units_download_status(
     return job_status
 
 
+@router.get("/download-status/{job_id}/summary", dependencies=[Depends(JWTBearer())])
+async def get_units_download_summary(
+    job_id: str,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=500),
+    result_status: Optional[str] = Query(None, description="Only results with this status"),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Get counters, progress and a page of results for a units download job (admin only)"""
+    # Check if user has admin permissions
+    if not hasattr(current_user, "role") or current_user.role.name != "admin":
+        raise HTTPException(
+            status_code=403, detail="Only admin users can check download status"
+        )
+
+    summary = download_manager.job_summary(job_id, page, page_size, result_status)
+    if not summary:
+        raise HTTPException(status_code=404, detail="Download job not found")
+
+    return summary
+
+
+@router.get("/download-events/{job_id}", dependencies=[Depends(JWTBearer())])
+async def stream_units_download_events(
+    job_id: str,
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID"),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Stream units download job events as Server-Sent Events (admin only)"""
+    # Check if user has admin permissions
+    if not hasattr(current_user, "role") or current_user.role.name != "admin":
+        raise HTTPException(
+            status_code=403, detail="Only admin users can check download status"
+        )
+
+    if not download_manager.get_job_status(job_id):
+        raise HTTPException(status_code=404, detail="Download job not found")
+
+    return StreamingResponse(
+        download_manager.stream_events(job_id, last_event_id or 0),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/download-resume/{job_id}", dependencies=[Depends(JWTBearer())])
+async def resume_units_download(
+    job_id: str,
+    background_tasks: BackgroundTasks,
+    force: bool = Query(False),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Resume a failed or interrupted units download job from its checkpoints (admin only)"""
+    # Check if user has admin permissions
+    if not hasattr(current_user, "role") or current_user.role.name != "admin":
+        raise HTTPException(
+            status_code=403, detail="Only admin users can resume downloads"
+        )
+
+    job = download_manager.get_job_status(job_id) or download_manager.load_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Download job not found")
+    if job["type"] != "units":
+        raise HTTPException(status_code=400, detail="Not a units download job")
+
+    try:
+        remaining = download_manager.resume_job(job_id)
+    except DownloadJobConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    background_tasks.add_task(
+        download_manager.process_units_download,
+        job_id,
+        remaining,
+        current_user.id,
+        force=force,
+    )
+
+    return {
+        "job_id": job_id,
+        "message": f"Resumed download with {len(remaining)} remaining units",
+        "status": "queued",
+    }
+
+
 @router.get("/{unit_id}", response_model=UnitSchema)
 async def get_unit(unit_id: int, db: Session = Depends(get_db)):
     """Get a specific unit by ID"""
@@ -254,125 +359,74 @@ async def get_unit_required_skills(unit_id: int, db: Session = Depends(get_db)):
     )
 
 
+def _document_response(
+    unit: models.Unit, body: Dict[str, Any], if_none_match: Optional[str], variant: str
+):
+    """Serve a unit document body with its ETag, or 304 if the client has it"""
+    etag = unit_etag(unit, variant)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return JSONResponse(content=jsonable_encoder(body), headers=headers)
+
+
 @router.get("/{unit_id}/elements-with-pc")
 async def get_unit_elements_with_performance_criteria(
-    unit_id: int, db: Session = Depends(get_db)
+    unit_id: int,
+    db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
 ):
     """Get all elements with performance criteria for a unit"""
-    # Check if unit exists
     unit = db.query(models.Unit).filter(models.Unit.id == unit_id).first()
     if not unit:
         raise HTTPException(status_code=404, detail="Unit not found")
 
-    # Get elements
-    elements = (
-        db.query(models.UnitElement)
-        .filter(models.UnitElement.unit_id == unit_id)
-        .order_by(models.UnitElement.element_num)
-        .all()
-    )
-
-    # Convert to dicts and add performance criteria
-    result_elements = []
-    for element in elements:
-        element_dict = {
-            "id": element.id,
-            "element_num": element.element_num,
-            "element_text": element.element_text,
-        }
-
-        # Get performance criteria for this element
-        pcs = (
-            db.query(models.UnitPerformanceCriteria)
-            .filter(models.UnitPerformanceCriteria.element_id == element.id)
-            .order_by(models.UnitPerformanceCriteria.pc_num)
-            .all()
-        )
-
-        element_dict["performance_criteria"] = [
-            {"id": pc.id, "pc_num": pc.pc_num, "pc_text": pc.pc_text} for pc in pcs
-        ]
+    document = get_unit_document(db, unit)
 
-        result_elements.append(element_dict)
-
-    return {
-        "unit": {"id": unit.id, "code": unit.code, "title": unit.title},
-        "elements": result_elements,
-    }
+    return _document_response(
+        unit,
+        {
+            "unit": {"id": unit.id, "code": unit.code, "title": unit.title},
+            "elements": document["elements"],
+        },
+        if_none_match,
+        "elements-with-pc",
+    )
 
 
 @router.get("/{unit_id}/comprehensive")
-async def get_unit_comprehensive(unit_id: int, db: Session = Depends(get_db)):
+async def get_unit_comprehensive(
+    unit_id: int,
+    db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
+):
     """Get comprehensive unit data including elements, performance criteria, and related information"""
     unit = db.query(models.Unit).filter(models.Unit.id == unit_id).first()
     if not unit:
         raise HTTPException(status_code=404, detail="Unit not found")
 
-    # Get elements with their performance criteria
-    elements = (
-        db.query(models.UnitElement)
-        .filter(models.UnitElement.unit_id == unit_id)
-        .order_by(models.UnitElement.element_num)
-        .all()
-    )
-
-    elements_data = []
-    for element in elements:
-        performance_criteria = (
-            db.query(models.UnitPerformanceCriteria)
-            .filter(models.UnitPerformanceCriteria.element_id == element.id)
-            .order_by(models.UnitPerformanceCriteria.pc_num)
-            .all()
-        )
-
-        elements_data.append(
-            {
-                "id": element.id,
-                "element_num": element.element_num,
-                "element_text": element.element_text,
-                "performance_criteria": [
-                    {"id": pc.id, "pc_num": pc.pc_num, "pc_text": pc.pc_text}
-                    for pc in performance_criteria
-                ],
-            }
-        )
-
-    # Get critical aspects (when implemented)
-    critical_aspects = (
-        db.query(models.UnitCriticalAspects)
-        .filter(models.UnitCriticalAspects.unit_id == unit_id)
-        .all()
-        if hasattr(models, "UnitCriticalAspects")
-        else []
-    )
-
-    # Get required skills (when implemented)
-    required_skills = (
-        db.query(models.UnitRequiredSkills)
-        .filter(models.UnitRequiredSkills.unit_id == unit_id)
-        .all()
-        if hasattr(models, "UnitRequiredSkills")
-        else []
-    )
+    # Elements, PCs, critical aspects and required skills are precomputed at sync time
+    document = get_unit_document(db, unit)
 
-    return {
-        "unit": {
-            "id": unit.id,
-            "code": unit.code,
-            "title": unit.title,
-            "description": unit.description,
-            "status": unit.status,
-            "release_date": unit.release_date,
-            "processed": unit.processed,
+    return _document_response(
+        unit,
+        {
+            "unit": {
+                "id": unit.id,
+                "code": unit.code,
+                "title": unit.title,
+                "description": unit.description,
+                "status": unit.status,
+                "release_date": unit.release_date,
+                "processed": unit.processed,
+            },
+            "elements": document["elements"],
+            "critical_aspects": document["critical_aspects"],
+            "required_skills": document["required_skills"],
         },
-        "elements": elements_data,
-        "critical_aspects": [
-            {"id": ca.id, "aspect_text": ca.aspect_text} for ca in critical_aspects
-        ],
-        "required_skills": [
-            {"id": rs.id, "skill_text": rs.skill_text} for rs in required_skills
-        ],
-    }
+        if_none_match,
+        "comprehensive",
+    )
 
 
 @router.post("/search")
@@ -457,50 +511,8 @@ async def search_units(
     )
     tga_units = result.get("components", [])
 
-    # For any new units from TGA, store them in our database
-    for unit in tga_units:
-        # Check if unit already exists
-        existing_unit = (
-            db.query(models.Unit).filter(models.Unit.code == unit["code"]).first()
-        )
-
-        if existing_unit:
-            # Update existing unit with clean dict approach
-            updates = {"processed": "N"}
-            if "title" in unit and unit.get("title") is not None:
-                updates["title"] = unit["title"]
-            if "description" in unit and unit.get("description") is not None:
-                updates["description"] = unit.get("description")
-            if "status" in unit and unit.get("status") is not None:
-                updates["status"] = unit.get("status")
-            if "release_date" in unit and unit.get("release_date") is not None:
-                updates["release_date"] = unit.get("release_date")
-            if "xml_file" in unit and unit.get("xml_file") is not None:
-                updates["xml_file"] = unit.get("xml_file")
-
-            # Update using direct attribute assignment
-            for key, value in updates.items():
-                setattr(existing_unit, key, value)
-        else:
-            # Create new unit using dictionary and ** operator
-            new_unit_data = {
-                "code": unit["code"],
-                "title": unit["title"],
-                "processed": "N",
-            }
-
-            if "description" in unit and unit.get("description") is not None:
-                new_unit_data["description"] = unit.get("description")
-            if "status" in unit and unit.get("status") is not None:
-                new_unit_data["status"] = unit.get("status")
-            if "release_date" in unit and unit.get("release_date") is not None:
-                new_unit_data["release_date"] = unit.get("release_date")
-            if "xml_file" in unit and unit.get("xml_file") is not None:
-                new_unit_data["xml_file"] = unit.get("xml_file")
-
-            new_unit = models.Unit(**new_unit_data)
-            db.add(new_unit)
-
+    # Store or update all returned units in one statement
+    upsert_components(db, models.Unit, tga_units)
     db.commit()
 
     # Return combined results, ensuring no duplicates
@@ -532,55 +544,15 @@ async def sync_unit(
         )
 
     client = TrainingGovClient(username=username, password=password)
-    unit_data = client.get_component_details(unit_code)
+    unit_data = details_summary(client.get_component_details(unit_code))
 
-    if not unit_data or not isinstance(unit_data, dict):
+    if not unit_data:
         raise HTTPException(
             status_code=404, detail=f"Unit {unit_code} not found in TGA"
         )
 
-    # Store or update unit in database using ORM
-    unit = db.query(models.Unit).filter(models.Unit.code == unit_code).first()
-
-    if unit:
-        # Update existing unit with query.update approach
-        updates = {
-            "title": unit_data["title"],
-            "processed": "N",  # Mark for reprocessing
-        }
-
-        if "description" in unit_data and unit_data.get("description") is not None:
-            updates["description"] = unit_data.get("description")
-        if "status" in unit_data and unit_data.get("status") is not None:
-            updates["status"] = unit_data.get("status")
-        if "release_date" in unit_data and unit_data.get("release_date") is not None:
-            updates["release_date"] = unit_data.get("release_date")
-        if "xml_file" in unit_data and unit_data.get("xml_file") is not None:
-            updates["xml_file"] = unit_data.get("xml_file")
-
-        # Apply the updates using direct attribute assignment
-        for key, value in updates.items():
-            setattr(unit, key, value)
-    else:
-        # Create new unit with dictionary approach
-        new_unit_data = {
-            "code": unit_data["code"],
-            "title": unit_data["title"],
-            "processed": "N",
-        }
-
-        if "description" in unit_data and unit_data.get("description") is not None:
-            new_unit_data["description"] = unit_data.get("description")
-        if "status" in unit_data and unit_data.get("status") is not None:
-            new_unit_data["status"] = unit_data.get("status")
-        if "release_date" in unit_data and unit_data.get("release_date") is not None:
-            new_unit_data["release_date"] = unit_data.get("release_date")
-        if "xml_file" in unit_data and unit_data.get("xml_file") is not None:
-            new_unit_data["xml_file"] = unit_data.get("xml_file")
-
-        unit = models.Unit(**new_unit_data)
-        db.add(unit)
-
+    # Store or update unit in database (marked for reprocessing)
+    unit = upsert_component(db, models.Unit, unit_data)
     db.commit()
     db.refresh(unit)
 
@@ -589,62 +561,25 @@ async def sync_unit(
         # Create a new session for the background task
         session = SessionLocal()
         try:
-            # Get elements from TGA
-            elements_data = client.get_component_xml(unit_code)
-
-            if elements_data and isinstance(elements_data, dict):
-                elements = elements_data.get("elements", [])
-                if not elements:
-                    return
-
-                # Clear existing elements using ORM
-                # First, delete performance criteria
-                session.query(models.UnitPerformanceCriteria).filter(
-                    models.UnitPerformanceCriteria.unit_id == unit_id
-                ).delete()
-
-                # Then delete elements
-                session.query(models.UnitElement).filter(
-                    models.UnitElement.unit_id == unit_id
-                ).delete()
-
-                session.commit()
-
-                # Insert new elements
-                for element_data in elements:
-                    if not isinstance(element_data, dict):
-                        continue
-
-                    # Create element
-                    element = models.UnitElement(
-                        unit_id=unit_id,
-                        element_num=str(element_data.get("number", "")),
-                        element_text=str(element_data.get("text", "")),
-                    )
-                    session.add(element)
-                    session.flush()  # Flush to get the ID
-
-                    # Insert performance criteria
-                    for pc_data in element_data.get("performance_criteria", []):
-                        if not isinstance(pc_data, dict):
-                            continue
-
-                        pc = models.UnitPerformanceCriteria(
-                            element_id=element.id,
-                            unit_id=unit_id,
-                            pc_num=str(pc_data.get("number", "")),
-                            pc_text=str(pc_data.get("text", "")),
-                        )
-                        session.add(pc)
-
-                # Mark unit as processed
-                unit = (
-                    session.query(models.Unit).filter(models.Unit.id == unit_id).first()
-                )
-                if unit:
-                    setattr(unit, "processed", "Y")
-
-                session.commit()
+            # Get unit XML from TGA and parse each document once
+            xml_data = client.get_component_xml(unit_code)
+            if not xml_data or not xml_data.get("xml"):
+                return
+
+            parsed = [parse_unit_xml(xml_data["xml"])]
+            if xml_data.get("assessment_xml"):
+                parsed.append(parse_unit_xml(xml_data["assessment_xml"]))
+
+            # Merge elements/PCs, replace critical aspects and required skills
+            write_unit_content_orm(session, [unit_content_from_parsed(unit_id, *parsed)])
+
+            # Mark unit as processed
+            session.query(models.Unit).filter(models.Unit.id == unit_id).update(
+                {"processed": "Y"}, synchronize_session=False
+            )
+
+            session.commit()
+            component_index.update(models.Unit, {unit_code: "Y"})
         except Exception as e:
             session.rollback()
             print(f"Error processing elements: {str(e)}")
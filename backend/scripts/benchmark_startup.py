@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Startup time benchmark for the API
+
+Starts the application in fresh interpreters, the way a new worker does, and
+times each phase: importing ``main``, running the lifespan startup, and
+serving a first request (GET /) through the full middleware stack. No database
+connection is made. Reports the median and worst run per phase and the heavy
+optional modules (zeep, requests, BeautifulSoup, psycopg2) that got loaded,
+which should be none until a TGA feature or the database is used. Exits
+non-zero when the median time to first response exceeds ``--budget`` seconds.
+
+With --imports N the slowest N modules of one run are listed from
+``python -X importtime``.
+
+Usage:
+    python scripts/benchmark_startup.py [--runs 5] [--budget 1.0] [--imports 15] [--json]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import statistics
+import subprocess
+
+# Make the backend package importable when run as a script
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+HEAVY_MODULES = ('zeep', 'requests', 'bs4', 'psycopg2')
+PHASES = ('import_s', 'lifespan_s', 'first_request_s', 'ready_s', 'process_s')
+
+# Runs in the fresh interpreter; the result is the last line of its stdout
+PROBE = """
+import sys, json, time, asyncio
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+import database
+engine_at_import = database._engine is not None
+heavy_at_import = [m for m in HEAVY if m in sys.modules]
+
+REQUEST = {
+    'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+    'scheme': 'http', 'path': '/', 'raw_path': b'/', 'query_string': b'', 'root_path': '',
+    'headers': [(b'host', b'startup')], 'client': ('127.0.0.1', 50000), 'server': ('startup', 80),
+}
+
+async def serve():
+    # A bare ASGI call, so no HTTP client import is timed
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    async with main.app.router.lifespan_context(main.app):
+        ready = time.perf_counter()
+        await main.app(REQUEST, receive, send)
+        return ready, time.perf_counter(), messages[0]['status']
+
+ready, served, status = asyncio.run(serve())
+print(json.dumps({
+    'import_s': imported - started,
+    'lifespan_s': ready - imported,
+    'first_request_s': served - ready,
+    'ready_s': served - started,
+    'status': status,
+    'engine_at_import': engine_at_import,
+    'heavy_at_import': heavy_at_import,
+}))
+"""
+
+
+def run_once(env=None):
+    """Start the app in a new interpreter and return its phase timings"""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-c', f"HEAVY = {HEAVY_MODULES!r}\n{PROBE}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings['process_s'] = time.perf_counter() - started
+    return timings
+
+
+def slowest_imports(count, env=None):
+    """The ``count`` modules with the most self time while importing main"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main'],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        modules.append({'module': name.strip(), 'self_ms': int(own) / 1000,
+                        'cumulative_ms': int(cumulative) / 1000})
+    return sorted(modules, key=lambda module: module['self_ms'], reverse=True)[:count]
+
+
+def summarize(runs):
+    summary = {}
+    for phase in PHASES:
+        values = [run[phase] for run in runs]
+        summary[phase] = {
+            'median': round(statistics.median(values), 3),
+            'max': round(max(values), 3),
+        }
+    summary['heavy_at_import'] = sorted({m for run in runs for m in run['heavy_at_import']})
+    summary['engine_at_import'] = any(run['engine_at_import'] for run in runs)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark API worker startup time')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to start')
+    parser.add_argument('--budget', type=float, default=1.0, help='Allowed median seconds to first response')
+    parser.add_argument('--imports', type=int, default=0, help='List the N slowest imports')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    # Importing the app must not need the TGA service or a database
+    env.setdefault('ENVIRONMENT', 'test')
+
+    # The first run warms the bytecode cache and is not counted
+    run_once(env)
+    runs = [run_once(env) for _ in range(args.runs)]
+    results = summarize(runs)
+    results['budget_s'] = args.budget
+    if args.imports:
+        results['slowest_imports'] = slowest_imports(args.imports, env)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for phase in PHASES:
+            logger.info(f"{phase}: median {results[phase]['median']}s, max {results[phase]['max']}s")
+        for module in results.get('slowest_imports', []):
+            logger.info(f"{module['self_ms']:.1f}ms {module['module']} ({module['cumulative_ms']:.1f}ms cumulative)")
+    if results['heavy_at_import']:
+        logger.warning(f"Loaded at import: {', '.join(results['heavy_at_import'])}")
+    if results['engine_at_import']:
+        logger.warning("The database engine was created at import")
+
+    if results['ready_s']['median'] > args.budget:
+        logger.error(f"Startup {results['ready_s']['median']}s exceeds the {args.budget}s budget")
+        return 1
+    logger.info(f"Startup {results['ready_s']['median']}s within the {args.budget}s budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
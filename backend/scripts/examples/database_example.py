@@ -50,11 +50,11 @@ def example_query_units():
                 logger.info("Querying units with elements...")
                 cur.execute("""
                     SELECT 
-                        u.id, u.code, u.title, u.elements_json,
+                        u.id, u.code, u.title, u.content_json,
                         (SELECT COUNT(*) FROM unit_elements ue WHERE ue.unit_id = u.id) as element_count,
                         (SELECT COUNT(*) FROM unit_performance_criteria upc WHERE upc.unit_id = u.id) as pc_count
                     FROM units u
-                    WHERE u.elements_json IS NOT NULL
+                    WHERE u.content_json IS NOT NULL
                     ORDER BY u.code
                     LIMIT 5
                 """)
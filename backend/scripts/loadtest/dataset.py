@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Synthetic dataset generator
+
+Fills the configured database with a catalog and a student body at
+realistic volumes for benchmarks and index tuning: training packages,
+units, elements, performance criteria, quiz assessments and questions, then
+users with profiles, element progress and quiz answers. The ``full``
+profile is about the size of the current TGA catalog with 100k students,
+which gives ~1.8M ``user_element_progress`` and ~11M ``user_answers`` rows.
+
+Rows are generated in Python and sent with COPY (services.bulk_writer.copy_rows)
+in chunks, with explicit ids so foreign keys are known without reading
+anything back; sequences are moved past the generated ids at the end. The
+content is fully determined by ``--seed`` and the profile: ids are offset
+by what the tables already hold, nothing else depends on the database.
+
+All codes start with ``--prefix`` and all emails end in
+``@synthetic.invalid``, so ``--cleanup`` removes the dataset again.
+
+Usage:
+    python scripts/loadtest/dataset.py --profile medium [--seed 42] [--analyze]
+    python scripts/loadtest/dataset.py --profile small --users 2000
+    python scripts/loadtest/dataset.py --cleanup
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import logging
+import argparse
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+
+# Make the backend package importable when run as a script
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, BACKEND_DIR)
+from services.bulk_writer import copy_rows
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREFIX = 'SYN'
+EMAIL_DOMAIN = 'synthetic.invalid'
+DEFAULT_PASSWORD = 'synthetic-password'
+STUDENT_ROLE = 'student'
+CHOICES = 4
+# Rows per COPY statement; bounds the memory used for one buffer
+CHUNK_ROWS = 100_000
+# Timestamps are spread over the year before this date, not before now()
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+PROFILES = {
+    'small': {
+        'packages': 3, 'units_per_package': 20, 'elements_per_unit': 4, 'pcs_per_element': 3,
+        'questions_per_element': 3, 'users': 500, 'units_per_user': 2,
+    },
+    'medium': {
+        'packages': 20, 'units_per_package': 100, 'elements_per_unit': 4, 'pcs_per_element': 4,
+        'questions_per_element': 3, 'users': 10_000, 'units_per_user': 4,
+    },
+    'full': {
+        'packages': 80, 'units_per_package': 250, 'elements_per_unit': 4, 'pcs_per_element': 4,
+        'questions_per_element': 3, 'users': 100_000, 'units_per_user': 5,
+    },
+}
+
+# user_answers.answer of each choice
+ANSWERS = tuple(json.dumps({'selected': choice}) for choice in range(CHOICES))
+
+# Element progress outcomes and their weights
+PROGRESS_STATUSES = (('passed', 60), ('in_progress', 30), ('not_started', 10))
+
+COLUMNS = {
+    'training_packages': ('id', 'code', 'title', 'status', 'processed', 'visible'),
+    'units': ('id', 'code', 'training_package_id', 'title', 'status', 'processed', 'experience_points'),
+    'unit_elements': ('id', 'unit_id', 'element_num', 'element_text'),
+    'unit_performance_criteria': ('id', 'element_id', 'unit_id', 'pc_num', 'pc_text'),
+    'assessments': ('id', 'unit_id', 'element_id', 'title', 'type', 'experience_points'),
+    'assessment_questions': (
+        'id', 'assessment_id', 'pc_id', 'question_text', 'question_type', 'options',
+        'source', 'review_status', 'is_active',
+    ),
+    'users': ('id', 'email', 'password_hash', 'first_name', 'last_name', 'role_id', 'is_active'),
+    'user_profiles': ('user_id', 'experience_points', 'level'),
+    'user_element_progress': (
+        'user_id', 'element_id', 'unit_id', 'status', 'attempts', 'xp_awarded', 'passed_at',
+    ),
+    'user_answers': ('user_id', 'question_id', 'session_id', 'answer', 'is_correct', 'answered_at'),
+}
+
+# Tables given explicit ids, whose sequences are moved afterwards
+ID_TABLES = (
+    'training_packages', 'units', 'unit_elements', 'unit_performance_criteria',
+    'assessments', 'assessment_questions', 'users',
+)
+
+WORDS = (
+    'apply', 'workplace', 'safety', 'procedures', 'manage', 'customer', 'service', 'prepare',
+    'documents', 'operate', 'equipment', 'develop', 'plans', 'monitor', 'quality', 'records',
+    'communicate', 'team', 'identify', 'hazards', 'maintain', 'systems', 'review', 'reports',
+)
+
+
+class Dataset:
+    """Row generators of one profile, with ids starting after ``bases``"""
+
+    def __init__(self, profile, seed=42, prefix=DEFAULT_PREFIX, bases=None, role_id=None,
+                 password_hash=''):
+        self.profile = profile
+        self.seed = seed
+        self.prefix = prefix
+        self.bases = {table: 0 for table in ID_TABLES}
+        self.bases.update(bases or {})
+        self.role_id = role_id
+        self.password_hash = password_hash
+        self.units = profile['packages'] * profile['units_per_package']
+        self.elements = self.units * profile['elements_per_unit']
+        self.questions_per_element = profile['questions_per_element']
+        self._correct = None
+
+    def _rng(self, stream):
+        return random.Random(f"{self.seed}-{stream}")
+
+    @staticmethod
+    def _sentence(rng, words):
+        return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+    def unit_id(self, unit):
+        return self.bases['units'] + unit + 1
+
+    def element_id(self, element):
+        return self.bases['unit_elements'] + element + 1
+
+    def question_id(self, element, number):
+        return self.bases['assessment_questions'] + element * self.questions_per_element + number + 1
+
+    def training_packages(self):
+        for package in range(self.profile['packages']):
+            yield (self.bases['training_packages'] + package + 1, f"{self.prefix}{package:03d}",
+                   f"Synthetic training package {package}", 'Current', 'Y', True)
+
+    def units_rows(self):
+        rng = self._rng('units')
+        per_package = self.profile['units_per_package']
+        for unit in range(self.units):
+            package = unit // per_package
+            yield (self.unit_id(unit), f"{self.prefix}{package:03d}U{unit % per_package:04d}",
+                   self.bases['training_packages'] + package + 1,
+                   self._sentence(rng, 5), 'Current', 'Y', 100)
+
+    def unit_elements(self):
+        rng = self._rng('elements')
+        per_unit = self.profile['elements_per_unit']
+        for element in range(self.elements):
+            yield (self.element_id(element), self.unit_id(element // per_unit),
+                   str(element % per_unit + 1), self._sentence(rng, 6))
+
+    def unit_performance_criteria(self):
+        rng = self._rng('pcs')
+        per_element = self.profile['pcs_per_element']
+        per_unit = self.profile['elements_per_unit']
+        for element in range(self.elements):
+            for number in range(per_element):
+                yield (self.bases['unit_performance_criteria'] + element * per_element + number + 1,
+                       self.element_id(element), self.unit_id(element // per_unit),
+                       f"{element % per_unit + 1}.{number + 1}", self._sentence(rng, 10))
+
+    def assessments(self):
+        per_unit = self.profile['elements_per_unit']
+        for element in range(self.elements):
+            yield (self.bases['assessments'] + element + 1, self.unit_id(element // per_unit),
+                   self.element_id(element), f"Element {element % per_unit + 1} quiz", 'quiz', 50)
+
+    def correct_choice(self, element, number):
+        """The correct option of a question, shared by the questions and the answers"""
+        if self._correct is None:
+            rng = self._rng('correct')
+            self._correct = bytes(
+                rng.randrange(CHOICES) for _ in range(self.elements * self.questions_per_element)
+            )
+        return self._correct[element * self.questions_per_element + number]
+
+    def assessment_questions(self):
+        rng = self._rng('questions')
+        per_element = self.profile['pcs_per_element']
+        for element in range(self.elements):
+            for number in range(self.questions_per_element):
+                pc = number % per_element if per_element else None
+                options = {
+                    'choices': [self._sentence(rng, 3) for _ in range(CHOICES)],
+                    'correct': self.correct_choice(element, number),
+                    'explanation': self._sentence(rng, 8),
+                }
+                yield (self.question_id(element, number), self.bases['assessments'] + element + 1,
+                       self.bases['unit_performance_criteria'] + element * per_element + pc + 1
+                       if pc is not None else None,
+                       self._sentence(rng, 9) + '?', 'mcq', json.dumps(options),
+                       'ai_generated', 'approved', True)
+
+    def user_id(self, user):
+        return self.bases['users'] + user + 1
+
+    def users(self):
+        for user in range(self.profile['users']):
+            yield (self.user_id(user), f"student{user:06d}@{EMAIL_DOMAIN}", self.password_hash,
+                   'Synthetic', f"Student {user}", self.role_id, True)
+
+    def student_activity(self, users):
+        """Profiles, element progress and answers of some users, as three row lists"""
+        per_unit = self.profile['elements_per_unit']
+        statuses = [status for status, _ in PROGRESS_STATUSES]
+        weights = [weight for _, weight in PROGRESS_STATUSES]
+        profiles, progress, answers = [], [], []
+        for user in users:
+            rng = random.Random(f"{self.seed}-user-{user}")
+            user_id = self.user_id(user)
+            xp = 0
+            units = rng.sample(range(self.units), min(self.profile['units_per_user'], self.units))
+            for unit in units:
+                for element in range(unit * per_unit, (unit + 1) * per_unit):
+                    status = rng.choices(statuses, weights)[0]
+                    if status == 'not_started':
+                        continue
+                    attempts = rng.randint(1, 3)
+                    answered = EPOCH - timedelta(seconds=rng.randrange(365 * 86400))
+                    for attempt in range(attempts):
+                        session_id = str(uuid.UUID(int=(user_id << 64) | (element << 16) | attempt))
+                        # Only the last attempt of a passed element is all correct
+                        passing = status == 'passed' and attempt == attempts - 1
+                        for number in range(self.questions_per_element):
+                            correct = self.correct_choice(element, number)
+                            is_correct = passing or rng.random() < 0.6
+                            selected = correct if is_correct else (correct + 1) % CHOICES
+                            answered += timedelta(seconds=rng.randint(5, 90))
+                            answers.append((user_id, self.question_id(element, number), session_id,
+                                            ANSWERS[selected], is_correct,
+                                            answered.isoformat()))
+                    passed = status == 'passed'
+                    xp += 50 if passed else 0
+                    progress.append((user_id, self.element_id(element), self.unit_id(unit), status,
+                                     attempts, 50 if passed else None,
+                                     answered.isoformat() if passed else None))
+            profiles.append((user_id, xp, 1 + xp // 1000))
+        return profiles, progress, answers
+
+
+def _chunks(rows, size=None):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size or CHUNK_ROWS))
+        if not chunk:
+            return
+        yield chunk
+
+
+def copy_table(cursor, table, rows):
+    """COPY generated rows into a table chunk by chunk"""
+    return sum(copy_rows(cursor, table, COLUMNS[table], chunk) for chunk in _chunks(rows))
+
+
+def _id_bases(cursor):
+    bases = {}
+    for table in ID_TABLES:
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+        bases[table] = cursor.fetchone()[0]
+    return bases
+
+
+def _student_role_id(cursor):
+    cursor.execute("SELECT id FROM roles WHERE name = %s", (STUDENT_ROLE,))
+    row = cursor.fetchone()
+    if row:
+        return row[0]
+    cursor.execute(
+        "INSERT INTO roles (name, description) VALUES (%s, 'Student') RETURNING id", (STUDENT_ROLE,)
+    )
+    return cursor.fetchone()[0]
+
+
+def generate(conn, profile, seed=42, prefix=DEFAULT_PREFIX, password=DEFAULT_PASSWORD,
+             user_chunk=2000, analyze=False):
+    """Generate the dataset; returns rows and seconds per table"""
+    from auth.auth_handler import get_password_hash
+
+    results = {}
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SET synchronous_commit = off")
+        dataset = Dataset(
+            profile, seed, prefix, bases=_id_bases(cursor), role_id=_student_role_id(cursor),
+            # bcrypt is deliberately slow: every student shares one hash
+            password_hash=get_password_hash(password),
+        )
+
+        catalog = (
+            ('training_packages', dataset.training_packages),
+            ('units', dataset.units_rows),
+            ('unit_elements', dataset.unit_elements),
+            ('unit_performance_criteria', dataset.unit_performance_criteria),
+            ('assessments', dataset.assessments),
+            ('assessment_questions', dataset.assessment_questions),
+            ('users', dataset.users),
+        )
+        for table, rows in catalog:
+            started = time.perf_counter()
+            count = copy_table(cursor, table, rows())
+            conn.commit()
+            results[table] = {'rows': count, 'seconds': round(time.perf_counter() - started, 2)}
+            logger.info(f"{table}: {count} rows in {results[table]['seconds']}s")
+
+        activity = ('user_profiles', 'user_element_progress', 'user_answers')
+        totals = {table: {'rows': 0, 'seconds': 0.0} for table in activity}
+        for start in range(0, profile['users'], user_chunk):
+            users = range(start, min(start + user_chunk, profile['users']))
+            for table, rows in zip(activity, dataset.student_activity(users)):
+                started = time.perf_counter()
+                totals[table]['rows'] += copy_table(cursor, table, rows)
+                totals[table]['seconds'] += time.perf_counter() - started
+            conn.commit()
+            logger.info(f"Students {users.stop}/{profile['users']}: "
+                        f"{totals['user_answers']['rows']} answers so far")
+        for table, total in totals.items():
+            results[table] = {'rows': total['rows'], 'seconds': round(total['seconds'], 2)}
+
+        for table in ID_TABLES:
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"(SELECT MAX(id) FROM {table}))"
+            )
+        conn.commit()
+
+        if analyze:
+            started = time.perf_counter()
+            conn.autocommit = True
+            for table in COLUMNS:
+                cursor.execute(f"ANALYZE {table}")
+            conn.autocommit = False
+            logger.info(f"Analyzed in {time.perf_counter() - started:.1f}s")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return results
+
+
+CLEANUP_SQL = """
+DELETE FROM user_answers WHERE user_id IN (SELECT id FROM users WHERE email LIKE %(emails)s);
+DELETE FROM user_element_progress WHERE user_id IN (SELECT id FROM users WHERE email LIKE %(emails)s);
+DELETE FROM user_badges WHERE user_id IN (SELECT id FROM users WHERE email LIKE %(emails)s);
+DELETE FROM user_profiles WHERE user_id IN (SELECT id FROM users WHERE email LIKE %(emails)s);
+DELETE FROM users WHERE email LIKE %(emails)s;
+DELETE FROM assessment_questions WHERE assessment_id IN (
+    SELECT a.id FROM assessments a JOIN units u ON u.id = a.unit_id WHERE u.code LIKE %(codes)s
+);
+DELETE FROM assessments WHERE unit_id IN (SELECT id FROM units WHERE code LIKE %(codes)s);
+DELETE FROM unit_performance_criteria WHERE unit_id IN (SELECT id FROM units WHERE code LIKE %(codes)s);
+DELETE FROM unit_elements WHERE unit_id IN (SELECT id FROM units WHERE code LIKE %(codes)s);
+DELETE FROM units WHERE code LIKE %(codes)s;
+DELETE FROM training_packages WHERE code LIKE %(codes)s;
+"""
+
+
+def cleanup(conn, prefix=DEFAULT_PREFIX):
+    """Delete a generated dataset"""
+    with conn.cursor() as cursor:
+        cursor.execute(CLEANUP_SQL, {'emails': f"%@{EMAIL_DOMAIN}", 'codes': f"{prefix}%"})
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic catalog and student dataset')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='small', help='Size profile')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--prefix', default=DEFAULT_PREFIX, help='Code prefix of generated rows')
+    for key in PROFILES['small']:
+        parser.add_argument(f"--{key.replace('_', '-')}", type=int, help=f"Override the profile's {key}")
+    parser.add_argument('--analyze', action='store_true', help='ANALYZE the tables afterwards')
+    parser.add_argument('--cleanup', action='store_true', help='Delete a generated dataset instead')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    from database import engine
+
+    conn = engine.raw_connection()
+    try:
+        if args.cleanup:
+            started = time.perf_counter()
+            cleanup(conn, args.prefix)
+            logger.info(f"Deleted the {args.prefix} dataset in {time.perf_counter() - started:.1f}s")
+            return 0
+
+        profile = dict(PROFILES[args.profile])
+        for key in profile:
+            if getattr(args, key) is not None:
+                profile[key] = getattr(args, key)
+        started = time.perf_counter()
+        results = generate(conn, profile, args.seed, args.prefix, analyze=args.analyze)
+        elapsed = time.perf_counter() - started
+    finally:
+        conn.close()
+
+    rows = sum(result['rows'] for result in results.values())
+    if args.json:
+        print(json.dumps({'profile': profile, 'tables': results, 'seconds': round(elapsed, 1)}, indent=2))
+    else:
+        logger.info(f"Generated {rows} rows in {elapsed:.1f}s ({rows / elapsed:.0f} rows/sec)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Load test of the student quiz flow
+
+Seeds students and units (scripts/loadtest/seed.py), then drives the API
+with one asyncio virtual user per student, each repeating:
+
+    login -> quiz-state -> element questions -> answers -> unit progress
+
+over the seeded units until ``--duration`` seconds or ``--iterations`` passes.
+Answers are correct with probability ``--accuracy`` using the manifest's
+answer key. Latency percentiles (p50/p95/p99), throughput and errors are
+reported per endpoint. With a baseline file (``--save-baseline`` writes one
+from the current run) the run fails when an endpoint's p95 or throughput
+regresses by more than ``--tolerance``.
+
+The API must already be running against the same database as the seeder,
+e.g. ``uvicorn main:app --workers 4``. Seeded data is removed afterwards
+unless ``--keep`` is given or an existing ``--manifest`` is used.
+
+Usage:
+    python scripts/loadtest/quiz_flow.py --students 50 --units 5 --duration 60
+    python scripts/loadtest/quiz_flow.py --manifest loadtest-manifest.json --save-baseline
+"""
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import random
+import asyncio
+import logging
+import argparse
+from collections import defaultdict
+
+import httpx
+
+# Make the backend package importable when run as a script
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, BACKEND_DIR)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Latency changes smaller than this are noise, whatever the tolerance
+MIN_REGRESSION_MS = 5.0
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return None
+    rank = math.ceil(q * len(values))
+    return values[min(max(rank, 1), len(values)) - 1]
+
+
+class LatencyRecorder:
+    """Latencies and errors per endpoint"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, endpoint, seconds, ok=True):
+        self.latencies[endpoint].append(seconds)
+        if not ok:
+            self.errors[endpoint] += 1
+
+    def report(self, elapsed):
+        """Per endpoint stats in milliseconds and requests per second"""
+        endpoints = {}
+        everything = []
+        for endpoint in sorted(self.latencies):
+            values = sorted(self.latencies[endpoint])
+            everything.extend(values)
+            endpoints[endpoint] = self._stats(values, self.errors[endpoint], elapsed)
+        everything.sort()
+        return {
+            'elapsed_seconds': round(elapsed, 2),
+            'total': self._stats(everything, sum(self.errors.values()), elapsed),
+            'endpoints': endpoints,
+        }
+
+    @staticmethod
+    def _stats(values, errors, elapsed):
+        def ms(value):
+            return round(value * 1000, 2) if value is not None else None
+
+        return {
+            'requests': len(values),
+            'errors': errors,
+            'rps': round(len(values) / elapsed, 2) if elapsed else None,
+            'mean_ms': ms(sum(values) / len(values)) if values else None,
+            'p50_ms': ms(percentile(values, 0.50)),
+            'p95_ms': ms(percentile(values, 0.95)),
+            'p99_ms': ms(percentile(values, 0.99)),
+            'max_ms': ms(values[-1]) if values else None,
+        }
+
+
+def compare_to_baseline(report, baseline, tolerance=0.2):
+    """Regressions of a report against a baseline report, as messages"""
+    regressions = []
+    for endpoint, base in baseline['endpoints'].items():
+        current = report['endpoints'].get(endpoint)
+        if current is None or not current['requests']:
+            regressions.append(f"{endpoint}: no requests (baseline {base['requests']})")
+            continue
+        if base['p95_ms'] is not None:
+            allowed = base['p95_ms'] + max(base['p95_ms'] * tolerance, MIN_REGRESSION_MS)
+            if current['p95_ms'] > allowed:
+                regressions.append(
+                    f"{endpoint}: p95 {current['p95_ms']}ms > {allowed:.1f}ms "
+                    f"(baseline {base['p95_ms']}ms)"
+                )
+        if base['rps'] and current['rps'] < base['rps'] * (1 - tolerance):
+            regressions.append(
+                f"{endpoint}: {current['rps']} req/s < {base['rps'] * (1 - tolerance):.1f} "
+                f"(baseline {base['rps']})"
+            )
+        base_error_rate = base['errors'] / base['requests'] if base['requests'] else 0
+        error_rate = current['errors'] / current['requests']
+        if error_rate > base_error_rate + 0.01:
+            regressions.append(
+                f"{endpoint}: error rate {error_rate:.1%} (baseline {base_error_rate:.1%})"
+            )
+    return regressions
+
+
+class VirtualStudent:
+    """One student working through the seeded units"""
+
+    def __init__(self, client, recorder, email, password, units, accuracy, rng):
+        self.client = client
+        self.recorder = recorder
+        self.email = email
+        self.password = password
+        self.units = units
+        self.accuracy = accuracy
+        self.rng = rng
+        self.headers = {}
+
+    async def request(self, endpoint, method, url, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=self.headers, **kwargs)
+            ok = response.status_code < 400
+        except httpx.HTTPError as e:
+            logger.debug(f"{endpoint} failed: {e}")
+            response, ok = None, False
+        self.recorder.record(endpoint, time.perf_counter() - started, ok)
+        return response if ok else None
+
+    async def login(self):
+        self.headers = {}
+        response = await self.request(
+            'POST /auth/login', 'POST', '/auth/login',
+            data={'username': self.email, 'password': self.password},
+        )
+        if response is None:
+            return False
+        self.headers = {'Authorization': f"Bearer {response.json()['access_token']}"}
+        return True
+
+    async def work_unit(self, unit):
+        unit_id = unit['id']
+        await self.request(
+            'GET /api/quiz/units/{unit_id}/quiz-state', 'GET', f"/api/quiz/units/{unit_id}/quiz-state"
+        )
+        for element in unit['elements']:
+            response = await self.request(
+                'GET /api/quiz/elements/{element_id}/questions', 'GET',
+                f"/api/quiz/elements/{element['id']}/questions",
+            )
+            if response is None:
+                continue
+            session_id = str(uuid.uuid4())
+            for question in response.json():
+                correct = element['answers'].get(str(question['id']), 0)
+                choices = len(question['options'].get('choices', [])) or 1
+                selected = correct if self.rng.random() < self.accuracy else (correct + 1) % choices
+                await self.request(
+                    'POST /api/quiz/answer', 'POST', '/api/quiz/answer',
+                    json={
+                        'question_id': question['id'],
+                        'element_id': element['id'],
+                        'session_id': session_id,
+                        'answer': {'selected': selected},
+                    },
+                )
+        await self.request(
+            'GET /api/quiz/units/{unit_id}/progress', 'GET', f"/api/quiz/units/{unit_id}/progress"
+        )
+
+    async def run(self, deadline, iterations):
+        passes = 0
+        while time.monotonic() < deadline and (iterations is None or passes < iterations):
+            if not await self.login():
+                await asyncio.sleep(0.5)
+                passes += 1
+                continue
+            for unit in self.rng.sample(self.units, len(self.units)):
+                if time.monotonic() >= deadline:
+                    break
+                await self.work_unit(unit)
+            passes += 1
+
+
+async def run_load(base_url, manifest, concurrency, duration, iterations, accuracy, seed_value,
+                   transport=None):
+    """Drive the quiz flow and return the report"""
+    recorder = LatencyRecorder()
+    students = manifest['students'][:concurrency] if concurrency else manifest['students']
+    limits = httpx.Limits(max_connections=len(students), max_keepalive_connections=len(students))
+    deadline = time.monotonic() + duration
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30,
+                                 transport=transport) as client:
+        users = [
+            VirtualStudent(client, recorder, email, manifest['password'], manifest['units'],
+                           accuracy, random.Random(f"{seed_value}-{email}"))
+            for email in students
+        ]
+        started = time.perf_counter()
+        await asyncio.gather(*(user.run(deadline, iterations) for user in users))
+        elapsed = time.perf_counter() - started
+    report = recorder.report(elapsed)
+    report['students'] = len(students)
+    return report
+
+
+def print_report(report):
+    logger.info(
+        f"{report['total']['requests']} requests in {report['elapsed_seconds']}s "
+        f"from {report['students']} students: {report['total']['rps']} req/s, "
+        f"{report['total']['errors']} errors"
+    )
+    for endpoint, stats in report['endpoints'].items():
+        logger.info(
+            f"{endpoint}: {stats['requests']} requests, {stats['rps']} req/s, "
+            f"p50 {stats['p50_ms']}ms, p95 {stats['p95_ms']}ms, p99 {stats['p99_ms']}ms, "
+            f"{stats['errors']} errors"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the student quiz flow')
+    parser.add_argument('--base-url', default='http://localhost:8000', help='API base URL')
+    parser.add_argument('--manifest', help='Use data seeded earlier instead of seeding')
+    parser.add_argument('--students', type=int, default=20, help='Students to seed')
+    parser.add_argument('--units', type=int, default=3, help='Units to seed')
+    parser.add_argument('--elements', type=int, default=4, help='Elements per unit')
+    parser.add_argument('--questions', type=int, default=3, help='Questions per element')
+    parser.add_argument('--concurrency', type=int, help='Virtual students (default: all)')
+    parser.add_argument('--duration', type=float, default=60, help='Seconds to run')
+    parser.add_argument('--iterations', type=int, help='Passes over the units per student')
+    parser.add_argument('--accuracy', type=float, default=0.8, help='Share of correct answers')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--keep', action='store_true', help='Keep the seeded data')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline report file')
+    parser.add_argument('--save-baseline', action='store_true', help='Write this run as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed regression (0.2 = 20%%)')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+
+    from database import SessionLocal
+    from scripts.loadtest.seed import cleanup, seed
+
+    seeded = args.manifest is None
+    if seeded:
+        db = SessionLocal()
+        try:
+            manifest = seed(db, args.students, args.units, args.elements, args.questions,
+                            seed_value=args.seed)
+        finally:
+            db.close()
+    else:
+        with open(args.manifest) as f:
+            manifest = json.load(f)
+
+    try:
+        report = asyncio.run(run_load(
+            args.base_url, manifest, args.concurrency, args.duration, args.iterations,
+            args.accuracy, args.seed,
+        ))
+    finally:
+        if seeded and not args.keep:
+            db = SessionLocal()
+            try:
+                cleanup(db, manifest['prefix'])
+            finally:
+                db.close()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        logger.info(f"No baseline at {args.baseline}; run with --save-baseline to store one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare_to_baseline(report, baseline, args.tolerance)
+    for regression in regressions:
+        logger.error(f"Regression: {regression}")
+    if regressions:
+        return 1
+    logger.info(f"No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Load test data for the student quiz flow
+
+Seeds students and units with elements, quiz assessments and approved MCQ
+questions into the configured database, and writes a manifest the load test
+driver reads: student logins, unit and element ids, and the correct choice of
+every question (the API never returns it). Everything is named with a prefix
+so ``--cleanup`` removes it, including the answers, progress and badges the
+load test created. Generation is deterministic for a given ``--seed``.
+
+Usage:
+    python scripts/loadtest/seed.py --students 50 --units 5 [--out manifest.json]
+    python scripts/loadtest/seed.py --cleanup [--prefix LOADTEST]
+"""
+import os
+import sys
+import json
+import random
+import logging
+import argparse
+
+from sqlalchemy import delete, insert, select
+
+# Make the backend package importable when run as a script
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, BACKEND_DIR)
+from database import SessionLocal
+import models.tables as models
+from auth.auth_handler import get_password_hash
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREFIX = 'LOADTEST'
+DEFAULT_PASSWORD = 'loadtest-password'
+STUDENT_ROLE = 'student'
+CHOICES = 4
+
+
+def student_email(prefix, number):
+    return f"{prefix.lower()}-student-{number:05d}@loadtest.invalid"
+
+
+def unit_code(prefix, number):
+    return f"{prefix}{number:04d}"
+
+
+def _student_role_id(db):
+    role_id = db.execute(select(models.Role.id).where(models.Role.name == STUDENT_ROLE)).scalar()
+    if role_id is None:
+        role_id = db.execute(
+            insert(models.Role).values(name=STUDENT_ROLE, description='Student').returning(models.Role.id)
+        ).scalar()
+    return role_id
+
+
+def seed(db, students, units, elements, questions, prefix=DEFAULT_PREFIX,
+         password=DEFAULT_PASSWORD, seed_value=42):
+    """Insert the load test data and return its manifest"""
+    rng = random.Random(seed_value)
+    # bcrypt is deliberately slow: every student shares one hash
+    password_hash = get_password_hash(password)
+    role_id = _student_role_id(db)
+
+    user_ids = db.execute(
+        insert(models.User).returning(models.User.id, models.User.email),
+        [
+            {
+                'email': student_email(prefix, number),
+                'password_hash': password_hash,
+                'first_name': 'Load',
+                'last_name': f"Student {number}",
+                'role_id': role_id,
+                'is_active': True,
+            }
+            for number in range(students)
+        ],
+    ).all()
+    db.execute(
+        insert(models.UserProfile),
+        [{'user_id': user_id, 'experience_points': 0, 'level': 1} for user_id, _ in user_ids],
+    )
+
+    unit_rows = db.execute(
+        insert(models.Unit).returning(models.Unit.id, models.Unit.code),
+        [
+            {
+                'code': unit_code(prefix, number),
+                'title': f"Load test unit {number}",
+                'experience_points': 100,
+                'processed': 'Y',
+            }
+            for number in range(units)
+        ],
+    ).all()
+
+    element_rows = db.execute(
+        insert(models.UnitElement).returning(
+            models.UnitElement.id, models.UnitElement.unit_id, models.UnitElement.element_num
+        ),
+        [
+            {'unit_id': unit_id, 'element_num': f"{number + 1:02d}",
+             'element_text': f"Load test element {number + 1} of {code}"}
+            for unit_id, code in unit_rows
+            for number in range(elements)
+        ],
+    ).all()
+
+    assessment_rows = db.execute(
+        insert(models.Assessment).returning(models.Assessment.id, models.Assessment.element_id),
+        [
+            {'unit_id': unit_id, 'element_id': element_id, 'title': f"Element {element_num} quiz",
+             'type': 'quiz', 'experience_points': 50}
+            for element_id, unit_id, element_num in element_rows
+        ],
+    ).all()
+
+    question_rows = []
+    for assessment_id, element_id in assessment_rows:
+        for number in range(questions):
+            question_rows.append({
+                'assessment_id': assessment_id,
+                'question_text': f"Load test question {number + 1} for element {element_id}?",
+                'question_type': 'mcq',
+                'options': {
+                    'choices': [f"Option {choice + 1}" for choice in range(CHOICES)],
+                    'correct': rng.randrange(CHOICES),
+                    'explanation': 'Seeded by the load test.',
+                },
+                'source': 'teacher',
+                'review_status': 'approved',
+                'is_active': True,
+            })
+    question_ids = db.execute(
+        insert(models.AssessmentQuestion).returning(models.AssessmentQuestion.id),
+        question_rows,
+    ).scalars().all()
+    db.commit()
+
+    element_questions = {}
+    assessment_elements = dict(assessment_rows)
+    for question_id, row in zip(question_ids, question_rows):
+        element_questions.setdefault(assessment_elements[row['assessment_id']], {})[
+            str(question_id)
+        ] = row['options']['correct']
+
+    manifest = {
+        'prefix': prefix,
+        'password': password,
+        'students': [email for _, email in user_ids],
+        'units': [
+            {
+                'id': unit_id,
+                'code': code,
+                'elements': [
+                    {'id': element_id, 'answers': element_questions.get(element_id, {})}
+                    for element_id, element_unit_id, _ in element_rows
+                    if element_unit_id == unit_id
+                ],
+            }
+            for unit_id, code in unit_rows
+        ],
+    }
+    logger.info(
+        f"Seeded {students} students, {units} units, {len(element_rows)} elements "
+        f"and {len(question_ids)} questions (prefix {prefix})"
+    )
+    return manifest
+
+
+def cleanup(db, prefix=DEFAULT_PREFIX):
+    """Delete everything seeded with ``prefix`` and what the load test wrote for it"""
+    user_ids = select(models.User.id).where(
+        models.User.email.like(f"{prefix.lower()}-student-%@loadtest.invalid")
+    ).scalar_subquery()
+    unit_ids = select(models.Unit.id).where(models.Unit.code.like(f"{prefix}%")).scalar_subquery()
+    assessment_ids = select(models.Assessment.id).where(
+        models.Assessment.unit_id.in_(unit_ids)
+    ).scalar_subquery()
+
+    statements = [
+        delete(models.UserAnswer).where(models.UserAnswer.user_id.in_(user_ids)),
+        delete(models.UserElementProgress).where(models.UserElementProgress.user_id.in_(user_ids)),
+        delete(models.UserBadge).where(models.UserBadge.user_id.in_(user_ids)),
+        delete(models.UserProfile).where(models.UserProfile.user_id.in_(user_ids)),
+        delete(models.User).where(models.User.id.in_(user_ids)),
+        delete(models.AssessmentQuestion).where(
+            models.AssessmentQuestion.assessment_id.in_(assessment_ids)
+        ),
+        delete(models.Assessment).where(models.Assessment.unit_id.in_(unit_ids)),
+        delete(models.UnitElement).where(models.UnitElement.unit_id.in_(unit_ids)),
+        delete(models.Unit).where(models.Unit.code.like(f"{prefix}%")),
+    ]
+    deleted = 0
+    for statement in statements:
+        deleted += db.execute(statement).rowcount
+    db.commit()
+    logger.info(f"Deleted {deleted} load test rows (prefix {prefix})")
+    return deleted
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed or remove load test data for the quiz flow')
+    parser.add_argument('--students', type=int, default=50, help='Students to create')
+    parser.add_argument('--units', type=int, default=5, help='Units to create')
+    parser.add_argument('--elements', type=int, default=4, help='Elements per unit')
+    parser.add_argument('--questions', type=int, default=3, help='Questions per element')
+    parser.add_argument('--prefix', default=DEFAULT_PREFIX, help='Unit code and email prefix')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--out', default='loadtest-manifest.json', help='Manifest file to write')
+    parser.add_argument('--cleanup', action='store_true', help='Delete the seeded data instead')
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.cleanup:
+            cleanup(db, args.prefix)
+            return 0
+        manifest = seed(db, args.students, args.units, args.elements, args.questions,
+                        args.prefix, seed_value=args.seed)
+    finally:
+        db.close()
+
+    with open(args.out, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    logger.info(f"Manifest written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
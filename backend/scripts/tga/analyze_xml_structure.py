@@ -3,14 +3,15 @@
 Helper script for analyzing XML files in a directory
 
 This script finds all XML files in a directory, analyzes their structure,
-and prints information about elements and performance criteria.
+and prints information about elements, performance criteria and evidence.
 """
 import os
 import sys
-import re
 import logging
-from pathlib import Path
-from bs4 import BeautifulSoup
+
+# Make the backend package importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from services.tga.xml_parser import parse_unit_xml
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -43,44 +44,39 @@ def analyze_xml_files(xml_dir):
             with open(file_path, 'r', encoding='utf-8') as f:
                 xml_content = f.read()
             
-            # Parse with BeautifulSoup
-            soup = BeautifulSoup(xml_content, 'lxml')
+            parsed = parse_unit_xml(xml_content)
             
-            # Find tables
-            tables = soup.find_all('table')
+            # Tables
+            tables = parsed["tables"]
             logger.info(f"Found {len(tables)} tables")
             
-            # Analyze each table
             for i, table in enumerate(tables):
-                rows = table.find_all('tr')
-                if not rows:
+                if not table["rows"]:
                     continue
                 
-                logger.info(f"\nTable {i+1}: {len(rows)} rows")
-                
-                # Analyze first row to detect headers
-                header_row = rows[0]
-                header_cells = header_row.find_all('td')
-                
-                if header_cells:
-                    header_texts = [cell.get_text().strip() for cell in header_cells]
-                    logger.info(f"Headers: {' | '.join(header_texts)}")
-                    
-                    # Check if this looks like an elements table
-                    is_elements_table = False
-                    for j, header in enumerate(header_texts):
-                        if "element" in header.lower() or "elements" == header.lower():
-                            is_elements_table = True
-                            logger.info(f"This appears to be an elements table (Element column: {j+1})")
-                            break
-                    
-                    if is_elements_table:
-                        # Analyze a few data rows
-                        for j, row in enumerate(rows[1:5]):  # Look at first few data rows
-                            cells = row.find_all('td')
-                            if cells:
-                                cell_texts = [cell.get_text().strip() for cell in cells]
-                                logger.info(f"Row {j+2}: {' | '.join(cell_texts[:4])}")  # First 4 cells
+                logger.info(f"\nTable {i+1}: {table['rows']} rows")
+                if table["headers"]:
+                    logger.info(f"Headers: {' | '.join(table['headers'])}")
+            
+            # Elements and performance criteria
+            elements = parsed["elements"]
+            pc_count = sum(len(element["performance_criteria"]) for element in elements)
+            logger.info(f"Found {len(elements)} elements with {pc_count} performance criteria")
+            for element in elements[:4]:  # First few elements
+                logger.info(
+                    f"Element {element['number']}: {element['text']} "
+                    f"({len(element['performance_criteria'])} PCs)"
+                )
+            
+            # Evidence and assessment sections
+            for section in (
+                "foundation_skills",
+                "performance_evidence",
+                "knowledge_evidence",
+                "assessment_conditions",
+            ):
+                if parsed[section]:
+                    logger.info(f"{section.replace('_', ' ').title()}: {len(parsed[section])} items")
         
         except Exception as e:
             logger.error(f"Error analyzing {filename}: {e}")
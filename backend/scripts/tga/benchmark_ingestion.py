@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+End-to-end ingestion benchmark over a local corpus of unit XML files
+
+Runs each unit in a directory through the TGA ingestion pipeline with the
+SOAP service stubbed out, so no network access is needed:
+
+    fetch  TrainingGovClient.get_component_xml against an in-memory
+           GetDetails stub and a requests adapter serving the XML files
+    parse  TrainingGovClient.extract_elements and tp_get.parse_elements_and_pcs
+    store  tp_get.store_elements_and_pcs inside a transaction that is rolled
+           back, so the database is left unchanged
+
+Reports files/sec, peak RSS, DB statements per unit and the time spent in
+each phase. Units missing from the database are inserted inside the same
+rolled-back transaction. With --no-store only fetch and parse run and no
+database is needed.
+
+Usage:
+    python scripts/tga/benchmark_ingestion.py [xml_dir] [--tp-code BSB] [--repeat 3] [--json]
+    python scripts/tga/benchmark_ingestion.py tests/fixtures/tga --no-store
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import resource
+from types import SimpleNamespace
+
+import requests
+from requests.adapters import BaseAdapter
+
+# Make the backend package importable when run as a script
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, BACKEND_DIR)
+from zeep.transports import Transport
+from services.tga.client import TrainingGovClient
+from services.tga.resilience import operation_timeouts
+from scripts.tga.tp_get import (
+    DB_PARAMS, find_unit_xml_files, parse_elements_and_pcs, store_elements_and_pcs,
+)
+from scripts.tga.benchmark_writer import CountingCursor
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIRS = [
+    os.path.join(os.path.dirname(BACKEND_DIR), 'tgaWebServiceKit-2021-12-01', 'xml'),
+    os.path.join(BACKEND_DIR, 'tests', 'fixtures', 'tga'),
+]
+
+STUB_XML_BASE = 'http://tga.invalid/TrainingComponentFiles/'
+PHASES = ('fetch', 'parse', 'store')
+
+
+def load_corpus(xml_dir, tp_code=None):
+    """Unit codes and the contents of every XML file, read up front"""
+    units = find_unit_xml_files(xml_dir, tp_code)
+    files = {}
+    for filename in sorted(os.listdir(xml_dir)):
+        if filename.endswith('.xml'):
+            with open(os.path.join(xml_dir, filename), 'rb') as f:
+                files[filename] = f.read()
+    return units, files
+
+
+class StubTrainingComponentService:
+    """GetDetails answering from the corpus file names, like the SOAP service"""
+
+    def __init__(self, files):
+        self.releases = {}
+        for filename in files:
+            prefix, _, rest = filename.partition('_')
+            if prefix in ('Unit', 'AssessmentRequirements'):
+                self.releases.setdefault(rest.split('_')[0], []).append(filename)
+
+    def GetDetails(self, request):
+        filenames = self.releases.get(request['Code'])
+        if not filenames:
+            return SimpleNamespace(GetDetailsResult=None)
+        release = SimpleNamespace(
+            Files=SimpleNamespace(ReleaseFile=[SimpleNamespace(Filename=name) for name in filenames])
+        )
+        return SimpleNamespace(
+            GetDetailsResult=SimpleNamespace(Releases=SimpleNamespace(Release=[release]))
+        )
+
+
+class CorpusAdapter(BaseAdapter):
+    """requests transport adapter serving TrainingComponentFiles/ from memory"""
+
+    def __init__(self, files, base_url=STUB_XML_BASE):
+        super().__init__()
+        self.files = files
+        self.base_url = base_url
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        content = self.files.get(request.url[len(self.base_url):])
+        response.status_code = 200 if content is not None else 404
+        response._content = content if content is not None else b''
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def stub_client(files):
+    """A TrainingGovClient whose SOAP service and downloads are served from ``files``"""
+    client = TrainingGovClient.__new__(TrainingGovClient)
+    client.xml_base_url = STUB_XML_BASE
+    client.timeouts = operation_timeouts()
+    client.session = requests.Session()
+    client.session.mount(STUB_XML_BASE, CorpusAdapter(files))
+    client.transport = Transport(session=client.session)
+    client.client = SimpleNamespace(service=StubTrainingComponentService(files))
+    return client
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def resolve_unit_ids(cursor, units):
+    """Unit ids by code, inserting units the database does not have yet"""
+    codes = sorted({code for _, code in units})
+    cursor.execute("SELECT code, id FROM units WHERE code = ANY(%s)", (codes,))
+    unit_ids = dict(cursor.fetchall())
+    for code in codes:
+        if code not in unit_ids:
+            cursor.execute(
+                "INSERT INTO units (code, title) VALUES (%s, %s) RETURNING id",
+                (code, f"Benchmark unit {code}")
+            )
+            unit_ids[code] = cursor.fetchone()[0]
+    return unit_ids
+
+
+def run(client, units, repeat=1, conn=None):
+    """Ingest every unit ``repeat`` times and return the measurements"""
+    phases = dict.fromkeys(PHASES, 0.0)
+    counts = {'files': 0, 'elements': 0, 'fetch_failures': 0, 'parse_failures': 0,
+              'store_failures': 0, 'statements': 0}
+    cursor = unit_ids = None
+    if conn is not None:
+        unit_ids = resolve_unit_ids(conn.cursor(), units)
+        cursor = CountingCursor(conn.cursor())
+
+    started = time.perf_counter()
+    try:
+        for _ in range(repeat):
+            for _, code in units:
+                mark = time.perf_counter()
+                try:
+                    xml = client.get_component_xml(code)['xml']
+                except Exception as e:
+                    logger.warning(f"Fetch failed for {code}: {e}")
+                    counts['fetch_failures'] += 1
+                    continue
+                finally:
+                    phases['fetch'] += time.perf_counter() - mark
+                counts['files'] += 1
+
+                mark = time.perf_counter()
+                try:
+                    client.extract_elements(xml)
+                except Exception as e:
+                    logger.warning(f"extract_elements failed for {code}: {e}")
+                elements = parse_elements_and_pcs(xml)
+                phases['parse'] += time.perf_counter() - mark
+                if not elements:
+                    counts['parse_failures'] += 1
+                    continue
+                counts['elements'] += len(elements)
+
+                if cursor is not None:
+                    mark = time.perf_counter()
+                    if not store_elements_and_pcs(cursor, unit_ids[code], elements):
+                        counts['store_failures'] += 1
+                    phases['store'] += time.perf_counter() - mark
+        elapsed = time.perf_counter() - started
+    finally:
+        if conn is not None:
+            conn.rollback()
+            cursor.close()
+
+    stored = counts['files'] - counts['parse_failures'] if cursor is not None else 0
+    counts['statements'] = cursor.statements if cursor is not None else 0
+    return {
+        **counts,
+        'seconds': round(elapsed, 4),
+        'files_per_sec': round(counts['files'] / elapsed, 1) if elapsed else None,
+        'statements_per_unit': round(counts['statements'] / stored, 1) if stored else None,
+        'peak_rss_mb': peak_rss_mb(),
+        'phases': {
+            name: {
+                'seconds': round(seconds, 4),
+                'share': round(seconds / elapsed, 3) if elapsed else None,
+            }
+            for name, seconds in phases.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark TGA unit ingestion with a stubbed SOAP service')
+    parser.add_argument('xml_dir', nargs='?', help='Directory of unit XML files')
+    parser.add_argument('--tp-code', help='Only units of this training package')
+    parser.add_argument('--repeat', type=int, default=1, help='Passes over the corpus')
+    parser.add_argument('--no-store', action='store_true', help='Skip the database phase')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    xml_dir = args.xml_dir or next((d for d in DEFAULT_DIRS if os.path.isdir(d)), None)
+    if not xml_dir or not os.path.isdir(xml_dir):
+        logger.error(f"Directory not found: {xml_dir}")
+        return 1
+
+    units, files = load_corpus(xml_dir, args.tp_code)
+    if not units:
+        logger.error(f"No unit XML files in {xml_dir}")
+        return 1
+    client = stub_client(files)
+
+    conn = None
+    if not args.no_store:
+        import psycopg2
+        conn = psycopg2.connect(**DB_PARAMS)
+    try:
+        results = run(client, units, args.repeat, conn)
+    finally:
+        if conn is not None:
+            conn.close()
+    results['corpus'] = xml_dir
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        logger.info(
+            f"{results['files']} files in {results['seconds']}s: {results['files_per_sec']} files/sec, "
+            f"peak RSS {results['peak_rss_mb']} MB"
+        )
+        if conn is not None:
+            logger.info(
+                f"{results['statements']} statements, {results['statements_per_unit']} per unit"
+            )
+        for name, phase in results['phases'].items():
+            logger.info(f"{name}: {phase['seconds']}s ({phase['share']:.0%})")
+        failures = {key: value for key, value in results.items() if key.endswith('_failures') and value}
+        if failures:
+            logger.warning(f"Failures: {failures}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
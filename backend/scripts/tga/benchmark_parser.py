@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the unit XML parser
+
+Parses every XML file in a directory with services.tga.xml_parser and reports
+files/sec. With --compare-bs4 the same files are also run through a
+BeautifulSoup tree build plus table walk (what the old parsers did before any
+extraction) as a baseline.
+
+Usage:
+    python scripts/tga/benchmark_parser.py [xml_dir] [--repeat 5] [--compare-bs4] [--json]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+
+# Make the backend package importable when run as a script
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, BACKEND_DIR)
+from services.tga.xml_parser import parse_unit_xml
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIRS = [
+    os.path.join(os.path.dirname(BACKEND_DIR), 'tgaWebServiceKit-2021-12-01', 'xml'),
+    os.path.join(BACKEND_DIR, 'tests', 'fixtures', 'tga'),
+]
+
+
+def load_files(xml_dir):
+    """Read all XML files up front so disk I/O is not measured"""
+    contents = []
+    for filename in sorted(os.listdir(xml_dir)):
+        if filename.endswith('.xml'):
+            with open(os.path.join(xml_dir, filename), 'rb') as f:
+                contents.append(f.read())
+    return contents
+
+
+def bs4_baseline(xml):
+    import warnings
+    from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
+
+    warnings.simplefilter('ignore', XMLParsedAsHTMLWarning)
+    soup = BeautifulSoup(xml, 'lxml')
+    for table in soup.find_all('table'):
+        for row in table.find_all('tr'):
+            [cell.get_text().strip() for cell in row.find_all('td')]
+
+
+def measure(parse, contents, repeat):
+    """Best-of-``repeat`` files/sec for one parser"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for xml in contents:
+            parse(xml)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return {
+        'files': len(contents),
+        'seconds': round(best, 4),
+        'files_per_sec': round(len(contents) / best, 1) if best else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark unit XML parsing throughput')
+    parser.add_argument('xml_dir', nargs='?', help='Directory of unit XML files')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per parser (best is reported)')
+    parser.add_argument('--compare-bs4', action='store_true', help='Also time a BeautifulSoup baseline')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    xml_dir = args.xml_dir or next((d for d in DEFAULT_DIRS if os.path.isdir(d)), None)
+    if not xml_dir or not os.path.isdir(xml_dir):
+        logger.error(f"Directory not found: {xml_dir}")
+        return 1
+
+    contents = load_files(xml_dir)
+    if not contents:
+        logger.error(f"No XML files found in {xml_dir}")
+        return 1
+
+    total_mb = sum(len(xml) for xml in contents) / (1024 * 1024)
+    logger.info(f"Benchmarking {len(contents)} files ({total_mb:.1f} MB) from {xml_dir}")
+
+    results = {'lxml': measure(parse_unit_xml, contents, args.repeat)}
+    if args.compare_bs4:
+        results['bs4'] = measure(bs4_baseline, contents, args.repeat)
+        results['speedup'] = round(results['bs4']['seconds'] / results['lxml']['seconds'], 1)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name in ('lxml', 'bs4'):
+            if name in results:
+                result = results[name]
+                logger.info(
+                    f"{name}: {result['files_per_sec']} files/sec "
+                    f"({result['files']} files in {result['seconds']}s)"
+                )
+        if 'speedup' in results:
+            logger.info(f"Speedup over BeautifulSoup: {results['speedup']}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Write benchmark for unit elements and performance criteria
+
+Parses every unit XML file in a directory (e.g. a full training package) and
+stores the elements and PCs twice against the configured database: once with
+the old per-row DELETE/INSERT statements and once with services.bulk_writer.
+Each run happens inside a transaction that is rolled back, so the database is
+left unchanged. Units must already exist (matched by code from the file name).
+
+Usage:
+    python scripts/tga/benchmark_writer.py [xml_dir] [--tp-code BSB] [--batch-size 100] [--json]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+
+import psycopg2
+from dotenv import load_dotenv
+
+# Make the backend package importable when run as a script
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, BACKEND_DIR)
+from services.bulk_writer import write_unit_content, elements_from_parser
+from scripts.tga.tp_get import DB_PARAMS, find_unit_xml_files, iter_parsed_unit_files
+
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIR = os.path.join(os.path.dirname(BACKEND_DIR), 'tgaWebServiceKit-2021-12-01', 'xml')
+
+
+class CountingCursor:
+    """Cursor wrapper counting statements sent to the server"""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.statements = 0
+
+    def execute(self, sql, params=None):
+        self.statements += 1
+        return self.cursor.execute(sql, params)
+
+    def copy_expert(self, sql, file):
+        self.statements += 1
+        return self.cursor.copy_expert(sql, file)
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+
+def write_per_row(cursor, units):
+    """The per-row statements the ingestion paths used before the bulk writer"""
+    for unit in units:
+        unit_id = unit['unit_id']
+        cursor.execute("DELETE FROM unit_performance_criteria WHERE unit_id = %s", (unit_id,))
+        cursor.execute("DELETE FROM unit_elements WHERE unit_id = %s", (unit_id,))
+        for element in unit['elements']:
+            cursor.execute("""
+                INSERT INTO unit_elements (unit_id, element_num, element_text)
+                VALUES (%s, %s, %s)
+                RETURNING id
+            """, (unit_id, str(element['number']), element['text']))
+            element_id = cursor.fetchone()[0]
+            for pc in element['performance_criteria']:
+                cursor.execute("""
+                    INSERT INTO unit_performance_criteria (element_id, unit_id, pc_num, pc_text)
+                    VALUES (%s, %s, %s, %s)
+                """, (element_id, unit_id, pc['number'], pc['text']))
+
+
+def write_bulk(cursor, units, batch_size):
+    for start in range(0, len(units), batch_size):
+        write_unit_content(cursor, units[start:start + batch_size])
+
+
+def measure(conn, write, units):
+    """Time one write strategy inside a rolled-back transaction"""
+    cursor = CountingCursor(conn.cursor())
+    started = time.perf_counter()
+    try:
+        write(cursor, units)
+        elapsed = time.perf_counter() - started
+    finally:
+        conn.rollback()
+        cursor.close()
+    return {
+        'units': len(units),
+        'seconds': round(elapsed, 4),
+        'units_per_sec': round(len(units) / elapsed, 1) if elapsed else None,
+        'statements': cursor.statements,
+    }
+
+
+def load_units(conn, xml_dir, tp_code, workers):
+    """Parse the unit files and resolve unit ids by code"""
+    unit_files = find_unit_xml_files(xml_dir, tp_code)
+    parsed = [
+        item for item in iter_parsed_unit_files(xml_dir, unit_files, workers)
+        if item.get('elements')
+    ]
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT code, id FROM units WHERE code = ANY(%s)",
+            ([item['unit_code'] for item in parsed],)
+        )
+        unit_ids = dict(cursor.fetchall())
+    conn.rollback()
+
+    missing = [item['unit_code'] for item in parsed if item['unit_code'] not in unit_ids]
+    if missing:
+        logger.warning(f"Skipping {len(missing)} units not in the database")
+    return [
+        {'unit_id': unit_ids[item['unit_code']], 'elements': elements_from_parser(item['elements'])}
+        for item in parsed
+        if item['unit_code'] in unit_ids
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark element/PC writes: per-row vs bulk COPY')
+    parser.add_argument('xml_dir', nargs='?', default=DEFAULT_DIR, help='Directory of unit XML files')
+    parser.add_argument('--tp-code', help='Only units of this training package')
+    parser.add_argument('--batch-size', type=int, default=100, help='Units per bulk write')
+    parser.add_argument('--workers', type=int, default=1, help='Parser processes')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.xml_dir):
+        logger.error(f"Directory not found: {args.xml_dir}")
+        return 1
+
+    conn = psycopg2.connect(**DB_PARAMS)
+    try:
+        units = load_units(conn, args.xml_dir, args.tp_code, args.workers)
+        if not units:
+            logger.error("No parsed units match units in the database")
+            return 1
+
+        results = {
+            'per_row': measure(conn, write_per_row, units),
+            'bulk': measure(conn, lambda cur, batch: write_bulk(cur, batch, args.batch_size), units),
+        }
+        results['speedup'] = round(results['per_row']['seconds'] / results['bulk']['seconds'], 1)
+    finally:
+        conn.close()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name in ('per_row', 'bulk'):
+            result = results[name]
+            logger.info(
+                f"{name}: {result['units_per_sec']} units/sec, {result['statements']} statements "
+                f"({result['units']} units in {result['seconds']}s)"
+            )
+        logger.info(f"Speedup of bulk writes: {results['speedup']}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,643 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Training.gov.au web services
+
+Serves what TrainingGovClient uses from a fixture directory of TGA XML files
+(named like the real downloads, e.g. Unit_BSBWHS211_R1.xml and
+AssessmentRequirements_BSBWHS211_R1.xml):
+
+    GET  /Deewr.Tga.Webservices/TrainingComponentServiceV12.svc?wsdl
+    POST /Deewr.Tga.Webservices/TrainingComponentServiceV12.svc
+         SOAP 1.1 Search, GetDetails and GetChanges
+    GET  /TrainingComponentFiles/<file name>
+    GET  /_stats   requests, injected failures and peak concurrency as JSON
+
+Units are listed from the Unit_ files; an optional components.json in the
+directory adds or overrides components (training packages, qualifications,
+titles, modified dates) as a list of objects with Code, Title, ComponentType
+and Modified keys. Modified defaults to the file's mtime.
+
+Latency and failures can be injected into SOAP calls and downloads to
+benchmark bulk downloads, retries and concurrency without the real service:
+``--latency-ms``/``--jitter-ms`` delay every response, ``--failure-rate``
+fails a share of requests and ``--fail-first N`` fails the first N requests
+for each component or file. Failures are an HTTP ``--failure-status``
+(default 503), a dropped connection (``--failure-mode reset``) or a response
+held for ``--hang-seconds`` (``--failure-mode timeout``).
+
+Point the backend at it with the printed TGA_WSDL_URL and TGA_XML_BASE_URL.
+
+Usage:
+    python scripts/tga/standin_server.py [fixture_dir] [--port 8089] [--latency-ms 50]
+    python scripts/tga/standin_server.py --failure-rate 0.1 --failure-mode reset
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+from lxml import etree
+
+# Make the backend package importable when run as a script
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, BACKEND_DIR)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIR = os.path.join(BACKEND_DIR, 'tests', 'fixtures', 'tga')
+
+SERVICE_PATH = '/Deewr.Tga.Webservices/TrainingComponentServiceV12.svc'
+FILES_PATH = '/TrainingComponentFiles/'
+STATS_PATH = '/_stats'
+
+TNS = 'http://training.gov.au/services/12/'
+SOAP_ENV = 'http://schemas.xmlsoap.org/soap/envelope/'
+
+# TrainingComponentTypes search flags and the component type each selects
+TYPE_FLAGS = {
+    'IncludeAccreditedCourse': 'AccreditedCourse',
+    'IncludeAccreditedCourseModule': 'AccreditedCourseModule',
+    'IncludeQualification': 'Qualification',
+    'IncludeSkillSet': 'SkillSet',
+    'IncludeTrainingPackage': 'TrainingPackage',
+    'IncludeUnit': 'Unit',
+    'IncludeUnitContextualisation': 'UnitContextualisation',
+}
+FILE_TYPES = {'Unit': 'Unit', 'AssessmentRequirements': 'Unit', 'Qualification': 'Qualification',
+              'SkillSet': 'SkillSet', 'TrainingPackage': 'TrainingPackage'}
+FAILURE_MODES = ('status', 'reset', 'timeout')
+
+FILE_NAME = re.compile(r'^(?P<kind>[A-Za-z]+)_(?P<code>[A-Za-z0-9]+)_R(?P<release>\d+)\.xml$')
+XML_TITLE = re.compile(rb'<title>\s*(.*?)\s*</title>', re.S)
+
+# GetDetails InformationRequest flags; the stand-in always returns releases and files
+SHOW_FLAGS = (
+    'ShowClassifications', 'ShowCompletionMapping', 'ShowComponents', 'ShowContacts',
+    'ShowCurrencyPeriods', 'ShowDataManagers', 'ShowFiles', 'ShowMappingInformation',
+    'ShowRecognitionManagers', 'ShowReleases', 'ShowUnitGrid', 'ShowUsageRecommendation',
+)
+
+
+def _boolean_elements(names):
+    return ''.join(f'<xs:element minOccurs="0" name="{name}" type="xs:boolean"/>' for name in names)
+
+
+WSDL_TEMPLATE = f"""<?xml version="1.0" encoding="utf-8"?>
+<wsdl:definitions xmlns:wsdl="http://schemas.xmlsoap.org/wsdl/"
+    xmlns:soap="http://schemas.xmlsoap.org/wsdl/soap/"
+    xmlns:xs="http://www.w3.org/2001/XMLSchema" xmlns:tns="{TNS}" targetNamespace="{TNS}">
+  <wsdl:types>
+    <xs:schema elementFormDefault="qualified" targetNamespace="{TNS}">
+      <xs:complexType name="TrainingComponentTypeFilter"><xs:sequence>{_boolean_elements(TYPE_FLAGS)}</xs:sequence></xs:complexType>
+      <xs:complexType name="TrainingComponentSearchRequest"><xs:sequence>
+        <xs:element minOccurs="0" name="Filter" type="xs:string"/>
+        <xs:element minOccurs="0" name="IncludeDeleted" type="xs:boolean"/>
+        <xs:element minOccurs="0" name="IncludeSuperseded" type="xs:boolean"/>
+        <xs:element minOccurs="0" name="SearchCode" type="xs:boolean"/>
+        <xs:element minOccurs="0" name="PageNumber" type="xs:int"/>
+        <xs:element minOccurs="0" name="PageSize" type="xs:int"/>
+        <xs:element minOccurs="0" name="TrainingComponentTypes" type="tns:TrainingComponentTypeFilter"/>
+      </xs:sequence></xs:complexType>
+      <xs:complexType name="TrainingComponentSummary"><xs:sequence>
+        <xs:element minOccurs="0" name="Code" type="xs:string"/>
+        <xs:element minOccurs="0" name="Title" type="xs:string"/>
+        <xs:element minOccurs="0" name="ComponentType" type="xs:string"/>
+        <xs:element minOccurs="0" name="IsCurrent" type="xs:boolean"/>
+        <xs:element minOccurs="0" name="CurrencyStatus" type="xs:string"/>
+      </xs:sequence></xs:complexType>
+      <xs:complexType name="ArrayOfTrainingComponentSummary"><xs:sequence>
+        <xs:element minOccurs="0" maxOccurs="unbounded" name="TrainingComponentSummary" type="tns:TrainingComponentSummary"/>
+      </xs:sequence></xs:complexType>
+      <xs:complexType name="TrainingComponentSearchResult"><xs:sequence>
+        <xs:element minOccurs="0" name="Count" type="xs:int"/>
+        <xs:element minOccurs="0" name="Page" type="xs:int"/>
+        <xs:element minOccurs="0" name="PageSize" type="xs:int"/>
+        <xs:element minOccurs="0" name="Results" type="tns:ArrayOfTrainingComponentSummary"/>
+      </xs:sequence></xs:complexType>
+      <xs:complexType name="TrainingComponentInformationRequested"><xs:sequence>{_boolean_elements(SHOW_FLAGS)}</xs:sequence></xs:complexType>
+      <xs:complexType name="TrainingComponentDetailsRequest"><xs:sequence>
+        <xs:element minOccurs="0" name="Code" type="xs:string"/>
+        <xs:element minOccurs="0" name="InformationRequest" type="tns:TrainingComponentInformationRequested"/>
+      </xs:sequence></xs:complexType>
+      <xs:complexType name="ReleaseFile"><xs:sequence>
+        <xs:element minOccurs="0" name="Filename" type="xs:string"/>
+        <xs:element minOccurs="0" name="Size" type="xs:long"/>
+      </xs:sequence></xs:complexType>
+      <xs:complexType name="ArrayOfReleaseFile"><xs:sequence>
+        <xs:element minOccurs="0" maxOccurs="unbounded" name="ReleaseFile" type="tns:ReleaseFile"/>
+      </xs:sequence></xs:complexType>
+      <xs:complexType name="Release"><xs:sequence>
+        <xs:element minOccurs="0" name="ReleaseNumber" type="xs:string"/>
+        <xs:element minOccurs="0" name="ReleaseDate" type="xs:dateTime"/>
+        <xs:element minOccurs="0" name="Files" type="tns:ArrayOfReleaseFile"/>
+      </xs:sequence></xs:complexType>
+      <xs:complexType name="ArrayOfRelease"><xs:sequence>
+        <xs:element minOccurs="0" maxOccurs="unbounded" name="Release" type="tns:Release"/>
+      </xs:sequence></xs:complexType>
+      <xs:complexType name="TrainingComponent"><xs:sequence>
+        <xs:element minOccurs="0" name="Code" type="xs:string"/>
+        <xs:element minOccurs="0" name="Title" type="xs:string"/>
+        <xs:element minOccurs="0" name="ComponentType" type="xs:string"/>
+        <xs:element minOccurs="0" name="CurrencyStatus" type="xs:string"/>
+        <xs:element minOccurs="0" name="Releases" type="tns:ArrayOfRelease"/>
+      </xs:sequence></xs:complexType>
+      <xs:complexType name="Change"><xs:sequence>
+        <xs:element minOccurs="0" name="Code" type="xs:string"/>
+        <xs:element minOccurs="0" name="ComponentType" type="xs:string"/>
+        <xs:element minOccurs="0" name="ModifiedDate" type="xs:dateTime"/>
+      </xs:sequence></xs:complexType>
+      <xs:complexType name="ArrayOfChange"><xs:sequence>
+        <xs:element minOccurs="0" maxOccurs="unbounded" name="Change" type="tns:Change"/>
+      </xs:sequence></xs:complexType>
+      <xs:complexType name="TrainingComponentChanges"><xs:sequence>
+        <xs:element minOccurs="0" name="Changes" type="tns:ArrayOfChange"/>
+      </xs:sequence></xs:complexType>
+      <xs:element name="Search"><xs:complexType><xs:sequence>
+        <xs:element minOccurs="0" name="request" type="tns:TrainingComponentSearchRequest"/>
+      </xs:sequence></xs:complexType></xs:element>
+      <xs:element name="SearchResponse"><xs:complexType><xs:sequence>
+        <xs:element minOccurs="0" name="SearchResult" type="tns:TrainingComponentSearchResult"/>
+      </xs:sequence></xs:complexType></xs:element>
+      <xs:element name="GetDetails"><xs:complexType><xs:sequence>
+        <xs:element minOccurs="0" name="request" type="tns:TrainingComponentDetailsRequest"/>
+      </xs:sequence></xs:complexType></xs:element>
+      <xs:element name="GetDetailsResponse"><xs:complexType><xs:sequence>
+        <xs:element minOccurs="0" name="GetDetailsResult" type="tns:TrainingComponent"/>
+      </xs:sequence></xs:complexType></xs:element>
+      <xs:element name="GetChanges"><xs:complexType><xs:sequence>
+        <xs:element minOccurs="0" name="modifiedSince" type="xs:dateTime"/>
+        <xs:element minOccurs="0" name="trainingComponentTypes" type="tns:TrainingComponentTypeFilter"/>
+      </xs:sequence></xs:complexType></xs:element>
+      <xs:element name="GetChangesResponse"><xs:complexType><xs:sequence>
+        <xs:element minOccurs="0" name="GetChangesResult" type="tns:TrainingComponentChanges"/>
+      </xs:sequence></xs:complexType></xs:element>
+    </xs:schema>
+  </wsdl:types>
+  {{messages}}
+  <wsdl:portType name="ITrainingComponentService">{{port_operations}}</wsdl:portType>
+  <wsdl:binding name="BasicHttpBinding_ITrainingComponentService" type="tns:ITrainingComponentService">
+    <soap:binding transport="http://schemas.xmlsoap.org/soap/http"/>{{binding_operations}}
+  </wsdl:binding>
+  <wsdl:service name="TrainingComponentService">
+    <wsdl:port name="BasicHttpBinding_ITrainingComponentService" binding="tns:BasicHttpBinding_ITrainingComponentService">
+      <soap:address location="{{address}}"/>
+    </wsdl:port>
+  </wsdl:service>
+</wsdl:definitions>
+"""
+
+OPERATIONS = ('Search', 'GetDetails', 'GetChanges')
+
+
+def wsdl(address):
+    """The service description with its endpoint at ``address``"""
+    return WSDL_TEMPLATE.format(
+        messages=''.join(
+            f'<wsdl:message name="{op}Request"><wsdl:part name="parameters" element="tns:{op}"/></wsdl:message>'
+            f'<wsdl:message name="{op}Reply"><wsdl:part name="parameters" element="tns:{op}Response"/></wsdl:message>'
+            for op in OPERATIONS
+        ),
+        port_operations=''.join(
+            f'<wsdl:operation name="{op}"><wsdl:input message="tns:{op}Request"/>'
+            f'<wsdl:output message="tns:{op}Reply"/></wsdl:operation>'
+            for op in OPERATIONS
+        ),
+        binding_operations=''.join(
+            f'<wsdl:operation name="{op}">'
+            f'<soap:operation soapAction="{TNS}ITrainingComponentService/{op}" style="document"/>'
+            f'<wsdl:input><soap:body use="literal"/></wsdl:input>'
+            f'<wsdl:output><soap:body use="literal"/></wsdl:output></wsdl:operation>'
+            for op in OPERATIONS
+        ),
+        address=address,
+    )
+
+
+def _timestamp(value):
+    return value.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _parse_timestamp(value):
+    value = value.strip().replace('Z', '+00:00')
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class Catalog:
+    """Components and release files found in a fixture directory"""
+
+    def __init__(self, fixture_dir):
+        self.fixture_dir = fixture_dir
+        self.files = {}
+        self.components = {}
+        for filename in sorted(os.listdir(fixture_dir)):
+            match = FILE_NAME.match(filename)
+            if not match or match['kind'] not in FILE_TYPES:
+                continue
+            path = os.path.join(fixture_dir, filename)
+            self.files[filename] = path
+            component = self.components.setdefault(match['code'], {
+                'Code': match['code'], 'Title': None, 'ComponentType': FILE_TYPES[match['kind']],
+                'Modified': None, 'releases': defaultdict(list),
+            })
+            component['releases'][int(match['release'])].append(filename)
+            modified = datetime.fromtimestamp(os.path.getmtime(path), timezone.utc)
+            component['Modified'] = max(filter(None, (component['Modified'], modified)))
+            if match['kind'] != 'AssessmentRequirements' and not component['Title']:
+                component['Title'] = self._title(path, match['code'])
+
+        manifest = os.path.join(fixture_dir, 'components.json')
+        if os.path.exists(manifest):
+            with open(manifest) as f:
+                for entry in json.load(f):
+                    component = self.components.setdefault(entry['Code'], {
+                        'Code': entry['Code'], 'Title': None, 'ComponentType': 'Unit',
+                        'Modified': None, 'releases': defaultdict(list),
+                    })
+                    component.update({key: value for key, value in entry.items() if key != 'Modified'})
+                    if entry.get('Modified'):
+                        component['Modified'] = _parse_timestamp(entry['Modified'])
+        for component in self.components.values():
+            component['Title'] = component['Title'] or component['Code']
+            component['Modified'] = component['Modified'] or datetime.now(timezone.utc)
+
+    @staticmethod
+    def _title(path, code):
+        with open(path, 'rb') as f:
+            match = XML_TITLE.search(f.read(4096))
+        if not match:
+            return None
+        title = match.group(1).decode('utf-8', 'replace')
+        return title[len(code):].strip() if title.startswith(code) else title
+
+    def search(self, filter_text, types, search_code=True):
+        filter_text = (filter_text or '').lower()
+        return [
+            component for code, component in sorted(self.components.items())
+            if component['ComponentType'] in types
+            and filter_text in (code if search_code else component['Title']).lower()
+        ]
+
+    def changes(self, since, types):
+        return [
+            component for _, component in sorted(self.components.items())
+            if component['ComponentType'] in types and (since is None or component['Modified'] > since)
+        ]
+
+
+class FaultInjector:
+    """Latency and failures for the responses of the stand-in"""
+
+    def __init__(self, latency_ms=0, jitter_ms=0, failure_rate=0.0, failure_mode='status',
+                 failure_status=503, fail_first=0, hang_seconds=30.0, targets=('soap', 'download'),
+                 seed=None):
+        if failure_mode not in FAILURE_MODES:
+            raise ValueError(f"failure_mode must be one of {', '.join(FAILURE_MODES)}")
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.failure_mode = failure_mode
+        self.failure_status = failure_status
+        self.fail_first = fail_first
+        self.hang_seconds = hang_seconds
+        self.targets = set(targets)
+        self._rng = random.Random(seed)
+        self._seen = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def delay(self):
+        """Seconds to hold a response"""
+        if not self.latency_ms and not self.jitter_ms:
+            return 0.0
+        with self._lock:
+            jitter = self._rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0
+        return (self.latency_ms + jitter) / 1000
+
+    def should_fail(self, target, key):
+        """Whether this request for ``key`` (a component code or file name) fails"""
+        if target not in self.targets:
+            return False
+        with self._lock:
+            self._seen[(target, key)] += 1
+            if self._seen[(target, key)] <= self.fail_first:
+                return True
+            return self.failure_rate > 0 and self._rng.random() < self.failure_rate
+
+
+class RequestStats:
+    """Request and failure counts per operation, and peak concurrency"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = defaultdict(int)
+            self.failures = defaultdict(int)
+            self.in_flight = 0
+            self.max_in_flight = 0
+
+    def begin(self, operation):
+        with self._lock:
+            self.requests[operation] += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def end(self, operation, failed):
+        with self._lock:
+            self.in_flight -= 1
+            if failed:
+                self.failures[operation] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'requests': dict(self.requests),
+                'failures': dict(self.failures),
+                'in_flight': self.in_flight,
+                'max_in_flight': self.max_in_flight,
+            }
+
+
+def _local(element, name):
+    """First child of ``element`` with this local name, in any namespace"""
+    if element is None:
+        return None
+    for child in element:
+        if isinstance(child.tag, str) and etree.QName(child).localname == name:
+            return child
+    return None
+
+
+def _text(element, name, default=None):
+    child = _local(element, name)
+    return child.text.strip() if child is not None and child.text else default
+
+
+def _flag(element, name, default=False):
+    value = _text(element, name)
+    return default if value is None else value.lower() in ('true', '1')
+
+
+def _component_types(element):
+    """Component types selected by a TrainingComponentTypes filter (all when absent)"""
+    if element is None:
+        return set(TYPE_FLAGS.values())
+    return {type_ for flag, type_ in TYPE_FLAGS.items() if _flag(element, flag)}
+
+
+def _add(parent, name, value=None):
+    child = etree.SubElement(parent, f'{{{TNS}}}{name}')
+    if value is not None:
+        child.text = 'true' if value is True else 'false' if value is False else str(value)
+    return child
+
+
+def _summary(parent, component):
+    summary = _add(parent, 'TrainingComponentSummary')
+    _add(summary, 'Code', component['Code'])
+    _add(summary, 'Title', component['Title'])
+    _add(summary, 'ComponentType', component['ComponentType'])
+    _add(summary, 'IsCurrent', True)
+    _add(summary, 'CurrencyStatus', component.get('CurrencyStatus', 'Current'))
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """HTTP handler for the WSDL, SOAP operations, file downloads and stats"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == SERVICE_PATH:
+            host = self.headers.get('Host') or '%s:%s' % self.server.server_address[:2]
+            return self._send(200, wsdl(f"http://{host}{SERVICE_PATH}").encode('utf-8'), 'text/xml; charset=utf-8')
+        if path == STATS_PATH:
+            return self._send(200, json.dumps(self.server.stats.snapshot()).encode('utf-8'), 'application/json')
+        if path.startswith(FILES_PATH):
+            filename = unquote(path[len(FILES_PATH):])
+            return self._inject('download', filename, lambda: self._download(filename))
+        self._send(404, b'Not found', 'text/plain')
+
+    def do_POST(self):
+        if urlsplit(self.path).path != SERVICE_PATH:
+            return self._send(404, b'Not found', 'text/plain')
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        try:
+            envelope = etree.fromstring(body)
+            request = next(iter(_local(envelope, 'Body')))
+            operation = etree.QName(request).localname
+        except Exception:
+            return self._fault('Client', 'Malformed SOAP request')
+        if operation not in OPERATIONS:
+            return self._fault('Client', f'Unknown operation {operation}')
+        key = _text(_local(request, 'request'), 'Code') or operation
+        self._inject(operation, key, lambda: getattr(self, f'_{operation}')(request), target='soap')
+
+    def _inject(self, operation, key, respond, target=None):
+        """Run ``respond`` after the configured latency, or fail instead"""
+        server = self.server
+        server.stats.begin(operation)
+        failed = server.injector.should_fail(target or operation, key)
+        try:
+            time.sleep(server.injector.delay())
+            if not failed:
+                return respond()
+            mode = server.injector.failure_mode
+            if mode == 'reset':
+                self.close_connection = True
+                self.connection.shutdown(2)
+            elif mode == 'timeout':
+                time.sleep(server.injector.hang_seconds)
+                respond()
+            else:
+                self._send(server.injector.failure_status, b'Injected failure', 'text/plain')
+        finally:
+            server.stats.end(operation, failed)
+
+    def _download(self, filename):
+        path = self.server.catalog.files.get(filename)
+        if path is None:
+            return self._send(404, b'Not found', 'text/plain')
+        with open(path, 'rb') as f:
+            self._send(200, f.read(), 'application/xml')
+
+    def _Search(self, request):
+        search = _local(request, 'request')
+        page = max(1, int(_text(search, 'PageNumber', '1')))
+        page_size = max(1, int(_text(search, 'PageSize', '100')))
+        matches = self.server.catalog.search(
+            _text(search, 'Filter', ''), _component_types(_local(search, 'TrainingComponentTypes')),
+            _flag(search, 'SearchCode', True),
+        )
+        result = self._response('Search')
+        _add(result, 'Count', len(matches))
+        _add(result, 'Page', page)
+        _add(result, 'PageSize', page_size)
+        results = _add(result, 'Results')
+        for component in matches[(page - 1) * page_size:page * page_size]:
+            _summary(results, component)
+        self._send_envelope(result)
+
+    def _GetDetails(self, request):
+        code = _text(_local(request, 'request'), 'Code')
+        component = self.server.catalog.components.get(code)
+        if component is None:
+            return self._fault('Client', f'Training component {code} not found')
+        result = self._response('GetDetails')
+        _add(result, 'Code', component['Code'])
+        _add(result, 'Title', component['Title'])
+        _add(result, 'ComponentType', component['ComponentType'])
+        _add(result, 'CurrencyStatus', component.get('CurrencyStatus', 'Current'))
+        releases = _add(result, 'Releases')
+        # Latest release first, as TGA lists them
+        for number in sorted(component['releases'], reverse=True):
+            release = _add(releases, 'Release')
+            _add(release, 'ReleaseNumber', number)
+            _add(release, 'ReleaseDate', _timestamp(component['Modified']))
+            files = _add(release, 'Files')
+            for filename in component['releases'][number]:
+                release_file = _add(files, 'ReleaseFile')
+                _add(release_file, 'Filename', filename)
+                _add(release_file, 'Size', os.path.getsize(self.server.catalog.files[filename]))
+        self._send_envelope(result)
+
+    def _GetChanges(self, request):
+        since = _text(request, 'modifiedSince')
+        try:
+            since = _parse_timestamp(since) if since else None
+        except ValueError:
+            return self._fault('Client', f'Invalid modifiedSince {since}')
+        changes = self.server.catalog.changes(since, _component_types(_local(request, 'trainingComponentTypes')))
+        result = self._response('GetChanges')
+        changes_element = _add(result, 'Changes')
+        for component in changes:
+            change = _add(changes_element, 'Change')
+            _add(change, 'Code', component['Code'])
+            _add(change, 'ComponentType', component['ComponentType'])
+            _add(change, 'ModifiedDate', _timestamp(component['Modified']))
+        self._send_envelope(result)
+
+    @staticmethod
+    def _response(operation):
+        envelope = etree.Element(f'{{{SOAP_ENV}}}Envelope', nsmap={'s': SOAP_ENV})
+        body = etree.SubElement(envelope, f'{{{SOAP_ENV}}}Body')
+        response = etree.SubElement(body, f'{{{TNS}}}{operation}Response', nsmap={None: TNS})
+        return _add(response, f'{operation}Result')
+
+    def _send_envelope(self, result):
+        self._send(200, etree.tostring(result.getroottree(), xml_declaration=True, encoding='utf-8'),
+                   'text/xml; charset=utf-8')
+
+    def _fault(self, code, message):
+        envelope = etree.Element(f'{{{SOAP_ENV}}}Envelope', nsmap={'s': SOAP_ENV})
+        fault = etree.SubElement(etree.SubElement(envelope, f'{{{SOAP_ENV}}}Body'), f'{{{SOAP_ENV}}}Fault')
+        etree.SubElement(fault, 'faultcode').text = f's:{code}'
+        etree.SubElement(fault, 'faultstring').text = message
+        self._send(500, etree.tostring(envelope, xml_declaration=True, encoding='utf-8'), 'text/xml; charset=utf-8')
+
+    def _send(self, status, content, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class StandinServer(ThreadingHTTPServer):
+    """Threaded HTTP server for the stand-in; ``start`` runs it in the background"""
+
+    daemon_threads = True
+
+    def __init__(self, fixture_dir, host='127.0.0.1', port=0, injector=None):
+        super().__init__((host, port), StandinHandler)
+        self.catalog = Catalog(fixture_dir)
+        self.injector = injector or FaultInjector()
+        self.stats = RequestStats()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def wsdl_url(self):
+        return f"{self.base_url}{SERVICE_PATH}?wsdl"
+
+    @property
+    def xml_base_url(self):
+        return f"{self.base_url}{FILES_PATH}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='tga-standin', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a local stand-in for the TGA web services')
+    parser.add_argument('fixture_dir', nargs='?', default=DEFAULT_DIR, help='Directory of TGA XML files')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on')
+    parser.add_argument('--port', type=int, default=8089, help='Port to listen on')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Delay added to every response')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='Random extra delay, up to this')
+    parser.add_argument('--failure-rate', type=float, default=0, help='Share of requests that fail')
+    parser.add_argument('--fail-first', type=int, default=0, help='Fail the first N requests per component/file')
+    parser.add_argument('--failure-mode', choices=FAILURE_MODES, default='status', help='How requests fail')
+    parser.add_argument('--failure-status', type=int, default=503, help='HTTP status of failed requests')
+    parser.add_argument('--hang-seconds', type=float, default=30, help='Hold time of timeout failures')
+    parser.add_argument('--inject', default='soap,download', help='Where to inject failures: soap, download')
+    parser.add_argument('--seed', type=int, help='Random seed for jitter and failures')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.fixture_dir):
+        logger.error(f"Directory not found: {args.fixture_dir}")
+        return 1
+
+    injector = FaultInjector(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, failure_rate=args.failure_rate,
+        failure_mode=args.failure_mode, failure_status=args.failure_status,
+        fail_first=args.fail_first, hang_seconds=args.hang_seconds,
+        targets=[target.strip() for target in args.inject.split(',') if target.strip()],
+        seed=args.seed,
+    )
+    server = StandinServer(args.fixture_dir, args.host, args.port, injector)
+    logger.info(
+        f"Serving {len(server.catalog.components)} components and {len(server.catalog.files)} files "
+        f"from {args.fixture_dir}"
+    )
+    logger.info(f"TGA_WSDL_URL={server.wsdl_url}")
+    logger.info(f"TGA_XML_BASE_URL={server.xml_base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
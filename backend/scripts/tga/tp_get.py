@@ -10,21 +10,25 @@ from zeep.transports import Transport
 from requests import Session
 from requests.auth import HTTPBasicAuth
 import psycopg2
-from psycopg2.extras import DictCursor, Json
+from psycopg2.extras import DictCursor, execute_values
 import os
 from dotenv import load_dotenv
 import sys
 import logging
-import re
 import json
 import requests
 import xml.etree.ElementTree as ET
 import inspect
-from bs4 import BeautifulSoup
 import time
 import tempfile
 from datetime import datetime
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+# Make the backend package importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from services.tga.xml_parser import parse_unit_xml
+from services.bulk_writer import write_unit_content, elements_from_parser, unit_content_from_parsed
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -254,161 +258,63 @@ def parse_elements_and_pcs(unit_xml):
         return None
         
     try:
-        # Parse XML
-        soup = BeautifulSoup(unit_xml, 'lxml')
-        if not soup:
-            logger.error("Failed to create BeautifulSoup object")
-            return None
-            
-        # Extract elements and PCs
-        elements = []
-        
-        # Find all tables
-        tables = soup.find_all('table')
-        if not tables:
-            logger.warning("No tables found in XML")
-            return None
-        
-        # Look for a table with Elements and Performance criteria
-        elements_table = None
-        for table in tables:
-            rows = table.find_all('tr')
-            if len(rows) >= 2:  # Need at least headers and one data row
-                cells = rows[0].find_all('td')
-                if len(cells) >= 2:
-                    cell1_text = cells[0].get_text().strip()
-                    cell2_text = cells[1].get_text().strip()
-                    # Different patterns we might see in table headers
-                    if any([
-                        ("Elements" in cell1_text and "Performance" in cell2_text),
-                        ("ELEMENT" in cell1_text.upper() and "PERFORMANCE" in cell2_text.upper()),
-                        (cell1_text == "Elements" and cell2_text == "Performance criteria"),
-                        # Add additional patterns here if needed
-                    ]):
-                        elements_table = table
-                        break
-        
-        if elements_table:
-            rows = elements_table.find_all('tr')
-            # Skip the first two rows (headers and explanation)
-            data_rows = rows[2:]
-            
-            current_element = None
-            
-            for row in data_rows:
-                cells = row.find_all('td')
-                if len(cells) < 2:
-                    continue
-                
-                # Get text from all cells
-                cell_texts = [cell.get_text().strip() for cell in cells]
-                
-                # Check for element in first column - various patterns
-                is_element_row = False
-                
-                if len(cells) >= 2:
-                    # Check for common element number patterns
-                    if re.match(r'^[1-9][0-9]*$', cell_texts[0]):  # Simple number: 1, 2, 3
-                        is_element_row = True
-                        element_num = cell_texts[0]
-                    elif re.match(r'^Element\s+[1-9][0-9]*$', cell_texts[0], re.IGNORECASE):  # "Element 1"
-                        is_element_row = True
-                        element_num = cell_texts[0].split()[-1]
-                    elif re.match(r'^[A-Z][1-9][0-9]*$', cell_texts[0]):  # Format like: A1, B2, etc.
-                        is_element_row = True
-                        element_num = cell_texts[0]
-                
-                if is_element_row:    
-                    # This looks like an element row
-                    element_text = cell_texts[1] if len(cell_texts) > 1 else ""
-                    
-                    current_element = {
-                        'element_num': element_num,
-                        'element_text': element_text,
-                        'performance_criteria': []
-                    }
-                    elements.append(current_element)
-                    
-                    # Check if this row also has a PC
-                    if len(cell_texts) >= 4:
-                        # Check common PC number patterns
-                        pc_pattern_match = (
-                            re.match(r'^[1-9][0-9]*\.[1-9][0-9]*$', cell_texts[2]) or  # 1.1, 1.2
-                            re.match(r'^[1-9][0-9]*\.[1-9][0-9]*\.[1-9][0-9]*$', cell_texts[2]) or  # 1.1.1, 1.1.2
-                            re.match(r'^[A-Z][1-9][0-9]*\.[1-9][0-9]*$', cell_texts[2])  # A1.1, B2.3
-                        )
-                        
-                        if pc_pattern_match:
-                            pc_num = cell_texts[2]
-                            pc_text = cell_texts[3] if len(cell_texts) > 3 else ""
-                            
-                            current_element['performance_criteria'].append({
-                                'pc_num': pc_num,
-                                'pc_text': pc_text
-                            })
-                
-                # Check for performance criteria in cells 3 & 4 (if element exists)
-                elif current_element and len(cells) >= 4:
-                    # Check common PC number patterns
-                    pc_pattern_match = (
-                        re.match(r'^[1-9][0-9]*\.[1-9][0-9]*$', cell_texts[2]) or  # 1.1, 1.2
-                        re.match(r'^[1-9][0-9]*\.[1-9][0-9]*\.[1-9][0-9]*$', cell_texts[2]) or  # 1.1.1, 1.1.2
-                        re.match(r'^[A-Z][1-9][0-9]*\.[1-9][0-9]*$', cell_texts[2])  # A1.1, B2.3
-                    )
-                    
-                    if pc_pattern_match:
-                        pc_num = cell_texts[2]
-                        pc_text = cell_texts[3]
-                        
-                        current_element['performance_criteria'].append({
-                            'pc_num': pc_num,
-                            'pc_text': pc_text
-                        })
-        
-        return elements
-                
+        return legacy_elements(parse_unit_xml(unit_xml))
     except Exception as e:
         logger.error(f"Error parsing elements and PCs: {e}")
         return None
 
-def store_elements_and_pcs(cursor, unit_id, elements):
+def legacy_elements(parsed):
     """
-    Store elements and performance criteria in the database.
+    Convert parse_unit_xml output to this script's element format
+    (element_num/element_text, pc_num/pc_text). Returns None if the XML had
+    neither tables nor elements.
+    """
+    if not parsed["tables"] and not parsed["elements"]:
+        logger.warning("No tables found in XML")
+        return None
+    
+    return [
+        {
+            'element_num': element['number'],
+            'element_text': element['text'],
+            'performance_criteria': [
+                {'pc_num': pc['number'], 'pc_text': pc['text']}
+                for pc in element['performance_criteria']
+            ]
+        }
+        for element in parsed["elements"]
+    ]
+
+def parse_unit_content(unit_xml, ar_xml=None):
+    """
+    Parse a unit XML and, if given, its assessment requirements XML.
+    Returns (elements, critical_aspects, required_skills); elements are in
+    this script's format and None if the unit XML had none.
+    """
+    documents = [parse_unit_xml(unit_xml)]
+    if ar_xml:
+        documents.append(parse_unit_xml(ar_xml))
+    content = unit_content_from_parsed(None, *documents)
+    return legacy_elements(documents[0]), content['critical_aspects'], content['required_skills']
+
+def store_elements_and_pcs(cursor, unit_id, elements, critical_aspects=None, required_skills=None):
+    """
+    Store elements and performance criteria in the database, with the unit's
+    critical aspects and required skills when given (None leaves them as is).
     Returns True if successful, False otherwise.
     """
     if not elements:
         return False
         
     try:
-        # First, delete existing elements and PCs
-        cursor.execute("DELETE FROM unit_performance_criteria WHERE unit_id = %s", (unit_id,))
-        cursor.execute("DELETE FROM unit_elements WHERE unit_id = %s", (unit_id,))
-        
-        # Store each element
-        for element in elements:
-            # Insert element
-            cursor.execute("""
-                INSERT INTO unit_elements (unit_id, element_num, element_text)
-                VALUES (%s, %s, %s)
-                RETURNING id
-            """, (unit_id, element.get('element_num', ''), element.get('element_text', '')))
-            
-            element_id = cursor.fetchone()[0]
-            
-            # Store PCs for this element
-            pcs = element.get('performance_criteria', [])
-            for pc in pcs:
-                cursor.execute("""
-                    INSERT INTO unit_performance_criteria (element_id, unit_id, pc_num, pc_text)
-                    VALUES (%s, %s, %s, %s)
-                """, (element_id, unit_id, pc.get('pc_num', ''), pc.get('pc_text', '')))
-                
-        # Store JSON representation in units table for quick access
-        cursor.execute("""
-            UPDATE units
-            SET elements_json = %s
-            WHERE id = %s
-        """, (Json(elements), unit_id))
+        # Merge the unit's content with a fixed number of set-based statements;
+        # this also rebuilds the unit's content document for quick access
+        write_unit_content(cursor, [{
+            'unit_id': unit_id,
+            'elements': elements_from_parser(elements),
+            'critical_aspects': critical_aspects,
+            'required_skills': required_skills,
+        }])
         
         return True
         
@@ -442,14 +348,16 @@ def process_unit_xml(client, cursor, unit_id, unit_code):
             logger.warning(f"Failed to download XML for {unit_code}")
             return False
             
-        # Parse elements and PCs
-        elements = parse_elements_and_pcs(xml_content)
+        # Parse elements, PCs, critical aspects and required skills
+        elements, critical_aspects, required_skills = parse_unit_content(
+            xml_content, download_xml(unit_code, ar_file)
+        )
         if not elements:
             logger.warning(f"No elements found in XML for {unit_code}")
             return False
             
-        # Store elements and PCs
-        return store_elements_and_pcs(cursor, unit_id, elements)
+        # Store the unit's content
+        return store_elements_and_pcs(cursor, unit_id, elements, critical_aspects, required_skills)
         
     except Exception as e:
         logger.error(f"Error processing XML for unit {unit_code}: {e}")
@@ -462,18 +370,18 @@ def process_unit_xml_from_file(cursor, unit_id, unit_code, file_path):
     logger.info(f"Processing local XML file for {unit_code} (ID: {unit_id}): {file_path}")
     
     try:
-        # Read XML file
-        with open(file_path, 'r', encoding='utf-8') as f:
-            xml_content = f.read()
-            
-        # Parse elements and PCs
-        elements = parse_elements_and_pcs(xml_content)
-        if not elements:
+        # Read and parse the XML file and its assessment requirements
+        parsed = parse_unit_xml_file((file_path, unit_code))
+        if parsed['error']:
+            raise ValueError(parsed['error'])
+        if not parsed['elements']:
             logger.warning(f"No elements found in XML for {unit_code}")
             return False
             
-        # Store elements and PCs
-        return store_elements_and_pcs(cursor, unit_id, elements)
+        # Store the unit's content
+        return store_elements_and_pcs(
+            cursor, unit_id, parsed['elements'], parsed['critical_aspects'], parsed['required_skills']
+        )
         
     except Exception as e:
         logger.error(f"Error processing XML for unit {unit_code} from file {file_path}: {e}")
@@ -770,7 +678,7 @@ def process_existing_units(specific_unit_id=None):
                     cur.execute("""
                         SELECT id, code
                         FROM units
-                        WHERE elements_json IS NULL
+                        WHERE content_json IS NULL
                         ORDER BY code
                     """)
                 
@@ -814,11 +722,136 @@ def process_existing_units(specific_unit_id=None):
         logger.error(f"An error occurred: {e}")
         return {"error": str(e)}
 
-def process_local_xml_files(base_dir=None, tp_code=None):
+def find_unit_xml_files(base_dir, tp_code=None):
+    """
+    List (file_name, unit_code) for the unit XML files in base_dir.
+    If tp_code is provided, only files for that training package are returned.
+    """
+    unit_files = []
+    for file in sorted(os.listdir(base_dir)):
+        if file.startswith('Unit_') and file.endswith('.xml'):
+            unit_code = file.split('_')[1].split('_')[0]  # Extract code like 'PUAAMS101' from 'Unit_PUAAMS101_R1.xml'
+            
+            # If tp_code is specified, check if this unit belongs to that TP
+            if tp_code and not unit_code.startswith(tp_code):
+                continue
+                
+            unit_files.append((file, unit_code))
+    return unit_files
+
+def parse_unit_xml_file(task):
+    """
+    Read and parse one unit XML file; runs in worker processes.
+    Takes (file_path, unit_code) and returns a dict with the parsed elements
+    (None on failure), critical aspects and required skills (from the unit
+    file and its AssessmentRequirements_ companion, if present), any error
+    message and the parse time in seconds.
+    """
+    file_path, unit_code = task
+    started = time.perf_counter()
+    result = {
+        'file': os.path.basename(file_path), 'unit_code': unit_code, 'elements': None,
+        'critical_aspects': None, 'required_skills': None, 'error': None
+    }
+    
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            unit_xml = f.read()
+        ar_xml = None
+        ar_path = os.path.join(
+            os.path.dirname(file_path),
+            'AssessmentRequirements_' + os.path.basename(file_path)[len('Unit_'):]
+        )
+        if os.path.exists(ar_path):
+            with open(ar_path, 'r', encoding='utf-8') as f:
+                ar_xml = f.read()
+        
+        result['elements'], result['critical_aspects'], result['required_skills'] = \
+            parse_unit_content(unit_xml, ar_xml)
+    except Exception as e:
+        result['error'] = str(e)
+        
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+def iter_parsed_unit_files(base_dir, unit_files, workers=1):
+    """
+    Parse unit XML files, in a process pool when workers > 1.
+    Results are yielded in file order as they become available.
+    """
+    tasks = [(os.path.join(base_dir, file_name), unit_code) for file_name, unit_code in unit_files]
+    
+    if workers <= 1:
+        for task in tasks:
+            yield parse_unit_xml_file(task)
+        return
+        
+    chunksize = max(1, min(32, len(tasks) // (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(parse_unit_xml_file, tasks, chunksize=chunksize)
+
+def write_unit_batch(cursor, batch):
+    """
+    Store the elements, PCs, critical aspects and required skills of a batch
+    of parsed units. Unit ids are resolved (and missing units created) with one query each and
+    the batch is merged with one bulk write. If that fails the units are
+    retried one by one; a failing unit is rolled back to its savepoint
+    without losing the batch.
+    Returns the number of units stored with elements.
+    """
+    codes = [item['unit_code'] for item in batch]
+    cursor.execute("SELECT id, code FROM units WHERE code = ANY(%s)", (codes,))
+    unit_ids = {row[1]: row[0] for row in cursor.fetchall()}
+    
+    missing = [code for code in dict.fromkeys(codes) if code not in unit_ids]
+    if missing:
+        created = execute_values(cursor, """
+            INSERT INTO units (code, title)
+            VALUES %s
+            RETURNING id, code
+        """, [(code, f"Unit {code} (from local XML)") for code in missing], fetch=True)
+        for unit_id, code in created:
+            unit_ids[code] = unit_id
+            logger.info(f"Created new unit: {code} (ID: {unit_id})")
+    
+    # Fast path: the whole batch in one COPY + merge
+    cursor.execute("SAVEPOINT batch_write")
+    try:
+        write_unit_content(cursor, [
+            {
+                'unit_id': unit_ids[item['unit_code']],
+                'elements': elements_from_parser(item['elements']),
+                'critical_aspects': item.get('critical_aspects'),
+                'required_skills': item.get('required_skills'),
+            }
+            for item in batch
+        ])
+        cursor.execute("RELEASE SAVEPOINT batch_write")
+        return len(batch)
+    except Exception as e:
+        logger.warning(f"Bulk write failed, retrying unit by unit: {e}")
+        cursor.execute("ROLLBACK TO SAVEPOINT batch_write")
+    
+    stored = 0
+    for item in batch:
+        cursor.execute("SAVEPOINT unit_write")
+        if store_elements_and_pcs(cursor, unit_ids[item['unit_code']], item['elements'],
+                                  item.get('critical_aspects'), item.get('required_skills')):
+            cursor.execute("RELEASE SAVEPOINT unit_write")
+            stored += 1
+        else:
+            cursor.execute("ROLLBACK TO SAVEPOINT unit_write")
+    return stored
+
+def process_local_xml_files(base_dir=None, tp_code=None, workers=1, batch_size=100, dry_run=False):
     """
     Process local XML files to extract elements and PCs.
     If base_dir is not provided, use the default 'tgaWebServiceKit-2021-12-01/xml' directory.
     If tp_code is provided, only process files for that training package.
+    With workers > 1 files are parsed in a process pool; results are written
+    in batches of batch_size units, one commit per batch.
+    With dry_run the files are only parsed and the database is not touched.
+    The returned results include parse statistics under 'stats'.
     """
     if not base_dir:
         base_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tgaWebServiceKit-2021-12-01', 'xml')
@@ -833,72 +866,115 @@ def process_local_xml_files(base_dir=None, tp_code=None):
         'with_elements': 0,
         'errors': 0
     }
+    stats = {
+        'workers': workers,
+        'files': 0,
+        'parse_failures': 0,
+        'without_elements': 0,
+        'elements': 0,
+        'performance_criteria': 0,
+        'critical_aspects': 0,
+        'required_skills': 0,
+        'parse_seconds': 0.0,
+        'wall_seconds': 0.0,
+        'files_per_sec': None,
+        'failures': []
+    }
+    results['stats'] = stats
+    
+    unit_files = find_unit_xml_files(base_dir, tp_code)
+    results['total'] = len(unit_files)
+    logger.info(f"Found {results['total']} unit XML files")
+    
+    conn = None
+    cur = None
+    batch = []
+    
+    def flush():
+        if not batch:
+            return
+        try:
+            results['with_elements'] += write_unit_batch(cur, batch)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            results['errors'] += len(batch)
+            logger.error(f"Error writing batch of {len(batch)} units: {e}")
+        batch.clear()
     
+    started = time.perf_counter()
     try:
-        # Connect to the database
-        with psycopg2.connect(**DB_PARAMS) as conn:
-            with conn.cursor(cursor_factory=DictCursor) as cur:
-                # Find all unit XML files
-                unit_files = []
-                for file in os.listdir(base_dir):
-                    if file.startswith('Unit_') and file.endswith('.xml'):
-                        unit_code = file.split('_')[1].split('_')[0]  # Extract code like 'PUAAMS101' from 'Unit_PUAAMS101_R1.xml'
-                        
-                        # If tp_code is specified, check if this unit belongs to that TP
-                        if tp_code and not unit_code.startswith(tp_code):
-                            continue
-                            
-                        unit_files.append((file, unit_code))
-                
-                results['total'] = len(unit_files)
-                logger.info(f"Found {results['total']} unit XML files")
-                
-                for file_name, unit_code in unit_files:
-                    # Check if this unit exists in the database
-                    cur.execute("""
-                        SELECT id FROM units WHERE code = %s
-                    """, (unit_code,))
-                    
-                    unit_row = cur.fetchone()
-                    if not unit_row:
-                        # Create a new unit entry
-                        cur.execute("""
-                            INSERT INTO units (code, title)
-                            VALUES (%s, %s)
-                            RETURNING id
-                        """, (unit_code, f"Unit {unit_code} (from local XML)"))
-                        
-                        unit_id = cur.fetchone()[0]
-                        logger.info(f"Created new unit: {unit_code} (ID: {unit_id})")
-                    else:
-                        unit_id = unit_row['id']
-                        logger.info(f"Found existing unit: {unit_code} (ID: {unit_id})")
-                    
-                    # Process the XML file
-                    try:
-                        results['processed'] += 1
-                        if process_unit_xml_from_file(cur, unit_id, unit_code, os.path.join(base_dir, file_name)):
-                            results['with_elements'] += 1
-                        
-                        # Commit after each unit
-                        conn.commit()
-                        
-                    except Exception as e:
-                        results['errors'] += 1
-                        logger.error(f"Error processing unit XML file {file_name}: {e}")
-                        # Continue with next file
+        if not dry_run:
+            conn = psycopg2.connect(**DB_PARAMS)
+            cur = conn.cursor()
+        
+        for parsed in iter_parsed_unit_files(base_dir, unit_files, workers):
+            results['processed'] += 1
+            stats['files'] += 1
+            stats['parse_seconds'] += parsed['seconds']
+            
+            if parsed['error']:
+                results['errors'] += 1
+                stats['parse_failures'] += 1
+                stats['failures'].append({'file': parsed['file'], 'error': parsed['error']})
+                logger.error(f"Error processing unit XML file {parsed['file']}: {parsed['error']}")
+                continue
                 
-                logger.info(
-                    f"Processed {results['processed']} units, "
-                    f"{results['with_elements']} with elements, "
-                    f"{results['errors']} errors"
-                )
+            elements = parsed['elements']
+            if not elements:
+                stats['without_elements'] += 1
+                logger.warning(f"No elements found in XML for {parsed['unit_code']}")
+                continue
                 
-                return results
+            stats['elements'] += len(elements)
+            stats['performance_criteria'] += sum(len(e.get('performance_criteria', [])) for e in elements)
+            stats['critical_aspects'] += len(parsed.get('critical_aspects') or [])
+            stats['required_skills'] += len(parsed.get('required_skills') or [])
+            
+            if dry_run:
+                results['with_elements'] += 1
+                continue
                 
+            batch.append(parsed)
+            if len(batch) >= batch_size:
+                flush()
+        
+        if not dry_run:
+            flush()
+            
     except Exception as e:
         logger.error(f"An error occurred: {e}")
         return {"error": str(e)}
+    finally:
+        if conn is not None:
+            conn.close()
+    
+    stats['wall_seconds'] = round(time.perf_counter() - started, 3)
+    stats['parse_seconds'] = round(stats['parse_seconds'], 3)
+    if stats['wall_seconds']:
+        stats['files_per_sec'] = round(stats['files'] / stats['wall_seconds'], 1)
+    
+    logger.info(
+        f"Processed {results['processed']} units, "
+        f"{results['with_elements']} with elements, "
+        f"{results['errors']} errors"
+    )
+    
+    return results
+
+def print_stats(stats):
+    """Print the parse statistics of process_local_xml_files"""
+    print(f"Files parsed: {stats['files']} ({stats['workers']} workers)")
+    print(f"Throughput: {stats['files_per_sec']} files/sec "
+          f"({stats['wall_seconds']}s wall, {stats['parse_seconds']}s parsing)")
+    print(f"Elements: {stats['elements']}")
+    print(f"Performance criteria: {stats['performance_criteria']}")
+    print(f"Critical aspects: {stats['critical_aspects']}")
+    print(f"Required skills: {stats['required_skills']}")
+    print(f"Files without elements: {stats['without_elements']}")
+    print(f"Parse failures: {stats['parse_failures']}")
+    for failure in stats['failures']:
+        print(f"  {failure['file']}: {failure['error']}")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Fetch training packages from TGA')
@@ -907,6 +983,10 @@ if __name__ == "__main__":
     parser.add_argument('--unit-id', type=int, help='Process a specific unit by ID')
     parser.add_argument('--process-local', action='store_true', help='Process local XML files')
     parser.add_argument('--xml-dir', help='Directory containing XML files (default: tgaWebServiceKit-2021-12-01/xml)')
+    parser.add_argument('--workers', type=int, default=1, help='Parse local XML files in N processes')
+    parser.add_argument('--batch-size', type=int, default=100, help='Units written per transaction when processing local XML')
+    parser.add_argument('--dry-run', action='store_true', help='Parse local XML files without touching the database')
+    parser.add_argument('--stats', action='store_true', help='Print parse throughput, failures and element/PC counts')
     args = parser.parse_args()
     
     if args.process_existing:
@@ -919,13 +999,20 @@ if __name__ == "__main__":
             print(f"Errors: {results['errors']}")
             sys.exit(0)
     elif args.process_local:
-        results = process_local_xml_files(args.xml_dir)
+        results = process_local_xml_files(
+            args.xml_dir,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            dry_run=args.dry_run
+        )
         if "error" in results:
             sys.exit(1)
         else:
             print(f"Processed {results['processed']} units")
             print(f"Units with elements: {results['with_elements']}")
             print(f"Errors: {results['errors']}")
+            if args.stats:
+                print_stats(results['stats'])
             sys.exit(0)
     else:
         results = get_training_packages(args.tp_codes)
@@ -0,0 +1,352 @@
+"""
+Bulk Writer Service - Set-based persistence of parsed unit content.
+
+Parsed units are staged into temporary tables with COPY and merged into
+unit_elements, unit_performance_criteria, unit_critical_aspects and
+unit_required_skills with a fixed number of statements per batch, whatever
+the number of units, elements or performance criteria in it.
+
+Elements and performance criteria are matched on (unit, element number) and
+(element, PC number) so their ids survive a re-import; assessments, quiz
+questions and element progress keep pointing at the same rows. Stale rows are
+removed unless something still references them. Critical aspects and required
+skills have no dependants and are replaced wholesale. The units' content
+documents (services.unit_documents) are rebuilt in the same transaction.
+
+The writer works on a DBAPI (psycopg2) cursor and never commits: callers run
+one transaction per batch.
+"""
+
+import io
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from services.unit_documents import refresh_unit_documents
+
+logger = logging.getLogger(__name__)
+
+STAGING_DDL = """
+CREATE TEMP TABLE IF NOT EXISTS stage_units (
+    unit_id integer,
+    replace_elements boolean,
+    replace_aspects boolean,
+    replace_skills boolean
+) ON COMMIT DELETE ROWS;
+CREATE TEMP TABLE IF NOT EXISTS stage_unit_elements (
+    unit_id integer,
+    position integer,
+    element_num text,
+    element_text text
+) ON COMMIT DELETE ROWS;
+CREATE TEMP TABLE IF NOT EXISTS stage_unit_pcs (
+    unit_id integer,
+    position integer,
+    element_num text,
+    pc_num text,
+    pc_text text
+) ON COMMIT DELETE ROWS;
+CREATE TEMP TABLE IF NOT EXISTS stage_unit_aspects (
+    unit_id integer,
+    position integer,
+    section text,
+    critical_aspect text
+) ON COMMIT DELETE ROWS;
+CREATE TEMP TABLE IF NOT EXISTS stage_unit_skills (
+    unit_id integer,
+    position integer,
+    skill_type text,
+    skill_section text,
+    skill_text text
+) ON COMMIT DELETE ROWS;
+TRUNCATE stage_units, stage_unit_elements, stage_unit_pcs, stage_unit_aspects, stage_unit_skills;
+"""
+
+MERGE_ELEMENTS_SQL = """
+UPDATE unit_elements e
+SET element_text = s.element_text, updated_at = now()
+FROM stage_unit_elements s
+WHERE e.unit_id = s.unit_id
+  AND e.element_num = s.element_num
+  AND e.element_text IS DISTINCT FROM s.element_text;
+
+INSERT INTO unit_elements (unit_id, element_num, element_text)
+SELECT s.unit_id, s.element_num, s.element_text
+FROM stage_unit_elements s
+WHERE NOT EXISTS (
+    SELECT 1 FROM unit_elements e
+    WHERE e.unit_id = s.unit_id AND e.element_num = s.element_num
+)
+ORDER BY s.unit_id, s.position;
+
+UPDATE unit_performance_criteria p
+SET pc_text = s.pc_text, updated_at = now()
+FROM stage_unit_pcs s
+JOIN unit_elements e ON e.unit_id = s.unit_id AND e.element_num = s.element_num
+WHERE p.element_id = e.id
+  AND p.pc_num = s.pc_num
+  AND p.pc_text IS DISTINCT FROM s.pc_text;
+
+INSERT INTO unit_performance_criteria (element_id, unit_id, pc_num, pc_text)
+SELECT e.id, s.unit_id, s.pc_num, s.pc_text
+FROM stage_unit_pcs s
+JOIN unit_elements e ON e.unit_id = s.unit_id AND e.element_num = s.element_num
+WHERE NOT EXISTS (
+    SELECT 1 FROM unit_performance_criteria p
+    WHERE p.element_id = e.id AND p.pc_num = s.pc_num
+)
+ORDER BY s.unit_id, s.position;
+
+DELETE FROM unit_performance_criteria p
+USING stage_units u
+WHERE p.unit_id = u.unit_id
+  AND u.replace_elements
+  AND NOT EXISTS (
+      SELECT 1 FROM stage_unit_pcs s
+      JOIN unit_elements e ON e.unit_id = s.unit_id AND e.element_num = s.element_num
+      WHERE e.id = p.element_id AND s.pc_num = p.pc_num
+  )
+  AND NOT EXISTS (SELECT 1 FROM assessment_questions q WHERE q.pc_id = p.id);
+
+DELETE FROM unit_elements e
+USING stage_units u
+WHERE e.unit_id = u.unit_id
+  AND u.replace_elements
+  AND NOT EXISTS (
+      SELECT 1 FROM stage_unit_elements s
+      WHERE s.unit_id = e.unit_id AND s.element_num = e.element_num
+  )
+  AND NOT EXISTS (SELECT 1 FROM unit_performance_criteria p WHERE p.element_id = e.id)
+  AND NOT EXISTS (SELECT 1 FROM assessments a WHERE a.element_id = e.id)
+  AND NOT EXISTS (SELECT 1 FROM user_element_progress g WHERE g.element_id = e.id);
+"""
+
+# Parser sections stored as critical aspects / required skills
+CRITICAL_ASPECT_SECTIONS = {
+    "performance_evidence": "Performance Evidence",
+    "assessment_conditions": "Assessment Conditions",
+}
+REQUIRED_SKILL_SECTIONS = {
+    "knowledge_evidence": ("knowledge", "Knowledge Evidence"),
+}
+
+REPLACE_ASPECTS_SQL = """
+DELETE FROM unit_critical_aspects c
+USING stage_units u
+WHERE c.unit_id = u.unit_id AND u.replace_aspects;
+
+INSERT INTO unit_critical_aspects (unit_id, section, critical_aspect)
+SELECT unit_id, section, critical_aspect
+FROM stage_unit_aspects
+ORDER BY unit_id, position;
+"""
+
+REPLACE_SKILLS_SQL = """
+DELETE FROM unit_required_skills r
+USING stage_units u
+WHERE r.unit_id = u.unit_id AND u.replace_skills;
+
+INSERT INTO unit_required_skills (unit_id, skill_type, skill_section, skill_text)
+SELECT unit_id, skill_type, skill_section, skill_text
+FROM stage_unit_skills
+ORDER BY unit_id, position;
+"""
+
+
+def _copy_value(value: Any) -> str:
+    """Encode one value for COPY text format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_rows(cursor, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+    """COPY rows into a table; returns the number of rows sent."""
+    buffer = io.StringIO()
+    count = 0
+    for row in rows:
+        buffer.write("\t".join(_copy_value(value) for value in row))
+        buffer.write("\n")
+        count += 1
+    if count:
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+    return count
+
+
+def write_unit_content(cursor, units: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Stage and merge the parsed content of a batch of units.
+
+    Each unit is a dict with ``unit_id`` and any of:
+
+    - ``elements``: ``[{"number", "text", "performance_criteria": [{"number", "text"}]}]``
+    - ``critical_aspects``: ``[{"section", "text"}]``
+    - ``required_skills``: ``[{"skill_type", "section", "text"}]``
+
+    A missing or None key leaves that kind of content untouched; an empty list
+    clears it. Returns the number of staged rows per table.
+    """
+    stats = {
+        "units": 0,
+        "elements": 0,
+        "performance_criteria": 0,
+        "critical_aspects": 0,
+        "required_skills": 0,
+    }
+    if not units:
+        return stats
+
+    # A unit listed twice in one batch keeps its last content
+    units = list({unit["unit_id"]: unit for unit in units}.values())
+
+    unit_rows, element_rows, pc_rows, aspect_rows, skill_rows = [], [], [], [], []
+    for unit in units:
+        unit_id = unit["unit_id"]
+        elements = unit.get("elements")
+        aspects = unit.get("critical_aspects")
+        skills = unit.get("required_skills")
+        unit_rows.append((unit_id, elements is not None, aspects is not None, skills is not None))
+
+        seen_elements = set()
+        for position, element in enumerate(elements or []):
+            element_num = str(element.get("number", ""))
+            # Element numbers identify rows; keep the first of any duplicates
+            if element_num in seen_elements:
+                continue
+            seen_elements.add(element_num)
+            element_rows.append((unit_id, position, element_num, str(element.get("text", ""))))
+            seen_pcs = set()
+            for pc in element.get("performance_criteria", []):
+                pc_num = str(pc.get("number", ""))
+                if pc_num in seen_pcs:
+                    continue
+                seen_pcs.add(pc_num)
+                pc_rows.append((unit_id, len(pc_rows), element_num, pc_num, str(pc.get("text", ""))))
+
+        for position, aspect in enumerate(aspects or []):
+            aspect_rows.append((unit_id, position, aspect.get("section"), aspect["text"]))
+        for position, skill in enumerate(skills or []):
+            skill_rows.append(
+                (unit_id, position, skill.get("skill_type"), skill.get("section"), skill["text"])
+            )
+
+    cursor.execute(STAGING_DDL)
+    stats["units"] = copy_rows(
+        cursor, "stage_units",
+        ("unit_id", "replace_elements", "replace_aspects", "replace_skills"), unit_rows
+    )
+    stats["elements"] = copy_rows(
+        cursor, "stage_unit_elements",
+        ("unit_id", "position", "element_num", "element_text"), element_rows
+    )
+    stats["performance_criteria"] = copy_rows(
+        cursor, "stage_unit_pcs",
+        ("unit_id", "position", "element_num", "pc_num", "pc_text"), pc_rows
+    )
+    stats["critical_aspects"] = copy_rows(
+        cursor, "stage_unit_aspects",
+        ("unit_id", "position", "section", "critical_aspect"), aspect_rows
+    )
+    stats["required_skills"] = copy_rows(
+        cursor, "stage_unit_skills",
+        ("unit_id", "position", "skill_type", "skill_section", "skill_text"), skill_rows
+    )
+
+    if any(row[1] for row in unit_rows):
+        cursor.execute(MERGE_ELEMENTS_SQL)
+    if any(row[2] for row in unit_rows):
+        cursor.execute(REPLACE_ASPECTS_SQL)
+    if any(row[3] for row in unit_rows):
+        cursor.execute(REPLACE_SKILLS_SQL)
+
+    # Rebuild the served documents from the merged rows
+    refresh_unit_documents(cursor, [row[0] for row in unit_rows])
+
+    logger.debug(f"Bulk wrote unit content: {stats}")
+    return stats
+
+
+def write_unit_content_orm(db: Session, units: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Run :func:`write_unit_content` inside a SQLAlchemy session's transaction.
+
+    The session is flushed first so pending ORM changes (e.g. a new unit row)
+    are visible to the set-based statements; the caller commits.
+    """
+    db.flush()
+    cursor = db.connection().connection.cursor()
+    try:
+        return write_unit_content(cursor, units)
+    finally:
+        cursor.close()
+
+
+def elements_from_parser(elements: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Normalise element dicts from any of the parsers to the writer's shape."""
+    normalised = []
+    for element in elements or []:
+        if not isinstance(element, dict):
+            continue
+        normalised.append({
+            "number": element.get("number", element.get("element_num", "")),
+            "text": element.get("text", element.get("title", element.get("element_text", ""))),
+            "performance_criteria": [
+                {
+                    "number": pc.get("number", pc.get("pc_num", "")),
+                    "text": pc.get("text", pc.get("pc_text", "")),
+                }
+                for pc in element.get("performance_criteria", [])
+                if isinstance(pc, dict)
+            ],
+        })
+    return normalised
+
+
+def unit_content_from_parsed(unit_id: int, *documents: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build a :func:`write_unit_content` entry from ``parse_unit_xml`` results.
+
+    ``documents`` are the parsed unit XML and, when available, the assessment
+    requirements XML. Elements come from the first document that has any;
+    performance evidence and assessment conditions become critical aspects,
+    knowledge evidence and foundation skills become required skills. All
+    lists are set, so content missing from the source is cleared.
+    """
+    documents = [document for document in documents if document]
+    elements = next((d["elements"] for d in documents if d.get("elements")), [])
+
+    aspects, skills, seen = [], [], set()
+    for document in documents:
+        for key, section in CRITICAL_ASPECT_SECTIONS.items():
+            for text in document.get(key, []):
+                if ("aspect", section, text) not in seen:
+                    seen.add(("aspect", section, text))
+                    aspects.append({"section": section, "text": text})
+        for key, (skill_type, section) in REQUIRED_SKILL_SECTIONS.items():
+            for text in document.get(key, []):
+                if (skill_type, section, text) not in seen:
+                    seen.add((skill_type, section, text))
+                    skills.append({"skill_type": skill_type, "section": section, "text": text})
+        for skill in document.get("foundation_skills", []):
+            text = skill.get("description") or skill.get("skill")
+            section = (skill.get("skill") or "")[:255] or None
+            if text and ("foundation", section, text) not in seen:
+                seen.add(("foundation", section, text))
+                skills.append({"skill_type": "foundation", "section": section, "text": text})
+
+    return {
+        "unit_id": unit_id,
+        "elements": elements_from_parser(elements),
+        "critical_aspects": aspects,
+        "required_skills": skills,
+    }
@@ -0,0 +1,120 @@
+"""
+Component Index Service - Cached processed state of stored TGA components.
+
+The admin "available" pages list a page of TGA search results (up to 200) and
+flag which components are already in the database and whether they have been
+processed. Instead of one query per result, codes are looked up in an
+in-memory map of ``code -> processed`` per table; codes not in the map (or
+older than the TTL) are fetched with a single ``WHERE code = ANY(:codes)``
+query per page.
+
+The ingestion pipeline keeps the map current: batch upserts record new or
+reset components as "N" when their transaction commits (a rollback discards
+them) and the sync paths record "Y" once content is stored.
+The TTL bounds staleness for writes made by other processes (other API
+workers, the ``scripts/tga`` importers).
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import String, any_, bindparam, event
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Seconds a cached state is trusted before it is read again
+COMPONENT_INDEX_TTL = float(os.getenv("COMPONENT_INDEX_TTL", "300"))
+
+
+class ComponentIndex:
+    """Thread-safe ``code -> processed`` map per component table"""
+
+    def __init__(self, ttl: float = COMPONENT_INDEX_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # table name -> code -> (processed or None when not stored, cached at)
+        self._states: Dict[str, Dict[str, Tuple[Optional[str], float]]] = {}
+
+    def lookup(self, db: Session, model, codes: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Return the processed state of each code, None for codes not stored.
+        Cache misses are read with one query.
+        """
+        codes = list(dict.fromkeys(code for code in codes if code))
+        now = time.monotonic()
+        states, missing = {}, []
+        with self._lock:
+            cached = self._states.get(model.__tablename__, {})
+            for code in codes:
+                entry = cached.get(code)
+                if entry and now - entry[1] < self.ttl:
+                    states[code] = entry[0]
+                else:
+                    missing.append(code)
+
+        if missing:
+            stored = dict(
+                db.query(model.code, model.processed)
+                .filter(model.code == any_(bindparam("codes", missing, type_=ARRAY(String))))
+                .all()
+            )
+            fetched = {code: stored.get(code) for code in missing}
+            self._store(model, fetched, now)
+            states.update(fetched)
+            logger.debug(
+                f"Component index: {len(codes) - len(missing)} cached, "
+                f"{len(missing)} read from {model.__tablename__}"
+            )
+        return states
+
+    def update(self, model, states: Dict[str, Optional[str]]) -> None:
+        """Record the processed state of components the caller just wrote"""
+        self._store(model, states, time.monotonic())
+
+    def update_on_commit(self, db: Session, model, states: Dict[str, Optional[str]]) -> None:
+        """
+        Record the processed state of components written in ``db``'s current
+        transaction once it commits; a rollback drops them.
+        """
+        db.info.setdefault(PENDING_STATES_KEY, []).append((self, model, dict(states)))
+
+    def invalidate(self, model=None) -> None:
+        """Forget cached states for one table, or for all of them"""
+        with self._lock:
+            if model is None:
+                self._states.clear()
+            else:
+                self._states.pop(model.__tablename__, None)
+
+    def _store(self, model, states: Dict[str, Optional[str]], cached_at: float) -> None:
+        with self._lock:
+            cached = self._states.setdefault(model.__tablename__, {})
+            for code, processed in states.items():
+                cached[code] = (processed, cached_at)
+
+
+# Session.info key of states waiting for their transaction to commit
+PENDING_STATES_KEY = "component_index_pending"
+
+
+@event.listens_for(Session, "after_commit")
+def _record_pending_states(session: Session) -> None:
+    # Savepoint releases also fire after_commit; wait for the outer commit
+    if session.in_nested_transaction():
+        return
+    for index, model, states in session.info.pop(PENDING_STATES_KEY, []):
+        index.update(model, states)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_pending_states(session: Session, previous_transaction) -> None:
+    session.info.pop(PENDING_STATES_KEY, None)
+
+
+# Process-wide index shared by the routers and the ingestion pipeline
+component_index = ComponentIndex()
@@ -0,0 +1,106 @@
+"""
+Component Store Service - Batch upserts of TGA components by code.
+
+Training packages, units, qualifications and skill sets returned by TGA
+searches and detail lookups are written with one
+``INSERT ... ON CONFLICT (code) DO UPDATE`` per batch instead of a SELECT plus
+an INSERT or UPDATE per component.
+
+Update rules (the same the per-row code applied):
+
+- fields missing or None in the TGA data keep their stored value;
+- ``processed`` is reset to "N" so the component is picked up for
+  (re)processing;
+- a component listed twice in one batch is written once, last entry wins.
+
+Upserted codes are recorded in ``services.component_index`` once the
+caller's transaction commits, so the admin pages see new components without
+a lookup.
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from services.component_index import component_index
+
+logger = logging.getLogger(__name__)
+
+# Component fields copied from TGA data when the model has them
+COMPONENT_FIELDS = ("title", "description", "status", "release_date", "xml_file")
+
+
+def component_rows(model, components: Iterable[Dict[str, Any]],
+                   training_package_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Build uniform insert rows for ``model`` from TGA component dicts.
+
+    Every row has the same keys, as a multi-row VALUES list requires. A
+    missing title is filled with the code so new rows satisfy NOT NULL; the
+    upsert keeps the stored title in that case.
+    """
+    fields = [field for field in COMPONENT_FIELDS if hasattr(model, field)]
+    rows = {}
+    for component in components:
+        code = component.get("code") if isinstance(component, dict) else None
+        if not code:
+            continue
+        row = {"code": code, "processed": "N"}
+        for field in fields:
+            row[field] = component.get(field)
+        if not row.get("title"):
+            row["title"] = code
+        if hasattr(model, "training_package_id"):
+            row["training_package_id"] = training_package_id
+        rows[code] = row
+    return list(rows.values())
+
+
+def upsert_statement(model, rows: List[Dict[str, Any]]):
+    """``INSERT ... ON CONFLICT (code) DO UPDATE ... RETURNING`` for a batch of rows."""
+    stmt = insert(model).values(rows)
+    excluded = stmt.excluded
+    table = model.__table__
+
+    set_ = {"processed": excluded.processed, "updated_at": func.now()}
+    for column in rows[0]:
+        if column in ("code", "processed"):
+            continue
+        if column == "title":
+            # Titles defaulted to the code are placeholders, not updates
+            set_["title"] = case(
+                (excluded.title == excluded.code, table.c.title), else_=excluded.title
+            )
+        else:
+            set_[column] = func.coalesce(excluded[column], table.c[column])
+
+    return stmt.on_conflict_do_update(index_elements=["code"], set_=set_).returning(model)
+
+
+def upsert_components(db: Session, model, components: Iterable[Dict[str, Any]],
+                      training_package_id: Optional[int] = None) -> List[Any]:
+    """
+    Insert or update a batch of components in one statement.
+
+    Returns the stored rows as ORM instances (refreshed in the session's
+    identity map). The caller commits.
+    """
+    rows = component_rows(model, components, training_package_id)
+    if not rows:
+        return []
+    stored = db.scalars(
+        upsert_statement(model, rows), execution_options={"populate_existing": True}
+    ).all()
+    component_index.update_on_commit(db, model, {row["code"]: row["processed"] for row in rows})
+    logger.debug(f"Upserted {len(rows)} {model.__tablename__}")
+    return stored
+
+
+def upsert_component(db: Session, model, component: Dict[str, Any],
+                     training_package_id: Optional[int] = None):
+    """Insert or update a single component; returns its ORM instance."""
+    stored = upsert_components(db, model, [component], training_package_id)
+    return stored[0] if stored else None
@@ -4,74 +4,548 @@ Download Manager Service - Handles bulk download operations for training data.
 This service provides:
 - Queue-based processing for bulk downloads
 - Progress tracking and status management
+- Incremental job events (with throughput and ETA) for streaming clients
 - Error handling and recovery
+- Job deduplication, per-item checkpoints and resumable jobs
+- Skipping components whose stored release matches TGA
+- Package component sync: paginated listing of units, qualifications and
+  skill sets, concurrent unit XML fetch/parse and per-component timings
 - Integration with TGA client for data retrieval
 """
 
 import os
+import json
+import time
 import uuid
+import asyncio
 import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 from database import SessionLocal
 import models.tables as models
-from services.tga.client import TrainingGovClient
-from services.tga.exceptions import TGAClientError
+from services.tga.client import TrainingGovClient, details_summary, iter_components
+from services.tga.exceptions import TGAClientError, TGACircuitOpenError
+from services.tga.resilience import tga_breaker
+from services.tga.xml_parser import parse_unit_xml
+from services.bulk_writer import write_unit_content_orm, unit_content_from_parsed
+from services.component_store import upsert_component, upsert_components
+from services.component_index import component_index
+from services.metrics import DOWNLOAD_ITEMS_PENDING, DOWNLOAD_JOBS_ACTIVE
 
 logger = logging.getLogger(__name__)
 
+# Job statuses that still own their pending items
+ACTIVE_JOB_STATUSES = ("queued", "processing")
+# Item statuses that do not need to be processed again on resume
+FINISHED_ITEM_STATUSES = ("success", "skipped")
+# Job statuses after which no further events are emitted until a resume
+TERMINAL_JOB_STATUSES = ("completed", "failed", "paused", "interrupted")
+# Events kept per job for clients that reconnect with Last-Event-ID
+EVENT_BUFFER_SIZE = 1000
+# Event type emitted when an item reaches each checkpoint status
+ITEM_EVENT_TYPES = {
+    "success": "item_finished",
+    "skipped": "item_skipped",
+    "failed": "item_failed",
+    "pending": "item_requeued",
+}
+# Components synced for a training package: search type flag and model
+PACKAGE_COMPONENT_TYPES = {
+    "units": ("IncludeUnit", models.Unit),
+    "qualifications": ("IncludeQualification", models.Qualification),
+    "skillsets": ("IncludeSkillSet", models.Skillset),
+}
+SEARCH_TYPE_FLAGS = (
+    "IncludeAccreditedCourse",
+    "IncludeAccreditedCourseModule",
+    "IncludeQualification",
+    "IncludeSkillSet",
+    "IncludeTrainingPackage",
+    "IncludeUnit",
+    "IncludeUnitContextualisation",
+)
+# Search results per page when listing a package's components
+SEARCH_PAGE_SIZE = int(os.getenv("TGA_SEARCH_PAGE_SIZE", "100"))
+# Threads fetching and parsing unit XML during a package sync
+SYNC_WORKERS = int(os.getenv("TGA_SYNC_WORKERS", "4"))
+# Parsed units written per bulk write during a package sync
+SYNC_BATCH_SIZE = 50
+# Slowest components reported in a package's sync summary
+SLOWEST_COMPONENTS = 5
+
+
+class DownloadJobConflict(Exception):
+    """Raised when a job cannot be resumed in its current state"""
+
+
 class DownloadManager:
     """Manages bulk download operations for training packages and units"""
     
     def __init__(self):
-        self.jobs = {}  # In production, use Redis or database
+        self.jobs = {}  # Live job state; checkpoints are persisted to download_jobs
+        self.running = set()  # Job ids currently being processed
+        self._persisted = set()  # Job ids with a download_jobs row
+        self._events = {}  # Job id -> recent events, oldest first
+        self._event_ids = {}  # Job id -> id of the last emitted event
+        self._run_started = {}  # Job id -> (monotonic start, items done at start)
+        self._events_lock = threading.Lock()
         
     def create_job(self, job_type: str, items: List[str], user_id: int) -> str:
-        """Create a new download job"""
+        """
+        Create a new download job.
+
+        Codes repeated within the request are collapsed, and codes that are
+        still pending in another active job of the same type are left out and
+        recorded under ``deduplicated`` with the id of the job that owns them.
+        """
         job_id = str(uuid.uuid4())
         
+        job_items = []
+        deduplicated = {}
+        for code in dict.fromkeys(items):
+            owner = self._active_owner(job_type, code)
+            if owner:
+                deduplicated[code] = owner
+            else:
+                job_items.append(code)
+        
         self.jobs[job_id] = {
             "id": job_id,
             "type": job_type,
             "status": "queued",
             "user_id": user_id,
-            "total_items": len(items),
+            "total_items": len(job_items),
             "completed_items": 0,
             "failed_items": 0,
+            "skipped_items": 0,
             "current_item": None,
             "started_at": datetime.now().isoformat(),
             "completed_at": None,
             "errors": [],
-            "items": items,
+            "items": job_items,
+            "item_status": {code: "pending" for code in job_items},
+            "deduplicated": deduplicated,
             "results": []
         }
         
-        logger.info(f"Created download job {job_id} for {len(items)} {job_type}")
+        if deduplicated:
+            logger.info(
+                f"Job {job_id}: {len(deduplicated)} {job_type} already queued in active jobs"
+            )
+        logger.info(f"Created download job {job_id} for {len(job_items)} {job_type}")
+        self._emit(job_id, "job_queued")
         return job_id
     
     def get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
-        """Get the status of a download job"""
-        return self.jobs.get(job_id)
+        """Get the status of a download job, including TGA circuit breaker state"""
+        job = self.jobs.get(job_id)
+        if job is not None:
+            job["tga_breaker"] = tga_breaker.snapshot()
+        return job
+    
+    def is_running(self, job_id: str) -> bool:
+        """Whether a background task is currently processing the job"""
+        return job_id in self.running
+    
+    def load_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Rebuild a job from its persisted checkpoints (e.g. after a restart)"""
+        db = SessionLocal()
+        try:
+            record = db.query(models.DownloadJob).filter(
+                models.DownloadJob.id == job_id
+            ).first()
+            if not record:
+                return None
+            
+            items = list(record.items)
+            status = record.status
+            if status in ACTIVE_JOB_STATUSES:
+                # Nothing in this process is working on it any more
+                status = "interrupted"
+            
+            self.jobs[job_id] = {
+                "id": record.id,
+                "type": record.type,
+                "status": status,
+                "user_id": record.user_id,
+                "total_items": record.total_items or len(items),
+                "completed_items": record.completed_items or 0,
+                "failed_items": record.failed_items or 0,
+                "skipped_items": record.skipped_items or 0,
+                "current_item": None,
+                "started_at": record.created_at.isoformat() if record.created_at else None,
+                "completed_at": record.completed_at.isoformat() if record.completed_at else None,
+                "errors": [f"Error processing {item.code}: {item.error}" for item in items if item.error],
+                "items": [item.code for item in items],
+                "item_status": {item.code: item.status for item in items},
+                "deduplicated": {},
+                "results": [
+                    {"code": item.code, "status": item.status}
+                    for item in items
+                    if item.status != "pending"
+                ]
+            }
+            self._persisted.add(job_id)
+            return self.jobs[job_id]
+        finally:
+            db.close()
+    
+    def resume_job(self, job_id: str) -> Optional[List[str]]:
+        """
+        Prepare a failed, interrupted or paused job to run again.
+
+        Returns the codes still to be processed, in their original order,
+        starting from the first item that did not finish successfully. Codes
+        pending in another active job stay with that job and are recorded
+        under ``deduplicated``. Returns None if the job is unknown.
+
+        Raises DownloadJobConflict if the job is queued or running, or
+        completed without failed items.
+        """
+        job = self.jobs.get(job_id) or self.load_job(job_id)
+        if not job:
+            return None
+        if self.is_running(job_id) or job["status"] in ACTIVE_JOB_STATUSES:
+            raise DownloadJobConflict("Download job is still queued or running")
+        if job["status"] == "completed" and "failed" not in job["item_status"].values():
+            raise DownloadJobConflict("Download job completed without failed items")
+        
+        pending = []
+        deduplicated = {}
+        for code in job["items"]:
+            if job["item_status"].get(code) in FINISHED_ITEM_STATUSES:
+                continue
+            owner = self._active_owner(job["type"], code)
+            if owner:
+                deduplicated[code] = owner
+            else:
+                pending.append(code)
+        retry = set(pending)
+        
+        for code in pending:
+            job["item_status"][code] = "pending"
+        job.setdefault("deduplicated", {}).update(deduplicated)
+        job["results"] = [r for r in job["results"] if r["code"] not in retry]
+        job["errors"] = []
+        job["failed_items"] = sum(1 for s in job["item_status"].values() if s == "failed")
+        job["completed_items"] = sum(1 for s in job["item_status"].values() if s == "success")
+        job["skipped_items"] = sum(1 for s in job["item_status"].values() if s == "skipped")
+        job["status"] = "queued"
+        job["completed_at"] = None
+        
+        if deduplicated:
+            logger.info(
+                f"Job {job_id}: {len(deduplicated)} items left with the active jobs that own them"
+            )
+        logger.info(f"Resuming download job {job_id} with {len(pending)} remaining items")
+        return pending
+    
+    def _active_owner(self, job_type: str, code: str) -> Optional[str]:
+        """Return the id of an active job that still has ``code`` pending"""
+        for job in self.jobs.values():
+            if job["type"] != job_type or job["status"] not in ACTIVE_JOB_STATUSES:
+                continue
+            if job.get("item_status", {}).get(code) in ("pending", "processing"):
+                return job["id"]
+        return None
+    
+    def _pending_items(self, job_id: str, codes: List[str]) -> List[str]:
+        """Filter ``codes`` down to the items this job still has to process"""
+        item_status = self.jobs[job_id].get("item_status", {})
+        return [
+            code for code in dict.fromkeys(codes)
+            if item_status.get(code) == "pending"
+        ]
+    
+    def _persist_job(self, db: Session, job_id: str):
+        """Write the job and its items so progress survives a restart"""
+        if job_id in self._persisted:
+            return
+        
+        job = self.jobs[job_id]
+        try:
+            db.add(models.DownloadJob(
+                id=job_id,
+                type=job["type"],
+                status=job["status"],
+                user_id=job["user_id"],
+                total_items=job["total_items"]
+            ))
+            db.add_all([
+                models.DownloadJobItem(job_id=job_id, position=position, code=code, status="pending")
+                for position, code in enumerate(job["items"])
+            ])
+            db.commit()
+            self._persisted.add(job_id)
+        except Exception as e:
+            logger.warning(f"Checkpoints disabled for job {job_id}: {str(e)}")
+            db.rollback()
+    
+    def _checkpoint(self, db: Session, job_id: str, code: str, status: str,
+                    release: Optional[str] = None, error: Optional[str] = None):
+        """Record the outcome of one item in memory, in the database and as an event"""
+        job = self.jobs[job_id]
+        job["item_status"][code] = status
+        self._emit(job_id, ITEM_EVENT_TYPES.get(status, "item_updated"), code=code, error=error)
+        
+        if job_id not in self._persisted:
+            return
+        
+        try:
+            db.query(models.DownloadJobItem).filter(
+                models.DownloadJobItem.job_id == job_id,
+                models.DownloadJobItem.code == code
+            ).update({"status": status, "release": release, "error": error}, synchronize_session=False)
+            self._save_job_counters(db, job_id)
+            db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to checkpoint {code} for job {job_id}: {str(e)}")
+            db.rollback()
+    
+    def _save_job_counters(self, db: Session, job_id: str):
+        """Copy the in-memory counters onto the download_jobs row"""
+        job = self.jobs[job_id]
+        db.query(models.DownloadJob).filter(models.DownloadJob.id == job_id).update({
+            "status": job["status"],
+            "completed_items": job["completed_items"],
+            "failed_items": job["failed_items"],
+            "skipped_items": job["skipped_items"],
+            "completed_at": datetime.fromisoformat(job["completed_at"]) if job["completed_at"] else None
+        }, synchronize_session=False)
+    
+    def _finish_job(self, db: Session, job_id: str):
+        """Mark the job completed and persist its final counters"""
+        self.update_job_status(
+            job_id,
+            "completed",
+            completed_at=datetime.now().isoformat(),
+            current_item=None
+        )
+        
+        if job_id in self._persisted:
+            try:
+                self._save_job_counters(db, job_id)
+                db.commit()
+            except Exception as e:
+                logger.warning(f"Failed to persist completion of job {job_id}: {str(e)}")
+                db.rollback()
+    
+    def _pause_job(self, db: Session, job_id: str, code: Optional[str], error: str):
+        """Stop a job while TGA is unavailable, leaving its items resumable"""
+        job = self.jobs[job_id]
+        if code is not None:
+            self._checkpoint(db, job_id, code, "pending")
+        job["errors"].append(f"Paused: {error}")
+        self.update_job_status(job_id, "paused", current_item=None)
+        logger.warning(f"Paused download job {job_id}: {error}")
+        
+        if job_id in self._persisted:
+            try:
+                self._save_job_counters(db, job_id)
+                db.commit()
+            except Exception as e:
+                logger.warning(f"Failed to persist pause of job {job_id}: {str(e)}")
+                db.rollback()
+    
+    def _release_key(self, component_data: Dict[str, Any]) -> Optional[str]:
+        """Identify the TGA release of a component (XML file name, else release date)"""
+        for key in ("xml_file", "release_date"):
+            value = component_data.get(key)
+            if value:
+                return str(value)
+        return None
+    
+    def _is_unchanged(self, db: Session, model, component_data: Dict[str, Any]) -> bool:
+        """Whether the stored component is already processed at the same TGA release"""
+        existing = db.query(model).filter(
+            model.code == component_data["code"]
+        ).first()
+        return self._same_release(existing, component_data)
+    
+    def _same_release(self, existing, component_data: Dict[str, Any]) -> bool:
+        """Whether a stored component (row or snapshot) is processed at the release in component_data"""
+        if not existing or existing.processed != "Y":
+            return False
+        
+        # TGA XML file names carry the release number (e.g. Unit_ABC123_R2.xml)
+        if component_data.get("xml_file"):
+            return existing.xml_file == component_data["xml_file"]
+        if component_data.get("release_date") and existing.release_date:
+            return str(existing.release_date)[:10] == str(component_data["release_date"])[:10]
+        return False
     
     def update_job_status(self, job_id: str, status: str, **kwargs):
-        """Update job status and additional fields"""
+        """Update job status and additional fields, emitting an event on status changes"""
         if job_id in self.jobs:
+            previous = self.jobs[job_id]["status"]
             self.jobs[job_id]["status"] = status
             for key, value in kwargs.items():
                 self.jobs[job_id][key] = value
+            if status != previous:
+                self._emit(job_id, f"job_{status}")
     
-    def process_training_package_download(self, job_id: str, package_codes: List[str], user_id: int):
-        """Process bulk download of training packages"""
+    def _start_run(self, job_id: str):
+        """Mark a job as processing and start its throughput clock"""
+        job = self.jobs.get(job_id)
+        if job is not None:
+            done = job["completed_items"] + job["failed_items"] + job["skipped_items"]
+            self._run_started[job_id] = (time.monotonic(), done)
+        self.update_job_status(job_id, "processing")
+        self.running.add(job_id)
+    
+    def _start_item(self, job_id: str, code: str):
+        """Mark one item as being processed"""
+        self.update_job_status(job_id, "processing", current_item=code)
+        self.jobs[job_id]["item_status"][code] = "processing"
+        self._emit(job_id, "item_started", code=code)
+    
+    def progress(self, job_id: str) -> Dict[str, Any]:
+        """Counters, throughput (items/second) and ETA for the current run of a job"""
+        job = self.jobs[job_id]
+        done = job["completed_items"] + job["failed_items"] + job["skipped_items"]
+        progress = {
+            "total": job["total_items"],
+            "completed": job["completed_items"],
+            "failed": job["failed_items"],
+            "skipped": job["skipped_items"],
+            "remaining": max(job["total_items"] - done, 0),
+            "percent": round(100 * done / job["total_items"], 1) if job["total_items"] else 100.0,
+            "items_per_second": None,
+            "eta_seconds": None,
+        }
+        
+        started = self._run_started.get(job_id)
+        if started:
+            elapsed = time.monotonic() - started[0]
+            processed = done - started[1]
+            if elapsed > 0 and processed > 0:
+                rate = processed / elapsed
+                progress["items_per_second"] = round(rate, 3)
+                progress["eta_seconds"] = round(progress["remaining"] / rate, 1)
+        return progress
+    
+    def _emit(self, job_id: str, event_type: str, **data):
+        """Append an event to the job's stream"""
+        if job_id not in self.jobs:
+            return
+        
+        with self._events_lock:
+            event_id = self._event_ids.get(job_id, 0) + 1
+            self._event_ids[job_id] = event_id
+            event = {
+                "id": event_id,
+                "type": event_type,
+                "job_id": job_id,
+                "timestamp": datetime.now().isoformat(),
+                "status": self.jobs[job_id]["status"],
+                **data,
+                "progress": self.progress(job_id),
+            }
+            self._events.setdefault(job_id, deque(maxlen=EVENT_BUFFER_SIZE)).append(event)
+        self._update_queue_metrics()
+    
+    def _update_queue_metrics(self):
+        """Publish this process's active jobs and pending items"""
+        active = {status: 0 for status in ACTIVE_JOB_STATUSES}
+        pending = 0
+        for job in list(self.jobs.values()):
+            if job.get("status") in active:
+                active[job["status"]] += 1
+                done = sum(job.get(key, 0) for key in ("completed_items", "failed_items", "skipped_items"))
+                pending += max(0, job.get("total_items", 0) - done)
+        for status, count in active.items():
+            DOWNLOAD_JOBS_ACTIVE.labels(status).set(count)
+        DOWNLOAD_ITEMS_PENDING.set(pending)
+    
+    def events_since(self, job_id: str, last_event_id: int = 0) -> List[Dict[str, Any]]:
+        """Buffered events of a job newer than ``last_event_id``"""
+        with self._events_lock:
+            return [e for e in self._events.get(job_id, ()) if e["id"] > last_event_id]
+    
+    async def stream_events(self, job_id: str, last_event_id: int = 0,
+                            poll_interval: float = 0.5, heartbeat: float = 15.0):
+        """
+        Yield Server-Sent Events for a job until it stops running.
+        
+        Events missed while disconnected are replayed from ``last_event_id``
+        as long as they are still buffered.
+        """
+        idle = 0.0
+        while True:
+            events = self.events_since(job_id, last_event_id)
+            for event in events:
+                last_event_id = event["id"]
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            
+            job = self.jobs.get(job_id)
+            if job is None or (job["status"] in TERMINAL_JOB_STATUSES and job_id not in self.running):
+                if not self.events_since(job_id, last_event_id):
+                    return
+                continue
+            
+            if events:
+                idle = 0.0
+            elif idle >= heartbeat:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(poll_interval)
+            idle += poll_interval
+    
+    def job_summary(self, job_id: str, page: int = 1, page_size: int = 50,
+                    result_status: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Compact job status: counters, progress and one page of results"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        
+        results = job["results"]
+        if result_status:
+            results = [r for r in results if r.get("status") == result_status]
+        start = (page - 1) * page_size
+        
+        return {
+            "id": job_id,
+            "type": job["type"],
+            "status": job["status"],
+            "current_item": job["current_item"],
+            "started_at": job["started_at"],
+            "completed_at": job["completed_at"],
+            "progress": self.progress(job_id),
+            "error_count": len(job["errors"]),
+            "last_error": job["errors"][-1] if job["errors"] else None,
+            "last_event_id": self._event_ids.get(job_id, 0),
+            "tga_breaker": tga_breaker.snapshot(),
+            "results": {
+                "items": results[start:start + page_size],
+                "total": len(results),
+                "page": page,
+                "page_size": page_size,
+            },
+        }
+    
+    def process_training_package_download(self, job_id: str, package_codes: List[str], user_id: int,
+                                          force: bool = False):
+        """
+        Process bulk download of training packages.
+
+        Packages already processed at the release TGA reports are skipped
+        unless ``force`` is set.
+        """
         logger.info(f"Starting training package download job {job_id}")
         
         # Update job status
-        self.update_job_status(job_id, "processing")
+        self._start_run(job_id)
         
         # Create new database session for background task
-        db = SessionLocal()
+        db = None
         
         try:
+            db = SessionLocal()
+            
             # Get TGA credentials
             username = os.getenv("TGA_USERNAME")
             password = os.getenv("TGA_PASSWORD")
@@ -85,35 +559,61 @@ class DownloadManager:
                 return
             
             client = TrainingGovClient(username=username, password=password)
+            self._persist_job(db, job_id)
             
-            for package_code in package_codes:
+            for package_code in self._pending_items(job_id, package_codes):
+                release = None
                 try:
                     # Update current package being processed
-                    self.update_job_status(job_id, "processing", current_item=package_code)
+                    self._start_item(job_id, package_code)
                     
                     # Get package details from TGA
-                    package_data = client.get_component_details(package_code)
+                    package_data = details_summary(client.get_component_details(package_code))
                     
-                    if not package_data or not isinstance(package_data, dict):
+                    if not package_data:
+                        error = f"Package {package_code} not found in TGA"
                         self.jobs[job_id]["failed_items"] += 1
-                        self.jobs[job_id]["errors"].append(f"Package {package_code} not found in TGA")
+                        self.jobs[job_id]["errors"].append(error)
+                        self._checkpoint(db, job_id, package_code, "failed", error=error)
+                        continue
+                    
+                    release = self._release_key(package_data)
+                    if not force and self._is_unchanged(db, models.TrainingPackage, package_data):
+                        self.jobs[job_id]["skipped_items"] += 1
+                        self.jobs[job_id]["results"].append({
+                            "code": package_code,
+                            "status": "skipped",
+                            "reason": "unchanged"
+                        })
+                        self._checkpoint(db, job_id, package_code, "skipped", release=release)
+                        logger.info(f"Package {package_code} unchanged at {release}, skipped")
                         continue
                     
                     # Store or update package in database
                     package = self._store_training_package(db, package_data)
                     
-                    # Queue units download for this package
-                    self._queue_units_download(db, client, package, job_id)
+                    # Sync the package's units, qualifications and skill sets
+                    summary = self._sync_package_components(db, client, package, job_id, force=force)
+                    if not summary["units_failed"]:
+                        setattr(package, "processed", "Y")
+                        db.commit()
+                        component_index.update(models.TrainingPackage, {package.code: "Y"})
                     
                     self.jobs[job_id]["completed_items"] += 1
                     self.jobs[job_id]["results"].append({
                         "code": package_code,
                         "status": "success",
-                        "package_id": package.id if package else None
+                        "package_id": package.id if package else None,
+                        "components": summary
                     })
+                    self._checkpoint(db, job_id, package_code, "success", release=release)
                     
                     logger.info(f"Successfully processed package {package_code}")
                     
+                except TGACircuitOpenError as e:
+                    db.rollback()
+                    self._pause_job(db, job_id, package_code, str(e))
+                    return
                 except Exception as e:
                     self.jobs[job_id]["failed_items"] += 1
                     error_msg = f"Error processing {package_code}: {str(e)}"
@@ -125,17 +625,16 @@ class DownloadManager:
                     })
                     logger.error(error_msg)
                     db.rollback()
+                    self._checkpoint(db, job_id, package_code, "failed", release=release, error=str(e))
             
             # Mark job as completed
-            self.update_job_status(
-                job_id,
-                "completed",
-                completed_at=datetime.now().isoformat(),
-                current_item=None
-            )
+            self._finish_job(db, job_id)
             
             logger.info(f"Completed training package download job {job_id}")
             
+        except TGACircuitOpenError as e:
+            self.update_job_status(job_id, "paused", errors=[f"Paused: {str(e)}"])
+            logger.warning(f"Paused download job {job_id}: {str(e)}")
         except Exception as e:
             error_msg = f"Bulk download failed: {str(e)}"
             self.update_job_status(
@@ -145,19 +644,29 @@ class DownloadManager:
             )
             logger.error(error_msg)
         finally:
-            db.close()
+            self.running.discard(job_id)
+            if db is not None:
+                db.close()
     
-    def process_units_download(self, job_id: str, unit_codes: List[str], user_id: int):
-        """Process bulk download of units with full data population"""
+    def process_units_download(self, job_id: str, unit_codes: List[str], user_id: int,
+                               force: bool = False):
+        """
+        Process bulk download of units with full data population.
+
+        Units already processed at the release TGA reports are skipped
+        unless ``force`` is set.
+        """
         logger.info(f"Starting units download job {job_id}")
         
         # Update job status
-        self.update_job_status(job_id, "processing")
+        self._start_run(job_id)
         
         # Create new database session for background task
-        db = SessionLocal()
+        db = None
         
         try:
+            db = SessionLocal()
+            
             # Get TGA credentials
             username = os.getenv("TGA_USERNAME")
             password = os.getenv("TGA_PASSWORD")
@@ -171,18 +680,34 @@ class DownloadManager:
                 return
             
             client = TrainingGovClient(username=username, password=password)
+            self._persist_job(db, job_id)
             
-            for unit_code in unit_codes:
+            for unit_code in self._pending_items(job_id, unit_codes):
+                release = None
                 try:
                     # Update current unit being processed
-                    self.update_job_status(job_id, "processing", current_item=unit_code)
+                    self._start_item(job_id, unit_code)
                     
                     # Get unit details from TGA
-                    unit_data = client.get_component_details(unit_code)
+                    unit_data = details_summary(client.get_component_details(unit_code))
                     
-                    if not unit_data or not isinstance(unit_data, dict):
+                    if not unit_data:
+                        error = f"Unit {unit_code} not found in TGA"
                         self.jobs[job_id]["failed_items"] += 1
-                        self.jobs[job_id]["errors"].append(f"Unit {unit_code} not found in TGA")
+                        self.jobs[job_id]["errors"].append(error)
+                        self._checkpoint(db, job_id, unit_code, "failed", error=error)
+                        continue
+                    
+                    release = self._release_key(unit_data)
+                    if not force and self._is_unchanged(db, models.Unit, unit_data):
+                        self.jobs[job_id]["skipped_items"] += 1
+                        self.jobs[job_id]["results"].append({
+                            "code": unit_code,
+                            "status": "skipped",
+                            "reason": "unchanged"
+                        })
+                        self._checkpoint(db, job_id, unit_code, "skipped", release=release)
+                        logger.info(f"Unit {unit_code} unchanged at {release}, skipped")
                         continue
                     
                     # Store or update unit in database
@@ -197,9 +722,14 @@ class DownloadManager:
                         "status": "success",
                         "unit_id": unit.id if unit else None
                     })
+                    self._checkpoint(db, job_id, unit_code, "success", release=release)
                     
                     logger.info(f"Successfully processed unit {unit_code}")
                     
+                except TGACircuitOpenError as e:
+                    db.rollback()
+                    self._pause_job(db, job_id, unit_code, str(e))
+                    return
                 except Exception as e:
                     self.jobs[job_id]["failed_items"] += 1
                     error_msg = f"Error processing {unit_code}: {str(e)}"
@@ -211,17 +741,16 @@ class DownloadManager:
                     })
                     logger.error(error_msg)
                     db.rollback()
+                    self._checkpoint(db, job_id, unit_code, "failed", release=release, error=str(e))
             
             # Mark job as completed
-            self.update_job_status(
-                job_id,
-                "completed",
-                completed_at=datetime.now().isoformat(),
-                current_item=None
-            )
+            self._finish_job(db, job_id)
             
             logger.info(f"Completed units download job {job_id}")
             
+        except TGACircuitOpenError as e:
+            self.update_job_status(job_id, "paused", errors=[f"Paused: {str(e)}"])
+            logger.warning(f"Paused download job {job_id}: {str(e)}")
         except Exception as e:
             error_msg = f"Units bulk download failed: {str(e)}"
             self.update_job_status(
@@ -231,195 +760,281 @@ class DownloadManager:
             )
             logger.error(error_msg)
         finally:
-            db.close()
+            self.running.discard(job_id)
+            if db is not None:
+                db.close()
     
     def _store_training_package(self, db: Session, package_data: Dict[str, Any]) -> models.TrainingPackage:
         """Store or update training package in database"""
-        package = db.query(models.TrainingPackage).filter(
-            models.TrainingPackage.code == package_data["code"]
-        ).first()
+        package = upsert_component(db, models.TrainingPackage, package_data)
+        db.commit()
+        return package
+    
+    def _store_unit(self, db: Session, unit_data: Dict[str, Any], commit: bool = True) -> models.Unit:
+        """Store or update unit in database; with commit=False the caller commits"""
+        unit = upsert_component(db, models.Unit, unit_data)
+        if commit:
+            db.commit()
+        return unit
+    
+    def _list_package_components(self, client: TrainingGovClient, package_code: str) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        List a package's units, qualifications and skill sets, following
+        search pages until TGA has no more results.
+        """
+        components = {}
+        for kind, (flag, _model) in PACKAGE_COMPONENT_TYPES.items():
+            component_types = {name: name == flag for name in SEARCH_TYPE_FLAGS}
+            found = {}
+            for component in iter_components(
+                client,
+                filter_text=package_code,
+                component_types=component_types,
+                page_size=SEARCH_PAGE_SIZE
+            ):
+                code = component.get("code") if isinstance(component, dict) else None
+                if code and code.startswith(package_code):
+                    found.setdefault(code, component)
+            components[kind] = list(found.values())
+        return components
+    
+    def _sync_package_components(self, db: Session, client: TrainingGovClient,
+                                 package: models.TrainingPackage, job_id: str,
+                                 force: bool = False) -> Dict[str, Any]:
+        """
+        Component sync stage for a training package.
+
+        All components are listed and upserted in one transaction (one
+        statement per component type), then unit
+        XML is fetched and parsed concurrently and written in bulk batches.
+        Units already processed at the release TGA reports are not fetched
+        again unless ``force`` is set.
+        Per-component timings are kept on the job under
+        ``component_timings``; the returned summary has counts, totals and
+        the slowest components.
+        """
+        started = time.perf_counter()
+        listed = self._list_package_components(client, package.code)
+        listing_seconds = time.perf_counter() - started
         
-        if package:
-            # Update existing package
-            updates = {}
-            if "title" in package_data and package_data.get("title") is not None:
-                updates["title"] = package_data["title"]
-            if "description" in package_data and package_data.get("description") is not None:
-                updates["description"] = package_data.get("description")
-            if "status" in package_data and package_data.get("status") is not None:
-                updates["status"] = package_data.get("status")
-            if "release_date" in package_data and package_data.get("release_date") is not None:
-                updates["release_date"] = package_data.get("release_date")
-            if "xml_file" in package_data and package_data.get("xml_file") is not None:
-                updates["xml_file"] = package_data.get("xml_file")
-            
-            updates["processed"] = "N"  # Mark for reprocessing
-            
-            # Update using direct attribute assignment
-            for key, value in updates.items():
-                setattr(package, key, value)
-        else:
-            # Create new package
-            new_package_data = {
-                "code": package_data["code"],
-                "title": package_data["title"],
-                "processed": "N"
+        # Snapshot the stored units before the upsert resets them to unprocessed
+        previous = {}
+        if not force and listed.get("units"):
+            previous = {
+                row.code: row for row in db.query(
+                    models.Unit.code, models.Unit.processed,
+                    models.Unit.xml_file, models.Unit.release_date
+                ).filter(models.Unit.code.in_([c["code"] for c in listed["units"]]))
             }
-            
-            if "description" in package_data and package_data.get("description") is not None:
-                new_package_data["description"] = package_data.get("description")
-            if "status" in package_data and package_data.get("status") is not None:
-                new_package_data["status"] = package_data.get("status")
-            if "release_date" in package_data and package_data.get("release_date") is not None:
-                new_package_data["release_date"] = package_data.get("release_date")
-            if "xml_file" in package_data and package_data.get("xml_file") is not None:
-                new_package_data["xml_file"] = package_data.get("xml_file")
-                
-            package = models.TrainingPackage(**new_package_data)
-            db.add(package)
         
+        units = []
+        for kind, components in listed.items():
+            model = PACKAGE_COMPONENT_TYPES[kind][1]
+            stored = upsert_components(db, model, components, training_package_id=package.id)
+            if kind == "units":
+                units = stored
         db.commit()
-        db.refresh(package)
-        return package
+        logger.info(
+            f"Listed package {package.code}: "
+            + ", ".join(f"{len(items)} {kind}" for kind, items in listed.items())
+        )
+        
+        timings = self._sync_unit_contents(db, client, units, previous)
+        self.jobs[job_id].setdefault("component_timings", []).extend(
+            dict(timing, package=package.code) for timing in timings
+        )
+        
+        summary = {kind: len(items) for kind, items in listed.items()}
+        summary["units_processed"] = sum(1 for t in timings if t["status"] == "success")
+        summary["units_failed"] = sum(1 for t in timings if t["status"] == "failed")
+        summary["units_unchanged"] = sum(1 for t in timings if t.get("reason") == "unchanged")
+        summary["timings"] = {
+            "listing_seconds": round(listing_seconds, 3),
+            "fetch_seconds": round(sum(t.get("fetch_seconds", 0) for t in timings), 3),
+            "parse_seconds": round(sum(t.get("parse_seconds", 0) for t in timings), 3),
+            "store_seconds": round(sum(t.get("store_seconds", 0) for t in timings), 3),
+            "wall_seconds": round(time.perf_counter() - started, 3),
+            "workers": max(1, SYNC_WORKERS),
+            "slowest": sorted(
+                timings, key=lambda t: t.get("total_seconds", 0), reverse=True
+            )[:SLOWEST_COMPONENTS],
+        }
+        self._emit(job_id, "package_components", code=package.code, summary=summary)
+        return summary
     
-    def _store_unit(self, db: Session, unit_data: Dict[str, Any]) -> models.Unit:
-        """Store or update unit in database"""
-        unit = db.query(models.Unit).filter(
-            models.Unit.code == unit_data["code"]
-        ).first()
+    def _fetch_unit_content(self, client_factory, code: str, previous=None):
+        """
+        Fetch and parse one unit's XML documents; runs in a worker thread.
+        Returns (parsed documents, release details, timing). Nothing is
+        downloaded when ``previous`` (the stored unit) is processed at the
+        current release; the timing is then marked unchanged.
+        """
+        timing = {"code": code, "type": "unit"}
+        client = client_factory()
+        started = time.perf_counter()
+        details = client.get_component_details(code, show_files=True, show_releases=True)
+        release = details_summary(details)
+        if self._same_release(previous, release):
+            timing["fetch_seconds"] = round(time.perf_counter() - started, 4)
+            timing.update(status="skipped", reason="unchanged")
+            return [], release, timing
+        xml_data = client.get_component_xml(code, details=details)
+        timing["fetch_seconds"] = round(time.perf_counter() - started, 4)
         
-        if unit:
-            # Update existing unit
-            updates = {}
-            if "title" in unit_data and unit_data.get("title") is not None:
-                updates["title"] = unit_data["title"]
-            if "description" in unit_data and unit_data.get("description") is not None:
-                updates["description"] = unit_data.get("description")
-            if "status" in unit_data and unit_data.get("status") is not None:
-                updates["status"] = unit_data.get("status")
-            if "release_date" in unit_data and unit_data.get("release_date") is not None:
-                updates["release_date"] = unit_data.get("release_date")
-            if "xml_file" in unit_data and unit_data.get("xml_file") is not None:
-                updates["xml_file"] = unit_data.get("xml_file")
-            
-            updates["processed"] = "N"  # Mark for reprocessing
-            
-            # Update using direct attribute assignment
-            for key, value in updates.items():
-                setattr(unit, key, value)
-        else:
-            # Create new unit
-            new_unit_data = {
-                "code": unit_data["code"],
-                "title": unit_data["title"],
-                "processed": "N"
+        started = time.perf_counter()
+        parsed = []
+        if xml_data and xml_data.get("xml"):
+            parsed.append(parse_unit_xml(xml_data["xml"]))
+            if xml_data.get("assessment_xml"):
+                parsed.append(parse_unit_xml(xml_data["assessment_xml"]))
+        timing["parse_seconds"] = round(time.perf_counter() - started, 4)
+        return parsed, release, timing
+    
+    def _sync_unit_contents(self, db: Session, client: TrainingGovClient,
+                            units: List[models.Unit],
+                            previous: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Fetch, parse and store the content of many units.
+
+        Fetching and parsing run in SYNC_WORKERS threads, each with its own
+        TGA client; results are written from this thread in batches of
+        SYNC_BATCH_SIZE. Units whose ``previous`` state (code -> stored row)
+        is processed at the current release are only marked processed again.
+        An open circuit breaker cancels the remaining units and propagates.
+        Returns one timing dict per unit.
+        """
+        previous = previous or {}
+        local = threading.local()
+        
+        def client_factory():
+            if SYNC_WORKERS <= 1:
+                return client
+            if not hasattr(local, "client"):
+                local.client = TrainingGovClient(
+                    username=os.getenv("TGA_USERNAME"),
+                    password=os.getenv("TGA_PASSWORD")
+                )
+            return local.client
+        
+        timings = []
+        pending = []
+        unchanged = []
+        with ThreadPoolExecutor(max_workers=max(1, SYNC_WORKERS)) as executor:
+            futures = {
+                executor.submit(
+                    self._fetch_unit_content, client_factory, unit.code, previous.get(unit.code)
+                ): unit
+                for unit in units
             }
-            
-            if "description" in unit_data and unit_data.get("description") is not None:
-                new_unit_data["description"] = unit_data.get("description")
-            if "status" in unit_data and unit_data.get("status") is not None:
-                new_unit_data["status"] = unit_data.get("status")
-            if "release_date" in unit_data and unit_data.get("release_date") is not None:
-                new_unit_data["release_date"] = unit_data.get("release_date")
-            if "xml_file" in unit_data and unit_data.get("xml_file") is not None:
-                new_unit_data["xml_file"] = unit_data.get("xml_file")
+            for future in as_completed(futures):
+                unit = futures[future]
+                try:
+                    parsed, release, timing = future.result()
+                except TGACircuitOpenError:
+                    for other in futures:
+                        other.cancel()
+                    raise
+                except Exception as e:
+                    logger.error(f"Error fetching XML for unit {unit.code}: {str(e)}")
+                    timings.append({"code": unit.code, "type": "unit", "status": "failed", "error": str(e)})
+                    continue
                 
-            unit = models.Unit(**new_unit_data)
-            db.add(unit)
+                if timing.get("reason") == "unchanged":
+                    unchanged.append(unit)
+                    timings.append(timing)
+                    continue
+                if not parsed:
+                    timing.update(status="skipped", reason="no XML")
+                    timings.append(timing)
+                    continue
+                
+                pending.append((unit, parsed, release, timing))
+                if len(pending) >= SYNC_BATCH_SIZE:
+                    timings.extend(self._store_unit_contents(db, pending))
+                    pending = []
         
-        db.commit()
-        db.refresh(unit)
-        return unit
+        if pending:
+            timings.extend(self._store_unit_contents(db, pending))
+        if unchanged:
+            # The listing upsert reset these to unprocessed
+            for unit in unchanged:
+                setattr(unit, "processed", "Y")
+            db.commit()
+            component_index.update(models.Unit, {unit.code: "Y" for unit in unchanged})
+        return timings
     
-    def _queue_units_download(self, db: Session, client: TrainingGovClient, package: models.TrainingPackage, job_id: str):
-        """Queue units download for a training package"""
+    def _store_unit_contents(self, db: Session, batch) -> List[Dict[str, Any]]:
+        """
+        Write a batch of parsed units in one transaction; if the batch fails
+        the units are retried one by one. Returns their timings.
+        """
+        started = time.perf_counter()
         try:
-            # Search for units in this training package
-            component_types = {
-                'IncludeAccreditedCourse': False,
-                'IncludeAccreditedCourseModule': False,
-                'IncludeQualification': False,
-                'IncludeSkillSet': False,
-                'IncludeTrainingPackage': False,
-                'IncludeUnit': True,
-                'IncludeUnitContextualisation': False
-            }
-            
-            # Search for units with training package code prefix
-            result = client.search_components(
-                filter_text=package.code,
-                component_types=component_types,
-                page=1,
-                page_size=500  # Large page size to get all units
-            )
-            
-            units = result.get('components', [])
-            
-            # Store basic unit information
-            for unit_data in units:
-                if unit_data["code"].startswith(package.code):
-                    self._store_unit(db, unit_data)
-            
-            logger.info(f"Queued {len(units)} units for package {package.code}")
-            
+            write_unit_content_orm(db, [
+                unit_content_from_parsed(unit.id, *parsed) for unit, parsed, _release, _timing in batch
+            ])
+            for unit, _parsed, release, _timing in batch:
+                setattr(unit, "processed", "Y")
+                # Keep the release so the next sync can tell whether it changed
+                for field in ("xml_file", "release_date"):
+                    if release.get(field):
+                        setattr(unit, field, release[field])
+            db.commit()
+            component_index.update(models.Unit, {unit.code: "Y" for unit, *_rest in batch})
         except Exception as e:
-            logger.error(f"Error queuing units for package {package.code}: {str(e)}")
+            db.rollback()
+            if len(batch) == 1:
+                unit, _parsed, _release, timing = batch[0]
+                logger.error(f"Error storing content for unit {unit.code}: {str(e)}")
+                timing.update(status="failed", error=str(e))
+                return [timing]
+            logger.warning(f"Bulk write of {len(batch)} units failed, retrying one by one: {str(e)}")
+            return [timing for item in batch for timing in self._store_unit_contents(db, [item])]
+        
+        store_seconds = (time.perf_counter() - started) / len(batch)
+        timings = []
+        for _unit, _parsed, _release, timing in batch:
+            timing["store_seconds"] = round(store_seconds, 4)
+            timing["total_seconds"] = round(
+                timing["fetch_seconds"] + timing["parse_seconds"] + store_seconds, 4
+            )
+            timing["status"] = "success"
+            timings.append(timing)
+        return timings
     
     def _process_unit_xml(self, db: Session, client: TrainingGovClient, unit: models.Unit, job_id: str):
-        """Process unit XML to populate all related tables"""
+        """
+        Process unit XML to populate all related tables. Raises (after rolling
+        back) when the content cannot be stored, so the item is marked failed
+        and retried on resume.
+        """
         try:
             # Get XML content for the unit
             xml_data = client.get_component_xml(unit.code)
             
             if not xml_data or "xml" not in xml_data:
-                logger.warning(f"No XML data found for unit {unit.code}")
-                return
+                raise TGAClientError(f"No XML data found for unit {unit.code}")
             
-            # Parse elements and performance criteria (existing functionality)
-            elements = client.extract_elements(xml_data["xml"])
-            
-            if elements:
-                # Clear existing elements and performance criteria
-                db.query(models.UnitPerformanceCriteria).filter(
-                    models.UnitPerformanceCriteria.unit_id == unit.id
-                ).delete()
-                
-                db.query(models.UnitElement).filter(
-                    models.UnitElement.unit_id == unit.id
-                ).delete()
-                
-                # Insert new elements and performance criteria
-                for element_data in elements:
-                    element = models.UnitElement(
-                        unit_id=unit.id,
-                        element_num=str(element_data.get("number", "")),
-                        element_text=str(element_data.get("title", ""))
-                    )
-                    db.add(element)
-                    db.flush()  # Flush to get the ID
-                    
-                    # Insert performance criteria
-                    for pc_data in element_data.get("performance_criteria", []):
-                        pc = models.UnitPerformanceCriteria(
-                            element_id=element.id,
-                            unit_id=unit.id,
-                            pc_num=str(pc_data.get("number", "")),
-                            pc_text=str(pc_data.get("text", ""))
-                        )
-                        db.add(pc)
+            # One parse per document yields elements, evidence and skills
+            parsed = [parse_unit_xml(xml_data["xml"])]
+            if xml_data.get("assessment_xml"):
+                parsed.append(parse_unit_xml(xml_data["assessment_xml"]))
             
-            # TODO: Parse and populate critical aspects, required skills, qualifications, skillsets
-            # This will be implemented in Phase 3
+            # Merge elements/PCs and replace critical aspects and required skills
+            stats = write_unit_content_orm(db, [unit_content_from_parsed(unit.id, *parsed)])
+            logger.debug(f"Stored content for unit {unit.code}: {stats}")
             
             # Mark unit as processed
             setattr(unit, "processed", "Y")
             db.commit()
+            component_index.update(models.Unit, {unit.code: "Y"})
             
             logger.info(f"Successfully processed XML for unit {unit.code}")
             
         except Exception as e:
             logger.error(f"Error processing XML for unit {unit.code}: {str(e)}")
             db.rollback()
+            raise
 
 # Global instance
 download_manager = DownloadManager()
@@ -0,0 +1,150 @@
+"""
+Metrics Service - Prometheus metrics for the API.
+
+Exposed at ``/metrics`` in the Prometheus text format:
+
+- HTTP request counts, latency and SQL statements per request, labelled by
+  route template (fed by ``services.request_timing``);
+- database pool connections open and checked out (pool events);
+- quiz answers graded and XP awarded;
+- download job queue depth (active jobs and pending items);
+- TGA call latency and errors by operation.
+
+Metrics are plain ``prometheus_client`` counters, gauges and histograms
+updated in-process; nothing is computed at scrape time. When
+``PROMETHEUS_MULTIPROC_DIR`` is set (several gunicorn/uvicorn workers) each
+worker writes its values to its own memory-mapped files and ``/metrics``
+aggregates them. The directory must be emptied before the server starts, and
+gunicorn's ``child_exit`` hook should call
+``prometheus_client.multiprocess.mark_process_dead(worker.pid)``.
+"""
+
+import os
+from typing import Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+HTTP_REQUESTS = Counter(
+    "learnonline_http_requests_total",
+    "HTTP requests by route template and status",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "learnonline_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+HTTP_REQUEST_SQL_STATEMENTS = Histogram(
+    "learnonline_http_request_sql_statements",
+    "SQL statements run per HTTP request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+
+DB_POOL_CONNECTIONS = Gauge(
+    "learnonline_db_pool_connections",
+    "Database connections open in the pool",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "learnonline_db_pool_checked_out",
+    "Database connections checked out of the pool",
+    multiprocess_mode="livesum",
+)
+
+QUIZ_ANSWERS = Counter(
+    "learnonline_quiz_answers_total",
+    "Quiz answers graded",
+    ["result"],
+)
+XP_AWARDED = Counter(
+    "learnonline_xp_awarded_total",
+    "Experience points awarded",
+    ["source"],
+)
+
+DOWNLOAD_JOBS_ACTIVE = Gauge(
+    "learnonline_download_jobs_active",
+    "Download jobs queued or processing",
+    ["status"],
+    multiprocess_mode="livesum",
+)
+DOWNLOAD_ITEMS_PENDING = Gauge(
+    "learnonline_download_items_pending",
+    "Items of active download jobs not yet processed",
+    multiprocess_mode="livesum",
+)
+
+TGA_REQUEST_DURATION = Histogram(
+    "learnonline_tga_request_duration_seconds",
+    "TGA call latency per attempt",
+    ["operation"],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+TGA_REQUEST_ERRORS = Counter(
+    "learnonline_tga_request_errors_total",
+    "Failed TGA calls by operation and kind (transient, fault, circuit_open)",
+    ["operation", "kind"],
+)
+
+
+def observe_request(method: str, route: str, status: int, seconds: float, sql_count: int) -> None:
+    """Record one finished HTTP request"""
+    HTTP_REQUESTS.labels(method, route, str(status)).inc()
+    HTTP_REQUEST_DURATION.labels(method, route).observe(seconds)
+    HTTP_REQUEST_SQL_STATEMENTS.labels(method, route).observe(sql_count)
+
+
+def _on_connect(dbapi_connection, connection_record):
+    DB_POOL_CONNECTIONS.inc()
+
+
+def _on_close(dbapi_connection, connection_record):
+    DB_POOL_CONNECTIONS.dec()
+
+
+def _on_close_detached(dbapi_connection):
+    DB_POOL_CONNECTIONS.dec()
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_CHECKED_OUT.inc()
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    DB_POOL_CHECKED_OUT.dec()
+
+
+def install_pool_metrics(engine) -> None:
+    """Track open and checked out connections of ``engine``'s pool"""
+    pool = engine.pool
+    if event.contains(pool, "checkout", _on_checkout):
+        return
+    event.listen(pool, "connect", _on_connect)
+    event.listen(pool, "close", _on_close)
+    event.listen(pool, "close_detached", _on_close_detached)
+    event.listen(pool, "checkout", _on_checkout)
+    event.listen(pool, "checkin", _on_checkin)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Exposition body and content type, aggregating workers in multiprocess mode"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,555 @@
+"""
+Pack Import Service - Streaming import of question packs.
+
+A question pack is a JSON document with header fields (training package,
+source, generation date) and a ``units`` array of units with their elements,
+performance criteria and generated questions. Full-package packs hold
+thousands of questions, so they are imported without loading the document
+or running per-row lookups:
+
+- uploads are parsed incrementally with ijson, one unit at a time;
+- units are processed in chunks: one upsert for the chunk's units, one
+  preload each of their elements, assessments and performance criteria into
+  ``code -> id`` maps, one multi-row insert per missing kind and one bulk
+  insert of the questions;
+- every chunk is committed, and progress is recorded on the job and on the
+  ``question_packs`` row.
+
+Re-imports are differential. Every imported question stores a hash of its
+pack content; for the pack's units, questions with a known hash are left
+alone, new hashes are inserted as drafts, and stored questions missing from
+the pack are retired (``is_active=False``, ``review_status="retired"``).
+A retired question that comes back is restored to draft. Questions written
+by teachers are never touched. The importer's ``diff`` counts each outcome.
+
+Upload imports run as background jobs (see ``PackImportManager``); the JSON
+body endpoint uses the same chunked importer inline.
+"""
+
+import os
+import json
+import uuid
+import hashlib
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import ijson
+from sqlalchemy import func, insert, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+import models.tables as models
+from services.component_index import component_index
+from services.unit_documents import refresh_unit_documents
+
+logger = logging.getLogger(__name__)
+
+# Units written and committed together
+PACK_IMPORT_CHUNK_UNITS = int(os.getenv("PACK_IMPORT_CHUNK_UNITS", "25"))
+
+# Top-level pack fields copied to the question_packs row
+PACK_HEADER_FIELDS = ("training_package", "source_url", "generated_at")
+
+# Prefixes of the pack object: a bare pack or the {"pack_data": ...} request body
+PACK_ROOTS = ("", "pack_data.")
+
+
+class PackImportError(Exception):
+    """Raised when a pack document cannot be imported"""
+
+
+def read_pack_header(path: str) -> Tuple[str, Dict[str, Any], int]:
+    """
+    Scan a pack file for its header fields and unit count without building
+    the units. Returns the prefix of the pack object ("" for a bare pack,
+    "pack_data." for the ``{"pack_data": {...}}`` request body), the header
+    and the number of units. A file with both a ``pack_data`` object and
+    top-level pack fields is rejected as ambiguous.
+    """
+    keys = set()
+    headers = {root: {} for root in PACK_ROOTS}
+    unit_counts = dict.fromkeys(PACK_ROOTS, 0)
+    with open(path, "rb") as f:
+        try:
+            # Both shapes are tracked: the wrapper key may come after other keys
+            for prefix, event, value in ijson.parse(f):
+                if prefix == "":
+                    if event == "map_key":
+                        keys.add(value)
+                    continue
+                for root in PACK_ROOTS:
+                    if event == "start_map" and prefix == f"{root}units.item":
+                        unit_counts[root] += 1
+                    elif event in ("string", "number") and prefix.startswith(root):
+                        field = prefix[len(root):]
+                        if field in PACK_HEADER_FIELDS:
+                            headers[root][field] = value
+        except ijson.JSONError as e:
+            raise PackImportError(f"Invalid pack JSON: {e}")
+    if not keys:
+        raise PackImportError("Pack file is not a JSON object")
+    root = ""
+    if "pack_data" in keys:
+        if keys & {"units", *PACK_HEADER_FIELDS}:
+            raise PackImportError(
+                "Pack file has both a pack_data object and top-level pack fields"
+            )
+        root = "pack_data."
+    return root, headers[root], unit_counts[root]
+
+
+def iter_pack_units(path: str, root: str = "") -> Iterator[Dict[str, Any]]:
+    """Yield the units of a pack file one at a time"""
+    with open(path, "rb") as f:
+        try:
+            yield from ijson.items(f, f"{root}units.item", use_float=True)
+        except ijson.JSONError as e:
+            raise PackImportError(f"Invalid pack JSON: {e}")
+
+
+def question_hash(q_data: Dict[str, Any]) -> str:
+    """
+    Hash of the pack fields that define a question. Stored on import, so
+    edits made during review do not make the question look new.
+    """
+    content = {
+        "pc_code": q_data.get("pc_code"),
+        "question_type": q_data["question_type"],
+        "question_text": q_data["question_text"],
+        "options": q_data.get("options") or {},
+    }
+    encoded = json.dumps(content, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class PackImporter:
+    """Writes the units of one pack in chunks, committing after each chunk"""
+
+    def __init__(self, db: Session, pack: models.QuestionPack,
+                 chunk_size: int = PACK_IMPORT_CHUNK_UNITS):
+        self.db = db
+        self.pack = pack
+        self.chunk_size = max(1, chunk_size)
+        self.unit_count = 0
+        self.question_count = 0
+        self.diff = {"added": 0, "unchanged": 0, "restored": 0, "deactivated": 0}
+        self._duplicates = {}  # assessment_id -> ids of repeated stored questions
+
+    def run(self, units: Iterable[Dict[str, Any]],
+            progress: Optional[Callable[[int, int], None]] = None) -> None:
+        """
+        Import all units. ``progress`` is called with the running unit and
+        question counts after each committed chunk.
+        """
+        for chunk in _chunks(units, self.chunk_size):
+            self.import_chunk(chunk)
+            self.pack.question_count = self.question_count
+            self.db.commit()
+            if progress:
+                progress(self.unit_count, self.question_count)
+
+    def import_chunk(self, units: List[Dict[str, Any]]) -> None:
+        """Write one chunk of units with a fixed number of statements"""
+        unit_ids = self._upsert_units(units)
+        chunk_ids = list(dict.fromkeys(unit_ids.values()))
+
+        # (unit_id, element_num) -> (element_id, element_text)
+        elements = self._element_map(units, unit_ids, chunk_ids)
+        # element_id -> assessment_id
+        assessments = self._assessment_map(units, unit_ids, elements)
+        # (element_id, pc_num) -> pc_id
+        pcs = self._pc_map(units, unit_ids, elements)
+
+        # Rebuild the served unit documents from the merged elements and PCs
+        cursor = self.db.connection().connection.cursor()
+        try:
+            refresh_unit_documents(cursor, chunk_ids)
+        finally:
+            cursor.close()
+
+        self._sync_questions(units, unit_ids, elements, assessments, pcs)
+        self.unit_count += len(units)
+
+    def _sync_questions(self, units, unit_ids, elements, assessments, pcs) -> None:
+        """
+        Diff the chunk's questions against the stored ones by content hash:
+        insert new questions, keep unchanged ones (restoring retired ones) and
+        retire stored questions the pack no longer contains.
+        """
+        # Every element of a unit that lists its elements is diffed, so
+        # questions of elements dropped from the pack are retired as well
+        listed = {unit_ids[unit_data["code"]] for unit_data in units if "elements" in unit_data}
+        # assessment_id -> content hash -> question row, in pack order
+        incoming = {
+            assessments[element_id]: {}
+            for (unit_id, _num), (element_id, _text) in elements.items()
+            if unit_id in listed and element_id in assessments
+        }
+        for unit_data in units:
+            unit_id = unit_ids[unit_data["code"]]
+            for element_data in unit_data.get("elements", []):
+                element_id = elements[(unit_id, element_data["code"])][0]
+                questions = incoming[assessments[element_id]]
+                for q_data in element_data.get("questions", []):
+                    questions.setdefault(question_hash(q_data), {
+                        "assessment_id": assessments[element_id],
+                        "pc_id": pcs.get((element_id, q_data.get("pc_code"))),
+                        "question_text": q_data["question_text"],
+                        "question_type": q_data["question_type"],
+                        "options": q_data.get("options", {}),
+                        "source": q_data.get("source", "ai_generated"),
+                        "review_status": "draft",
+                        "is_active": False,
+                        "content_hash": question_hash(q_data),
+                    })
+
+        stored = self._stored_questions(list(incoming))
+
+        added, restore, retire = [], [], []
+        for assessment_id, questions in incoming.items():
+            kept = stored.get(assessment_id, {})
+            for content_hash, row in questions.items():
+                existing = kept.get(content_hash)
+                if existing is None:
+                    added.append(row)
+                    continue
+                self.diff["unchanged"] += 1
+                if existing.review_status == "retired":
+                    restore.append(existing.id)
+            for content_hash, existing in kept.items():
+                if content_hash not in questions and existing.review_status != "retired":
+                    retire.append(existing.id)
+            retire.extend(self._duplicates.pop(assessment_id, []))
+
+        if added:
+            self.db.execute(insert(models.AssessmentQuestion), added)
+        if restore:
+            self._set_status(restore, review_status="draft")
+        if retire:
+            self._set_status(retire, review_status="retired", is_active=False)
+
+        self.diff["added"] += len(added)
+        self.diff["restored"] += len(restore)
+        self.diff["deactivated"] += len(retire)
+        self.question_count += sum(len(questions) for questions in incoming.values())
+
+    def _stored_questions(self, assessment_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Pack questions of the given assessments: assessment_id -> content
+        hash -> row. Questions imported before hashing get their hash now;
+        repeated copies of one question are queued for retirement in
+        ``self._duplicates``.
+        """
+        Question = models.AssessmentQuestion
+        rows = (
+            self.db.query(
+                Question.id, Question.assessment_id, Question.content_hash,
+                Question.review_status, Question.is_active, Question.source,
+                Question.question_text, Question.question_type, Question.options,
+                models.UnitPerformanceCriteria.pc_num,
+            )
+            .outerjoin(models.UnitPerformanceCriteria,
+                       models.UnitPerformanceCriteria.id == Question.pc_id)
+            .filter(Question.assessment_id.in_(assessment_ids))
+            # Keep the active, then approved, then oldest copy of a question
+            .order_by(Question.is_active.desc(),
+                      (Question.review_status == "approved").desc(),
+                      Question.id)
+            .all()
+        )
+
+        stored, backfill = {}, []
+        for row in rows:
+            content_hash = row.content_hash
+            if content_hash is None:
+                if row.source == "teacher":
+                    # Written by hand, not managed by packs
+                    continue
+                content_hash = question_hash({
+                    "pc_code": row.pc_num,
+                    "question_type": row.question_type,
+                    "question_text": row.question_text,
+                    "options": row.options or {},
+                })
+                backfill.append({"id": row.id, "content_hash": content_hash})
+            questions = stored.setdefault(row.assessment_id, {})
+            if content_hash in questions:
+                if row.review_status != "retired":
+                    self._duplicates.setdefault(row.assessment_id, []).append(row.id)
+            else:
+                questions[content_hash] = row
+
+        if backfill:
+            self.db.execute(update(models.AssessmentQuestion), backfill)
+        return stored
+
+    def _set_status(self, question_ids: List[int], **values) -> None:
+        self.db.query(models.AssessmentQuestion).filter(
+            models.AssessmentQuestion.id.in_(question_ids)
+        ).update(values, synchronize_session=False)
+
+    def _upsert_units(self, units: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Insert missing units and set plain English descriptions; code -> id"""
+        rows = {}
+        for unit_data in units:
+            rows[unit_data["code"]] = {
+                "code": unit_data["code"],
+                "title": unit_data["title"],
+                "description": unit_data.get("description", ""),
+                "plain_english_description": unit_data.get("plain_english_description"),
+            }
+        stmt = pg_insert(models.Unit).values(list(rows.values()))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["code"],
+            set_={
+                "plain_english_description": stmt.excluded.plain_english_description,
+                "updated_at": func.now(),
+            },
+        ).returning(models.Unit.id, models.Unit.code, models.Unit.processed)
+        stored = self.db.execute(stmt).all()
+        component_index.update_on_commit(self.db, models.Unit, {row.code: row.processed for row in stored})
+        return {row.code: row.id for row in stored}
+
+    def _element_map(self, units, unit_ids, chunk_ids) -> Dict[Tuple[int, str], Tuple[int, str]]:
+        elements = {}
+        for row in (
+            self.db.query(models.UnitElement.id, models.UnitElement.unit_id,
+                          models.UnitElement.element_num, models.UnitElement.element_text)
+            .filter(models.UnitElement.unit_id.in_(chunk_ids))
+            .order_by(models.UnitElement.id)
+        ):
+            elements.setdefault((row.unit_id, row.element_num), (row.id, row.element_text))
+
+        missing = {}
+        for unit_data in units:
+            unit_id = unit_ids[unit_data["code"]]
+            for element_data in unit_data.get("elements", []):
+                key = (unit_id, element_data["code"])
+                if key not in elements and key not in missing:
+                    missing[key] = {
+                        "unit_id": unit_id,
+                        "element_num": element_data["code"],
+                        "element_text": element_data["title"],
+                    }
+        if missing:
+            for row in self.db.execute(
+                insert(models.UnitElement).returning(
+                    models.UnitElement.id, models.UnitElement.unit_id,
+                    models.UnitElement.element_num, models.UnitElement.element_text,
+                ),
+                list(missing.values()),
+            ):
+                elements[(row.unit_id, row.element_num)] = (row.id, row.element_text)
+        return elements
+
+    def _assessment_map(self, units, unit_ids, elements) -> Dict[int, int]:
+        codes = {unit_id: code for code, unit_id in unit_ids.items()}
+        element_ids = {element_id for element_id, _text in elements.values()}
+        assessments = {}
+        for row in (
+            self.db.query(models.Assessment.id, models.Assessment.element_id)
+            .filter(models.Assessment.element_id.in_(element_ids))
+            .order_by(models.Assessment.id)
+        ):
+            assessments.setdefault(row.element_id, row.id)
+
+        missing = {}
+        for unit_data in units:
+            unit_id = unit_ids[unit_data["code"]]
+            for element_data in unit_data.get("elements", []):
+                element_id, element_text = elements[(unit_id, element_data["code"])]
+                if element_id not in assessments and element_id not in missing:
+                    missing[element_id] = {
+                        "unit_id": unit_id,
+                        "element_id": element_id,
+                        "title": f"{codes[unit_id]} — {element_text}",
+                        "type": "quiz",
+                        "experience_points": 50,
+                    }
+        if missing:
+            for row in self.db.execute(
+                insert(models.Assessment).returning(
+                    models.Assessment.id, models.Assessment.element_id
+                ),
+                list(missing.values()),
+            ):
+                assessments[row.element_id] = row.id
+        return assessments
+
+    def _pc_map(self, units, unit_ids, elements) -> Dict[Tuple[int, str], int]:
+        element_ids = {element_id for element_id, _text in elements.values()}
+        pcs = {}
+        for row in (
+            self.db.query(models.UnitPerformanceCriteria.id,
+                          models.UnitPerformanceCriteria.element_id,
+                          models.UnitPerformanceCriteria.pc_num)
+            .filter(models.UnitPerformanceCriteria.element_id.in_(element_ids))
+            .order_by(models.UnitPerformanceCriteria.id)
+        ):
+            pcs.setdefault((row.element_id, row.pc_num), row.id)
+
+        missing = {}
+        for unit_data in units:
+            unit_id = unit_ids[unit_data["code"]]
+            for element_data in unit_data.get("elements", []):
+                element_id = elements[(unit_id, element_data["code"])][0]
+                for pc_data in element_data.get("performance_criteria", []):
+                    key = (element_id, pc_data["code"])
+                    if key not in pcs and key not in missing:
+                        missing[key] = {
+                            "element_id": element_id,
+                            "unit_id": unit_id,
+                            "pc_num": pc_data["code"],
+                            "pc_text": pc_data["text"],
+                        }
+        if missing:
+            for row in self.db.execute(
+                insert(models.UnitPerformanceCriteria).returning(
+                    models.UnitPerformanceCriteria.id,
+                    models.UnitPerformanceCriteria.element_id,
+                    models.UnitPerformanceCriteria.pc_num,
+                ),
+                list(missing.values()),
+            ):
+                pcs[(row.element_id, row.pc_num)] = row.id
+        return pcs
+
+
+def create_pack_record(db: Session, header: Dict[str, Any]) -> models.QuestionPack:
+    """Add the question_packs row for an import (flushed, not committed)"""
+    pack = models.QuestionPack(
+        training_package_code=header.get("training_package") or "UNKNOWN",
+        source_url=header.get("source_url", ""),
+        version=str(header.get("generated_at", "")),
+        status="pending",
+    )
+    db.add(pack)
+    db.flush()
+    return pack
+
+
+def finish_pack(pack: models.QuestionPack, importer: PackImporter) -> None:
+    pack.question_count = importer.question_count
+    pack.status = "imported"
+    pack.imported_at = datetime.now(timezone.utc)
+
+
+class PackImportManager:
+    """Background pack imports with progress tracking"""
+
+    def __init__(self):
+        self.jobs = {}  # Job id -> live job state
+        self._lock = threading.Lock()
+
+    def create_job(self, path: str) -> Dict[str, Any]:
+        """
+        Read the pack header, create its question_packs row and queue the
+        import. Raises PackImportError for files that are not packs.
+        """
+        root, header, unit_count = read_pack_header(path)
+        db = SessionLocal()
+        try:
+            pack = create_pack_record(db, header)
+            db.commit()
+            pack_id = pack.id
+        finally:
+            db.close()
+
+        job_id = str(uuid.uuid4())
+        job = {
+            "id": job_id,
+            "status": "queued",
+            "pack_id": pack_id,
+            "training_package_code": header.get("training_package") or "UNKNOWN",
+            "total_units": unit_count,
+            "completed_units": 0,
+            "question_count": 0,
+            "diff": None,
+            "started_at": datetime.now().isoformat(),
+            "completed_at": None,
+            "error": None,
+            "path": path,
+            "root": root,
+        }
+        with self._lock:
+            self.jobs[job_id] = job
+        logger.info(f"Created pack import job {job_id} for {unit_count} units (pack {pack_id})")
+        return self.get_job_status(job_id)
+
+    def get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Public view of a job"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            status = {k: v for k, v in job.items() if k not in ("path", "root")}
+        total = status["total_units"]
+        status["progress"] = round(100 * status["completed_units"] / total, 1) if total else 100.0
+        return status
+
+    def _update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            self.jobs[job_id].update(fields)
+
+    def run_job(self, job_id: str) -> None:
+        """Import a queued pack file (run as a background task)"""
+        job = self.jobs[job_id]
+        self._update(job_id, status="processing")
+        db = SessionLocal()
+        try:
+            pack = db.query(models.QuestionPack).filter_by(id=job["pack_id"]).one()
+            importer = PackImporter(db, pack)
+            importer.run(
+                iter_pack_units(job["path"], job["root"]),
+                progress=lambda units, questions: self._update(
+                    job_id, completed_units=units, question_count=questions,
+                    diff=dict(importer.diff),
+                ),
+            )
+            finish_pack(pack, importer)
+            db.commit()
+            self._update(
+                job_id,
+                status="completed",
+                completed_units=importer.unit_count,
+                question_count=importer.question_count,
+                diff=dict(importer.diff),
+                completed_at=datetime.now().isoformat(),
+            )
+            logger.info(
+                f"Pack import {job_id}: {importer.unit_count} units, "
+                f"{importer.question_count} questions, changes {importer.diff}"
+            )
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Pack import {job_id} failed: {str(e)}")
+            db.query(models.QuestionPack).filter_by(id=job["pack_id"]).update(
+                {"status": "failed"}, synchronize_session=False
+            )
+            db.commit()
+            self._update(job_id, status="failed", error=str(e),
+                         completed_at=datetime.now().isoformat())
+        finally:
+            db.close()
+            try:
+                os.remove(job["path"])
+            except OSError:
+                pass
+
+
+# Global pack import manager instance
+pack_import_manager = PackImportManager()
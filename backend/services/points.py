@@ -19,6 +19,7 @@ from uuid import UUID
 
 from models.tables import User, UserProfile, Role, Achievement, UserAchievement
 from auth.auth_handler import get_user_role_by_experience
+from services.metrics import XP_AWARDED
 
 logger = logging.getLogger(__name__)
 
@@ -132,6 +133,7 @@ def award_points(
         
         # Update experience points
         profile.experience_points += points_to_award
+        XP_AWARDED.labels(action).inc(points_to_award)
         
         # Calculate new level
         new_level = calculate_level_from_points(profile.experience_points)
@@ -0,0 +1,329 @@
+"""
+Profiler Service - On-demand sampling profiles of individual requests.
+
+Profiling is off by default and costs one attribute check per request while
+off. It is armed (per worker, through the environment or the monitoring
+router) for:
+
+- a random fraction of requests (``PROFILE_SAMPLE_RATE``);
+- requests to some route templates (``PROFILE_ROUTES``, comma separated);
+- requests carrying ``X-Profile: <PROFILE_TOKEN>`` when a token is set.
+
+A profiled request is sampled every ``PROFILE_INTERVAL_MS`` by a background
+thread reading ``sys._current_frames()``; nothing is traced or patched in
+the request itself. Samples are attributed to the request by stack
+contents:
+
+- on the event loop thread, stacks that run through this request's
+  middleware frame (async endpoints and dependencies);
+- on other threads, stacks that run through the matched endpoint function
+  (sync endpoints in the threadpool). Concurrent requests to the same sync
+  endpoint share those samples.
+
+Samples are wall-clock: time spent waiting on the database shows up under
+the driver call. Finished profiles are kept per request id (the
+``X-Request-ID`` header) and exported as speedscope JSON or collapsed stacks
+for flamegraph tools.
+"""
+
+import os
+import sys
+import time
+import uuid
+import random
+import logging
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from starlette.routing import compile_path
+
+from services.request_timing import current_request, route_template
+
+logger = logging.getLogger(__name__)
+
+# Fraction of requests profiled (0 disables random sampling)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# Route templates always profiled, e.g. /api/quiz/units/{unit_id}/quiz-state
+PROFILE_ROUTES = [route for route in os.getenv("PROFILE_ROUTES", "").split(",") if route.strip()]
+# Requests with this X-Profile header value are profiled (unset disables)
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+# Milliseconds between stack samples
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+# Finished profiles kept in memory, oldest dropped first
+PROFILE_MAX_STORED = int(os.getenv("PROFILE_MAX_STORED", "50"))
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (function, file, first line) of one stack frame
+FrameKey = Tuple[str, str, int]
+
+
+def _frame_key(frame) -> FrameKey:
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(_APP_ROOT):
+        filename = os.path.relpath(filename, _APP_ROOT)
+    return code.co_name, filename, code.co_firstlineno
+
+
+class RequestProfile:
+    """Stack samples of one request"""
+
+    def __init__(self, request_id: str, method: str, path: str, scope: Dict[str, Any],
+                 anchor, loop_thread: int, interval: float):
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.route: Optional[str] = None
+        self.status: Optional[int] = None
+        self.interval = interval
+        self.started = time.time()
+        self.duration: Optional[float] = None
+        self.stacks: Counter = Counter()  # root-first tuple of FrameKey -> samples
+        self._scope = scope
+        self._anchor = anchor
+        self._loop_thread = loop_thread
+        self._perf_started = time.perf_counter()
+
+    def _stack_below(self, frame, stop) -> Optional[Tuple[FrameKey, ...]]:
+        """Frames from ``stop`` (frame object or code object) down to ``frame``"""
+        chain = []
+        while frame is not None:
+            chain.append(frame)
+            if frame is stop or frame.f_code is stop:
+                return tuple(_frame_key(f) for f in reversed(chain))
+            frame = frame.f_back
+        return None
+
+    def sample(self, frames: Dict[int, Any], sampler_thread: int) -> None:
+        scope, anchor = self._scope, self._anchor
+        if scope is None:
+            return  # finished while the sampler was running
+        top = frames.get(self._loop_thread)
+        if top is not None:
+            stack = self._stack_below(top, anchor)
+            if stack:
+                self.stacks[stack] += 1
+
+        code = getattr(scope.get("endpoint"), "__code__", None)
+        if code is None:
+            return
+        for thread_id, top in frames.items():
+            if thread_id in (self._loop_thread, sampler_thread):
+                continue
+            stack = self._stack_below(top, code)
+            if stack:
+                self.stacks[stack] += 1
+
+    def finish(self, status: Optional[int]) -> None:
+        self.duration = time.perf_counter() - self._perf_started
+        self.status = status
+        self.route = route_template(self._scope)
+        self._scope = None
+        self._anchor = None
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "request_id": self.request_id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "started": self.started,
+            "duration_ms": round(self.duration * 1000, 1) if self.duration is not None else None,
+            "samples": self.samples,
+            "interval_ms": round(self.interval * 1000, 3),
+        }
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed stack format, one ``a;b;c count`` line per stack"""
+        lines = []
+        for stack, count in sorted(self.stacks.items()):
+            frames = ";".join(f"{name} ({filename}:{line})" for name, filename, line in stack)
+            lines.append(f"{frames} {count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def speedscope(self) -> Dict[str, Any]:
+        """speedscope file format: one sampled profile weighted in milliseconds"""
+        frame_index: Dict[FrameKey, int] = {}
+        frames: List[Dict[str, Any]] = []
+        samples: List[List[int]] = []
+        weights: List[float] = []
+        interval_ms = self.interval * 1000
+        for stack, count in self.stacks.items():
+            indexes = []
+            for key in stack:
+                if key not in frame_index:
+                    frame_index[key] = len(frames)
+                    frames.append({"name": key[0], "file": key[1], "line": key[2]})
+                indexes.append(frame_index[key])
+            samples.append(indexes)
+            weights.append(count * interval_ms)
+
+        name = f"{self.method} {self.route or self.path} ({self.request_id})"
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "learnonline-profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+
+class RequestProfiler:
+    """Chooses requests to profile, samples them and keeps the results"""
+
+    def __init__(self, sample_rate: float = PROFILE_SAMPLE_RATE,
+                 routes: Iterable[str] = PROFILE_ROUTES, token: str = PROFILE_TOKEN,
+                 interval_ms: float = PROFILE_INTERVAL_MS, max_stored: int = PROFILE_MAX_STORED):
+        self.interval = interval_ms / 1000
+        self.max_stored = max_stored
+        self._lock = threading.Lock()
+        self._active: Dict[int, RequestProfile] = {}
+        self._profiles: "OrderedDict[str, RequestProfile]" = OrderedDict()
+        self._thread: Optional[threading.Thread] = None
+        self.configure(sample_rate, routes, token)
+
+    def configure(self, sample_rate: Optional[float] = None, routes: Optional[Iterable[str]] = None,
+                  token: Optional[str] = None) -> None:
+        """Change what is profiled; arguments left as None are kept"""
+        if sample_rate is not None:
+            self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        if routes is not None:
+            self.routes = [route.strip() for route in routes if route.strip()]
+            self._route_patterns = [compile_path(route)[0] for route in self.routes]
+        if token is not None:
+            self.token = token.encode("latin-1")
+        self.armed = bool(self.sample_rate or self.routes or self.token)
+
+    def settings(self) -> Dict[str, Any]:
+        return {
+            "armed": self.armed,
+            "sample_rate": self.sample_rate,
+            "routes": self.routes,
+            "token_set": bool(self.token),
+            "interval_ms": round(self.interval * 1000, 3),
+        }
+
+    def wants(self, scope: Dict[str, Any]) -> bool:
+        """Whether to profile this request"""
+        if self.token:
+            for name, value in scope.get("headers", []):
+                if name == b"x-profile":
+                    if value == self.token:
+                        return True
+                    break
+        if any(pattern.match(scope["path"]) for pattern in self._route_patterns):
+            return True
+        return bool(self.sample_rate) and random.random() < self.sample_rate
+
+    def start(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._active[id(profile)] = profile
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="request-profiler", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self, profile: RequestProfile, status: Optional[int]) -> None:
+        with self._lock:
+            self._active.pop(id(profile), None)
+        profile.finish(status)
+        with self._lock:
+            self._profiles[profile.request_id] = profile
+            self._profiles.move_to_end(profile.request_id)
+            while len(self._profiles) > self.max_stored:
+                self._profiles.popitem(last=False)
+        logger.info(
+            f"Profiled {profile.method} {profile.route} ({profile.request_id}): "
+            f"{profile.samples} samples in {profile.duration * 1000:.0f}ms"
+        )
+
+    def _run(self) -> None:
+        sampler_thread = threading.get_ident()
+        while True:
+            with self._lock:
+                active = list(self._active.values())
+                if not active:
+                    self._thread = None
+                    return
+            frames = sys._current_frames()
+            for profile in active:
+                profile.sample(frames, sampler_thread)
+            del frames
+            time.sleep(self.interval)
+
+    def get(self, request_id: str) -> Optional[RequestProfile]:
+        with self._lock:
+            return self._profiles.get(request_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Stored profiles, newest first"""
+        with self._lock:
+            profiles = list(self._profiles.values())
+        return [profile.summary() for profile in reversed(profiles)]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._profiles.clear()
+
+
+# Process-wide profiler used by the middleware and the monitoring router
+request_profiler = RequestProfiler()
+
+
+class ProfilerMiddleware:
+    """ASGI middleware profiling the requests ``request_profiler`` selects
+
+    Install inside ``RequestTimingMiddleware`` so profiles are stored under
+    the request's ``X-Request-ID``.
+    """
+
+    def __init__(self, app, profiler: RequestProfiler = request_profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if not self.profiler.armed or scope["type"] != "http" or not self.profiler.wants(scope):
+            await self.app(scope, receive, send)
+            return
+
+        stats = current_request()
+        profile = RequestProfile(
+            stats.request_id if stats else uuid.uuid4().hex,
+            scope["method"],
+            scope["path"],
+            scope,
+            sys._getframe(),
+            threading.get_ident(),
+            self.profiler.interval,
+        )
+        status = {"code": None}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        self.profiler.start(profile)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.profiler.stop(profile, status["code"])
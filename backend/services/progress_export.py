@@ -0,0 +1,168 @@
+"""
+Progress Export Service - Streaming CSV exports for RTO reporting.
+
+Two exports, both optionally limited to some units and to a class (a set of
+student ids):
+
+- progress: one row per student per element with status, attempts and pass
+  date;
+- gaps: one row per element with student, pass and attempt counts (the M4
+  gap map). A unit's students are those with progress in it or answers to
+  its questions; progress rows are only written when an element is passed,
+  so students who have not passed an element count towards ``not_passed``.
+
+Rows are read through a server-side cursor (``yield_per``) and written to
+the response batch by batch, so exporting a whole college never holds the
+result set in memory. The generators open their own session because they
+run after the endpoint has returned.
+"""
+
+import io
+import os
+import csv
+import logging
+from datetime import datetime
+from typing import Any, Iterable, Iterator, Optional, Sequence
+
+from sqlalchemy import Numeric, and_, cast, func, select, union
+
+from database import SessionLocal
+import models.tables as models
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched from the server-side cursor and written per chunk
+EXPORT_BATCH_ROWS = int(os.getenv("PROGRESS_EXPORT_BATCH_ROWS", "1000"))
+
+PROGRESS_COLUMNS = (
+    "training_package", "unit_code", "unit_title", "element_num", "element_text",
+    "student_id", "email", "status", "attempts", "passed_at",
+)
+
+GAP_COLUMNS = (
+    "training_package", "unit_code", "unit_title", "element_num", "element_text",
+    "students", "passed", "not_passed", "attempts", "pass_rate",
+)
+
+
+def progress_statement(unit_ids: Optional[Iterable[int]] = None,
+                       student_ids: Optional[Iterable[int]] = None):
+    """Progress rows in unit, element and student order"""
+    progress = models.UserElementProgress
+    stmt = (
+        select(
+            models.TrainingPackage.code, models.Unit.code, models.Unit.title,
+            models.UnitElement.element_num, models.UnitElement.element_text,
+            progress.user_id, models.User.email, progress.status,
+            progress.attempts, progress.passed_at,
+        )
+        .select_from(progress)
+        .join(models.UnitElement, models.UnitElement.id == progress.element_id)
+        .join(models.Unit, models.Unit.id == progress.unit_id)
+        .outerjoin(models.TrainingPackage,
+                   models.TrainingPackage.id == models.Unit.training_package_id)
+        .join(models.User, models.User.id == progress.user_id)
+        .order_by(models.Unit.code, models.UnitElement.element_num, progress.user_id)
+    )
+    if unit_ids is not None:
+        stmt = stmt.where(progress.unit_id.in_(list(unit_ids)))
+    if student_ids is not None:
+        stmt = stmt.where(progress.user_id.in_(list(student_ids)))
+    return stmt
+
+
+def unit_students_statement(unit_ids: Optional[Iterable[int]] = None,
+                            student_ids: Optional[Iterable[int]] = None):
+    """Students per unit: users with progress in it or answers to its questions"""
+    progress = models.UserElementProgress
+    answer_unit = func.coalesce(models.Assessment.unit_id, models.UnitElement.unit_id)
+    progressed = select(progress.unit_id, progress.user_id)
+    answered = (
+        select(answer_unit.label("unit_id"), models.UserAnswer.user_id)
+        .select_from(models.UserAnswer)
+        .join(models.AssessmentQuestion,
+              models.AssessmentQuestion.id == models.UserAnswer.question_id)
+        .join(models.Assessment, models.Assessment.id == models.AssessmentQuestion.assessment_id)
+        .outerjoin(models.UnitElement, models.UnitElement.id == models.Assessment.element_id)
+    )
+    if unit_ids is not None:
+        unit_ids = list(unit_ids)
+        progressed = progressed.where(progress.unit_id.in_(unit_ids))
+        answered = answered.where(answer_unit.in_(unit_ids))
+    if student_ids is not None:
+        student_ids = list(student_ids)
+        progressed = progressed.where(progress.user_id.in_(student_ids))
+        answered = answered.where(models.UserAnswer.user_id.in_(student_ids))
+    # UNION drops students found both ways
+    enrolled = union(progressed, answered).subquery()
+    return (
+        select(enrolled.c.unit_id, func.count().label("students"))
+        .group_by(enrolled.c.unit_id)
+    )
+
+
+def gap_statement(unit_ids: Optional[Iterable[int]] = None,
+                  student_ids: Optional[Iterable[int]] = None):
+    """Per-element counts; elements nobody has attempted are included"""
+    progress = models.UserElementProgress
+    unit_ids = list(unit_ids) if unit_ids is not None else None
+    student_ids = list(student_ids) if student_ids is not None else None
+    joined = progress.element_id == models.UnitElement.id
+    if student_ids is not None:
+        joined = and_(joined, progress.user_id.in_(student_ids))
+    unit_students = unit_students_statement(unit_ids, student_ids).subquery()
+    students = func.coalesce(unit_students.c.students, 0)
+    passed = func.count(progress.id).filter(progress.status == "passed")
+    stmt = (
+        select(
+            models.TrainingPackage.code, models.Unit.code, models.Unit.title,
+            models.UnitElement.element_num, models.UnitElement.element_text,
+            students, passed, students - passed,
+            func.coalesce(func.sum(progress.attempts), 0),
+            func.round(cast(passed, Numeric) / func.nullif(students, 0), 3),
+        )
+        .select_from(models.UnitElement)
+        .join(models.Unit, models.Unit.id == models.UnitElement.unit_id)
+        .outerjoin(models.TrainingPackage,
+                   models.TrainingPackage.id == models.Unit.training_package_id)
+        .outerjoin(unit_students, unit_students.c.unit_id == models.Unit.id)
+        .outerjoin(progress, joined)
+        .group_by(models.TrainingPackage.code, models.Unit.code, models.Unit.title,
+                  models.UnitElement.id, models.UnitElement.element_num,
+                  models.UnitElement.element_text, unit_students.c.students)
+        .order_by(models.Unit.code, models.UnitElement.element_num)
+    )
+    if unit_ids is not None:
+        stmt = stmt.where(models.UnitElement.unit_id.in_(unit_ids))
+    return stmt
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def stream_csv(statement, columns: Sequence[str],
+               batch_rows: int = EXPORT_BATCH_ROWS) -> Iterator[str]:
+    """Yield CSV text for a statement: the header, then one chunk per batch"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+
+    db = SessionLocal()
+    rows = 0
+    try:
+        result = db.execute(statement.execution_options(yield_per=batch_rows))
+        for batch in result.partitions():
+            buffer.seek(0)
+            buffer.truncate(0)
+            writer.writerows([_csv_value(value) for value in row] for row in batch)
+            rows += len(batch)
+            yield buffer.getvalue()
+    finally:
+        db.close()
+        logger.info(f"Exported {rows} CSV rows")
@@ -0,0 +1,162 @@
+"""
+Progress Heatmap Service - Element x student progress for a unit.
+
+The class progress view (and the M4 gap map) needs every student's status
+on every element of a unit. The heatmap is built with one aggregated query
+that pivots ``user_element_progress`` per student (statuses keyed by element
+id, emails joined) and is cached per unit and class, where a class is the
+optional set of student ids the caller restricts it to. Pages of students
+are then cut from the cached heatmap with a cursor (the last student id).
+
+Passing an element invalidates the unit's heatmaps; the TTL bounds
+staleness for progress written by other workers.
+"""
+
+import os
+import time
+import bisect
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+import models.tables as models
+
+logger = logging.getLogger(__name__)
+
+# Seconds a cached heatmap is served before it is rebuilt
+PROGRESS_HEATMAP_TTL = float(os.getenv("PROGRESS_HEATMAP_TTL", "60"))
+# Heatmaps kept in memory, least recently used dropped first
+PROGRESS_HEATMAP_MAX_ENTRIES = int(os.getenv("PROGRESS_HEATMAP_MAX_ENTRIES", "256"))
+
+
+def heatmap_statement(unit_id: int, student_ids: Optional[Iterable[int]] = None):
+    """One row per student: id, email and ``{element_id: status}``"""
+    progress = models.UserElementProgress
+    stmt = (
+        select(
+            progress.user_id.label("student_id"),
+            models.User.email,
+            func.jsonb_object_agg(progress.element_id, progress.status).label("elements"),
+        )
+        .join(models.User, models.User.id == progress.user_id)
+        .where(progress.unit_id == unit_id)
+        .group_by(progress.user_id, models.User.email)
+        .order_by(progress.user_id)
+    )
+    if student_ids is not None:
+        stmt = stmt.where(progress.user_id.in_(list(student_ids)))
+    return stmt
+
+
+def build_heatmap(db: Session, unit_id: int,
+                  student_ids: Optional[Iterable[int]] = None) -> Optional[Dict[str, Any]]:
+    """Build a unit's heatmap; None if the unit does not exist"""
+    unit = db.query(models.Unit.id).filter_by(id=unit_id).first()
+    if not unit:
+        return None
+
+    elements = [
+        {
+            "element_id": row.id,
+            "element_num": row.element_num,
+            "element_text": row.element_text,
+        }
+        for row in (
+            db.query(models.UnitElement.id, models.UnitElement.element_num,
+                     models.UnitElement.element_text)
+            .filter_by(unit_id=unit_id)
+            .order_by(models.UnitElement.element_num)
+        )
+    ]
+
+    students = [
+        {
+            "student_id": row.student_id,
+            "email": row.email or "",
+            "elements": {int(element_id): status for element_id, status in row.elements.items()},
+        }
+        for row in db.execute(heatmap_statement(unit_id, student_ids))
+    ]
+
+    # Per-element status counts: which competency areas are broadly weak
+    summary = {element["element_id"]: {} for element in elements}
+    for student in students:
+        for element_id, status in student["elements"].items():
+            counts = summary.setdefault(element_id, {})
+            counts[status] = counts.get(status, 0) + 1
+
+    return {
+        "unit_id": unit_id,
+        "elements": elements,
+        "students": students,
+        "summary": [
+            {"element_id": element_id, "statuses": counts}
+            for element_id, counts in summary.items()
+        ],
+    }
+
+
+def page_students(heatmap: Dict[str, Any], cursor: Optional[int],
+                  limit: int) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """Students after ``cursor`` (a student id) and the cursor of the next page"""
+    students = heatmap["students"]
+    start = 0
+    if cursor is not None:
+        start = bisect.bisect_right([s["student_id"] for s in students], cursor)
+    page = students[start:start + limit]
+    more = start + limit < len(students)
+    return page, page[-1]["student_id"] if page and more else None
+
+
+class ProgressHeatmapCache:
+    """Heatmaps per (unit, class), with a TTL and LRU eviction"""
+
+    def __init__(self, ttl: float = PROGRESS_HEATMAP_TTL,
+                 max_entries: int = PROGRESS_HEATMAP_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (unit_id, class key) -> (built at, heatmap)
+
+    @staticmethod
+    def _key(unit_id: int, student_ids: Optional[Iterable[int]]):
+        return unit_id, None if student_ids is None else tuple(sorted(set(student_ids)))
+
+    def get(self, db: Session, unit_id: int,
+            student_ids: Optional[Iterable[int]] = None) -> Optional[Dict[str, Any]]:
+        """Cached heatmap for a unit (and class), built on a miss"""
+        key = self._key(unit_id, student_ids)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        heatmap = build_heatmap(db, unit_id, key[1])
+        if heatmap is None:
+            return None
+        with self._lock:
+            self._entries[key] = (now, heatmap)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        logger.debug(f"Built progress heatmap for unit {unit_id}: {len(heatmap['students'])} students")
+        return heatmap
+
+    def invalidate(self, unit_id: Optional[int] = None) -> None:
+        """Drop the heatmaps of one unit, or all of them"""
+        with self._lock:
+            if unit_id is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == unit_id]:
+                del self._entries[key]
+
+
+# Process-wide heatmap cache shared by the admin and quiz routers
+progress_heatmaps = ProgressHeatmapCache()
@@ -0,0 +1,183 @@
+"""
+Query Detector Service - N+1 detection and per-endpoint query budgets.
+
+Two checks run when a request finishes (``RequestTimingMiddleware``):
+
+- query budgets: endpoints declare the most SQL statements a request may run
+  with ``@query_budget(n)``; requests over budget are logged. The check only
+  compares the statement count the middleware already keeps, so it is always
+  on. The pytest plugin in ``tests/query_budget.py`` turns these findings
+  into test failures.
+- repeated statements (opt-in with ``QUERY_DETECTION=1``): every statement is
+  fingerprinted (literals and parameters replaced by ``?``, ``IN`` lists
+  collapsed) and counted per request; a fingerprint run ``QUERY_REPEAT_THRESHOLD``
+  times or more is an N+1 and is logged with the application line that first
+  ran it. Finding the call site walks the stack once per distinct statement,
+  which is why detection is meant for development and tests.
+
+Recent findings are kept in memory for the monitoring router.
+"""
+
+import os
+import re
+import sys
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Fingerprint and count every statement of a request (development and tests)
+QUERY_DETECTION = os.getenv("QUERY_DETECTION", "0").lower() in ("1", "true", "yes")
+# Runs of one fingerprint within a request reported as an N+1
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "5"))
+# Findings kept for the monitoring endpoint
+QUERY_FINDINGS_HISTORY = int(os.getenv("QUERY_FINDINGS_HISTORY", "200"))
+
+# Repeated statements listed with a budget finding
+BUDGET_REPORT_STATEMENTS = 5
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Frames in these files are instrumentation, not the code running the query
+_SKIPPED_FILES = (
+    os.path.abspath(__file__),
+    os.path.join(_APP_ROOT, "services", "request_timing.py"),
+)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_PARAMETER = re.compile(r"%\([^)]+\)s|%s|(?<![:\w]):\w+|\$\d+|\?")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_POSTCOMPILE = re.compile(r"\(?\s*__\[POSTCOMPILE_\w+\]\s*\)?")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Statement shape with literals and parameters replaced by ``?``"""
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _POSTCOMPILE.sub("(?)", shape)
+    shape = _PARAMETER.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = _IN_LIST.sub("IN (?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+def call_site(skip: int = 1) -> Optional[str]:
+    """First application frame up the stack, as ``path:line in function``"""
+    frame = sys._getframe(skip)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(_APP_ROOT)
+            and "site-packages" not in filename
+            and filename not in _SKIPPED_FILES
+        ):
+            path = os.path.relpath(filename, _APP_ROOT)
+            return f"{path}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def query_budget(limit: int) -> Callable:
+    """Declare the most SQL statements one request to an endpoint may run
+
+    Apply below the router decorator::
+
+        @router.get("/units/{unit_id}/quiz-state")
+        @query_budget(4)
+        def get_quiz_state(...):
+    """
+    def decorate(endpoint: Callable) -> Callable:
+        endpoint.query_budget = limit
+        return endpoint
+    return decorate
+
+
+def endpoint_budget(endpoint: Any) -> Optional[int]:
+    """Declared query budget of an endpoint, None if it has none"""
+    return getattr(endpoint, "query_budget", None)
+
+
+class QueryDetector:
+    """Per-request statement counts checked against thresholds and budgets"""
+
+    def __init__(self, enabled: bool = QUERY_DETECTION,
+                 threshold: int = QUERY_REPEAT_THRESHOLD,
+                 history: int = QUERY_FINDINGS_HISTORY):
+        self.enabled = enabled
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._findings = deque(maxlen=history)
+
+    def new_log(self) -> Optional[Dict[str, list]]:
+        """Statement log for a new request, None while detection is off"""
+        return {} if self.enabled else None
+
+    @staticmethod
+    def record(queries: Dict[str, list], statement: str) -> None:
+        """Count one statement; the call site is captured on its first run"""
+        key = fingerprint(statement)
+        entry = queries.get(key)
+        if entry is None:
+            queries[key] = [1, call_site(2)]
+        else:
+            entry[0] += 1
+
+    @staticmethod
+    def _repeated(queries: Optional[Dict[str, list]], minimum: int) -> List[Dict[str, Any]]:
+        if not queries:
+            return []
+        repeated = [
+            {"statement": key, "count": count, "call_site": site}
+            for key, (count, site) in queries.items()
+            if count >= minimum
+        ]
+        repeated.sort(key=lambda item: item["count"], reverse=True)
+        return repeated
+
+    def check(self, stats, route: str, budget: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Findings of a finished request (``RequestStats``), logged and kept"""
+        request = {
+            "request_id": stats.request_id,
+            "method": stats.method,
+            "path": stats.path,
+            "route": route,
+        }
+        findings = []
+        if budget is not None and stats.sql_count > budget:
+            findings.append({
+                **request,
+                "kind": "budget",
+                "count": stats.sql_count,
+                "budget": budget,
+                "repeated": self._repeated(stats.queries, 2)[:BUDGET_REPORT_STATEMENTS],
+            })
+            logger.warning(
+                f"Query budget exceeded by {stats.request_id}: {stats.method} {route} "
+                f"ran {stats.sql_count} SQL statements, budget {budget}"
+            )
+        for repeated in self._repeated(stats.queries, self.threshold):
+            findings.append({**request, "kind": "repeated", **repeated})
+            logger.warning(
+                f"Repeated query in {stats.request_id}: {stats.method} {route} ran "
+                f"{repeated['count']}x from {repeated['call_site']}: {repeated['statement'][:200]}"
+            )
+
+        if findings:
+            with self._lock:
+                self._findings.extend(findings)
+        return findings
+
+    def findings(self, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Recent findings, oldest first, optionally of one kind"""
+        with self._lock:
+            return [finding for finding in self._findings if kind is None or finding["kind"] == kind]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._findings.clear()
+
+
+# Process-wide detector used by the request timing middleware
+query_detector = QueryDetector()
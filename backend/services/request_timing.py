@@ -0,0 +1,269 @@
+"""
+Request Timing Service - Per-request latency and SQL instrumentation.
+
+``RequestTimingMiddleware`` wraps every HTTP request and:
+
+- gives it an id (the incoming ``X-Request-ID`` or a new one) and a
+  ``RequestStats`` held in a context variable, visible to sync endpoints
+  running in the threadpool as well;
+- counts the SQL statements and database time of the request through
+  SQLAlchemy ``before/after_cursor_execute`` events (see
+  ``install_sql_instrumentation``);
+- adds ``Server-Timing`` and ``X-Request-ID`` response headers;
+- records the latency in a histogram per method and route template, and in
+  the Prometheus metrics (``services.metrics``);
+- logs requests slower than ``REQUEST_SLOW_MS`` or running more than
+  ``REQUEST_SLOW_SQL_COUNT`` statements, which is how N+1 routes show up;
+- checks declared query budgets and, when enabled, repeated statements
+  (``services.query_detector``).
+
+Latency is measured until the last body chunk is sent, so background tasks
+that run after the response do not count towards the route. Statements
+sent through raw DBAPI cursors (the COPY-based bulk writer) bypass the
+events and are not counted.
+"""
+
+import os
+import time
+import uuid
+import bisect
+import logging
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+from services.metrics import observe_request
+from services.query_detector import endpoint_budget, query_detector
+
+logger = logging.getLogger(__name__)
+
+# Requests slower than this (milliseconds) are logged
+REQUEST_SLOW_MS = float(os.getenv("REQUEST_SLOW_MS", "1000"))
+# Requests running more SQL statements than this are logged
+REQUEST_SLOW_SQL_COUNT = int(os.getenv("REQUEST_SLOW_SQL_COUNT", "50"))
+
+# Histogram bucket upper bounds in milliseconds
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Route label for requests no route matched (404s), keeping labels bounded
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class RequestStats:
+    """Timing and SQL counters of one request"""
+
+    __slots__ = (
+        "request_id", "method", "path", "scope", "started", "sql_count", "sql_seconds", "queries",
+    )
+
+    def __init__(self, request_id: str, method: str, path: str,
+                 scope: Optional[Dict[str, Any]] = None):
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.scope = scope
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        # Statement fingerprints -> [count, call site], only while detection is on
+        self.queries = query_detector.new_log()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def route(self) -> str:
+        """Template of the matched route, once routing has happened"""
+        return route_template(self.scope) if self.scope is not None else UNMATCHED_ROUTE
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: total app time and database time"""
+        return (
+            f"app;dur={self.elapsed() * 1000:.1f}, "
+            f'db;dur={self.sql_seconds * 1000:.1f};desc="{self.sql_count} queries"'
+        )
+
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request() -> Optional[RequestStats]:
+    """Stats of the request being handled, None outside requests"""
+    return _current_request.get()
+
+
+class LatencyHistogram:
+    """Bucketed latencies of one route"""
+
+    __slots__ = ("counts", "count", "total_seconds", "sql_count", "sql_seconds", "max_seconds")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_seconds = 0.0
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def observe(self, seconds: float, sql_count: int = 0, sql_seconds: float = 0.0) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, seconds * 1000)] += 1
+        self.count += 1
+        self.total_seconds += seconds
+        self.sql_count += sql_count
+        self.sql_seconds += sql_seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bucket bound (ms) below which ``q`` of the requests fall"""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= target:
+                return float(bound)
+        return round(self.max_seconds * 1000, 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        buckets = {f"le_{bound}ms": count for bound, count in zip(LATENCY_BUCKETS_MS, self.counts)}
+        buckets["le_inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_seconds * 1000 / self.count, 1) if self.count else None,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": round(self.max_seconds * 1000, 1),
+            "sql_per_request": round(self.sql_count / self.count, 1) if self.count else None,
+            "sql_ms_per_request": (
+                round(self.sql_seconds * 1000 / self.count, 1) if self.count else None
+            ),
+            "buckets": buckets,
+        }
+
+
+class RouteLatencies:
+    """Latency histograms per (method, route template)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+
+    def observe(self, method: str, route: str, seconds: float,
+                sql_count: int = 0, sql_seconds: float = 0.0) -> None:
+        with self._lock:
+            histogram = self._histograms.get((method, route))
+            if histogram is None:
+                histogram = self._histograms[(method, route)] = LatencyHistogram()
+            histogram.observe(seconds, sql_count, sql_seconds)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Histograms sorted by total time spent, slowest routes first"""
+        with self._lock:
+            items = sorted(
+                self._histograms.items(), key=lambda item: item[1].total_seconds, reverse=True
+            )
+            return [
+                {"method": method, "route": route, **histogram.snapshot()}
+                for (method, route), histogram in items
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+# Process-wide latency histograms
+route_latencies = RouteLatencies()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._timing_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_request.get()
+    started = getattr(context, "_timing_started", None)
+    if stats is None or started is None:
+        return
+    stats.sql_count += 1
+    stats.sql_seconds += time.perf_counter() - started
+    if stats.queries is not None:
+        query_detector.record(stats.queries, statement)
+
+
+def install_sql_instrumentation(engine) -> None:
+    """Count statements and database time of requests run on ``engine``"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def route_template(scope: Dict[str, Any]) -> str:
+    """Path template of the matched route (e.g. /api/units/{unit_id})"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class RequestTimingMiddleware:
+    """ASGI middleware recording latency and SQL usage per request"""
+
+    def __init__(self, app, slow_ms: float = REQUEST_SLOW_MS,
+                 slow_sql_count: int = REQUEST_SLOW_SQL_COUNT):
+        self.app = app
+        self.slow_ms = slow_ms
+        self.slow_sql_count = slow_sql_count
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        stats = RequestStats(request_id or uuid.uuid4().hex, scope["method"], scope["path"], scope)
+        response = {"status": 500, "finished": False}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", stats.server_timing())
+                headers["X-Request-ID"] = stats.request_id
+            elif message["type"] == "http.response.body" and not message.get("more_body"):
+                await send(message)
+                self._finish(scope, stats, response)
+                return
+            await send(message)
+
+        token = _current_request.set(stats)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_request.reset(token)
+            # Requests that failed before a complete response
+            self._finish(scope, stats, response)
+
+    def _finish(self, scope, stats: RequestStats, response: Dict[str, Any]) -> None:
+        if response["finished"]:
+            return
+        response["finished"] = True
+        elapsed = stats.elapsed()
+        route = route_template(scope)
+        route_latencies.observe(stats.method, route, elapsed, stats.sql_count, stats.sql_seconds)
+        observe_request(stats.method, route, response["status"], elapsed, stats.sql_count)
+        query_detector.check(stats, route, endpoint_budget(scope.get("endpoint")))
+
+        if elapsed * 1000 >= self.slow_ms or stats.sql_count >= self.slow_sql_count:
+            logger.warning(
+                f"Slow request {stats.request_id}: {stats.method} {stats.path} ({route}) "
+                f"status {response['status']} in {elapsed * 1000:.0f}ms, "
+                f"{stats.sql_count} SQL statements in {stats.sql_seconds * 1000:.0f}ms"
+            )
@@ -0,0 +1,280 @@
+"""
+Slow Query Service - Records statements slower than a threshold.
+
+Statements run on an engine passed to ``install_slow_query_log`` are timed
+with cursor events. Those slower than ``SLOW_QUERY_MS`` are aggregated by
+fingerprint (``services.query_detector.fingerprint``) with:
+
+- count, total, mean and max duration;
+- the routes they ran from and the last request id;
+- the shape of their parameters (names and types, never values);
+- optionally, an ``EXPLAIN (ANALYZE, BUFFERS)`` plan.
+
+``SLOW_QUERY_EXPLAIN_RATE`` of the slow SELECT statements are explained on a
+background thread, through a separate engine whose sessions are read-only
+(``default_transaction_read_only``) and rolled back, with a statement
+timeout. ANALYZE runs the statement again, so only SELECTs are explained and
+at most one plan per fingerprint is pending at a time. The plan's sequential
+scans are listed with it: they are the index candidates for the catalog and
+quiz tables.
+
+Aggregates live in memory per worker; the monitoring router lists the top
+offenders.
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import create_engine, event
+
+from services.query_detector import fingerprint
+from services.request_timing import current_request
+
+logger = logging.getLogger(__name__)
+
+# Statements slower than this (milliseconds) are recorded
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+# Fraction of slow SELECT statements explained (0 disables EXPLAIN)
+SLOW_QUERY_EXPLAIN_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_RATE", "0"))
+# Database for EXPLAIN, e.g. a read replica (defaults to the recorded engine's)
+SLOW_QUERY_EXPLAIN_URL = os.getenv("SLOW_QUERY_EXPLAIN_URL")
+# Statement timeout of EXPLAIN ANALYZE runs (milliseconds)
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "5000"))
+# Distinct fingerprints kept; the least recently seen are dropped
+SLOW_QUERY_MAX_FINGERPRINTS = int(os.getenv("SLOW_QUERY_MAX_FINGERPRINTS", "500"))
+
+# Routes remembered per fingerprint
+MAX_ROUTES = 10
+# Characters of the example statement kept
+MAX_STATEMENT_LENGTH = 4000
+
+SORT_KEYS = ("total_ms", "max_ms", "mean_ms", "count")
+
+
+def parameter_shape(parameters: Any) -> Any:
+    """Parameter names and type names, without the values"""
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__ if parameters is not None else None
+
+
+def is_explainable(statement: str) -> bool:
+    """Read statements only: EXPLAIN ANALYZE executes what it explains"""
+    head = statement.lstrip().split(None, 1)
+    return bool(head) and head[0].upper() in ("SELECT", "WITH")
+
+
+def seq_scans(plan: Any) -> List[str]:
+    """Relations read by sequential scans anywhere in a JSON plan"""
+    found: List[str] = []
+
+    def walk(node):
+        if isinstance(node, list):
+            for item in node:
+                walk(item)
+        elif isinstance(node, dict):
+            if node.get("Node Type") == "Seq Scan" and node.get("Relation Name"):
+                found.append(node["Relation Name"])
+            for key in ("Plan", "Plans"):
+                if key in node:
+                    walk(node[key])
+
+    walk(plan)
+    return sorted(set(found))
+
+
+class SlowQueryStats:
+    """Aggregate of one slow statement fingerprint"""
+
+    __slots__ = (
+        "fingerprint", "statement", "parameters", "count", "total_seconds", "max_seconds",
+        "routes", "last_request_id", "last_seen", "plan", "plan_seq_scans", "explained_at",
+    )
+
+    def __init__(self, key: str, statement: str, parameters: Any):
+        self.fingerprint = key
+        self.statement = statement[:MAX_STATEMENT_LENGTH]
+        self.parameters = parameters
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.routes: Dict[str, int] = {}
+        self.last_request_id: Optional[str] = None
+        self.last_seen = 0.0
+        self.plan: Any = None
+        self.plan_seq_scans: List[str] = []
+        self.explained_at: Optional[float] = None
+
+    def observe(self, seconds: float, route: Optional[str], request_id: Optional[str]) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.last_seen = time.time()
+        if route is not None:
+            if route in self.routes or len(self.routes) < MAX_ROUTES:
+                self.routes[route] = self.routes.get(route, 0) + 1
+            self.last_request_id = request_id
+
+    def snapshot(self, include_plan: bool = True) -> Dict[str, Any]:
+        snapshot = {
+            "fingerprint": self.fingerprint,
+            "statement": self.statement,
+            "parameters": self.parameters,
+            "count": self.count,
+            "total_ms": round(self.total_seconds * 1000, 1),
+            "mean_ms": round(self.total_seconds * 1000 / self.count, 1),
+            "max_ms": round(self.max_seconds * 1000, 1),
+            "routes": dict(sorted(self.routes.items(), key=lambda item: item[1], reverse=True)),
+            "last_request_id": self.last_request_id,
+            "last_seen": self.last_seen,
+            "seq_scans": self.plan_seq_scans,
+            "explained_at": self.explained_at,
+        }
+        if include_plan:
+            snapshot["plan"] = self.plan
+        return snapshot
+
+
+class SlowQueryLog:
+    """Slow statements by fingerprint, with sampled EXPLAIN plans"""
+
+    def __init__(self, threshold_ms: float = SLOW_QUERY_MS,
+                 explain_rate: float = SLOW_QUERY_EXPLAIN_RATE,
+                 max_fingerprints: int = SLOW_QUERY_MAX_FINGERPRINTS):
+        self.threshold = threshold_ms / 1000
+        self.explain_rate = explain_rate
+        self.max_fingerprints = max_fingerprints
+        self._lock = threading.Lock()
+        self._stats: Dict[str, SlowQueryStats] = {}
+        self._explaining = set()
+        self._explain_engine = None
+        self._explain_url = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def set_explain_url(self, url) -> None:
+        """Database EXPLAIN runs against (the first recorded engine's by default)"""
+        if self._explain_url is None:
+            self._explain_url = SLOW_QUERY_EXPLAIN_URL or url
+
+    def record(self, statement: str, parameters: Any, seconds: float,
+               executemany: bool = False) -> Optional[SlowQueryStats]:
+        """Count one statement if it is slow; returns its aggregate"""
+        if seconds < self.threshold:
+            return None
+        key = fingerprint(statement)
+        stats = current_request()
+        route = stats.route() if stats else None
+        request_id = stats.request_id if stats else None
+        with self._lock:
+            entry = self._stats.pop(key, None)
+            if entry is None:
+                shape = parameter_shape(parameters[0] if executemany and parameters else parameters)
+                entry = SlowQueryStats(key, statement, shape)
+                while len(self._stats) >= self.max_fingerprints:
+                    # Dicts keep insertion order: the first key was seen least recently
+                    del self._stats[next(iter(self._stats))]
+            self._stats[key] = entry
+            entry.observe(seconds, route, request_id)
+            explain = (
+                not executemany
+                and self.explain_rate
+                and key not in self._explaining
+                and is_explainable(statement)
+                and random.random() < self.explain_rate
+            )
+            if explain:
+                self._explaining.add(key)
+        logger.info(f"Slow query ({seconds * 1000:.0f}ms) from {route}: {key[:200]}")
+        if explain:
+            self._submit_explain(key, statement, parameters)
+        return entry
+
+    def _submit_explain(self, key: str, statement: str, parameters: Any) -> None:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+        self._executor.submit(self._explain_and_store, key, statement, parameters)
+
+    def _get_explain_engine(self):
+        if self._explain_engine is None:
+            self._explain_engine = create_engine(
+                self._explain_url,
+                pool_size=1,
+                max_overflow=0,
+                connect_args={
+                    "options": (
+                        "-c default_transaction_read_only=on "
+                        f"-c statement_timeout={SLOW_QUERY_EXPLAIN_TIMEOUT_MS}"
+                    )
+                },
+            )
+        return self._explain_engine
+
+    def explain(self, statement: str, parameters: Any) -> Any:
+        """``EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)`` on the read-only engine"""
+        with self._get_explain_engine().connect() as conn:
+            try:
+                result = conn.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters or ()
+                )
+                return result.scalar()
+            finally:
+                conn.rollback()
+
+    def _explain_and_store(self, key: str, statement: str, parameters: Any) -> None:
+        try:
+            plan = self.explain(statement, parameters)
+        except Exception as e:
+            logger.warning(f"EXPLAIN failed for slow query {key[:200]}: {str(e)}")
+            plan = None
+        with self._lock:
+            self._explaining.discard(key)
+            entry = self._stats.get(key)
+            if entry is not None and plan is not None:
+                entry.plan = plan
+                entry.plan_seq_scans = seq_scans(plan)
+                entry.explained_at = time.time()
+
+    def top(self, order_by: str = "total_ms", limit: int = 20,
+            include_plans: bool = True) -> List[Dict[str, Any]]:
+        """Worst fingerprints first by ``order_by`` (one of ``SORT_KEYS``)"""
+        if order_by not in SORT_KEYS:
+            raise ValueError(f"order_by must be one of {', '.join(SORT_KEYS)}")
+        with self._lock:
+            snapshots = [entry.snapshot(include_plans) for entry in self._stats.values()]
+        snapshots.sort(key=lambda snapshot: snapshot[order_by], reverse=True)
+        return snapshots[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+# Process-wide slow query log
+slow_query_log = SlowQueryLog()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._slow_query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_slow_query_started", None)
+    if started is not None:
+        slow_query_log.record(statement, parameters, time.perf_counter() - started, executemany)
+
+
+def install_slow_query_log(engine) -> None:
+    """Record slow statements run on ``engine``"""
+    slow_query_log.set_explain_url(engine.url)
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
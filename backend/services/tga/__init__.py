@@ -3,7 +3,23 @@ TGA Services module initialization.
 This module provides services for interacting with Training.gov.au API.
 """
 
-from .client import TrainingGovClient
-from .exceptions import TGAClientError, TGAAuthenticationError, TGAConnectionError
+from .client import TrainingGovClient, iter_components
+from .exceptions import (
+    TGAClientError,
+    TGAAuthenticationError,
+    TGAConnectionError,
+    TGACircuitOpenError,
+)
+from .resilience import tga_breaker
+from .xml_parser import parse_unit_xml
 
-__all__ = ['TrainingGovClient', 'TGAClientError', 'TGAAuthenticationError', 'TGAConnectionError']
+__all__ = [
+    'TrainingGovClient',
+    'iter_components',
+    'TGAClientError',
+    'TGAAuthenticationError',
+    'TGAConnectionError',
+    'TGACircuitOpenError',
+    'tga_breaker',
+    'parse_unit_xml',
+]
@@ -1,19 +1,23 @@
 """
 Client implementation for Training.gov.au SOAP API.
+
+zeep and requests are imported when a client is created rather than with this
+module, so the API starts without them until a TGA feature is used.
 """
 
 import logging
-from typing import Optional, List, Dict, Any, Union
-from zeep import Client
-from zeep.transports import Transport
-from requests import Session
-from requests.auth import HTTPBasicAuth
-import xml.etree.ElementTree as ET
-from bs4 import BeautifulSoup
-import time
+import os
 import re
+from typing import Optional, List, Dict, Any, Tuple, Union
 
-from .exceptions import TGAClientError, TGAAuthenticationError, TGAConnectionError
+from .exceptions import (
+    TGAClientError,
+    TGAAuthenticationError,
+    TGAConnectionError,
+    TGACircuitOpenError,
+)
+from .resilience import call_with_retry, operation_timeouts, tga_breaker
+from .xml_parser import parse_unit_xml
 
 logger = logging.getLogger(__name__)
 
@@ -27,8 +31,10 @@ class TrainingGovClient:
     Args:
         username (str): TGA API username for authentication
         password (str): TGA API password for authentication
-        wsdl_url (str, optional): WSDL URL for the TGA service. Defaults to sandbox URL.
-        xml_base_url (str, optional): Base URL for XML file downloads. Defaults to TGA URL.
+        wsdl_url (str, optional): WSDL URL for the TGA service. Defaults to
+            TGA_WSDL_URL, else the sandbox URL.
+        xml_base_url (str, optional): Base URL for XML file downloads. Defaults
+            to TGA_XML_BASE_URL, else the TGA URL.
     
     Attributes:
         client: SOAP client instance
@@ -47,25 +53,52 @@ class TrainingGovClient:
         xml_base_url: Optional[str] = None
     ):
         """Initialize the TGA client with authentication credentials."""
-        self.xml_base_url = xml_base_url or self.DEFAULT_XML_BASE
+        from requests import Session
+        from requests.auth import HTTPBasicAuth
+        from zeep import Client
+        from zeep.transports import Transport
+
+        self.xml_base_url = xml_base_url or os.getenv("TGA_XML_BASE_URL") or self.DEFAULT_XML_BASE
         
+        self.timeouts = operation_timeouts()
+
+        # Fail fast while TGA is known to be down
+        if not tga_breaker.allow():
+            raise TGACircuitOpenError(
+                "TGA API unavailable: circuit breaker open "
+                f"(retry in {tga_breaker.retry_after():.0f}s)"
+            )
+
         # Set up authentication session
         self.session = Session()
         self.session.auth = HTTPBasicAuth(username, password)
         
-        # Create transport with auth session
-        transport = Transport(session=self.session)
+        # Create transport with auth session; timeout applies to WSDL loading,
+        # operation timeouts are set per call
+        self.transport = Transport(
+            session=self.session,
+            timeout=self.timeouts["wsdl"],
+            operation_timeout=self.timeouts["search"],
+        )
         
         try:
             # Initialize SOAP client
             self.client = Client(
-                wsdl=wsdl_url or self.DEFAULT_WSDL,
-                transport=transport
+                wsdl=wsdl_url or os.getenv("TGA_WSDL_URL") or self.DEFAULT_WSDL,
+                transport=self.transport
             )
+            tga_breaker.record_success()
         except Exception as e:
+            tga_breaker.record_failure()
             logger.error(f"Failed to initialize TGA client: {e}")
             raise TGAConnectionError(f"Failed to connect to TGA API: {e}")
 
+    def _call(self, operation: str, timeout_key: str, **kwargs) -> Any:
+        """Invoke a SOAP operation with its timeout, retries and the breaker."""
+        method = getattr(self.client.service, operation)
+        with self.transport.settings(timeout=self.timeouts[timeout_key]):
+            return call_with_retry(operation, method, **kwargs)
+
     def search_components(
         self,
         filter_text: str = "",
@@ -119,23 +152,48 @@ class TrainingGovClient:
         
         try:
             # Execute search request
-            result = self.client.service.Search(request=search_request)
+            result = self._call('Search', 'search', request=search_request)
             
             if not hasattr(result, 'Results'):
                 logger.warning("No results found in search response")
                 return {'components': []}
                 
-            # Process results
-            components = result.Results.TrainingComponentSummary
+            # Process results; an empty page has no Results content
+            components = getattr(result.Results, 'TrainingComponentSummary', None)
             if components and not isinstance(components, list):
                 components = [components]
                 
-            return {'components': components or []}
+            return {
+                'components': [self._component_summary(c) for c in components or []],
+                'total': getattr(result, 'Count', None),
+                'page': page,
+                'page_size': page_size
+            }
             
+        except TGACircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Failed to search components: {e}")
             raise TGAClientError(f"Component search failed: {e}")
 
+    @staticmethod
+    def _component_summary(component: Any) -> Dict[str, Any]:
+        """Convert a TrainingComponentSummary to a dict with snake_case keys."""
+        if isinstance(component, dict):
+            return component
+        from zeep.helpers import serialize_object
+
+        data = serialize_object(component)
+        if not isinstance(data, dict):
+            return {'code': str(component)}
+        summary = {
+            re.sub(r'(?<!^)(?=[A-Z])', '_', key).lower(): value
+            for key, value in data.items()
+        }
+        if 'currency_status' in summary and 'status' not in summary:
+            summary['status'] = summary['currency_status']
+        return summary
+
     def get_component_details(
         self,
         code: str,
@@ -180,14 +238,18 @@ class TrainingGovClient:
         
         try:
             # Get component details
-            result = self.client.service.GetDetails(request=details_request)
+            result = self._call('GetDetails', 'details', request=details_request)
             
-            if not hasattr(result, 'GetDetailsResult'):
+            # zeep unwraps the single-child response to the component itself
+            details = getattr(result, 'GetDetailsResult', result)
+            if not details:
                 logger.warning(f"No details found for component {code}")
                 return {}
                 
-            return result.GetDetailsResult
+            return details
             
+        except TGACircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Failed to get details for component {code}: {e}")
             raise TGAClientError(f"Failed to get component details: {e}")
@@ -195,7 +257,8 @@ class TrainingGovClient:
     def get_component_xml(
         self, 
         code: str,
-        include_assessment: bool = True
+        include_assessment: bool = True,
+        details: Any = None
     ) -> Dict[str, Optional[str]]:
         """
         Get XML file(s) for a training component.
@@ -203,6 +266,8 @@ class TrainingGovClient:
         Args:
             code (str): Component code to get XML for
             include_assessment (bool): Whether to include assessment requirements XML
+            details: GetDetails result already fetched for the component
+                (looked up when omitted)
             
         Returns:
             dict: XML content with keys 'xml' and optionally 'assessment_xml'
@@ -212,41 +277,19 @@ class TrainingGovClient:
         """
         try:
             # Get component details with files
-            details = self.get_component_details(code, show_files=True, show_releases=True)
+            if details is None:
+                details = self.get_component_details(code, show_files=True, show_releases=True)
             
-            if not details or not hasattr(details, 'Releases') or not details.Releases:
+            if not details or not getattr(details, 'Releases', None):
                 raise TGAClientError(f"No releases found for component {code}")
                 
-            # Get release files
-            release = details.Releases.Release
-            if isinstance(release, list):
-                release = release[0]  # Use latest release
-                
-            if not hasattr(release, 'Files') or not release.Files:
+            release = latest_release(details)
+            if not release or not getattr(release, 'Files', None):
                 raise TGAClientError(f"No files found for component {code}")
                 
             # Find XML files
-            xml_file = None
-            assessment_file = None
+            xml_file, assessment_file = release_xml_files(release)
             
-            if hasattr(release.Files, 'ReleaseFile'):
-                files = release.Files.ReleaseFile
-                if not isinstance(files, list):
-                    files = [files]
-                    
-                for file in files:
-                    if not hasattr(file, 'Filename'):
-                        continue
-                        
-                    filename = file.Filename
-                    if not filename.endswith('.xml'):
-                        continue
-                        
-                    if 'AssessmentRequirements' in filename:
-                        assessment_file = filename
-                    else:
-                        xml_file = filename
-                        
             if not xml_file:
                 raise TGAClientError(f"No XML file found for component {code}")
                 
@@ -258,6 +301,8 @@ class TrainingGovClient:
                 
             return result
             
+        except TGACircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Failed to get XML for component {code}: {e}")
             raise TGAClientError(f"Failed to get component XML: {e}")
@@ -293,20 +338,22 @@ class TrainingGovClient:
             
         try:
             # Get changes from TGA
-            result = self.client.service.GetChanges(
+            result = self._call(
+                'GetChanges',
+                'changes',
                 modifiedSince=from_date,
                 trainingComponentTypes=component_types
             )
             
-            if not hasattr(result, 'Changes'):
-                return {'changes': []}
-                
-            changes = result.Changes.Change
+            # zeep may unwrap single-child results down to the change list
+            changes = getattr(getattr(result, 'Changes', result), 'Change', None)
             if changes and not isinstance(changes, list):
                 changes = [changes]
                 
             return {'changes': changes or []}
             
+        except TGACircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Failed to get changes since {from_date}: {e}")
             raise TGAClientError(f"Failed to get component changes: {e}")
@@ -333,7 +380,7 @@ class TrainingGovClient:
             url = f"{self.xml_base_url}{filename}"
             
             # Download file
-            response = self.session.get(url)
+            response = call_with_retry('download', self._get, url)
             if response.status_code != 200:
                 raise TGAClientError(
                     f"Failed to download {url}: {response.status_code}"
@@ -341,10 +388,23 @@ class TrainingGovClient:
                 
             return response.text
             
+        except TGACircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Error downloading XML for {code}: {e}")
             raise TGAClientError(f"Failed to download XML: {e}")
 
+    def _get(self, url: str):
+        """GET with the download timeout, raising on retryable statuses."""
+        import requests
+
+        response = self.session.get(url, timeout=self.timeouts['download'])
+        if response.status_code >= 500 or response.status_code == 429:
+            raise requests.HTTPError(
+                f"{response.status_code} for {url}", response=response
+            )
+        return response
+
     def extract_elements(self, xml_content: str) -> List[Dict[str, Any]]:
         """
         Extract elements and performance criteria from unit XML.
@@ -359,50 +419,114 @@ class TrainingGovClient:
             TGAClientError: If parsing fails
         """
         try:
-            # Parse XML with BeautifulSoup
-            soup = BeautifulSoup(xml_content, 'xml')
-            
-            elements = []
-            element_sections = soup.find_all('div', class_='element')
-            
-            for element_div in element_sections:
-                # Extract element number and title
-                element_title = element_div.find('h4')
-                if not element_title:
-                    continue
-                    
-                element_text = element_title.text.strip()
-                element_match = re.match(r'ELEMENT\s+(\d+)\s+(.*)', element_text)
-                if not element_match:
-                    continue
-                    
-                element_num, element_title = element_match.groups()
-                
-                # Find performance criteria
-                pcs = []
-                pc_items = element_div.find_all('tr')
-                for pc_item in pc_items:
-                    pc_cells = pc_item.find_all('td')
-                    if len(pc_cells) < 2:
-                        continue
-                        
-                    pc_num = pc_cells[0].text.strip()
-                    pc_text = pc_cells[1].text.strip()
-                    
-                    if pc_num and pc_text:
-                        pcs.append({
-                            'number': pc_num,
-                            'text': pc_text
-                        })
-                
-                elements.append({
-                    'number': int(element_num),
-                    'title': element_title,
-                    'performance_criteria': pcs
-                })
+            elements = parse_unit_xml(xml_content)["elements"]
             
-            return elements
+            return [
+                {
+                    'number': int(element['number']) if element['number'].isdigit() else element['number'],
+                    'title': element['text'],
+                    'performance_criteria': element['performance_criteria']
+                }
+                for element in elements
+            ]
             
         except Exception as e:
             logger.error(f"Failed to parse elements from XML: {e}")
             raise TGAClientError(f"Failed to parse elements: {e}")
+
+
+def latest_release(details: Any) -> Any:
+    """The latest release of a GetDetails component (TGA lists it first), or None."""
+    releases = getattr(details, 'Releases', None)
+    release = getattr(releases, 'Release', None) if releases else None
+    if isinstance(release, list):
+        release = release[0] if release else None
+    return release
+
+
+def release_xml_files(release: Any) -> Tuple[Optional[str], Optional[str]]:
+    """(unit XML file name, assessment requirements XML file name) of a release."""
+    xml_file = None
+    assessment_file = None
+    files = getattr(getattr(release, 'Files', None), 'ReleaseFile', None) or []
+    if not isinstance(files, list):
+        files = [files]
+    for file in files:
+        filename = getattr(file, 'Filename', None)
+        if not filename or not filename.endswith('.xml'):
+            continue
+        if 'AssessmentRequirements' in filename:
+            assessment_file = filename
+        else:
+            xml_file = filename
+    return xml_file, assessment_file
+
+
+def details_summary(details: Any) -> Dict[str, Any]:
+    """
+    Convert a GetDetails component to a dict with the fields the component
+    store and the release check use: code, title, component_type, status,
+    release_number, release_date, xml_file and assessment_file (from the
+    latest release). Dicts are returned as they are; no details give {}.
+    """
+    if not details:
+        return {}
+    if isinstance(details, dict):
+        return details
+    release = latest_release(details)
+    xml_file, assessment_file = release_xml_files(release) if release else (None, None)
+    return {
+        'code': getattr(details, 'Code', None),
+        'title': getattr(details, 'Title', None),
+        'component_type': getattr(details, 'ComponentType', None),
+        'status': getattr(details, 'CurrencyStatus', None),
+        'release_number': getattr(release, 'ReleaseNumber', None),
+        'release_date': getattr(release, 'ReleaseDate', None),
+        'xml_file': xml_file,
+        'assessment_file': assessment_file,
+    }
+
+
+def iter_components(
+    client: "TrainingGovClient",
+    filter_text: str = "",
+    component_types: Optional[Dict[str, bool]] = None,
+    page_size: int = 100,
+    max_pages: Optional[int] = None
+):
+    """
+    Yield every component matching a search, one page at a time.
+    
+    Pages are requested with ``client.search_components`` until TGA reports
+    no more results: a short page, or the reported total has been reached.
+    
+    Args:
+        client (TrainingGovClient): Client to search with
+        filter_text (str): Text to filter components by
+        component_types (dict, optional): Component types to include
+        page_size (int): Number of results per page
+        max_pages (int, optional): Stop after this many pages
+        
+    Yields:
+        dict: Component summaries
+    """
+    page = 1
+    seen = 0
+    while True:
+        result = client.search_components(
+            filter_text=filter_text,
+            component_types=component_types,
+            page=page,
+            page_size=page_size
+        )
+        components = result.get('components', [])
+        yield from components
+        seen += len(components)
+        
+        total = result.get('total')
+        if len(components) < page_size or (total is not None and seen >= total):
+            return
+        if max_pages is not None and page >= max_pages:
+            logger.warning(f"Stopped listing '{filter_text}' after {page} pages")
+            return
+        page += 1
@@ -13,3 +13,7 @@ class TGAAuthenticationError(TGAClientError):
 class TGAConnectionError(TGAClientError):
     """Raised when connection to TGA API fails."""
     pass
+
+class TGACircuitOpenError(TGAConnectionError):
+    """Raised when calls are short-circuited because TGA keeps failing."""
+    pass
@@ -0,0 +1,258 @@
+"""
+Retry and circuit breaker helpers for Training.gov.au calls.
+
+Transient failures (timeouts, dropped connections, 5xx/429 responses) are
+retried with jittered exponential backoff. Repeated transient failures open
+a process-wide circuit breaker so callers fail fast while TGA is down instead
+of each waiting out its full timeout.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from services.metrics import TGA_REQUEST_DURATION, TGA_REQUEST_ERRORS
+
+from .exceptions import TGACircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Per-operation timeouts in seconds, overridable via TGA_TIMEOUT_<OPERATION>
+DEFAULT_TIMEOUTS = {
+    "wsdl": 15.0,
+    "search": 30.0,
+    "details": 30.0,
+    "changes": 60.0,
+    "download": 60.0,
+}
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning(f"Ignoring invalid value for {name}: {value!r}")
+        return default
+
+
+def operation_timeouts() -> Dict[str, float]:
+    """Return the configured timeout for each TGA operation."""
+    return {
+        operation: _env_float(f"TGA_TIMEOUT_{operation.upper()}", default)
+        for operation, default in DEFAULT_TIMEOUTS.items()
+    }
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter."""
+
+    def __init__(
+        self, attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0
+    ):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        return cls(
+            attempts=int(_env_float("TGA_RETRY_ATTEMPTS", 3)),
+            base_delay=_env_float("TGA_RETRY_BASE_DELAY", 0.5),
+            max_delay=_env_float("TGA_RETRY_MAX_DELAY", 8.0),
+        )
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait after the given (1-based) failed attempt."""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed -> open after ``failure_threshold`` transient failures in a row;
+    open -> half_open once ``reset_timeout`` seconds have passed, letting a
+    single trial call through; the trial's outcome closes or re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @classmethod
+    def from_env(cls) -> "CircuitBreaker":
+        return cls(
+            failure_threshold=int(_env_float("TGA_BREAKER_THRESHOLD", 5)),
+            reset_timeout=_env_float("TGA_BREAKER_RESET_SECONDS", 30.0),
+        )
+
+    def _current_state(self) -> str:
+        if (
+            self._state == self.OPEN
+            and self._clock() - self._opened_at >= self.reset_timeout
+        ):
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def allow(self) -> bool:
+        """Return True if a call may proceed right now."""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker lets a trial call through."""
+        with self._lock:
+            if self._current_state() != self.OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("TGA circuit breaker closed")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            state = self._current_state()
+            if state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if state != self.OPEN:
+                    logger.warning(
+                        f"TGA circuit breaker opened after {self._failures} "
+                        f"consecutive failures"
+                    )
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self._trial_in_flight = False
+
+    def reset(self) -> None:
+        self.record_success()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Breaker state suitable for status endpoints."""
+        with self._lock:
+            state = self._current_state()
+            retry_after = 0.0
+            if state == self.OPEN:
+                retry_after = max(
+                    0.0, self.reset_timeout - (self._clock() - self._opened_at)
+                )
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "retry_after_seconds": round(retry_after, 1),
+            }
+
+
+# Shared by every TrainingGovClient in this process
+tga_breaker = CircuitBreaker.from_env()
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Return True if the failure is worth retrying."""
+    # Imported here so the breaker and retry helpers load without the
+    # HTTP and SOAP stacks; by the time anything fails they are loaded
+    import requests
+    from zeep.exceptions import TransportError
+
+    if isinstance(exc, (requests.Timeout, requests.ConnectionError, TimeoutError)):
+        return True
+    if isinstance(exc, TransportError):
+        return exc.status_code in TRANSIENT_STATUS_CODES
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code in TRANSIENT_STATUS_CODES
+    return False
+
+
+def call_with_retry(
+    operation: str,
+    func: Callable[..., Any],
+    *args: Any,
+    breaker: Optional[CircuitBreaker] = None,
+    policy: Optional[RetryPolicy] = None,
+    sleep: Callable[[float], None] = time.sleep,
+    **kwargs: Any,
+) -> Any:
+    """
+    Call ``func`` retrying transient failures and honouring the breaker.
+
+    Non-transient errors (SOAP faults, bad requests) are raised immediately
+    and count as TGA being reachable.
+
+    Raises:
+        TGACircuitOpenError: If the breaker is open, before or during retries
+    """
+    breaker = breaker or tga_breaker
+    policy = policy or RetryPolicy.from_env()
+
+    for attempt in range(1, policy.attempts + 1):
+        if not breaker.allow():
+            TGA_REQUEST_ERRORS.labels(operation, "circuit_open").inc()
+            raise TGACircuitOpenError(
+                f"TGA {operation} skipped: circuit breaker open "
+                f"(retry in {breaker.retry_after():.0f}s)"
+            )
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            TGA_REQUEST_DURATION.labels(operation).observe(time.perf_counter() - started)
+            if not is_transient(e):
+                TGA_REQUEST_ERRORS.labels(operation, "fault").inc()
+                breaker.record_success()
+                raise
+            TGA_REQUEST_ERRORS.labels(operation, "transient").inc()
+            breaker.record_failure()
+            if attempt == policy.attempts:
+                raise
+            delay = policy.delay(attempt)
+            logger.warning(
+                f"TGA {operation} attempt {attempt}/{policy.attempts} failed: {e}; "
+                f"retrying in {delay:.2f}s"
+            )
+            sleep(delay)
+        else:
+            TGA_REQUEST_DURATION.labels(operation).observe(time.perf_counter() - started)
+            breaker.record_success()
+            return result
@@ -0,0 +1,251 @@
+"""
+Single-pass lxml parser for Training.gov.au unit and assessment requirements XML.
+
+Replaces the BeautifulSoup parsers that built a full soup tree and walked every
+table with ``find_all``. The document is streamed with ``iterparse``; tables,
+``div.element`` blocks and top-level paragraphs/list items are handled as they
+close, so elements, performance criteria, foundation skills, performance and
+knowledge evidence and assessment conditions all come out of one pass.
+
+Output of :func:`parse_unit_xml`::
+
+    {
+        "elements": [
+            {"number": "1", "text": "...",
+             "performance_criteria": [{"number": "1.1", "text": "..."}]}
+        ],
+        "foundation_skills": [
+            {"skill": "Reading", "performance_criteria": "1.2", "description": "..."}
+        ],
+        "performance_evidence": ["..."],
+        "knowledge_evidence": ["..."],
+        "assessment_conditions": ["..."],
+        "tables": [{"rows": 8, "headers": ["Elements", "Performance criteria"]}]
+    }
+
+All text is whitespace-normalised.
+"""
+
+import io
+import re
+from typing import Any, Dict, List, Optional, Union
+
+from lxml import etree
+
+# Element numbers: 1, "Element 1", A1
+ELEMENT_NUM_RE = re.compile(r"^(?:[1-9][0-9]*|[A-Z][1-9][0-9]*)$")
+ELEMENT_LABEL_RE = re.compile(r"^Element\s+([1-9][0-9]*)$", re.IGNORECASE)
+# PC numbers: 1.1, 1.1.1, A1.1
+PC_NUM_RE = re.compile(
+    r"^(?:[1-9][0-9]*\.[1-9][0-9]*(?:\.[1-9][0-9]*)?|[A-Z][1-9][0-9]*\.[1-9][0-9]*)$"
+)
+# div.element headings: "ELEMENT 1 Prepare for work"
+ELEMENT_HEADING_RE = re.compile(r"ELEMENT\s+(\d+)\s+(.*)", re.DOTALL)
+
+# Section headings whose following blocks are collected
+EVIDENCE_SECTIONS = {
+    "performance evidence": "performance_evidence",
+    "knowledge evidence": "knowledge_evidence",
+    "assessment conditions": "assessment_conditions",
+    "foundation skills": "foundation_skills",
+}
+HEADING_TAGS = {"title", "h1", "h2", "h3", "h4", "h5", "h6"}
+BLOCK_TAGS = {"p", "li"} | HEADING_TAGS
+LIST_TAGS = {"ul", "ol"}
+CONTAINER_TAGS = {"table", "div"}
+
+
+def _local(tag: Any) -> str:
+    """Lower-cased tag name without namespace ('' for comments/PIs)."""
+    if not isinstance(tag, str):
+        return ""
+    return tag.rsplit("}", 1)[-1].lower()
+
+
+def _text(el) -> str:
+    return " ".join("".join(el.itertext()).split())
+
+
+def _own_text(el) -> str:
+    """Text of a block excluding nested blocks and lists."""
+    parts = [el.text or ""]
+    for child in el:
+        if _local(child.tag) not in BLOCK_TAGS | LIST_TAGS:
+            parts.append("".join(child.itertext()))
+        parts.append(child.tail or "")
+    return " ".join("".join(parts).split())
+
+
+def _section_key(text: str) -> Optional[str]:
+    return EVIDENCE_SECTIONS.get(text.rstrip(":").strip().lower())
+
+
+def _is_element_div(el) -> bool:
+    return _local(el.tag) == "div" and "element" in (el.get("class") or "").split()
+
+
+def _inside(el, tags) -> bool:
+    return any(_local(a.tag) in tags for a in el.iterancestors())
+
+
+def _rows(table) -> List[List[str]]:
+    """Cell texts of every row in a table (td cells only, like the old parsers)."""
+    rows = []
+    for tr in table.iter():
+        if _local(tr.tag) != "tr":
+            continue
+        rows.append([_text(td) for td in tr.iter() if _local(td.tag) == "td"])
+    return rows
+
+
+def _is_elements_header(cells: List[str]) -> bool:
+    if len(cells) < 2:
+        return False
+    first, second = cells[0], cells[1]
+    return ("Elements" in first and "Performance" in second) or (
+        "ELEMENT" in first.upper() and "PERFORMANCE" in second.upper()
+    )
+
+
+def _element_number(cell: str) -> Optional[str]:
+    if ELEMENT_NUM_RE.match(cell):
+        return cell
+    label = ELEMENT_LABEL_RE.match(cell)
+    return label.group(1) if label else None
+
+
+def _elements_from_table(rows: List[List[str]]) -> List[Dict[str, Any]]:
+    """Elements table: header and explanation rows, then num | text | pc num | pc text."""
+    elements = []
+    current = None
+    for cells in rows[2:]:
+        if len(cells) < 2:
+            continue
+        number = _element_number(cells[0])
+        if number is not None:
+            current = {"number": number, "text": cells[1], "performance_criteria": []}
+            elements.append(current)
+        elif current is None:
+            continue
+        if len(cells) >= 4 and PC_NUM_RE.match(cells[2]):
+            current["performance_criteria"].append({"number": cells[2], "text": cells[3]})
+    return elements
+
+
+def _element_from_div(div) -> Optional[Dict[str, Any]]:
+    """``<div class="element"><h4>ELEMENT 1 Title</h4> ... pc rows ...</div>``"""
+    heading = next((h for h in div.iter() if _local(h.tag) == "h4"), None)
+    if heading is None:
+        return None
+    match = ELEMENT_HEADING_RE.match(_text(heading))
+    if not match:
+        return None
+    pcs = [
+        {"number": cells[0], "text": cells[1]}
+        for cells in _rows(div)
+        if len(cells) >= 2 and cells[0] and cells[1]
+    ]
+    return {"number": match.group(1), "text": match.group(2), "performance_criteria": pcs}
+
+
+def _foundation_skills(rows: List[List[str]]) -> List[Dict[str, Any]]:
+    """Skill | [Performance Criteria |] Description"""
+    skills = []
+    for cells in rows[1:]:
+        if len(cells) < 2 or not cells[0]:
+            continue
+        skills.append({
+            "skill": cells[0],
+            "performance_criteria": cells[1] if len(cells) >= 3 else None,
+            "description": cells[-1],
+        })
+    return skills
+
+
+def parse_unit_xml(xml: Union[str, bytes]) -> Dict[str, Any]:
+    """
+    Parse unit or assessment requirements XML in one pass.
+
+    Malformed markup is recovered rather than rejected; an empty result is
+    returned for empty input.
+    """
+    result: Dict[str, Any] = {
+        "elements": [],
+        "foundation_skills": [],
+        "performance_evidence": [],
+        "knowledge_evidence": [],
+        "assessment_conditions": [],
+        "tables": [],
+    }
+    if not xml:
+        return result
+    if isinstance(xml, str):
+        xml = xml.encode("utf-8")
+        # The encoding declaration no longer applies to re-encoded text
+        xml = re.sub(rb"^\s*<\?xml[^>]*\?>", b"", xml, count=1)
+
+    section = None
+    have_table_elements = False
+    div_elements = []
+
+    events = etree.iterparse(
+        io.BytesIO(xml), events=("end",), recover=True, huge_tree=True,
+        remove_comments=True, remove_pis=True
+    )
+    try:
+        for _, el in events:
+            tag = _local(el.tag)
+
+            if tag == "table":
+                rows = _rows(el)
+                result["tables"].append({"rows": len(rows), "headers": rows[0] if rows else []})
+                if not rows:
+                    continue
+                if not have_table_elements and len(rows) >= 2 and _is_elements_header(rows[0]):
+                    result["elements"] = _elements_from_table(rows)
+                    have_table_elements = True
+                elif section == "foundation_skills" or (
+                    rows[0] and rows[0][0].lower() == "skill"
+                ):
+                    result["foundation_skills"].extend(_foundation_skills(rows))
+                else:
+                    # Two-column layout: | Knowledge Evidence | ...content... |
+                    for cells in rows:
+                        key = _section_key(cells[0]) if len(cells) >= 2 else None
+                        if key and key != "foundation_skills" and cells[1]:
+                            result[key].append(cells[1])
+                if not _inside(el, CONTAINER_TAGS):
+                    el.clear(keep_tail=True)
+
+            elif tag == "div" and _is_element_div(el):
+                element = _element_from_div(el)
+                if element:
+                    div_elements.append(element)
+                if not _inside(el, CONTAINER_TAGS):
+                    el.clear(keep_tail=True)
+
+            elif tag in BLOCK_TAGS:
+                # Blocks in tables are handled with their table, nested blocks
+                # with their outermost block so they stay in document order
+                if _inside(el, BLOCK_TAGS | {"table"}):
+                    continue
+                key = _section_key(_text(el))
+                if key:
+                    section = key
+                elif tag in HEADING_TAGS:
+                    section = None
+                elif section and section != "foundation_skills":
+                    for block in el.iter():
+                        if _local(block.tag) in BLOCK_TAGS:
+                            text = _own_text(block)
+                            if text:
+                                result[section].append(text)
+                if not _inside(el, CONTAINER_TAGS):
+                    el.clear(keep_tail=True)
+    except etree.XMLSyntaxError:
+        # Unrecoverable markup: keep whatever was parsed before the error
+        pass
+
+    if not have_table_elements:
+        result["elements"] = div_elements
+    return result
@@ -0,0 +1,126 @@
+"""
+Unit Documents Service - Precomputed JSON documents for unit pages.
+
+Unit content (elements with their performance criteria, critical aspects and
+required skills) only changes when a unit is synced, so it is aggregated once
+into ``units.content_json`` by a single set-based statement run at the end of
+every bulk write. The unit endpoints then serve the document from one
+primary-key read and answer conditional requests with the stored hash.
+
+Documents carry ``DOCUMENT_VERSION``; bump it when the document shape changes
+and stale documents are rebuilt the next time they are read.
+"""
+
+import hashlib
+import logging
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+import models.tables as models
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_VERSION = 1
+
+REFRESH_DOCUMENTS_SQL = """
+UPDATE units u
+SET content_json = d.document,
+    content_etag = md5(d.document::text),
+    content_version = %(version)s,
+    updated_at = now()
+FROM (
+    SELECT ids.unit_id, jsonb_build_object(
+        'version', %(version)s,
+        'elements', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object(
+                'id', e.id,
+                'element_num', e.element_num,
+                'element_text', e.element_text,
+                'performance_criteria', COALESCE((
+                    SELECT jsonb_agg(jsonb_build_object(
+                        'id', p.id, 'pc_num', p.pc_num, 'pc_text', p.pc_text
+                    ) ORDER BY p.pc_num, p.id)
+                    FROM unit_performance_criteria p
+                    WHERE p.element_id = e.id
+                ), '[]'::jsonb)
+            ) ORDER BY e.element_num, e.id)
+            FROM unit_elements e
+            WHERE e.unit_id = ids.unit_id
+        ), '[]'::jsonb),
+        'critical_aspects', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object(
+                'id', c.id, 'section', c.section, 'critical_aspect', c.critical_aspect
+            ) ORDER BY c.id)
+            FROM unit_critical_aspects c
+            WHERE c.unit_id = ids.unit_id
+        ), '[]'::jsonb),
+        'required_skills', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object(
+                'id', r.id, 'skill_type', r.skill_type,
+                'skill_section', r.skill_section, 'skill_text', r.skill_text
+            ) ORDER BY r.id)
+            FROM unit_required_skills r
+            WHERE r.unit_id = ids.unit_id
+        ), '[]'::jsonb)
+    ) AS document
+    FROM (SELECT DISTINCT unnest(%(unit_ids)s::integer[]) AS unit_id) ids
+) d
+WHERE u.id = d.unit_id
+"""
+
+
+def refresh_unit_documents(cursor, unit_ids: Iterable[int]) -> None:
+    """Rebuild the content documents of the given units (DBAPI cursor, no commit)."""
+    unit_ids = [unit_id for unit_id in unit_ids if unit_id is not None]
+    if unit_ids:
+        cursor.execute(
+            REFRESH_DOCUMENTS_SQL, {"version": DOCUMENT_VERSION, "unit_ids": unit_ids}
+        )
+
+
+def get_unit_document(db: Session, unit: models.Unit) -> Dict[str, Any]:
+    """
+    Return a unit's content document, building it first if it is missing or
+    was built by an older ``DOCUMENT_VERSION``.
+
+    Writers refresh documents in their own transactions; a missing or stale
+    one is built in a separate short transaction, so the caller's (read-only)
+    session is never committed.
+    """
+    if unit.content_json is None or unit.content_version != DOCUMENT_VERSION:
+        logger.info(f"Building content document for unit {unit.code}")
+        with db.get_bind().begin() as connection:
+            cursor = connection.connection.cursor()
+            try:
+                refresh_unit_documents(cursor, [unit.id])
+            finally:
+                cursor.close()
+        db.refresh(unit)
+    return unit.content_json
+
+
+def unit_etag(unit: models.Unit, variant: Optional[str] = None) -> str:
+    """
+    Weak ETag for a unit response: the document hash plus the unit row's
+    last update, so both content syncs and unit field edits change it.
+    """
+    updated = unit.updated_at.isoformat() if unit.updated_at else ""
+    key = f"{unit.id}:{unit.content_version}:{unit.content_etag}:{updated}:{variant or ''}"
+    return f'W/"{hashlib.md5(key.encode()).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches an ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
@@ -13,8 +13,16 @@ TEST_DATABASE_URL = os.environ.get(
 from models.base import Base
 from database import get_db
 import main as app_module
+from services.component_index import component_index
+from services.progress_heatmap import progress_heatmaps
+from services.request_timing import install_sql_instrumentation
+
+# Fails tests whose requests exceed an endpoint's declared query budget
+pytest_plugins = ["query_budget"]
 
 engine = create_engine(TEST_DATABASE_URL)
+# Count the statements of requests served from the test engine
+install_sql_instrumentation(engine)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -25,6 +33,14 @@ def create_tables():
     Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture(autouse=True)
+def reset_caches():
+    # Tests write rows directly; cached states must not leak between them
+    component_index.invalidate()
+    progress_heatmaps.invalidate()
+    yield
+
+
 @pytest.fixture
 def db():
     session = TestingSessionLocal()
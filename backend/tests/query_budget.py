@@ -0,0 +1,68 @@
+"""
+Pytest plugin enforcing the query budgets declared on endpoints.
+
+Endpoints declare how many SQL statements a request may run with
+``services.query_detector.query_budget``. While a test runs, repeated
+statement detection is switched on and every request over its endpoint's
+budget fails the test, listing the statements it repeated and where they
+were run from.
+
+Tests that knowingly exceed a budget are marked ``allow_query_budget``;
+``--no-query-budget`` turns the check off for a whole run. Statements are
+counted on engines passed to ``install_sql_instrumentation`` (conftest does
+this for the test engine).
+"""
+
+import pytest
+
+from services.query_detector import query_detector
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--no-query-budget",
+        action="store_true",
+        default=False,
+        help="do not fail tests whose requests exceed an endpoint's query budget",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "allow_query_budget: requests of this test may exceed endpoint query budgets"
+    )
+
+
+def describe(finding) -> str:
+    lines = [
+        f"{finding['method']} {finding['path']} ({finding['route']}) ran "
+        f"{finding['count']} SQL statements, budget {finding['budget']}"
+    ]
+    for repeated in finding["repeated"]:
+        lines.append(
+            f"  {repeated['count']}x from {repeated['call_site']}: {repeated['statement'][:200]}"
+        )
+    return "\n".join(lines)
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    if item.config.getoption("no_query_budget") or item.get_closest_marker("allow_query_budget"):
+        return (yield)
+
+    enabled = query_detector.enabled
+    query_detector.enabled = True
+    query_detector.reset()
+    try:
+        result = yield
+    finally:
+        query_detector.enabled = enabled
+
+    # Only reached when the test itself passed
+    findings = query_detector.findings("budget")
+    if findings:
+        pytest.fail(
+            "Query budget exceeded:\n" + "\n".join(describe(finding) for finding in findings),
+            pytrace=False,
+        )
+    return result
@@ -0,0 +1,63 @@
+"""
+Tests for the ingestion benchmark over the local XML fixtures
+"""
+
+import os
+from unittest.mock import MagicMock
+
+import pytest
+
+from scripts.tga.benchmark_ingestion import load_corpus, run, stub_client
+from services.tga.exceptions import TGAClientError
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'tga')
+
+
+@pytest.fixture
+def corpus():
+    return load_corpus(FIXTURES)
+
+
+class TestStubClient:
+    def test_fetches_unit_and_assessment_xml(self, corpus):
+        units, files = corpus
+        client = stub_client(files)
+
+        result = client.get_component_xml('TSTWHS101')
+
+        assert result['xml'] == files['Unit_TSTWHS101_R1.xml'].decode('utf-8')
+        assert result['assessment_xml'] == files['AssessmentRequirements_TSTWHS101_R1.xml'].decode('utf-8')
+
+    def test_unknown_code_fails_like_the_service(self, corpus):
+        client = stub_client(corpus[1])
+
+        with pytest.raises(TGAClientError):
+            client.get_component_xml('NOPE001')
+
+
+class TestRun:
+    def test_parse_only(self, corpus):
+        units, files = corpus
+
+        results = run(stub_client(files), units, repeat=3)
+
+        assert results['files'] == 3 * len(units)
+        assert results['elements'] > 0
+        assert results['statements'] == 0 and results['statements_per_unit'] is None
+        assert results['phases']['store']['seconds'] == 0
+        assert results['peak_rss_mb'] > 0
+
+    def test_store_counts_statements_and_rolls_back(self, corpus):
+        units, files = corpus
+        conn = MagicMock()
+        cursor = conn.cursor.return_value
+        cursor.fetchall.return_value = [(code, number) for number, (_, code) in enumerate(units, 1)]
+
+        results = run(stub_client(files), units, conn=conn)
+
+        assert results['store_failures'] == 0
+        # Everything but the unit id lookup is counted
+        assert results['statements'] == cursor.execute.call_count + cursor.copy_expert.call_count - 1
+        assert results['statements_per_unit'] == results['statements'] / len(units)
+        conn.rollback.assert_called_once()
+        conn.commit.assert_not_called()
@@ -0,0 +1,206 @@
+"""
+Tests for the set-based unit content writer
+"""
+
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from services.bulk_writer import (
+    MERGE_ELEMENTS_SQL,
+    REPLACE_ASPECTS_SQL,
+    REPLACE_SKILLS_SQL,
+    STAGING_DDL,
+    _copy_value,
+    copy_rows,
+    elements_from_parser,
+    unit_content_from_parsed,
+    write_unit_content,
+    write_unit_content_orm,
+)
+from services.tga.xml_parser import parse_unit_xml
+from services.unit_documents import REFRESH_DOCUMENTS_SQL
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures" / "tga"
+
+
+def copied(cursor):
+    """COPY payloads sent to a mock cursor, keyed by staging table"""
+    payloads = {}
+    for call in cursor.copy_expert.call_args_list:
+        table = call.args[0].split()[1]
+        payloads[table] = call.args[1].getvalue().splitlines()
+    return payloads
+
+
+def executed(cursor):
+    return [call.args[0] for call in cursor.execute.call_args_list]
+
+
+class TestCopyRows:
+    """COPY text encoding"""
+
+    def test_copy_value_escapes_special_characters(self):
+        assert _copy_value(None) == "\\N"
+        assert _copy_value(True) == "t"
+        assert _copy_value(False) == "f"
+        assert _copy_value(3) == "3"
+        assert _copy_value("a\tb\nc\\d\r") == "a\\tb\\nc\\\\d\\r"
+
+    def test_copy_rows(self):
+        cursor = MagicMock()
+        count = copy_rows(cursor, "stage_units", ("unit_id", "replace_elements"), [(1, True), (2, None)])
+
+        assert count == 2
+        sql, buffer = cursor.copy_expert.call_args.args
+        assert sql == "COPY stage_units (unit_id, replace_elements) FROM STDIN"
+        assert buffer.getvalue() == "1\tt\n2\t\\N\n"
+
+    def test_copy_rows_skips_empty(self):
+        cursor = MagicMock()
+        assert copy_rows(cursor, "stage_units", ("unit_id",), []) == 0
+        cursor.copy_expert.assert_not_called()
+
+
+class TestWriteUnitContent:
+    """Staging and merge statements per batch"""
+
+    def test_batch_uses_fixed_statements(self):
+        cursor = MagicMock()
+        units = [
+            {
+                "unit_id": unit_id,
+                "elements": [
+                    {"number": "1", "text": "Plan", "performance_criteria": [
+                        {"number": "1.1", "text": "Confirm"}, {"number": "1.2", "text": "Check"},
+                    ]},
+                    {"number": "2", "text": "Do", "performance_criteria": []},
+                ],
+            }
+            for unit_id in range(1, 51)
+        ]
+
+        stats = write_unit_content(cursor, units)
+
+        assert stats == {
+            "units": 50,
+            "elements": 100,
+            "performance_criteria": 100,
+            "critical_aspects": 0,
+            "required_skills": 0,
+        }
+        # Same statements for 50 units as for one
+        assert executed(cursor) == [STAGING_DDL, MERGE_ELEMENTS_SQL, REFRESH_DOCUMENTS_SQL]
+        assert cursor.execute.call_args.args[1]["unit_ids"] == list(range(1, 51))
+        assert cursor.copy_expert.call_count == 3
+
+    def test_duplicate_numbers_keep_first(self):
+        cursor = MagicMock()
+        write_unit_content(cursor, [{
+            "unit_id": 7,
+            "elements": [
+                {"number": "1", "text": "First", "performance_criteria": [
+                    {"number": "1.1", "text": "A"}, {"number": "1.1", "text": "B"},
+                ]},
+                {"number": "1", "text": "Second", "performance_criteria": []},
+            ],
+        }])
+
+        payloads = copied(cursor)
+        assert payloads["stage_unit_elements"] == ["7\t0\t1\tFirst"]
+        assert payloads["stage_unit_pcs"] == ["7\t0\t1\t1.1\tA"]
+
+    def test_repeated_unit_keeps_last_content(self):
+        cursor = MagicMock()
+        stats = write_unit_content(cursor, [
+            {"unit_id": 5, "elements": [{"number": "1", "text": "Old", "performance_criteria": []}]},
+            {"unit_id": 5, "elements": [{"number": "1", "text": "New", "performance_criteria": []}]},
+        ])
+
+        assert stats["units"] == 1
+        assert copied(cursor)["stage_unit_elements"] == ["5\t0\t1\tNew"]
+
+    def test_none_leaves_content_and_empty_list_clears(self):
+        cursor = MagicMock()
+        write_unit_content(cursor, [{
+            "unit_id": 3,
+            "critical_aspects": [],
+            "required_skills": [{"skill_type": "knowledge", "section": None, "text": "Hazards"}],
+        }])
+
+        payloads = copied(cursor)
+        assert payloads["stage_units"] == ["3\tf\tt\tt"]
+        assert payloads["stage_unit_skills"] == ["3\t0\tknowledge\t\\N\tHazards"]
+        assert executed(cursor) == [
+            STAGING_DDL, REPLACE_ASPECTS_SQL, REPLACE_SKILLS_SQL, REFRESH_DOCUMENTS_SQL
+        ]
+
+    def test_empty_batch_does_nothing(self):
+        cursor = MagicMock()
+        assert write_unit_content(cursor, [])["units"] == 0
+        cursor.execute.assert_not_called()
+
+    def test_orm_wrapper_flushes_and_closes_cursor(self):
+        db = MagicMock()
+        cursor = db.connection.return_value.connection.cursor.return_value
+
+        write_unit_content_orm(db, [{"unit_id": 1, "elements": []}])
+
+        db.flush.assert_called_once()
+        assert executed(cursor) == [STAGING_DDL, MERGE_ELEMENTS_SQL, REFRESH_DOCUMENTS_SQL]
+        cursor.close.assert_called_once()
+        db.commit.assert_not_called()
+
+
+class TestElementsFromParser:
+    """Normalising the parsers' element shapes"""
+
+    def test_legacy_shapes(self):
+        tp_get = [{"element_num": "1", "element_text": "Plan",
+                   "performance_criteria": [{"pc_num": "1.1", "pc_text": "Confirm"}]}]
+        client = [{"number": 1, "title": "Plan",
+                   "performance_criteria": [{"number": "1.1", "text": "Confirm"}]}]
+        expected = [{"number": "1", "text": "Plan",
+                     "performance_criteria": [{"number": "1.1", "text": "Confirm"}]}]
+
+        assert elements_from_parser(tp_get) == expected
+        assert elements_from_parser(client)[0]["number"] == 1
+        assert elements_from_parser(client)[0]["text"] == "Plan"
+        assert elements_from_parser(None) == []
+
+
+class TestUnitContentFromParsed:
+    """Mapping parsed documents to unit content"""
+
+    def parse(self, name):
+        return parse_unit_xml((FIXTURE_DIR / f"{name}.xml").read_text(encoding="utf-8"))
+
+    def test_unit_and_assessment_requirements(self):
+        unit = self.parse("Unit_TSTWHS101_R1")
+        assessment = self.parse("AssessmentRequirements_TSTWHS101_R1")
+
+        content = unit_content_from_parsed(9, unit, assessment)
+
+        assert content["unit_id"] == 9
+        assert len(content["elements"]) == 3
+        sections = {aspect["section"] for aspect in content["critical_aspects"]}
+        assert sections == {"Performance Evidence", "Assessment Conditions"}
+        skill_types = {skill["skill_type"] for skill in content["required_skills"]}
+        assert skill_types == {"knowledge", "foundation"}
+        foundation = [s for s in content["required_skills"] if s["skill_type"] == "foundation"]
+        assert foundation[0]["section"] == "Reading"
+
+    def test_repeated_text_is_stored_once(self):
+        parsed = {"elements": [], "performance_evidence": ["Two tasks"],
+                  "knowledge_evidence": ["Hazards"], "foundation_skills": []}
+
+        content = unit_content_from_parsed(1, parsed, parsed)
+
+        assert content["critical_aspects"] == [{"section": "Performance Evidence", "text": "Two tasks"}]
+        assert len(content["required_skills"]) == 1
+
+    def test_missing_documents_clear_content(self):
+        content = unit_content_from_parsed(1, None)
+
+        assert content["elements"] == []
+        assert content["critical_aspects"] == []
+        assert content["required_skills"] == []
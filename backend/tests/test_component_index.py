@@ -0,0 +1,120 @@
+"""
+Tests for the cached component state index
+"""
+
+from unittest.mock import MagicMock
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+import models.tables as models
+from services.component_index import ComponentIndex
+from services.component_store import upsert_components
+
+
+def session_with(rows):
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.return_value = rows
+    return db
+
+
+class TestLookup:
+    """One query per page for codes not cached"""
+
+    def test_page_is_one_query(self):
+        index = ComponentIndex()
+        db = session_with([("TSTWHS101", "Y"), ("TSTDIV201", "N")])
+        codes = [f"TSTUNIT{i:03}" for i in range(198)] + ["TSTWHS101", "TSTDIV201"]
+
+        states = index.lookup(db, models.Unit, codes)
+
+        db.query.assert_called_once()
+        criterion = db.query.return_value.filter.call_args.args[0]
+        sql = str(criterion.compile(dialect=postgresql.dialect()))
+        assert sql == "units.code = ANY (%(codes)s::VARCHAR[])"
+        assert states["TSTWHS101"] == "Y"
+        assert states["TSTDIV201"] == "N"
+        assert states["TSTUNIT000"] is None
+        assert len(states) == 200
+
+    def test_cached_codes_are_not_queried_again(self):
+        index = ComponentIndex()
+        db = session_with([("TSTWHS101", "Y")])
+        index.lookup(db, models.Unit, ["TSTWHS101", "TSTDIV201"])
+
+        db = session_with([])
+        states = index.lookup(db, models.Unit, ["TSTWHS101", "TSTDIV201"])
+
+        db.query.assert_not_called()
+        assert states == {"TSTWHS101": "Y", "TSTDIV201": None}
+
+    def test_expired_entries_are_read_again(self):
+        index = ComponentIndex(ttl=0)
+        index.update(models.Unit, {"TSTWHS101": "N"})
+        db = session_with([("TSTWHS101", "Y")])
+
+        assert index.lookup(db, models.Unit, ["TSTWHS101"]) == {"TSTWHS101": "Y"}
+
+    def test_tables_are_cached_separately(self):
+        index = ComponentIndex()
+        index.update(models.Unit, {"TST": "Y"})
+        db = session_with([])
+
+        assert index.lookup(db, models.TrainingPackage, ["TST"]) == {"TST": None}
+        db.query.assert_called_once()
+
+    def test_empty_page_does_not_query(self):
+        index = ComponentIndex()
+        db = MagicMock()
+
+        assert index.lookup(db, models.Unit, []) == {}
+        db.query.assert_not_called()
+
+
+class TestIngestionUpdates:
+    """The ingestion pipeline keeps the index current"""
+
+    def test_upsert_records_components_as_unprocessed_on_commit(self, monkeypatch):
+        index = ComponentIndex()
+        monkeypatch.setattr("services.component_store.component_index", index)
+        session = Session()
+        monkeypatch.setattr(session, "scalars", MagicMock())
+
+        upsert_components(session, models.Unit, [{"code": "TSTWHS101"}])
+
+        # Not visible to other sessions until the upsert commits
+        assert index.lookup(session_with([]), models.Unit, ["TSTWHS101"]) == {"TSTWHS101": None}
+        session.commit()
+        db = MagicMock()
+        assert index.lookup(db, models.Unit, ["TSTWHS101"]) == {"TSTWHS101": "N"}
+        db.query.assert_not_called()
+
+    def test_rolled_back_upsert_is_not_recorded(self, monkeypatch):
+        index = ComponentIndex()
+        monkeypatch.setattr("services.component_store.component_index", index)
+        session = Session()
+        monkeypatch.setattr(session, "scalars", MagicMock())
+        session.begin()
+
+        upsert_components(session, models.Unit, [{"code": "TSTWHS101"}])
+        session.rollback()
+        session.commit()
+
+        db = session_with([])
+        assert index.lookup(db, models.Unit, ["TSTWHS101"]) == {"TSTWHS101": None}
+        db.query.assert_called_once()
+
+    def test_processed_state_replaces_cached_state(self):
+        index = ComponentIndex()
+        index.update(models.Unit, {"TSTWHS101": "N"})
+        index.update(models.Unit, {"TSTWHS101": "Y"})
+
+        assert index.lookup(MagicMock(), models.Unit, ["TSTWHS101"]) == {"TSTWHS101": "Y"}
+
+    def test_invalidate(self):
+        index = ComponentIndex()
+        index.update(models.Unit, {"TSTWHS101": "Y"})
+        index.invalidate(models.Unit)
+        db = session_with([])
+
+        assert index.lookup(db, models.Unit, ["TSTWHS101"]) == {"TSTWHS101": None}
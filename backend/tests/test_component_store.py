@@ -0,0 +1,91 @@
+"""
+Tests for batch upserts of TGA components
+"""
+
+from unittest.mock import MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+import models.tables as models
+from services.component_store import (
+    component_rows,
+    upsert_component,
+    upsert_components,
+    upsert_statement,
+)
+
+
+def compiled(statement):
+    return statement.compile(dialect=postgresql.dialect())
+
+
+class TestComponentRows:
+    """Building uniform insert rows from TGA data"""
+
+    def test_rows_have_the_same_keys(self):
+        rows = component_rows(models.Unit, [
+            {"code": "TSTWHS101", "title": "Work safely", "status": "Current"},
+            {"code": "TSTDIV201"},
+        ], training_package_id=4)
+
+        assert rows[0].keys() == rows[1].keys()
+        assert rows[0]["training_package_id"] == 4
+        assert all(row["processed"] == "N" for row in rows)
+        # Missing titles are filled with the code so inserts satisfy NOT NULL
+        assert rows[1]["title"] == "TSTDIV201"
+
+    def test_fields_follow_the_model(self):
+        rows = component_rows(models.Qualification, [{"code": "TST30120", "status": "Current"}])
+
+        assert "status" not in rows[0]
+        assert "training_package_id" in rows[0]
+        assert "training_package_id" not in component_rows(models.TrainingPackage, [{"code": "TST"}])[0]
+
+    def test_repeated_and_invalid_components(self):
+        rows = component_rows(models.Unit, [
+            {"code": "TSTWHS101", "title": "Old"},
+            {"title": "No code"},
+            "TSTWHS101",
+            {"code": "TSTWHS101", "title": "New"},
+        ])
+
+        assert rows == [dict(rows[0], title="New")]
+
+
+class TestUpsert:
+    """One INSERT ... ON CONFLICT statement per batch"""
+
+    def test_statement_keeps_stored_values_for_missing_fields(self):
+        rows = component_rows(models.Unit, [{"code": "TSTWHS101"}])
+        sql = str(compiled(upsert_statement(models.Unit, rows)))
+
+        assert "ON CONFLICT (code) DO UPDATE" in sql
+        assert "description = coalesce(excluded.description, units.description)" in sql
+        assert "WHEN (excluded.title = excluded.code) THEN units.title" in sql
+        assert "processed = excluded.processed" in sql
+        assert "RETURNING units.id" in sql
+
+    def test_search_page_is_one_statement(self):
+        db = MagicMock()
+        components = [{"code": f"TSTUNIT{i:03}", "title": f"Unit {i}"} for i in range(200)]
+
+        upsert_components(db, models.Unit, components)
+
+        db.scalars.assert_called_once()
+        params = compiled(db.scalars.call_args.args[0]).params
+        assert params["code_m199"] == "TSTUNIT199"
+        assert db.scalars.call_args.kwargs["execution_options"] == {"populate_existing": True}
+        db.commit.assert_not_called()
+
+    def test_empty_batch_does_nothing(self):
+        db = MagicMock()
+
+        assert upsert_components(db, models.Unit, []) == []
+        db.scalars.assert_not_called()
+
+    def test_single_component(self):
+        db = MagicMock()
+        unit = MagicMock()
+        db.scalars.return_value.all.return_value = [unit]
+
+        assert upsert_component(db, models.Unit, {"code": "TSTWHS101"}) is unit
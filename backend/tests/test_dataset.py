@@ -0,0 +1,96 @@
+"""
+Tests for the synthetic dataset generator
+"""
+
+import json
+from unittest.mock import MagicMock
+
+from scripts.loadtest import dataset
+from scripts.loadtest.dataset import COLUMNS, Dataset, copy_table
+
+PROFILE = {
+    'packages': 2, 'units_per_package': 3, 'elements_per_unit': 2, 'pcs_per_element': 2,
+    'questions_per_element': 3, 'users': 20, 'units_per_user': 2,
+}
+
+
+def build(seed=7, bases=None):
+    return Dataset(PROFILE, seed=seed, bases=bases, role_id=5, password_hash='hash')
+
+
+class TestCatalog:
+    def test_row_counts_follow_the_profile(self):
+        data = build()
+
+        assert len(list(data.training_packages())) == 2
+        assert len(list(data.units_rows())) == 6
+        assert len(list(data.unit_elements())) == 12
+        assert len(list(data.unit_performance_criteria())) == 24
+        assert len(list(data.assessments())) == 12
+        assert len(list(data.assessment_questions())) == 36
+
+    def test_rows_match_their_columns(self):
+        data = build()
+        generators = {
+            'training_packages': data.training_packages, 'units': data.units_rows,
+            'unit_elements': data.unit_elements,
+            'unit_performance_criteria': data.unit_performance_criteria,
+            'assessments': data.assessments, 'assessment_questions': data.assessment_questions,
+            'users': data.users,
+        }
+        for table, rows in generators.items():
+            assert all(len(row) == len(COLUMNS[table]) for row in rows()), table
+
+    def test_ids_start_after_existing_rows(self):
+        data = build(bases={'units': 100, 'unit_elements': 500, 'training_packages': 9})
+
+        units = list(data.units_rows())
+        elements = list(data.unit_elements())
+
+        assert units[0][0] == 101 and units[0][2] == 10
+        assert elements[0][:2] == (501, 101)
+        assert {element[1] for element in elements} == {unit[0] for unit in units}
+
+    def test_codes_carry_the_prefix(self):
+        assert all(row[1].startswith('SYN') for row in build().units_rows())
+
+
+class TestActivity:
+    def test_generation_is_deterministic(self):
+        assert build().student_activity(range(20)) == build().student_activity(range(20))
+        assert build().student_activity(range(20)) != build(seed=8).student_activity(range(20))
+
+    def test_chunks_do_not_change_the_result(self):
+        data = build()
+        whole = data.student_activity(range(20))
+        parts = [data.student_activity(range(start, start + 5)) for start in range(0, 20, 5)]
+
+        for index in range(3):
+            assert whole[index] == [row for part in parts for row in part[index]]
+
+    def test_passed_elements_end_with_correct_answers(self):
+        data = build()
+        questions = {row[0]: json.loads(row[5])['correct'] for row in data.assessment_questions()}
+        profiles, progress, answers = data.student_activity(range(20))
+
+        assert len(profiles) == 20
+        for answer in answers:
+            selected = json.loads(answer[3])['selected']
+            assert (selected == questions[answer[1]]) is answer[4]
+        passed = [row for row in progress if row[3] == 'passed']
+        assert passed and all(row[5] == 50 and row[6] for row in passed)
+        xp = {row[0]: row[1] for row in profiles}
+        for user_id, total in xp.items():
+            assert total == 50 * sum(1 for row in passed if row[0] == user_id)
+
+
+def test_copy_table_sends_chunks(monkeypatch):
+    monkeypatch.setattr(dataset, 'CHUNK_ROWS', 10)
+    cursor = MagicMock()
+
+    count = copy_table(cursor, 'unit_elements', build().unit_elements())
+
+    assert count == 12
+    assert cursor.copy_expert.call_count == 2
+    sql = cursor.copy_expert.call_args.args[0]
+    assert sql == "COPY unit_elements (id, unit_id, element_num, element_text) FROM STDIN"
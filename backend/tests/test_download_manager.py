@@ -5,13 +5,19 @@ This module tests the bulk download functionality for training packages and unit
 including job management, progress tracking, and data population.
 """
 
+import asyncio
 import pytest
 import uuid
+from pathlib import Path
+from types import SimpleNamespace
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import Session
 
-from services.download_manager import DownloadManager
+from services.download_manager import DownloadJobConflict, DownloadManager
+from services.tga.client import iter_components
+from services.tga.exceptions import TGAClientError, TGACircuitOpenError
 import models.tables as models
 
 
@@ -99,6 +105,356 @@ class TestDownloadManager:
         self.download_manager.update_job_status(fake_job_id, "processing")
 
 
+class TestDownloadJobDeduplication:
+    """Test deduplication, skip-if-unchanged and resume behaviour"""
+    
+    def setup_method(self):
+        self.download_manager = DownloadManager()
+    
+    def test_create_job_collapses_repeated_codes(self):
+        """Codes repeated within one request are queued once"""
+        job_id = self.download_manager.create_job("units", ["ICTICT418", "ICTICT418", "BSBWHS411"], 1)
+        
+        job = self.download_manager.get_job_status(job_id)
+        assert job["items"] == ["ICTICT418", "BSBWHS411"]
+        assert job["total_items"] == 2
+    
+    def test_create_job_skips_codes_pending_in_active_job(self):
+        """Overlapping codes stay with the active job that already owns them"""
+        first_id = self.download_manager.create_job("units", ["ICTICT418", "BSBWHS411"], 1)
+        second_id = self.download_manager.create_job("units", ["BSBWHS411", "ICTSAS214"], 1)
+        
+        second = self.download_manager.get_job_status(second_id)
+        assert second["items"] == ["ICTSAS214"]
+        assert second["deduplicated"] == {"BSBWHS411": first_id}
+    
+    def test_create_job_requeues_codes_from_finished_jobs(self):
+        """Completed jobs and other job types do not block new jobs"""
+        first_id = self.download_manager.create_job("units", ["ICTICT418"], 1)
+        self.download_manager.update_job_status(first_id, "completed")
+        self.download_manager.create_job("training_packages", ["BSBWHS411"], 1)
+        
+        job_id = self.download_manager.create_job("units", ["ICTICT418", "BSBWHS411"], 1)
+        assert self.download_manager.get_job_status(job_id)["items"] == ["ICTICT418", "BSBWHS411"]
+    
+    def test_is_unchanged_matches_stored_release(self):
+        """A processed unit with the same XML release is reported unchanged"""
+        db = Mock()
+        stored = Mock(processed="Y", xml_file="Unit_ICTICT418_R2.xml")
+        db.query.return_value.filter.return_value.first.return_value = stored
+        
+        assert self.download_manager._is_unchanged(
+            db, models.Unit, {"code": "ICTICT418", "xml_file": "Unit_ICTICT418_R2.xml"}
+        )
+        assert not self.download_manager._is_unchanged(
+            db, models.Unit, {"code": "ICTICT418", "xml_file": "Unit_ICTICT418_R3.xml"}
+        )
+        
+        stored.processed = "N"
+        assert not self.download_manager._is_unchanged(
+            db, models.Unit, {"code": "ICTICT418", "xml_file": "Unit_ICTICT418_R2.xml"}
+        )
+    
+    @patch.dict('os.environ', {'TGA_USERNAME': 'test', 'TGA_PASSWORD': 'test'})
+    @patch('services.download_manager.SessionLocal')
+    @patch('services.download_manager.TrainingGovClient')
+    def test_unchanged_unit_is_skipped(self, mock_client_class, mock_session_local):
+        """Units already processed at the TGA release are not fetched again"""
+        db = Mock()
+        db.query.return_value.filter.return_value.first.return_value = Mock(
+            processed="Y", xml_file="Unit_ICTICT418_R2.xml"
+        )
+        mock_session_local.return_value = db
+        client = Mock()
+        client.get_component_details.return_value = {
+            "code": "ICTICT418",
+            "title": "Test Unit",
+            "xml_file": "Unit_ICTICT418_R2.xml"
+        }
+        mock_client_class.return_value = client
+        
+        job_id = self.download_manager.create_job("units", ["ICTICT418"], 1)
+        self.download_manager.process_units_download(job_id, ["ICTICT418"], 1)
+        
+        job = self.download_manager.get_job_status(job_id)
+        assert job["status"] == "completed"
+        assert job["skipped_items"] == 1
+        assert job["completed_items"] == 0
+        assert job["results"][0]["status"] == "skipped"
+        client.get_component_xml.assert_not_called()
+    
+    def test_resume_job_starts_from_first_unfinished_item(self):
+        """Resuming keeps finished items and retries the rest in order"""
+        codes = ["A1", "B2", "C3", "D4"]
+        job_id = self.download_manager.create_job("units", codes, 1)
+        job = self.download_manager.get_job_status(job_id)
+        job["item_status"].update({"A1": "success", "B2": "failed", "C3": "skipped"})
+        job["results"] = [
+            {"code": "A1", "status": "success"},
+            {"code": "B2", "status": "failed", "error": "timeout"},
+            {"code": "C3", "status": "skipped"},
+        ]
+        job["completed_items"], job["failed_items"], job["skipped_items"] = 1, 1, 1
+        job["status"] = "completed"
+        
+        remaining = self.download_manager.resume_job(job_id)
+        
+        assert remaining == ["B2", "D4"]
+        assert job["status"] == "queued"
+        assert job["failed_items"] == 0
+        assert job["completed_items"] == 1
+        assert job["skipped_items"] == 1
+        assert [r["code"] for r in job["results"]] == ["A1", "C3"]
+        assert self.download_manager._pending_items(job_id, codes) == ["B2", "D4"]
+    
+    def test_resume_rejects_queued_running_and_finished_jobs(self):
+        """Only stopped jobs, or completed jobs with failed items, can be resumed"""
+        job_id = self.download_manager.create_job("units", ["A1", "B2"], 1)
+        with pytest.raises(DownloadJobConflict):
+            self.download_manager.resume_job(job_id)
+        
+        self.download_manager.update_job_status(job_id, "paused")
+        self.download_manager.running.add(job_id)
+        with pytest.raises(DownloadJobConflict):
+            self.download_manager.resume_job(job_id)
+        self.download_manager.running.discard(job_id)
+        
+        job = self.download_manager.get_job_status(job_id)
+        job["item_status"].update({"A1": "success", "B2": "skipped"})
+        job["status"] = "completed"
+        with pytest.raises(DownloadJobConflict):
+            self.download_manager.resume_job(job_id)
+        
+        job["item_status"]["B2"] = "failed"
+        assert self.download_manager.resume_job(job_id) == ["B2"]
+        assert job["status"] == "queued"
+    
+    def test_resume_leaves_codes_owned_by_active_jobs(self):
+        """Resumed codes go through the same active-owner check as new jobs"""
+        first_id = self.download_manager.create_job("units", ["A1", "B2"], 1)
+        first = self.download_manager.get_job_status(first_id)
+        first["item_status"].update({"A1": "failed", "B2": "failed"})
+        first["status"] = "completed"
+        other_id = self.download_manager.create_job("units", ["B2"], 1)
+        
+        assert self.download_manager.resume_job(first_id) == ["A1"]
+        assert first["deduplicated"] == {"B2": other_id}
+        assert first["failed_items"] == 1
+
+
+class TestDownloadJobEvents:
+    """Test incremental job events and the compact status summary"""
+    
+    def setup_method(self):
+        self.download_manager = DownloadManager()
+    
+    @patch.dict('os.environ', {'TGA_USERNAME': 'test', 'TGA_PASSWORD': 'test'})
+    @patch('services.download_manager.SessionLocal')
+    @patch('services.download_manager.TrainingGovClient')
+    def run_units_job(self, codes, mock_client_class, mock_session_local):
+        db = Mock()
+        db.query.return_value.filter.return_value.first.return_value = None
+        db.scalars.return_value.all.return_value = [Mock(id=1)]
+        mock_session_local.return_value = db
+        client = Mock()
+        client.get_component_details.side_effect = lambda code: (
+            {"code": code, "title": f"Unit {code}"} if code != "BAD1" else {}
+        )
+        client.get_component_xml.return_value = {"xml": "<Unit/>"}
+        mock_client_class.return_value = client
+        
+        job_id = self.download_manager.create_job("units", codes, 1)
+        self.download_manager.process_units_download(job_id, codes, 1)
+        return job_id
+    
+    def test_events_cover_item_lifecycle(self):
+        """Each item emits started and finished/failed events in order"""
+        job_id = self.run_units_job(["ICTICT418", "BAD1"])
+        
+        events = self.download_manager.events_since(job_id)
+        assert [e["type"] for e in events] == [
+            "job_queued", "job_processing",
+            "item_started", "item_finished",
+            "item_started", "item_failed",
+            "job_completed",
+        ]
+        assert [e["id"] for e in events] == list(range(1, 8))
+        assert events[3]["code"] == "ICTICT418"
+        assert events[-1]["progress"]["completed"] == 1
+        assert events[-1]["progress"]["failed"] == 1
+        assert events[-1]["progress"]["remaining"] == 0
+        assert [e["type"] for e in self.download_manager.events_since(job_id, 5)] == [
+            "item_failed", "job_completed"
+        ]
+    
+    def test_progress_reports_throughput_and_eta(self):
+        """Throughput and ETA are derived from items finished in the current run"""
+        job_id = self.download_manager.create_job("units", ["A1", "B2", "C3", "D4"], 1)
+        self.download_manager._run_started[job_id] = (0, 0)
+        self.download_manager.jobs[job_id]["completed_items"] = 2
+        
+        with patch('services.download_manager.time.monotonic', return_value=10.0):
+            progress = self.download_manager.progress(job_id)
+        
+        assert progress["percent"] == 50.0
+        assert progress["items_per_second"] == 0.2
+        assert progress["eta_seconds"] == 10.0
+    
+    def test_summary_paginates_results(self):
+        """The summary returns counters and one page of results"""
+        job_id = self.download_manager.create_job("units", ["A1"], 1)
+        job = self.download_manager.jobs[job_id]
+        job["results"] = [
+            {"code": f"U{i}", "status": "failed" if i % 2 else "success"} for i in range(5)
+        ]
+        job["errors"] = ["first", "last"]
+        
+        summary = self.download_manager.job_summary(job_id, page=2, page_size=2)
+        assert [r["code"] for r in summary["results"]["items"]] == ["U2", "U3"]
+        assert summary["results"]["total"] == 5
+        assert summary["error_count"] == 2
+        assert summary["last_error"] == "last"
+        assert "item_status" not in summary
+        
+        failed = self.download_manager.job_summary(job_id, result_status="failed")
+        assert [r["code"] for r in failed["results"]["items"]] == ["U1", "U3"]
+        assert self.download_manager.job_summary("missing") is None
+    
+    def test_stream_replays_from_last_event_id_and_ends(self):
+        """The SSE stream replays missed events and closes once the job is done"""
+        job_id = self.run_units_job(["ICTICT418"])
+        
+        async def collect():
+            return [chunk async for chunk in self.download_manager.stream_events(job_id, 2)]
+        
+        chunks = asyncio.run(collect())
+        assert chunks[0].startswith("id: 3\nevent: item_started\ndata: ")
+        assert chunks[-1].startswith("id: 5\nevent: job_completed\n")
+        assert all(chunk.endswith("\n\n") for chunk in chunks)
+
+
+class TestPackageComponentSync:
+    """Test paginated component listing and the concurrent unit sync stage"""
+    
+    def setup_method(self):
+        self.download_manager = DownloadManager()
+        self.job_id = self.download_manager.create_job("training_packages", ["TST"], 1)
+        fixtures = Path(__file__).parent / "fixtures" / "tga"
+        self.unit_xml = (fixtures / "Unit_TSTWHS101_R1.xml").read_text(encoding="utf-8")
+    
+    def make_client(self, unit_codes, page_size=2):
+        """Client whose searches return unit_codes in pages, and nothing else"""
+        client = Mock()
+        
+        def search(filter_text, component_types, page, page_size):
+            codes = unit_codes if component_types["IncludeUnit"] else []
+            start = (page - 1) * page_size
+            return {"components": [{"code": c, "title": c} for c in codes[start:start + page_size]]}
+        
+        client.search_components.side_effect = search
+        client.get_component_details.side_effect = lambda code, **kwargs: {
+            "code": code, "xml_file": f"Unit_{code}_R1.xml"
+        }
+        client.get_component_xml.return_value = {"xml": self.unit_xml}
+        return client
+    
+    def test_iter_components_follows_pages(self):
+        """Listing keeps requesting pages until a short page"""
+        client = self.make_client([f"TSTUNIT{i}" for i in range(5)])
+        
+        codes = [c["code"] for c in iter_components(client, "TST", {"IncludeUnit": True}, page_size=2)]
+        
+        assert len(codes) == 5
+        assert client.search_components.call_count == 3
+    
+    def test_iter_components_stops_at_reported_total(self):
+        client = Mock()
+        client.search_components.return_value = {"components": [{"code": "A"}, {"code": "B"}], "total": 2}
+        
+        assert len(list(iter_components(client, "A", page_size=2))) == 2
+        client.search_components.assert_called_once()
+    
+    @patch('services.download_manager.SEARCH_PAGE_SIZE', 2)
+    @patch('services.download_manager.SYNC_WORKERS', 2)
+    @patch('services.download_manager.write_unit_content_orm')
+    @patch('services.download_manager.TrainingGovClient')
+    def test_sync_lists_all_pages_and_records_timings(self, mock_client_class, mock_write):
+        """Every listed unit is fetched by the workers, stored in bulk and timed"""
+        codes = ["TSTUNIT1", "TSTUNIT2", "TSTUNIT3", "OTHER1"]
+        client = self.make_client(codes)
+        mock_client_class.return_value = client
+        db = MagicMock()
+        units = [Mock(id=i, code=f"TSTUNIT{i}") for i in (1, 2, 3)]
+        # Upserts return the units, then no qualifications or skill sets
+        db.scalars.return_value.all.side_effect = [units, [], []]
+        package = Mock(id=3, code="TST")
+        
+        summary = self.download_manager._sync_package_components(db, client, package, self.job_id)
+        
+        assert summary["units"] == 3
+        assert summary["qualifications"] == 0
+        assert summary["units_processed"] == 3
+        assert summary["units_failed"] == 0
+        assert summary["timings"]["workers"] == 2
+        stored = [content["unit_id"] for call in mock_write.call_args_list for content in call.args[1]]
+        assert len(stored) == 3
+        timings = self.download_manager.jobs[self.job_id]["component_timings"]
+        assert sorted(t["code"] for t in timings) == ["TSTUNIT1", "TSTUNIT2", "TSTUNIT3"]
+        assert all(t["status"] == "success" and "fetch_seconds" in t for t in timings)
+    
+    @patch('services.download_manager.SEARCH_PAGE_SIZE', 2)
+    @patch('services.download_manager.SYNC_WORKERS', 1)
+    @patch('services.download_manager.write_unit_content_orm')
+    def test_sync_skips_units_at_the_stored_release(self, mock_write):
+        """Units processed at the listed release are marked processed, not fetched"""
+        client = self.make_client(["TSTUNIT1", "TSTUNIT2"])
+        db = MagicMock()
+        units = [Mock(id=1, code="TSTUNIT1"), Mock(id=2, code="TSTUNIT2")]
+        db.scalars.return_value.all.side_effect = [units, [], []]
+        db.query.return_value.filter.return_value = [
+            SimpleNamespace(code="TSTUNIT1", processed="Y", xml_file="Unit_TSTUNIT1_R1.xml", release_date=None),
+            SimpleNamespace(code="TSTUNIT2", processed="Y", xml_file="Unit_TSTUNIT2_R0.xml", release_date=None),
+        ]
+        package = Mock(id=3, code="TST")
+        
+        summary = self.download_manager._sync_package_components(db, client, package, self.job_id)
+        
+        assert summary["units_unchanged"] == 1
+        assert summary["units_processed"] == 1
+        client.get_component_xml.assert_called_once()
+        assert client.get_component_xml.call_args.args == ("TSTUNIT2",)
+        assert units[0].processed == "Y"
+        assert units[1].xml_file == "Unit_TSTUNIT2_R1.xml"
+        
+        db.scalars.return_value.all.side_effect = [units, [], []]
+        forced = self.download_manager._sync_package_components(db, client, package, self.job_id, force=True)
+        assert forced["units_processed"] == 2
+    
+    @patch('services.download_manager.SYNC_WORKERS', 1)
+    @patch('services.download_manager.write_unit_content_orm')
+    def test_failed_batch_is_retried_per_unit(self, mock_write):
+        """A failing bulk write falls back to one write per unit"""
+        client = self.make_client([])
+        mock_write.side_effect = [Exception("bad row"), None, Exception("bad row")]
+        units = [Mock(id=1, code="TSTUNIT1"), Mock(id=2, code="TSTUNIT2")]
+        db = MagicMock()
+        
+        timings = self.download_manager._sync_unit_contents(db, client, units)
+        
+        assert sorted(t["status"] for t in timings) == ["failed", "success"]
+        assert mock_write.call_count == 3
+    
+    @patch('services.download_manager.SYNC_WORKERS', 1)
+    def test_open_breaker_stops_sync(self):
+        """An open circuit breaker aborts the stage so the job can pause"""
+        client = self.make_client([])
+        client.get_component_xml.side_effect = TGACircuitOpenError("open")
+        units = [Mock(id=1, code="TSTUNIT1"), Mock(id=2, code="TSTUNIT2")]
+        
+        with pytest.raises(TGACircuitOpenError):
+            self.download_manager._sync_unit_contents(MagicMock(), client, units)
+
+
 class TestDownloadManagerIntegration:
     """Integration tests for DownloadManager with database operations"""
     
@@ -107,6 +463,7 @@ class TestDownloadManagerIntegration:
         """Mock database session"""
         session = Mock(spec=Session)
         session.query.return_value.filter.return_value.first.return_value = None
+        session.scalars.return_value.all.return_value = [Mock(id=1, code="ICT40120")]
         session.add = Mock()
         session.commit = Mock()
         session.refresh = Mock()
@@ -231,6 +588,7 @@ class TestDownloadManagerIntegration:
         mock_unit = Mock()
         mock_unit.id = 1
         mock_unit.code = "ICTICT418"
+        mock_db_session.scalars.return_value.all.return_value = [mock_unit]
         
         # Create download manager and job
         download_manager = DownloadManager()
@@ -256,22 +614,19 @@ class TestDownloadManagerIntegration:
             "status": "Current"
         }
         
-        # Mock query to return None (package doesn't exist)
-        mock_db_session.query.return_value.filter.return_value.first.return_value = None
-        
-        # Mock the package model
-        with patch('models.tables.TrainingPackage') as mock_package_class:
-            mock_package = Mock()
-            mock_package.id = 1
-            mock_package_class.return_value = mock_package
-            
-            result = download_manager._store_training_package(mock_db_session, package_data)
-            
-            # Verify package was created
-            mock_package_class.assert_called_once()
-            mock_db_session.add.assert_called_with(mock_package)
-            mock_db_session.commit.assert_called()
-            mock_db_session.refresh.assert_called_with(mock_package)
+        stored_package = Mock(id=1, code="ICT40120")
+        mock_db_session.scalars.return_value.all.return_value = [stored_package]
+        
+        result = download_manager._store_training_package(mock_db_session, package_data)
+        
+        # One upsert statement, no lookup or per-row add
+        assert result is stored_package
+        mock_db_session.scalars.assert_called_once()
+        statement = str(mock_db_session.scalars.call_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT (code) DO UPDATE" in statement
+        mock_db_session.query.assert_not_called()
+        mock_db_session.add.assert_not_called()
+        mock_db_session.commit.assert_called()
     
     def test_store_training_package_existing(self, mock_db_session):
         """Test updating existing training package"""
@@ -283,16 +638,108 @@ class TestDownloadManagerIntegration:
             "description": "Updated description"
         }
         
-        # Mock existing package
-        existing_package = Mock()
-        existing_package.code = "ICT40120"
-        mock_db_session.query.return_value.filter.return_value.first.return_value = existing_package
+        existing_package = Mock(id=7, code="ICT40120")
+        mock_db_session.scalars.return_value.all.return_value = [existing_package]
         
         result = download_manager._store_training_package(mock_db_session, package_data)
         
-        # Verify package was updated
+        # The conflicting row is updated in place and returned
+        assert result is existing_package
+        statement = mock_db_session.scalars.call_args.args[0]
+        params = statement.compile(dialect=postgresql.dialect()).params
+        assert params["title_m0"] == "Updated Title"
+        assert params["processed_m0"] == "N"
         mock_db_session.commit.assert_called()
-        mock_db_session.refresh.assert_called_with(existing_package)
+    
+    @patch('services.download_manager.write_unit_content_orm')
+    def test_process_unit_xml_stores_all_content(self, mock_write, mock_db_session):
+        """Elements, critical aspects and required skills come from one parse of each document"""
+        download_manager = DownloadManager()
+        fixtures = Path(__file__).parent / "fixtures" / "tga"
+        client = Mock()
+        client.get_component_xml.return_value = {
+            "xml": (fixtures / "Unit_TSTWHS101_R1.xml").read_text(encoding="utf-8"),
+            "assessment_xml": (fixtures / "AssessmentRequirements_TSTWHS101_R1.xml").read_text(encoding="utf-8")
+        }
+        unit = Mock(id=5, code="TSTWHS101")
+        
+        download_manager._process_unit_xml(mock_db_session, client, unit, "job")
+        
+        content = mock_write.call_args.args[1][0]
+        assert content["unit_id"] == 5
+        assert len(content["elements"]) == 3
+        assert content["critical_aspects"]
+        assert {skill["skill_type"] for skill in content["required_skills"]} == {"knowledge", "foundation"}
+        assert unit.processed == "Y"
+        mock_db_session.commit.assert_called_once()
+    
+    @patch('services.download_manager.write_unit_content_orm')
+    def test_process_unit_xml_raises_when_content_is_not_stored(self, mock_write, mock_db_session):
+        """Missing XML and failed writes are rolled back and raised, not swallowed"""
+        download_manager = DownloadManager()
+        client = Mock()
+        unit = Mock(id=5, code="TSTWHS101")
+        
+        client.get_component_xml.return_value = None
+        with pytest.raises(TGAClientError):
+            download_manager._process_unit_xml(mock_db_session, client, unit, "job")
+        
+        client.get_component_xml.return_value = {"xml": "<Unit/>"}
+        mock_write.side_effect = Exception("deadlock detected")
+        with pytest.raises(Exception, match="deadlock detected"):
+            download_manager._process_unit_xml(mock_db_session, client, unit, "job")
+        
+        assert mock_db_session.rollback.call_count == 2
+        mock_db_session.commit.assert_not_called()
+    
+    @patch.dict('os.environ', {'TGA_USERNAME': 'test', 'TGA_PASSWORD': 'test'})
+    @patch('services.download_manager.SessionLocal')
+    @patch('services.download_manager.TrainingGovClient')
+    def test_unchanged_check_reads_zeep_details(self, mock_client_class, mock_session_local, mock_db_session):
+        """GetDetails objects (not dicts) are normalised before the release check"""
+        release_file = SimpleNamespace(Filename="Unit_ICTICT418_R2.xml")
+        release = SimpleNamespace(
+            ReleaseNumber="2", ReleaseDate=datetime(2024, 6, 1),
+            Files=SimpleNamespace(ReleaseFile=[release_file])
+        )
+        client = Mock()
+        client.get_component_details.return_value = SimpleNamespace(
+            Code="ICTICT418", Title="Test Unit", ComponentType="Unit", CurrencyStatus="Current",
+            Releases=SimpleNamespace(Release=[release])
+        )
+        mock_client_class.return_value = client
+        mock_session_local.return_value = mock_db_session
+        mock_db_session.query.return_value.filter.return_value.first.return_value = Mock(
+            processed="Y", xml_file="Unit_ICTICT418_R2.xml"
+        )
+        
+        download_manager = DownloadManager()
+        job_id = download_manager.create_job("units", ["ICTICT418"], 1)
+        download_manager.process_units_download(job_id, ["ICTICT418"], 1)
+        
+        job = download_manager.get_job_status(job_id)
+        assert job["skipped_items"] == 1
+        assert job["failed_items"] == 0
+        client.get_component_xml.assert_not_called()
+    
+    @patch.dict('os.environ', {'TGA_USERNAME': 'test', 'TGA_PASSWORD': 'test'})
+    @patch('services.download_manager.SessionLocal')
+    @patch('services.download_manager.TrainingGovClient')
+    def test_process_units_download_fails_units_without_xml(self, mock_client_class, mock_session_local, mock_tga_client, mock_db_session):
+        """A unit whose XML is missing is failed, so resuming the job retries it"""
+        mock_session_local.return_value = mock_db_session
+        mock_client_class.return_value = mock_tga_client
+        mock_tga_client.get_component_xml.return_value = None
+        mock_db_session.scalars.return_value.all.return_value = [Mock(id=1, code="ICTICT418")]
+        
+        download_manager = DownloadManager()
+        job_id = download_manager.create_job("units", ["ICTICT418"], 1)
+        download_manager.process_units_download(job_id, ["ICTICT418"], 1)
+        
+        job = download_manager.get_job_status(job_id)
+        assert job["completed_items"] == 0
+        assert job["failed_items"] == 1
+        assert job["item_status"]["ICTICT418"] == "failed"
 
 
 class TestDownloadManagerErrorHandling:
@@ -0,0 +1,138 @@
+"""
+Tests for the quiz flow load test driver
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, Form, Header, HTTPException
+
+from scripts.loadtest.quiz_flow import (
+    LatencyRecorder,
+    compare_to_baseline,
+    percentile,
+    run_load,
+)
+
+MANIFEST = {
+    "prefix": "LOADTEST",
+    "password": "secret",
+    "students": ["a@loadtest.invalid", "b@loadtest.invalid"],
+    "units": [
+        {"id": 1, "code": "LOADTEST0000", "elements": [{"id": 10, "answers": {"100": 2, "101": 0}}]},
+    ],
+}
+
+
+def endpoint_stats(p95_ms, rps, requests=100, errors=0):
+    return {"requests": requests, "errors": errors, "rps": rps, "p95_ms": p95_ms}
+
+
+class TestStatistics:
+    def test_nearest_rank_percentiles(self):
+        values = list(range(1, 101))
+
+        assert percentile(values, 0.5) == 50
+        assert percentile(values, 0.95) == 95
+        assert percentile(values, 0.99) == 99
+        assert percentile([7], 0.99) == 7
+        assert percentile([], 0.5) is None
+
+    def test_report_per_endpoint(self):
+        recorder = LatencyRecorder()
+        for ms in (10, 20, 30, 40):
+            recorder.record("GET /a", ms / 1000)
+        recorder.record("GET /b", 0.5, ok=False)
+
+        report = recorder.report(elapsed=2)
+
+        assert report["endpoints"]["GET /a"]["p50_ms"] == 20
+        assert report["endpoints"]["GET /a"]["rps"] == 2
+        assert report["endpoints"]["GET /b"]["errors"] == 1
+        assert report["total"]["requests"] == 5
+        assert report["total"]["max_ms"] == 500
+
+
+class TestBaseline:
+    def test_within_tolerance_passes(self):
+        baseline = {"endpoints": {"GET /a": endpoint_stats(100, 50)}}
+        report = {"endpoints": {"GET /a": endpoint_stats(115, 45)}}
+
+        assert compare_to_baseline(report, baseline, tolerance=0.2) == []
+
+    def test_latency_throughput_and_errors_regressions(self):
+        baseline = {"endpoints": {"GET /a": endpoint_stats(100, 50), "GET /b": endpoint_stats(10, 5)}}
+        report = {"endpoints": {"GET /a": endpoint_stats(130, 30, errors=5)}}
+
+        regressions = compare_to_baseline(report, baseline, tolerance=0.2)
+
+        assert any("GET /a: p95 130" in message for message in regressions)
+        assert any("GET /a: 30 req/s" in message for message in regressions)
+        assert any("GET /a: error rate" in message for message in regressions)
+        assert any("GET /b: no requests" in message for message in regressions)
+
+    def test_small_latency_changes_are_noise(self):
+        baseline = {"endpoints": {"GET /a": endpoint_stats(2, 50)}}
+        report = {"endpoints": {"GET /a": endpoint_stats(6, 50)}}
+
+        assert compare_to_baseline(report, baseline) == []
+
+
+@pytest.fixture
+def quiz_api():
+    app = FastAPI()
+    app.state.answers = []
+
+    def require_token(authorization):
+        if authorization != "Bearer token":
+            raise HTTPException(status_code=401)
+
+    @app.post("/auth/login")
+    def login(username: str = Form(...), password: str = Form(...)):
+        if password != "secret":
+            raise HTTPException(status_code=401)
+        return {"access_token": "token"}
+
+    @app.get("/api/quiz/units/{unit_id}/quiz-state")
+    def quiz_state(unit_id: int, authorization: str = Header(None)):
+        require_token(authorization)
+        return {"unit_id": unit_id}
+
+    @app.get("/api/quiz/elements/{element_id}/questions")
+    def questions(element_id: int, authorization: str = Header(None)):
+        require_token(authorization)
+        return [{"id": question_id, "options": {"choices": ["a", "b", "c", "d"]}}
+                for question_id in (100, 101)]
+
+    @app.post("/api/quiz/answer")
+    def answer(payload: dict, authorization: str = Header(None)):
+        require_token(authorization)
+        app.state.answers.append(payload)
+        return {"is_correct": True}
+
+    @app.get("/api/quiz/units/{unit_id}/progress")
+    def progress(unit_id: int, authorization: str = Header(None)):
+        require_token(authorization)
+        return {"unit_id": unit_id}
+
+    return app
+
+
+def test_virtual_students_walk_the_quiz_flow(quiz_api):
+    report = asyncio.run(run_load(
+        "http://testserver", MANIFEST, concurrency=None, duration=30, iterations=2,
+        accuracy=1.0, seed_value=1, transport=httpx.ASGITransport(app=quiz_api),
+    ))
+
+    endpoints = report["endpoints"]
+    assert report["students"] == 2
+    assert endpoints["POST /auth/login"]["requests"] == 4
+    assert endpoints["GET /api/quiz/units/{unit_id}/quiz-state"]["requests"] == 4
+    assert endpoints["POST /api/quiz/answer"]["requests"] == 8
+    assert endpoints["GET /api/quiz/units/{unit_id}/progress"]["requests"] == 4
+    assert report["total"]["errors"] == 0
+    # Correct choices come from the manifest's answer key
+    assert {(a["question_id"], a["answer"]["selected"]) for a in quiz_api.state.answers} == {
+        (100, 2), (101, 0)
+    }
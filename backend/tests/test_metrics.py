@@ -0,0 +1,91 @@
+"""
+Tests for the Prometheus metrics
+"""
+
+import pytest
+import requests
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+
+from services.download_manager import DownloadManager
+from services.metrics import install_pool_metrics, observe_request, render_metrics
+from services.tga.exceptions import TGACircuitOpenError
+from services.tga.resilience import CircuitBreaker, RetryPolicy, call_with_retry
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TestRequestMetrics:
+    """Request rate and latency by route template"""
+
+    def test_requests_are_labelled_by_route(self):
+        before = sample("learnonline_http_requests_total",
+                        method="GET", route="/api/units/{unit_id}", status="200")
+
+        observe_request("GET", "/api/units/{unit_id}", 200, 0.03, 4)
+
+        assert sample("learnonline_http_requests_total",
+                      method="GET", route="/api/units/{unit_id}", status="200") == before + 1
+        body, content_type = render_metrics()
+        assert content_type.startswith("text/plain")
+        assert b'learnonline_http_request_duration_seconds_bucket{le="0.05",method="GET",' \
+               b'route="/api/units/{unit_id}"}' in body
+
+    def test_all_metric_families_are_exposed(self):
+        body = render_metrics()[0].decode()
+
+        for name in ("learnonline_db_pool_connections", "learnonline_quiz_answers_total",
+                     "learnonline_xp_awarded_total", "learnonline_download_items_pending",
+                     "learnonline_tga_request_duration_seconds"):
+            assert f"# TYPE {name}" in body
+
+
+class TestPoolMetrics:
+    """Connections open and checked out"""
+
+    def test_checkout_and_checkin(self):
+        engine = create_engine("sqlite://")
+        install_pool_metrics(engine)
+        before = sample("learnonline_db_pool_checked_out")
+
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            assert sample("learnonline_db_pool_checked_out") == before + 1
+        assert sample("learnonline_db_pool_checked_out") == before
+
+
+class TestTgaMetrics:
+    """TGA call latency and errors"""
+
+    def test_errors_by_kind(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        policy = RetryPolicy(attempts=1)
+        before = sample("learnonline_tga_request_errors_total", operation="search", kind="transient")
+        calls = sample("learnonline_tga_request_duration_seconds_count", operation="search")
+
+        def fail():
+            raise requests.Timeout("slow")
+
+        with pytest.raises(requests.Timeout):
+            call_with_retry("search", fail, breaker=breaker, policy=policy)
+        with pytest.raises(TGACircuitOpenError):
+            call_with_retry("search", fail, breaker=breaker, policy=policy)
+
+        assert sample("learnonline_tga_request_errors_total",
+                      operation="search", kind="transient") == before + 1
+        assert sample("learnonline_tga_request_errors_total",
+                      operation="search", kind="circuit_open") >= 1
+        assert sample("learnonline_tga_request_duration_seconds_count", operation="search") == calls + 1
+
+
+class TestQueueMetrics:
+    """Download job queue depth"""
+
+    def test_queue_depth_follows_jobs(self):
+        manager = DownloadManager()
+        manager.create_job("units", ["TSTWHS101", "TSTDIV201"], user_id=1)
+
+        assert sample("learnonline_download_jobs_active", status="queued") == 1
+        assert sample("learnonline_download_items_pending") == 2
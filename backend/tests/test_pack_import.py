@@ -0,0 +1,213 @@
+"""
+Tests for streaming question pack import
+"""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from services.pack_import import (
+    PackImporter,
+    PackImportError,
+    iter_pack_units,
+    question_hash,
+    read_pack_header,
+)
+
+
+def pack(units=3, questions=2):
+    return {
+        "training_package": "TST",
+        "generated_at": "2026-05-18",
+        "units": [
+            {
+                "code": f"TSTUNIT{u}",
+                "title": f"Unit {u}",
+                "elements": [{
+                    "code": "01",
+                    "title": "First element",
+                    "performance_criteria": [{"code": "01.01", "text": "Do it"}],
+                    "questions": [
+                        {"pc_code": "01.01", "question_type": "mcq",
+                         "question_text": f"Question {q}", "options": {"correct": 0.5}}
+                        for q in range(questions)
+                    ],
+                }],
+            }
+            for u in range(units)
+        ],
+        "source_url": "https://example.com/tst.json",
+    }
+
+
+@pytest.fixture
+def pack_file(tmp_path):
+    def write(document):
+        path = tmp_path / "pack.json"
+        path.write_text(json.dumps(document))
+        return str(path)
+    return write
+
+
+class TestPackFile:
+    """Incremental parsing of pack files"""
+
+    def test_header_is_read_without_units(self, pack_file):
+        root, header, unit_count = read_pack_header(pack_file(pack(units=4)))
+
+        assert root == ""
+        assert unit_count == 4
+        # Fields after the units array are found as well
+        assert header == {
+            "training_package": "TST",
+            "generated_at": "2026-05-18",
+            "source_url": "https://example.com/tst.json",
+        }
+
+    def test_request_body_shape(self, pack_file):
+        root, header, unit_count = read_pack_header(pack_file({"pack_data": pack(units=2)}))
+
+        assert root == "pack_data."
+        assert header["training_package"] == "TST"
+        assert unit_count == 2
+        units = list(iter_pack_units(pack_file({"pack_data": pack(units=2)}), root))
+        assert [unit["code"] for unit in units] == ["TSTUNIT0", "TSTUNIT1"]
+
+    def test_wrapper_key_after_other_keys(self, pack_file):
+        path = pack_file({"format": 2, "notes": {"units": []}, "pack_data": pack(units=3)})
+
+        root, header, unit_count = read_pack_header(path)
+
+        assert root == "pack_data."
+        assert header["training_package"] == "TST"
+        assert unit_count == 3
+
+    def test_ambiguous_wrapper_is_rejected(self, pack_file):
+        with pytest.raises(PackImportError, match="pack_data"):
+            read_pack_header(pack_file(dict(pack(units=1), pack_data=pack(units=2))))
+
+    def test_units_are_plain_json_values(self, pack_file):
+        unit = next(iter_pack_units(pack_file(pack())))
+
+        # Floats rather than Decimal so options serialise to JSONB
+        assert unit["elements"][0]["questions"][0]["options"] == {"correct": 0.5}
+
+    def test_invalid_files(self, pack_file, tmp_path):
+        with pytest.raises(PackImportError):
+            read_pack_header(pack_file([1, 2]))
+        bad = tmp_path / "bad.json"
+        bad.write_text('{"units": [')
+        with pytest.raises(PackImportError):
+            read_pack_header(str(bad))
+
+
+class TestPackImporter:
+    """Chunked writes and commits"""
+
+    def test_units_are_committed_in_chunks(self):
+        db = MagicMock()
+        record = MagicMock()
+        importer = PackImporter(db, record, chunk_size=2)
+        progress = []
+
+        def import_chunk(units):
+            importer.unit_count += len(units)
+            importer.question_count += 2 * len(units)
+
+        with patch.object(importer, "import_chunk", side_effect=import_chunk) as chunk:
+            importer.run(pack(units=5)["units"], progress=lambda *counts: progress.append(counts))
+
+        assert [len(call.args[0]) for call in chunk.call_args_list] == [2, 2, 1]
+        assert db.commit.call_count == 3
+        assert progress == [(2, 4), (4, 8), (5, 10)]
+        assert record.question_count == 10
+
+
+def stored(id, question, review_status="draft", is_active=False, content_hash=True, source="ai_generated"):
+    return SimpleNamespace(
+        id=id, assessment_id=10, review_status=review_status, is_active=is_active,
+        source=source, content_hash=question_hash(question) if content_hash else None,
+        question_text=question["question_text"], question_type=question["question_type"],
+        options=question.get("options"), pc_num=question.get("pc_code"),
+    )
+
+
+class TestQuestionDiff:
+    """Re-imports only write what changed"""
+
+    def question(self, text):
+        return {"pc_code": "01.01", "question_type": "mcq", "question_text": text,
+                "options": {"choices": ["A", "B"], "correct": 0}}
+
+    def sync(self, questions, rows):
+        db = MagicMock()
+        db.query.return_value.outerjoin.return_value.filter.return_value \
+            .order_by.return_value.all.return_value = rows
+        importer = PackImporter(db, MagicMock())
+        units = [{"code": "TSTUNIT0", "elements": [
+            {"code": "01", "title": "First element", "questions": questions},
+        ]}]
+        importer._sync_questions(
+            units, {"TSTUNIT0": 1}, {(1, "01"): (5, "First element")}, {5: 10}, {(5, "01.01"): 7}
+        )
+        return db, importer
+
+    def test_hash_ignores_key_order_and_review_edits(self):
+        question = self.question("What?")
+        reordered = dict(reversed(list(question.items())), source="teacher", review_status="approved")
+
+        assert question_hash(question) == question_hash(reordered)
+        assert question_hash(question) != question_hash(self.question("What else?"))
+
+    def test_reimport_of_same_pack_writes_nothing(self):
+        questions = [self.question("One"), self.question("Two")]
+        db, importer = self.sync(questions, [stored(1, questions[0]), stored(2, questions[1])])
+
+        assert importer.diff == {"added": 0, "unchanged": 2, "restored": 0, "deactivated": 0}
+        assert importer.question_count == 2
+        db.execute.assert_not_called()
+        db.query.return_value.filter.return_value.update.assert_not_called()
+
+    def test_new_changed_and_removed_questions(self):
+        kept, removed = self.question("Kept"), self.question("Removed")
+        changed = self.question("Changed")
+        db, importer = self.sync([kept, changed], [stored(1, kept), stored(2, removed)])
+
+        assert importer.diff == {"added": 1, "unchanged": 1, "restored": 0, "deactivated": 1}
+        added = db.execute.call_args.args[1]
+        assert [row["question_text"] for row in added] == ["Changed"]
+        assert added[0]["pc_id"] == 7
+        assert added[0]["content_hash"] == question_hash(changed)
+        assert added[0]["is_active"] is False
+        db.query.return_value.filter.return_value.update.assert_called_once_with(
+            {"review_status": "retired", "is_active": False}, synchronize_session=False
+        )
+
+    def test_returning_question_is_restored(self):
+        question = self.question("Back again")
+        db, importer = self.sync([question], [stored(1, question, review_status="retired")])
+
+        assert importer.diff["restored"] == 1
+        db.query.return_value.filter.return_value.update.assert_called_once_with(
+            {"review_status": "draft"}, synchronize_session=False
+        )
+
+    def test_legacy_rows_are_hashed_and_duplicates_retired(self):
+        question = self.question("Imported twice")
+        rows = [
+            stored(1, question, review_status="approved", is_active=True, content_hash=False),
+            stored(2, question, content_hash=False),
+            stored(3, self.question("Teacher"), content_hash=False, source="teacher"),
+        ]
+        db, importer = self.sync([question], rows)
+
+        backfill = db.execute.call_args.args[1]
+        assert backfill == [
+            {"id": 1, "content_hash": question_hash(question)},
+            {"id": 2, "content_hash": question_hash(question)},
+        ]
+        # The approved copy stays; the duplicate is retired; teacher questions are untouched
+        assert importer.diff == {"added": 0, "unchanged": 1, "restored": 0, "deactivated": 1}
+        assert db.query.return_value.filter.call_args.args[0].right.value == [2]
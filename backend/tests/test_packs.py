@@ -1,11 +1,20 @@
 """Tests for M2 pack import and admin question management."""
 
+import json
 import pytest
 import uuid
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
-from models.tables import User, Role, UserProfile, Unit, TrainingPackage
+from models.tables import (
+    User,
+    Role,
+    UserProfile,
+    Unit,
+    TrainingPackage,
+    UnitElement,
+    UserElementProgress,
+)
 from auth.auth_handler import get_password_hash, sign_jwt
 
 SAMPLE_PACK = {
@@ -106,6 +115,59 @@ class TestPackImport:
         assert len(questions) >= 1
         assert all(q["review_status"] == "draft" for q in questions)
 
+    def test_reimport_only_writes_changes(
+        self, client: TestClient, admin_token, db: Session
+    ):
+        pack = dict(SAMPLE_PACK)
+        unit = {**SAMPLE_PACK["units"][0], "code": f"TSTRE{uuid.uuid4().hex[:4].upper()}"}
+        pack["units"] = [unit]
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        first = client.post("/api/admin/packs/import", json={"pack_data": pack}, headers=headers)
+        assert first.json()["diff"]["added"] == 1
+
+        again = client.post("/api/admin/packs/import", json={"pack_data": pack}, headers=headers)
+        assert again.json()["diff"] == {"added": 0, "unchanged": 1, "restored": 0, "deactivated": 0}
+
+        element = dict(unit["elements"][0])
+        element["questions"] = [
+            {**element["questions"][0], "question_text": "What is the second thing?"}
+        ]
+        pack["units"] = [{**unit, "elements": [element]}]
+        changed = client.post("/api/admin/packs/import", json={"pack_data": pack}, headers=headers)
+        assert changed.json()["diff"] == {"added": 1, "unchanged": 0, "restored": 0, "deactivated": 1}
+
+    def test_upload_pack_imports_in_background(
+        self, client: TestClient, admin_token, db: Session
+    ):
+        pack = dict(SAMPLE_PACK)
+        pack["units"] = [
+            {**SAMPLE_PACK["units"][0], "code": f"TSTUP{uuid.uuid4().hex[:4].upper()}"}
+        ]
+        resp = client.post(
+            "/api/admin/packs/import/upload",
+            files={"file": ("pack.json", json.dumps(pack), "application/json")},
+            headers={"Authorization": f"Bearer {admin_token}"},
+        )
+        assert resp.status_code == 200
+        job = resp.json()
+        assert job["total_units"] == 1
+
+        # The test client runs background tasks before returning
+        resp = client.get(
+            f"/api/admin/packs/import/jobs/{job['id']}",
+            headers={"Authorization": f"Bearer {admin_token}"},
+        )
+        assert resp.json()["status"] == "completed"
+        assert resp.json()["question_count"] == 1
+
+    def test_upload_rejects_invalid_json(self, client: TestClient, admin_token):
+        resp = client.post(
+            "/api/admin/packs/import/upload",
+            files={"file": ("pack.json", "{not json", "application/json")},
+            headers={"Authorization": f"Bearer {admin_token}"},
+        )
+        assert resp.status_code == 400
+
 
 class TestQuestionAdmin:
     def test_approve_question(self, client: TestClient, admin_token, db: Session):
@@ -131,3 +193,60 @@ class TestQuestionAdmin:
         )
         assert resp.status_code == 200
         assert resp.json()["review_status"] == "approved"
+
+
+class TestClassProgress:
+    def test_heatmap_pages_students(self, client: TestClient, admin_token, db: Session):
+        unit = Unit(code=f"TSTHM{uuid.uuid4().hex[:4].upper()}", title="Heatmap unit")
+        db.add(unit)
+        db.flush()
+        element = UnitElement(unit_id=unit.id, element_num="1", element_text="Plan")
+        db.add(element)
+        db.flush()
+        for status in ("passed", "in_progress"):
+            user = User(
+                email=f"student-{uuid.uuid4().hex[:6]}@test.com",
+                password_hash=get_password_hash("password"),
+            )
+            db.add(user)
+            db.flush()
+            db.add(UserElementProgress(
+                user_id=user.id, element_id=element.id, unit_id=unit.id, status=status
+            ))
+        db.commit()
+        headers = {"Authorization": f"Bearer {admin_token}"}
+
+        first = client.get(f"/api/admin/progress?unit_id={unit.id}&limit=1", headers=headers).json()
+        assert first["total_students"] == 2
+        assert len(first["students"]) == 1
+        assert first["summary"] == [
+            {"element_id": element.id, "statuses": {"passed": 1, "in_progress": 1}}
+        ]
+
+        second = client.get(
+            f"/api/admin/progress?unit_id={unit.id}&limit=1&cursor={first['next_cursor']}",
+            headers=headers,
+        ).json()
+        assert second["students"][0]["elements"] == {str(element.id): "in_progress"}
+        assert second["next_cursor"] is None
+
+        export = client.get(f"/api/admin/progress/export?unit_ids={unit.id}", headers=headers)
+        assert export.headers["content-type"].startswith("text/csv")
+        lines = export.text.splitlines()
+        assert lines[0].startswith("training_package,unit_code")
+        assert len(lines) == 3
+
+        gaps = client.get(f"/api/admin/gaps/export?unit_ids={unit.id}", headers=headers)
+        assert gaps.text.splitlines()[1].endswith(",2,1,1,0,0.500")
+
+    def test_exports_require_admin_or_mentor(self, client: TestClient, db: Session):
+        user = User(
+            email=f"student-{uuid.uuid4().hex[:6]}@test.com",
+            password_hash=get_password_hash("password"),
+        )
+        db.add(user)
+        db.commit()
+        headers = {"Authorization": f"Bearer {sign_jwt(str(user.id), 'student')['access_token']}"}
+
+        for path in ("/api/admin/progress/export", "/api/admin/gaps/export"):
+            assert client.get(path, headers=headers).status_code == 403
@@ -0,0 +1,130 @@
+"""
+Tests for on-demand request profiling
+"""
+
+import time
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services.profiler import ProfilerMiddleware, RequestProfile, RequestProfiler
+from services.request_timing import RequestTimingMiddleware
+
+
+def busy_wait(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+@pytest.fixture
+def profiler():
+    return RequestProfiler(sample_rate=0, routes=[], token="", interval_ms=1, max_stored=2)
+
+
+@pytest.fixture
+def client(profiler):
+    app = FastAPI()
+    app.add_middleware(ProfilerMiddleware, profiler=profiler)
+    app.add_middleware(RequestTimingMiddleware, slow_ms=10000, slow_sql_count=1000)
+
+    @app.get("/sync/{item_id}")
+    def sync_endpoint(item_id: int):
+        busy_wait(0.05)
+        return {"item_id": item_id}
+
+    @app.get("/async")
+    async def async_endpoint():
+        busy_wait(0.05)
+        await asyncio.sleep(0)
+        return {}
+
+    return TestClient(app)
+
+
+class TestSelection:
+    """Which requests are profiled"""
+
+    def test_unarmed_profiler_profiles_nothing(self, client, profiler):
+        assert profiler.armed is False
+
+        client.get("/sync/1")
+
+        assert profiler.list() == []
+
+    def test_route_templates_are_profiled(self, client, profiler):
+        profiler.configure(routes=["/sync/{item_id}"])
+
+        response = client.get("/sync/1")
+        client.get("/async")
+
+        [summary] = profiler.list()
+        assert summary["request_id"] == response.headers["x-request-id"]
+        assert summary["route"] == "/sync/{item_id}"
+        assert summary["status"] == 200
+
+    def test_token_header_is_profiled(self, client, profiler):
+        profiler.configure(token="secret")
+
+        client.get("/async", headers={"X-Profile": "wrong"})
+        client.get("/async", headers={"X-Profile": "secret", "X-Request-ID": "req-1"})
+
+        assert [summary["request_id"] for summary in profiler.list()] == ["req-1"]
+
+    def test_sample_rate_of_one_profiles_everything(self, client, profiler):
+        profiler.configure(sample_rate=1)
+
+        client.get("/async")
+        client.get("/sync/2")
+        client.get("/sync/3")
+
+        # Oldest profile dropped beyond max_stored
+        assert [summary["path"] for summary in profiler.list()] == ["/sync/3", "/sync/2"]
+
+    def test_disarming(self, profiler):
+        profiler.configure(sample_rate=0.5, routes=["/a"], token="t")
+        profiler.configure(sample_rate=0, routes=[], token="")
+
+        assert profiler.armed is False
+
+
+class TestSampling:
+    """Stacks are attributed to the profiled request"""
+
+    @pytest.mark.parametrize("path, function", [
+        ("/sync/1", "sync_endpoint"),
+        ("/async", "async_endpoint"),
+    ])
+    def test_endpoint_frames_are_sampled(self, client, profiler, path, function):
+        profiler.configure(sample_rate=1)
+
+        response = client.get(path)
+
+        profile = profiler.get(response.headers["x-request-id"])
+        assert profile.samples > 0
+        collapsed = profile.collapsed()
+        assert f"{function} (tests/test_profiler.py:" in collapsed
+        assert "busy_wait" in collapsed
+
+    def test_speedscope_export(self, client, profiler):
+        profiler.configure(sample_rate=1)
+
+        response = client.get("/sync/1")
+        document = profiler.get(response.headers["x-request-id"]).speedscope()
+
+        assert document["$schema"] == "https://www.speedscope.app/file-format-schema.json"
+        [profile] = document["profiles"]
+        assert profile["type"] == "sampled"
+        assert len(profile["samples"]) == len(profile["weights"])
+        names = {frame["name"] for frame in document["shared"]["frames"]}
+        assert "sync_endpoint" in names
+        assert profile["endValue"] == pytest.approx(sum(profile["weights"]))
+
+
+def test_collapsed_format():
+    profile = RequestProfile("r1", "GET", "/x", {}, None, 0, 0.001)
+    profile.stacks[(("outer", "a.py", 1), ("inner", "a.py", 5))] = 3
+
+    assert profile.collapsed() == "outer (a.py:1);inner (a.py:5) 3\n"
@@ -0,0 +1,80 @@
+"""
+Tests for the streaming progress CSV exports
+"""
+
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy.dialects import postgresql
+
+from services.progress_export import (
+    GAP_COLUMNS,
+    PROGRESS_COLUMNS,
+    gap_statement,
+    progress_statement,
+    stream_csv,
+)
+
+
+def compiled(statement):
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+class TestStatements:
+    """Export queries"""
+
+    def test_progress_columns_match_header(self):
+        assert len(progress_statement().selected_columns) == len(PROGRESS_COLUMNS)
+        assert len(gap_statement().selected_columns) == len(GAP_COLUMNS)
+
+    def test_filters(self):
+        sql = compiled(progress_statement([1, 2], [3]))
+        assert "user_element_progress.unit_id IN" in sql
+        assert "user_element_progress.user_id IN" in sql
+
+        # The class filter belongs to the join so unattempted elements stay in the gap map
+        sql = compiled(gap_statement(student_ids=[3]))
+        assert "LEFT OUTER JOIN user_element_progress ON user_element_progress.element_id = " \
+               "unit_elements.id AND user_element_progress.user_id IN" in sql
+
+    def test_gap_students_include_those_without_passes(self):
+        # Progress rows are only written on a pass; answers count a student in
+        sql = compiled(gap_statement(unit_ids=[1], student_ids=[3]))
+        assert "UNION SELECT coalesce(assessments.unit_id, unit_elements.unit_id) AS unit_id, " \
+               "user_answers.user_id" in sql
+        assert "user_answers.user_id IN" in sql
+        assert "coalesce(assessments.unit_id, unit_elements.unit_id) IN" in sql
+
+
+class TestStreamCsv:
+    """Rows are written batch by batch from a server-side cursor"""
+
+    def test_batches_are_yielded_as_read(self):
+        db = MagicMock()
+        passed = datetime(2026, 5, 18, 9, 30, tzinfo=timezone.utc)
+        db.execute.return_value.partitions.return_value = iter([
+            [("TST", "TSTWHS101", "Work safely", "1", "Plan", 7, "a@test.com", "passed", 2, passed)],
+            [("TST", "TSTWHS101", "Work safely", "2", "Do, then check", 8, None, "in_progress", 1, None)],
+        ])
+        statement = MagicMock()
+
+        with patch("services.progress_export.SessionLocal", return_value=db):
+            chunks = list(stream_csv(statement, PROGRESS_COLUMNS, batch_rows=500))
+
+        statement.execution_options.assert_called_once_with(yield_per=500)
+        assert chunks[0].startswith("training_package,unit_code,")
+        assert chunks[1] == "TST,TSTWHS101,Work safely,1,Plan,7,a@test.com,passed,2,2026-05-18T09:30:00+00:00\r\n"
+        assert chunks[2] == 'TST,TSTWHS101,Work safely,2,"Do, then check",8,,in_progress,1,\r\n'
+        db.close.assert_called_once()
+
+    def test_session_is_closed_when_client_disconnects(self):
+        db = MagicMock()
+        db.execute.return_value.partitions.return_value = iter([[("x",) * 10]] * 3)
+
+        with patch("services.progress_export.SessionLocal", return_value=db):
+            rows = stream_csv(MagicMock(), PROGRESS_COLUMNS)
+            next(rows)
+            next(rows)
+            rows.close()
+
+        db.close.assert_called_once()
@@ -0,0 +1,102 @@
+"""
+Tests for the class progress heatmap
+"""
+
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy.dialects import postgresql
+
+from services.progress_heatmap import (
+    ProgressHeatmapCache,
+    heatmap_statement,
+    page_students,
+)
+
+
+def heatmap(student_ids):
+    return {
+        "unit_id": 1,
+        "elements": [],
+        "summary": [],
+        "students": [{"student_id": i, "email": f"{i}@test.com", "elements": {}} for i in student_ids],
+    }
+
+
+class TestHeatmapQuery:
+    """One aggregated statement per unit"""
+
+    def test_statement_pivots_statuses_per_student(self):
+        sql = str(heatmap_statement(3).compile(dialect=postgresql.dialect()))
+
+        assert "jsonb_object_agg(user_element_progress.element_id, user_element_progress.status)" in sql
+        assert "JOIN users ON users.id = user_element_progress.user_id" in sql
+        assert "GROUP BY user_element_progress.user_id, users.email" in sql
+        assert "ORDER BY user_element_progress.user_id" in sql
+
+    def test_class_filter(self):
+        sql = str(heatmap_statement(3, [5, 6]).compile(dialect=postgresql.dialect()))
+
+        assert "user_element_progress.user_id IN" in sql
+
+
+class TestPagination:
+    """Cursor pages over students"""
+
+    def test_pages_follow_cursor(self):
+        data = heatmap([2, 4, 6, 8, 10])
+
+        page, cursor = page_students(data, None, 2)
+        assert [s["student_id"] for s in page] == [2, 4]
+        page, cursor = page_students(data, cursor, 2)
+        assert [s["student_id"] for s in page] == [6, 8]
+        page, cursor = page_students(data, cursor, 2)
+        assert [s["student_id"] for s in page] == [10]
+        assert cursor is None
+
+    def test_cursor_between_ids(self):
+        page, cursor = page_students(heatmap([2, 4, 6]), 3, 10)
+
+        assert [s["student_id"] for s in page] == [4, 6]
+        assert cursor is None
+
+
+class TestHeatmapCache:
+    """Heatmaps per unit and class"""
+
+    def test_heatmap_is_built_once(self):
+        cache = ProgressHeatmapCache()
+        with patch("services.progress_heatmap.build_heatmap", return_value=heatmap([1])) as build:
+            cache.get(MagicMock(), 1)
+            cache.get(MagicMock(), 1)
+            cache.get(MagicMock(), 1, [2, 1])
+            cache.get(MagicMock(), 1, [1, 2, 2])
+
+        assert build.call_count == 2
+        assert build.call_args.args[2] == (1, 2)
+
+    def test_invalidate_unit(self):
+        cache = ProgressHeatmapCache()
+        with patch("services.progress_heatmap.build_heatmap", return_value=heatmap([1])) as build:
+            cache.get(MagicMock(), 1)
+            cache.get(MagicMock(), 2)
+            cache.invalidate(1)
+            cache.get(MagicMock(), 1)
+            cache.get(MagicMock(), 2)
+
+        assert [call.args[1] for call in build.call_args_list] == [1, 2, 1]
+
+    def test_missing_unit_is_not_cached(self):
+        cache = ProgressHeatmapCache()
+        with patch("services.progress_heatmap.build_heatmap", return_value=None) as build:
+            assert cache.get(MagicMock(), 1) is None
+            assert cache.get(MagicMock(), 1) is None
+
+        assert build.call_count == 2
+
+    def test_least_recently_used_entries_are_dropped(self):
+        cache = ProgressHeatmapCache(max_entries=2)
+        with patch("services.progress_heatmap.build_heatmap", return_value=heatmap([1])) as build:
+            for unit_id in (1, 2, 1, 3, 1, 2):
+                cache.get(MagicMock(), unit_id)
+
+        assert [call.args[1] for call in build.call_args_list] == [1, 2, 3, 2]
@@ -0,0 +1,157 @@
+"""
+Tests for statement fingerprints, repeated statement detection and query budgets
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from query_budget import describe
+from services.query_detector import (
+    QueryDetector,
+    call_site,
+    endpoint_budget,
+    fingerprint,
+    query_budget,
+    query_detector,
+)
+from services.request_timing import RequestTimingMiddleware, install_sql_instrumentation
+
+
+class TestFingerprint:
+    """Statements differing only in values share a fingerprint"""
+
+    def test_parameters_and_literals_are_replaced(self):
+        assert fingerprint(
+            "SELECT badges.id FROM badges WHERE badges.id = %(id_1)s LIMIT %(param_1)s"
+        ) == fingerprint("SELECT badges.id FROM badges WHERE badges.id = 7 LIMIT 1")
+        assert fingerprint("SELECT * FROM units WHERE code = 'BSBOPS101'") == (
+            "SELECT * FROM units WHERE code = ?"
+        )
+
+    def test_in_lists_of_any_length_collapse(self):
+        assert fingerprint("SELECT 1 FROM t WHERE id IN (%(id_1_1)s, %(id_1_2)s)") == (
+            fingerprint("SELECT 1 FROM t WHERE id IN (%(id_1_1)s)")
+        )
+
+    def test_identifiers_and_casts_are_kept(self):
+        shape = fingerprint("SELECT users_1.id FROM users AS users_1 WHERE code = ANY(%(codes)s::VARCHAR[])")
+
+        assert shape == "SELECT users_1.id FROM users AS users_1 WHERE code = ANY(?::VARCHAR[])"
+
+    def test_whitespace_is_normalised(self):
+        assert fingerprint("SELECT  1\n  FROM t") == fingerprint("SELECT 1 FROM t")
+
+
+def test_call_site_is_the_first_application_frame():
+    def run_query():
+        return call_site()
+
+    assert run_query().startswith("tests/test_query_detector.py:")
+    assert run_query().endswith("in run_query")
+
+
+def test_query_budget_is_declared_on_the_endpoint():
+    @query_budget(3)
+    def endpoint():
+        pass
+
+    assert endpoint_budget(endpoint) == 3
+    assert endpoint_budget(lambda: None) is None
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    install_sql_instrumentation(engine)
+    return engine
+
+
+@pytest.fixture
+def detector():
+    enabled, threshold = query_detector.enabled, query_detector.threshold
+    query_detector.enabled = True
+    query_detector.threshold = 3
+    query_detector.reset()
+    yield query_detector
+    query_detector.enabled, query_detector.threshold = enabled, threshold
+    query_detector.reset()
+
+
+@pytest.fixture
+def client(engine):
+    app = FastAPI()
+    app.add_middleware(RequestTimingMiddleware, slow_ms=10000, slow_sql_count=1000)
+
+    @app.get("/badges/{count}")
+    @query_budget(2)
+    def get_badges(count: int):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1 AS user_id"))
+            for badge_id in range(count):
+                conn.execute(text("SELECT :badge_id"), {"badge_id": badge_id})
+        return {}
+
+    @app.get("/unbudgeted/{count}")
+    def get_unbudgeted(count: int):
+        with engine.connect() as conn:
+            for badge_id in range(count):
+                conn.execute(text("SELECT :badge_id"), {"badge_id": badge_id})
+        return {}
+
+    return TestClient(app)
+
+
+@pytest.mark.allow_query_budget
+class TestDetection:
+    """Findings recorded by the request timing middleware"""
+
+    def test_requests_within_budget_have_no_findings(self, client, detector):
+        client.get("/badges/1")
+
+        assert detector.findings() == []
+
+    def test_budget_finding_lists_repeated_statements(self, client, detector):
+        client.get("/badges/2")
+
+        [finding] = detector.findings("budget")
+        assert finding["route"] == "/badges/{count}"
+        assert finding["count"] == 3
+        assert finding["budget"] == 2
+        [repeated] = finding["repeated"]
+        assert repeated["statement"] == "SELECT ?"
+        assert repeated["count"] == 2
+        assert repeated["call_site"].startswith("tests/test_query_detector.py:")
+        assert "ran 3 SQL statements, budget 2" in describe(finding)
+
+    def test_repeats_over_threshold_are_reported(self, client, detector):
+        client.get("/unbudgeted/3")
+        client.get("/unbudgeted/2")
+
+        [finding] = detector.findings("repeated")
+        assert finding["route"] == "/unbudgeted/{count}"
+        assert finding["count"] == 3
+        assert "get_unbudgeted" in finding["call_site"]
+
+    def test_detection_off_only_checks_budgets(self, client, detector):
+        detector.enabled = False
+
+        client.get("/unbudgeted/5")
+        client.get("/badges/5")
+
+        [finding] = detector.findings()
+        assert finding["kind"] == "budget"
+        assert finding["repeated"] == []
+
+    def test_findings_history_is_bounded(self):
+        detector = QueryDetector(enabled=True, threshold=1, history=2)
+
+        class Stats:
+            request_id, method, path, sql_count = "r1", "GET", "/x", 1
+            queries = {"SELECT ?": [1, None]}
+
+        for _ in range(3):
+            detector.check(Stats(), "/x")
+
+        assert len(detector.findings()) == 2
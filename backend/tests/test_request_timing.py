@@ -0,0 +1,115 @@
+"""
+Tests for per-request timing and SQL instrumentation
+"""
+
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from services.request_timing import (
+    LatencyHistogram,
+    RequestTimingMiddleware,
+    RouteLatencies,
+    current_request,
+    install_sql_instrumentation,
+    route_latencies,
+)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    install_sql_instrumentation(engine)
+    # Installing twice does not count statements twice
+    install_sql_instrumentation(engine)
+    return engine
+
+
+@pytest.fixture
+def app(engine):
+    app = FastAPI()
+    app.add_middleware(RequestTimingMiddleware, slow_ms=10000, slow_sql_count=3)
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int):
+        with engine.connect() as conn:
+            for _ in range(item_id):
+                conn.execute(text("SELECT 1"))
+        stats = current_request()
+        return {"sql_count": stats.sql_count, "request_id": stats.request_id}
+
+    route_latencies.reset()
+    yield app
+    route_latencies.reset()
+
+
+class TestMiddleware:
+    """Headers, histograms and slow request logging"""
+
+    def test_sql_statements_are_counted_per_request(self, app):
+        client = TestClient(app)
+
+        response = client.get("/items/2")
+
+        assert response.json()["sql_count"] == 2
+        assert 'db;dur=' in response.headers["server-timing"]
+        assert response.headers["server-timing"].startswith("app;dur=")
+        assert response.headers["x-request-id"] == response.json()["request_id"]
+
+    def test_incoming_request_id_is_kept(self, app):
+        response = TestClient(app).get("/items/0", headers={"X-Request-ID": "abc123"})
+
+        assert response.headers["x-request-id"] == "abc123"
+
+    def test_latency_is_recorded_by_route_template(self, app):
+        client = TestClient(app)
+        client.get("/items/1")
+        client.get("/items/2")
+        client.get("/missing")
+
+        routes = {(r["method"], r["route"]): r for r in route_latencies.snapshot()}
+        assert routes[("GET", "/items/{item_id}")]["count"] == 2
+        assert routes[("GET", "/items/{item_id}")]["sql_per_request"] == 1.5
+        assert routes[("GET", "<unmatched>")]["count"] == 1
+
+    def test_requests_over_thresholds_are_logged(self, app, caplog):
+        client = TestClient(app)
+        with caplog.at_level(logging.WARNING, logger="services.request_timing"):
+            client.get("/items/1")
+            client.get("/items/3")
+
+        assert len(caplog.records) == 1
+        assert "/items/{item_id}" in caplog.records[0].getMessage()
+        assert "3 SQL statements" in caplog.records[0].getMessage()
+
+    def test_statements_outside_requests_are_ignored(self, engine):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+        assert current_request() is None
+
+
+class TestHistogram:
+    """Bucketed latencies"""
+
+    def test_quantiles_use_bucket_bounds(self):
+        histogram = LatencyHistogram()
+        for ms in (3, 3, 40, 40, 40, 40, 40, 40, 40, 700):
+            histogram.observe(ms / 1000)
+
+        snapshot = histogram.snapshot()
+        assert snapshot["count"] == 10
+        assert snapshot["p50_ms"] == 50.0
+        assert snapshot["p99_ms"] == 1000.0
+        assert snapshot["buckets"]["le_5ms"] == 2
+        assert snapshot["max_ms"] == 700.0
+
+    def test_slowest_routes_first(self):
+        latencies = RouteLatencies()
+        latencies.observe("GET", "/fast", 0.01)
+        latencies.observe("GET", "/slow", 0.5)
+
+        assert [r["route"] for r in latencies.snapshot()] == ["/slow", "/fast"]
@@ -0,0 +1,148 @@
+"""
+Tests for the slow query log
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from services import slow_queries
+from services.request_timing import RequestTimingMiddleware
+from services.slow_queries import (
+    SlowQueryLog,
+    install_slow_query_log,
+    is_explainable,
+    parameter_shape,
+    seq_scans,
+    slow_query_log,
+)
+
+PLAN = [{
+    "Plan": {
+        "Node Type": "Hash Join",
+        "Plans": [
+            {"Node Type": "Seq Scan", "Relation Name": "units"},
+            {"Node Type": "Index Scan", "Relation Name": "unit_elements"},
+        ],
+    },
+    "Execution Time": 12.5,
+}]
+
+
+class TestHelpers:
+    def test_parameter_shape_hides_values(self):
+        assert parameter_shape({"code": "BSB", "id": 3}) == {"code": "str", "id": "int"}
+        assert parameter_shape(("BSB", None)) == ["str", "NoneType"]
+        assert parameter_shape(None) is None
+
+    def test_only_reads_are_explainable(self):
+        assert is_explainable("  SELECT 1")
+        assert is_explainable("WITH x AS (SELECT 1) SELECT * FROM x")
+        assert not is_explainable("UPDATE units SET processed = 'Y'")
+        assert not is_explainable("")
+
+    def test_seq_scans_are_found_in_nested_plans(self):
+        assert seq_scans(PLAN) == ["units"]
+
+
+@pytest.fixture
+def log():
+    return SlowQueryLog(threshold_ms=0, explain_rate=0, max_fingerprints=2)
+
+
+class TestRecording:
+    def test_fast_statements_are_ignored(self):
+        log = SlowQueryLog(threshold_ms=100)
+
+        assert log.record("SELECT 1", {}, 0.01) is None
+        assert log.top() == []
+
+    def test_statements_aggregate_by_fingerprint(self, log):
+        log.record("SELECT * FROM units WHERE id = %(id)s", {"id": 1}, 0.2)
+        log.record("SELECT * FROM units WHERE id = %(id)s", {"id": 2}, 0.4)
+
+        [entry] = log.top()
+        assert entry["fingerprint"] == "SELECT * FROM units WHERE id = ?"
+        assert entry["count"] == 2
+        assert entry["total_ms"] == pytest.approx(600)
+        assert entry["max_ms"] == pytest.approx(400)
+        assert entry["mean_ms"] == pytest.approx(300)
+        assert entry["parameters"] == {"id": "int"}
+
+    def test_top_orders_by_key(self, log):
+        log.record("SELECT a FROM t", None, 0.5)
+        log.record("SELECT b FROM t", None, 0.3)
+        log.record("SELECT b FROM t", None, 0.3)
+
+        assert [e["fingerprint"] for e in log.top("max_ms")] == ["SELECT a FROM t", "SELECT b FROM t"]
+        assert [e["fingerprint"] for e in log.top("count")] == ["SELECT b FROM t", "SELECT a FROM t"]
+        with pytest.raises(ValueError):
+            log.top("route")
+
+    def test_least_recently_seen_fingerprints_are_dropped(self, log):
+        log.record("SELECT a FROM t", None, 0.1)
+        log.record("SELECT b FROM t", None, 0.1)
+        log.record("SELECT a FROM t", None, 0.1)
+        log.record("SELECT c FROM t", None, 0.1)
+
+        assert sorted(e["fingerprint"] for e in log.top()) == ["SELECT a FROM t", "SELECT c FROM t"]
+
+
+class TestExplain:
+    def test_sampled_selects_are_explained_in_the_background(self, log, monkeypatch):
+        explained = []
+
+        def explain(statement, parameters):
+            explained.append((statement, parameters))
+            return PLAN
+
+        monkeypatch.setattr(log, "explain", explain)
+        log.explain_rate = 1
+
+        log.record("SELECT * FROM units WHERE code = %(code)s", {"code": "BSB"}, 0.2)
+        log.record("UPDATE units SET title = %(title)s", {"title": "x"}, 0.2)
+        log._executor.shutdown(wait=True)
+
+        assert explained == [("SELECT * FROM units WHERE code = %(code)s", {"code": "BSB"})]
+        entry = next(e for e in log.top() if e["fingerprint"].startswith("SELECT"))
+        assert entry["plan"] == PLAN
+        assert entry["seq_scans"] == ["units"]
+        assert entry["explained_at"] is not None
+        assert "plan" not in log.top(include_plans=False)[0]
+
+    def test_explain_failures_are_logged_not_raised(self, log, monkeypatch):
+        def explain(statement, parameters):
+            raise RuntimeError("permission denied")
+
+        monkeypatch.setattr(log, "explain", explain)
+        log.explain_rate = 1
+
+        log.record("SELECT 1", None, 0.2)
+        log._executor.shutdown(wait=True)
+
+        [entry] = log.top()
+        assert entry["plan"] is None
+        assert log._explaining == set()
+
+
+def test_routes_of_slow_statements_are_recorded(monkeypatch):
+    engine = create_engine("sqlite://")
+    install_slow_query_log(engine)
+    monkeypatch.setattr(slow_queries, "slow_query_log", SlowQueryLog(threshold_ms=0))
+
+    app = FastAPI()
+    app.add_middleware(RequestTimingMiddleware, slow_ms=10000, slow_sql_count=1000)
+
+    @app.get("/units/{unit_id}")
+    def get_unit(unit_id: int):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT :unit_id"), {"unit_id": unit_id})
+        return {}
+
+    response = TestClient(app).get("/units/5")
+
+    [entry] = slow_queries.slow_query_log.top()
+    assert entry["routes"] == {"/units/{unit_id}": 1}
+    assert entry["last_request_id"] == response.headers["x-request-id"]
+    assert slow_query_log.top() == []
@@ -0,0 +1,53 @@
+"""
+Tests for application startup: no import-time side effects, lifespan setup
+"""
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+
+import database
+from scripts.benchmark_startup import run_once
+from services import request_timing, slow_queries
+
+
+def test_fresh_import_is_free_of_heavy_work(monkeypatch):
+    monkeypatch.setenv('ENVIRONMENT', 'test')
+
+    timings = run_once()
+
+    assert timings['status'] == 200
+    assert timings['heavy_at_import'] == []
+    assert timings['engine_at_import'] is False
+
+
+def test_lifespan_installs_engine_hooks():
+    from main import app
+
+    with TestClient(app) as client:
+        assert client.get('/').status_code == 200
+        engine = database.get_engine()
+        assert event.contains(engine, 'before_cursor_execute', request_timing._before_cursor_execute)
+        assert event.contains(engine, 'before_cursor_execute', slow_queries._before_cursor_execute)
+
+
+class TestLazyEngine:
+    def test_engine_attribute_is_the_shared_engine(self):
+        assert database.engine is database.get_engine()
+
+    def test_sessions_bind_to_the_engine_on_first_use(self):
+        session = database.SessionLocal()
+        try:
+            assert session.get_bind() is database.get_engine()
+        finally:
+            session.close()
+
+    def test_patched_engine_is_used(self, monkeypatch):
+        engine = create_engine('sqlite://')
+        monkeypatch.setattr(database, 'engine', engine)
+
+        session = database.SessionLocal()
+        try:
+            assert database.get_engine() is engine
+            assert session.get_bind() is engine
+        finally:
+            session.close()
@@ -0,0 +1,185 @@
+"""
+Tests for TGA retry, timeout and circuit breaker handling
+"""
+
+import pytest
+import requests
+from unittest.mock import Mock, patch
+from zeep.exceptions import Fault, TransportError
+
+from services.download_manager import DownloadManager
+from services.tga.exceptions import TGACircuitOpenError
+from services.tga.resilience import (
+    CircuitBreaker,
+    RetryPolicy,
+    call_with_retry,
+    is_transient,
+    operation_timeouts,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker:
+    """State transitions of the circuit breaker"""
+
+    def setup_method(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=self.clock)
+
+    def test_opens_after_threshold(self):
+        for _ in range(2):
+            self.breaker.record_failure()
+        assert self.breaker.state == CircuitBreaker.CLOSED
+
+        self.breaker.record_failure()
+        assert self.breaker.state == CircuitBreaker.OPEN
+        assert not self.breaker.allow()
+
+    def test_success_resets_failure_count(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        assert self.breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_allows_single_trial(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.clock.now += 30
+
+        assert self.breaker.state == CircuitBreaker.HALF_OPEN
+        assert self.breaker.allow()
+        assert not self.breaker.allow()
+
+        self.breaker.record_success()
+        assert self.breaker.state == CircuitBreaker.CLOSED
+
+    def test_failed_trial_reopens(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.clock.now += 31
+        assert self.breaker.allow()
+
+        self.breaker.record_failure()
+        assert self.breaker.state == CircuitBreaker.OPEN
+        assert self.breaker.retry_after() == 30
+
+    def test_snapshot(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.clock.now += 10
+
+        snapshot = self.breaker.snapshot()
+        assert snapshot["state"] == "open"
+        assert snapshot["consecutive_failures"] == 3
+        assert snapshot["retry_after_seconds"] == 20
+
+
+class TestCallWithRetry:
+    """Retry behaviour for transient and permanent failures"""
+
+    def setup_method(self):
+        self.breaker = CircuitBreaker(failure_threshold=10, reset_timeout=30, clock=FakeClock())
+        self.policy = RetryPolicy(attempts=3, base_delay=0.1, max_delay=1)
+        self.sleeps = []
+
+    def call(self, func, **kwargs):
+        return call_with_retry(
+            "Search", func, breaker=self.breaker, policy=self.policy,
+            sleep=self.sleeps.append, **kwargs
+        )
+
+    def test_retries_transient_then_succeeds(self):
+        func = Mock(side_effect=[requests.Timeout("slow"), requests.ConnectionError("reset"), "ok"])
+
+        assert self.call(func, request={"Filter": "BSB"}) == "ok"
+        assert func.call_count == 3
+        func.assert_called_with(request={"Filter": "BSB"})
+        assert len(self.sleeps) == 2
+        assert self.breaker.snapshot()["consecutive_failures"] == 0
+
+    def test_gives_up_after_attempts(self):
+        func = Mock(side_effect=requests.Timeout("slow"))
+
+        with pytest.raises(requests.Timeout):
+            self.call(func)
+        assert func.call_count == 3
+        assert self.breaker.snapshot()["consecutive_failures"] == 3
+
+    def test_permanent_error_not_retried(self):
+        func = Mock(side_effect=Fault("Component not found"))
+
+        with pytest.raises(Fault):
+            self.call(func)
+        assert func.call_count == 1
+        assert self.sleeps == []
+
+    def test_open_breaker_short_circuits(self):
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=FakeClock())
+        func = Mock(side_effect=requests.Timeout("slow"))
+
+        with pytest.raises(TGACircuitOpenError):
+            self.call(func)
+        assert func.call_count == 2
+
+        with pytest.raises(TGACircuitOpenError):
+            self.call(func)
+        assert func.call_count == 2
+
+    def test_backoff_is_jittered_and_bounded(self):
+        policy = RetryPolicy(attempts=10, base_delay=0.5, max_delay=4)
+        for attempt in range(1, 10):
+            delay = policy.delay(attempt)
+            assert 0 <= delay <= min(4, 0.5 * 2 ** (attempt - 1))
+
+    def test_transient_classification(self):
+        assert is_transient(TransportError(status_code=503))
+        assert not is_transient(TransportError(status_code=404))
+        assert not is_transient(Fault("bad request"))
+        response = Mock(status_code=502)
+        assert is_transient(requests.HTTPError(response=response))
+
+
+class TestOperationTimeouts:
+    """Per-operation timeout configuration"""
+
+    def test_env_overrides(self, monkeypatch):
+        monkeypatch.setenv("TGA_TIMEOUT_SEARCH", "5")
+        monkeypatch.setenv("TGA_TIMEOUT_DOWNLOAD", "not-a-number")
+
+        timeouts = operation_timeouts()
+        assert timeouts["search"] == 5.0
+        assert timeouts["download"] == 60.0
+
+
+class TestJobPausesWhenBreakerOpen:
+    """Download jobs stop cleanly while TGA is unavailable"""
+
+    @patch("services.download_manager.SessionLocal")
+    @patch("services.download_manager.TrainingGovClient")
+    @patch.dict("os.environ", {"TGA_USERNAME": "user", "TGA_PASSWORD": "pass"})
+    def test_units_job_paused_and_resumable(self, mock_client_class, mock_session_local):
+        manager = DownloadManager()
+        mock_session_local.return_value = Mock()
+        mock_client = Mock()
+        mock_client.get_component_details.side_effect = [
+            TGACircuitOpenError("circuit breaker open")
+        ]
+        mock_client_class.return_value = mock_client
+
+        job_id = manager.create_job("units", ["BSBWHS411", "ICTICT418"], 1)
+        manager.process_units_download(job_id, ["BSBWHS411", "ICTICT418"], 1)
+
+        job = manager.get_job_status(job_id)
+        assert job["status"] == "paused"
+        assert job["failed_items"] == 0
+        assert job["item_status"] == {"BSBWHS411": "pending", "ICTICT418": "pending"}
+        assert "tga_breaker" in job
+        assert manager.resume_job(job_id) == ["BSBWHS411", "ICTICT418"]
@@ -0,0 +1,193 @@
+"""
+Tests for the local TGA stand-in server, driven by the real client
+"""
+
+import os
+import json
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from scripts.tga.standin_server import FaultInjector, StandinServer
+from services.download_manager import DownloadManager
+from services.tga.client import TrainingGovClient, details_summary, iter_components
+from services.tga.exceptions import TGAClientError
+from services.tga.resilience import tga_breaker
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'tga')
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setenv('TGA_RETRY_BASE_DELAY', '0.01')
+    yield
+    tga_breaker.reset()
+
+
+@pytest.fixture
+def standin():
+    servers = []
+
+    def start(fixture_dir=FIXTURES, **injection):
+        server = StandinServer(fixture_dir, injector=FaultInjector(seed=1, **injection)).start()
+        servers.append(server)
+        client = TrainingGovClient('user', 'secret', wsdl_url=server.wsdl_url,
+                                   xml_base_url=server.xml_base_url)
+        return server, client
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+class TestService:
+    def test_search_pages_through_units(self, standin):
+        server, client = standin()
+
+        first = client.search_components('TST', page_size=1)
+        components = list(iter_components(client, 'TST', page_size=1))
+
+        assert first['total'] == 2
+        assert [c['code'] for c in components] == ['TSTDIV201', 'TSTWHS101']
+        assert components[1]['title'] == 'Apply workplace health and safety procedures'
+        assert client.search_components('TST', component_types={'IncludeQualification': True})['components'] == []
+
+    def test_details_and_xml_downloads(self, standin):
+        server, client = standin()
+
+        details = client.get_component_details('TSTWHS101')
+        xml = client.get_component_xml('TSTWHS101')
+
+        assert details.Code == 'TSTWHS101'
+        with open(os.path.join(FIXTURES, 'Unit_TSTWHS101_R1.xml'), encoding='utf-8') as f:
+            assert xml['xml'] == f.read()
+        assert 'assessment_xml' in xml
+        with pytest.raises(TGAClientError):
+            client.get_component_details('NOPE101')
+
+    def test_details_summary(self, standin):
+        server, client = standin()
+
+        summary = details_summary(client.get_component_details('TSTWHS101'))
+
+        assert summary['code'] == 'TSTWHS101'
+        assert summary['title'] == 'Apply workplace health and safety procedures'
+        assert summary['status'] == 'Current'
+        assert summary['xml_file'] == 'Unit_TSTWHS101_R1.xml'
+        assert summary['assessment_file'] == 'AssessmentRequirements_TSTWHS101_R1.xml'
+        assert summary['release_date'] is not None
+
+    def test_changes_since(self, standin, tmp_path):
+        for name in ('Unit_TSTWHS101_R1.xml', 'Unit_TSTDIV201_R1.xml'):
+            shutil.copy(os.path.join(FIXTURES, name), tmp_path)
+        (tmp_path / 'components.json').write_text(json.dumps([
+            {'Code': 'TSTDIV201', 'Modified': '2024-06-01T00:00:00Z'},
+            {'Code': 'TSTWHS101', 'Modified': '2023-01-01T00:00:00Z'},
+            {'Code': 'TST', 'Title': 'Test Training Package', 'ComponentType': 'TrainingPackage',
+             'Modified': '2024-07-01T00:00:00Z'},
+        ]))
+        server, client = standin(str(tmp_path))
+
+        changes = client.get_changes('2024-01-01T00:00:00')['changes']
+
+        assert [change.Code for change in changes] == ['TST', 'TSTDIV201']
+        assert client.get_changes('2025-01-01T00:00:00') == {'changes': []}
+
+
+class TestInjection:
+    def test_failed_downloads_are_retried(self, standin):
+        server, client = standin(fail_first=1, targets=['download'])
+
+        xml = client.get_component_xml('TSTWHS101')
+
+        assert xml['xml']
+        stats = server.stats.snapshot()
+        assert stats['requests']['download'] == 4
+        assert stats['failures'] == {'download': 2}
+
+    def test_dropped_connections_are_retried(self, standin):
+        server, client = standin(fail_first=1, failure_mode='reset', targets=['soap'])
+
+        assert client.get_component_details('TSTWHS101').Code == 'TSTWHS101'
+        assert server.stats.snapshot()['failures'] == {'GetDetails': 1}
+
+    def test_persistent_failures_surface(self, standin):
+        server, client = standin(failure_rate=1.0, targets=['soap'])
+
+        with pytest.raises(TGAClientError):
+            client.search_components('TST')
+        assert server.stats.snapshot()['requests']['Search'] == 3
+
+    def test_latency_and_concurrency(self, standin):
+        server, client = standin(latency_ms=100)
+        url = f"{server.xml_base_url}Unit_TSTWHS101_R1.xml"
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            responses = list(executor.map(lambda _: requests.get(url, timeout=5), range(4)))
+
+        assert all(response.status_code == 200 for response in responses)
+        stats = requests.get(f"{server.base_url}/_stats", timeout=5).json()
+        assert stats['requests']['download'] == 4
+        assert stats['max_in_flight'] > 1
+
+    def test_unknown_failure_mode(self):
+        with pytest.raises(ValueError):
+            FaultInjector(failure_mode='explode')
+
+
+class TestBulkDownload:
+    """The download manager run end to end against the stand-in"""
+
+    @pytest.fixture
+    def run_units_job(self, standin, monkeypatch):
+        server, _client = standin(latency_ms=10, fail_first=1, targets=['download'])
+        monkeypatch.setenv('TGA_USERNAME', 'user')
+        monkeypatch.setenv('TGA_PASSWORD', 'secret')
+        monkeypatch.setenv('TGA_WSDL_URL', server.wsdl_url)
+        monkeypatch.setenv('TGA_XML_BASE_URL', server.xml_base_url)
+        stored = {}
+
+        def upsert(db, model, data):
+            stored[data['code']] = data
+            return SimpleNamespace(id=len(stored), code=data['code'], processed='N')
+
+        def run(codes, existing=None):
+            db = MagicMock()
+            db.query.return_value.filter.return_value.first.return_value = existing
+            manager = DownloadManager()
+            job_id = manager.create_job('units', codes, 1)
+            with patch('services.download_manager.SessionLocal', return_value=db), \
+                    patch('services.download_manager.upsert_component', side_effect=upsert), \
+                    patch('services.download_manager.write_unit_content_orm') as write:
+                manager.process_units_download(job_id, codes, 1)
+            return manager.get_job_status(job_id), write, stored
+
+        return server, run
+
+    def test_units_download_completes(self, run_units_job):
+        server, run = run_units_job
+
+        job, write, stored = run(['TSTWHS101', 'TSTDIV201'])
+
+        assert job['status'] == 'completed'
+        assert job['completed_items'] == 2
+        assert job['failed_items'] == 0
+        assert stored['TSTWHS101']['xml_file'] == 'Unit_TSTWHS101_R1.xml'
+        assert write.call_count == 2
+        # Injected download failures were retried
+        assert server.stats.snapshot()['failures']['download'] >= 1
+
+    def test_unchanged_units_are_skipped(self, run_units_job):
+        server, run = run_units_job
+        existing = SimpleNamespace(processed='Y', xml_file='Unit_TSTWHS101_R1.xml', release_date=None)
+
+        job, write, _stored = run(['TSTWHS101'], existing=existing)
+
+        assert job['skipped_items'] == 1
+        assert job['completed_items'] == 0
+        write.assert_not_called()
+        assert 'download' not in server.stats.snapshot()['requests']
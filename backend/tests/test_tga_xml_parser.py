@@ -0,0 +1,131 @@
+"""
+Golden-file tests for the shared lxml unit XML parser
+
+The ``*.tp_get.json`` and ``*.client.json`` fixtures were produced by the
+BeautifulSoup parsers this module replaced; the wrappers must return the same
+elements and performance criteria (modulo whitespace, which is now normalised).
+``*.parsed.json`` holds the full expected output of ``parse_unit_xml``.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from scripts.tga.tp_get import parse_elements_and_pcs
+from services.tga.client import TrainingGovClient
+from services.tga.xml_parser import parse_unit_xml
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures" / "tga"
+FIXTURES = sorted(path.stem for path in FIXTURE_DIR.glob("*.xml"))
+
+
+def load_xml(name):
+    return (FIXTURE_DIR / f"{name}.xml").read_text(encoding="utf-8")
+
+
+def load_golden(name, kind):
+    return json.loads((FIXTURE_DIR / f"{name}.{kind}.json").read_text(encoding="utf-8"))
+
+
+def normalise(value):
+    """Collapse whitespace in every string of a golden structure"""
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, list):
+        return [normalise(item) for item in value]
+    if isinstance(value, dict):
+        return {key: normalise(item) for key, item in value.items()}
+    return value
+
+
+class TestGoldenFiles:
+    """The shared parser against fixtures and the replaced parsers"""
+
+    @pytest.mark.parametrize("name", FIXTURES)
+    def test_parse_unit_xml(self, name):
+        assert parse_unit_xml(load_xml(name)) == load_golden(name, "parsed")
+
+    @pytest.mark.parametrize("name", FIXTURES)
+    def test_tp_get_matches_legacy_parser(self, name):
+        legacy = normalise(load_golden(name, "tp_get"))
+        elements = parse_elements_and_pcs(load_xml(name))
+
+        if legacy:
+            assert elements == legacy
+        else:
+            # The legacy table parser did not understand div.element markup
+            assert len(elements) == len(parse_unit_xml(load_xml(name))["elements"])
+
+    @pytest.mark.parametrize("name", FIXTURES)
+    def test_client_matches_legacy_parser(self, name):
+        legacy = normalise(load_golden(name, "client"))
+        client = TrainingGovClient.__new__(TrainingGovClient)
+        elements = client.extract_elements(load_xml(name))
+
+        if legacy:
+            assert elements == legacy
+        else:
+            # The legacy client parser did not understand elements tables
+            assert len(elements) == len(parse_unit_xml(load_xml(name))["elements"])
+
+
+class TestParseUnitXml:
+    """Edge cases of the shared parser"""
+
+    def test_empty_input(self):
+        parsed = parse_unit_xml("")
+        assert parsed["elements"] == []
+        assert parsed["knowledge_evidence"] == []
+        assert parse_elements_and_pcs("") is None
+
+    def test_bytes_with_encoding_declaration(self):
+        xml = load_xml("Unit_TSTWHS101_R1").encode("utf-8")
+        assert parse_unit_xml(xml) == load_golden("Unit_TSTWHS101_R1", "parsed")
+
+    def test_recovers_from_malformed_markup(self):
+        xml = (
+            "<document><table>"
+            "<tr><td>Elements</td><td>Performance criteria</td></tr>"
+            "<tr><td>Explanation</td><td>Explanation</td></tr>"
+            "<tr><td>1</td><td>Plan work<td>1.1</td><td>Confirm requirements</td></tr>"
+            "</table>"
+        )
+        elements = parse_unit_xml(xml)["elements"]
+        assert elements[0]["number"] == "1"
+        assert elements[0]["performance_criteria"][0]["number"] == "1.1"
+
+    def test_namespaced_and_uppercase_tags(self):
+        xml = (
+            '<Document xmlns="urn:tga"><Table>'
+            "<TR><TD>ELEMENT</TD><TD>PERFORMANCE CRITERIA</TD></TR>"
+            "<TR><TD>Explanation</TD><TD>Explanation</TD></TR>"
+            "<TR><TD>Element 2</TD><TD>Review work</TD><TD>2.1</TD><TD>Check output</TD></TR>"
+            "</Table></Document>"
+        )
+        elements = parse_unit_xml(xml)["elements"]
+        assert elements == [{
+            "number": "2",
+            "text": "Review work",
+            "performance_criteria": [{"number": "2.1", "text": "Check output"}],
+        }]
+
+    def test_evidence_in_two_column_table(self):
+        xml = (
+            "<document><table>"
+            "<tr><td>Knowledge Evidence</td><td>Hazard types and controls</td></tr>"
+            "<tr><td>Assessment Conditions</td><td>Simulated workplace</td></tr>"
+            "</table></document>"
+        )
+        parsed = parse_unit_xml(xml)
+        assert parsed["knowledge_evidence"] == ["Hazard types and controls"]
+        assert parsed["assessment_conditions"] == ["Simulated workplace"]
+
+    def test_section_ends_at_next_heading(self):
+        xml = (
+            "<document>"
+            "<section><title>Performance Evidence</title><p>Complete two tasks</p></section>"
+            "<section><title>Links</title><p>Companion volume</p></section>"
+            "</document>"
+        )
+        assert parse_unit_xml(xml)["performance_evidence"] == ["Complete two tasks"]
@@ -0,0 +1,93 @@
+"""
+Tests for precomputed unit content documents and their ETags
+"""
+
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+from services.unit_documents import (
+    DOCUMENT_VERSION,
+    REFRESH_DOCUMENTS_SQL,
+    etag_matches,
+    get_unit_document,
+    refresh_unit_documents,
+    unit_etag,
+)
+
+
+def make_unit(**overrides):
+    unit = MagicMock()
+    unit.id = 1
+    unit.code = "TSTWHS101"
+    unit.content_json = {"version": DOCUMENT_VERSION, "elements": []}
+    unit.content_etag = "0" * 32
+    unit.content_version = DOCUMENT_VERSION
+    unit.updated_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for key, value in overrides.items():
+        setattr(unit, key, value)
+    return unit
+
+
+class TestRefreshUnitDocuments:
+    """One statement rebuilds the documents of a batch"""
+
+    def test_refresh_passes_ids_and_version(self):
+        cursor = MagicMock()
+        refresh_unit_documents(cursor, [3, None, 4])
+
+        cursor.execute.assert_called_once_with(
+            REFRESH_DOCUMENTS_SQL, {"version": DOCUMENT_VERSION, "unit_ids": [3, 4]}
+        )
+
+    def test_refresh_without_units_does_nothing(self):
+        cursor = MagicMock()
+        refresh_unit_documents(cursor, [])
+        cursor.execute.assert_not_called()
+
+
+class TestGetUnitDocument:
+    """Reading documents, building missing or stale ones"""
+
+    def test_current_document_is_read_as_is(self):
+        db = MagicMock()
+        unit = make_unit()
+
+        assert get_unit_document(db, unit) == unit.content_json
+        db.connection.assert_not_called()
+        db.commit.assert_not_called()
+
+    def test_stale_document_is_rebuilt(self):
+        db = MagicMock()
+        connection = db.get_bind.return_value.begin.return_value.__enter__.return_value
+        cursor = connection.connection.cursor.return_value
+        unit = make_unit(content_version=DOCUMENT_VERSION - 1)
+
+        get_unit_document(db, unit)
+
+        # Built and committed in its own transaction, not the caller's session
+        assert cursor.execute.call_args.args[1]["unit_ids"] == [1]
+        db.commit.assert_not_called()
+        db.refresh.assert_called_once_with(unit)
+
+
+class TestUnitEtag:
+    """ETag generation and If-None-Match comparison"""
+
+    def test_etag_changes_with_content_and_unit_row(self):
+        etag = unit_etag(make_unit())
+
+        assert etag.startswith('W/"')
+        assert etag == unit_etag(make_unit())
+        assert etag != unit_etag(make_unit(content_etag="1" * 32))
+        assert etag != unit_etag(make_unit(updated_at=datetime(2026, 2, 1, tzinfo=timezone.utc)))
+        assert etag != unit_etag(make_unit(), "comprehensive")
+
+    def test_etag_matches(self):
+        etag = unit_etag(make_unit())
+
+        assert etag_matches(etag, etag)
+        assert etag_matches(etag[2:], etag)
+        assert etag_matches(f'"other", {etag}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"other"', etag)
+        assert not etag_matches(None, etag)
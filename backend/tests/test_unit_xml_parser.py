@@ -15,7 +15,15 @@ ROOT_DIR = os.path.dirname(os.path.dirname(SCRIPT_DIR))
 sys.path.insert(0, ROOT_DIR)
 
 # Import the modules we want to test
-from scripts.tga.tp_get import parse_elements_and_pcs, store_elements_and_pcs
+from scripts.tga.tp_get import (
+    parse_elements_and_pcs,
+    store_elements_and_pcs,
+    process_local_xml_files,
+    write_unit_batch,
+    parse_unit_xml_file,
+)
+
+FIXTURE_DIR = os.path.join(SCRIPT_DIR, 'fixtures', 'tga')
 
 class TestElementParsing(unittest.TestCase):
     """Test cases for element and performance criteria parsing"""
@@ -88,15 +96,110 @@ class TestElementParsing(unittest.TestCase):
         # Verify the function returned True
         self.assertTrue(result, "Function should return True on success")
         
-        # Verify cursor methods were called the expected number of times
-        self.assertEqual(mock_cursor.execute.call_count, 5, 
-                       "Should execute 5 SQL statements (2 deletes, 1 element insert, 1 PC insert, 1 update)")
+        # Staging DDL, element merge and the document refresh, whatever the row count
+        self.assertEqual(mock_cursor.execute.call_count, 3,
+                       "Should execute 3 SQL statements (staging, merge, document refresh)")
+        
+        # Element and PC rows are sent with COPY
+        copied = [call.args[1].getvalue() for call in mock_cursor.copy_expert.call_args_list]
+        self.assertIn("123\t0\t1\tTest element\n", copied)
+        self.assertIn("123\t0\t1\t1.1\tTest PC\n", copied)
+
+class TestLocalXmlProcessing(unittest.TestCase):
+    """Test cases for parallel and dry-run processing of local XML files"""
+    
+    @patch('scripts.tga.tp_get.psycopg2.connect')
+    def test_dry_run_stats(self, mock_connect):
+        """Dry runs report element/PC counts without connecting to the database"""
+        results = process_local_xml_files(FIXTURE_DIR, dry_run=True)
+        
+        mock_connect.assert_not_called()
+        self.assertEqual(results['total'], 2)
+        self.assertEqual(results['with_elements'], 2)
+        self.assertEqual(results['stats']['elements'], 5)
+        self.assertEqual(results['stats']['performance_criteria'], 9)
+        self.assertEqual(results['stats']['parse_failures'], 0)
+        
+    def test_workers_match_serial_results(self):
+        """Parsing in a process pool gives the same counts as one process"""
+        serial = process_local_xml_files(FIXTURE_DIR, dry_run=True)
+        parallel = process_local_xml_files(FIXTURE_DIR, dry_run=True, workers=2)
+        
+        for key in ('files', 'elements', 'performance_criteria', 'without_elements'):
+            self.assertEqual(parallel['stats'][key], serial['stats'][key])
+        self.assertEqual(parallel['stats']['workers'], 2)
+        
+    @patch('scripts.tga.tp_get.psycopg2.connect')
+    def test_batches_commit_once_per_batch(self, mock_connect):
+        """Units are written in batches with one commit each"""
+        conn = mock_connect.return_value
+        with patch('scripts.tga.tp_get.write_unit_batch', side_effect=lambda cur, batch: len(batch)) as write:
+            results = process_local_xml_files(FIXTURE_DIR, batch_size=1)
+            
+        self.assertEqual(write.call_count, 2)
+        self.assertEqual(conn.commit.call_count, 2)
+        self.assertEqual(results['with_elements'], 2)
+        
+    @patch('scripts.tga.tp_get.execute_values')
+    def test_write_unit_batch(self, mock_execute_values):
+        """Unit ids are resolved in one query and the batch is merged in one bulk write"""
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [(1, 'TSTWHS101')]
+        mock_execute_values.return_value = [(2, 'TSTDIV201')]
+        batch = [
+            {'unit_code': 'TSTWHS101', 'elements': [{'element_num': '1'}]},
+            {'unit_code': 'TSTDIV201', 'elements': [{'element_num': '1'}]},
+        ]
+        
+        self.assertEqual(write_unit_batch(cursor, batch), 2)
+        cursor.execute.assert_any_call("RELEASE SAVEPOINT batch_write")
+        # units, elements (no PCs to copy)
+        self.assertEqual(cursor.copy_expert.call_count, 2)
+        
+    @patch('scripts.tga.tp_get.store_elements_and_pcs')
+    @patch('scripts.tga.tp_get.write_unit_content')
+    @patch('scripts.tga.tp_get.execute_values')
+    def test_write_unit_batch_falls_back_per_unit(self, mock_execute_values, mock_write, mock_store):
+        """A failed bulk write is retried unit by unit; failed units roll back to a savepoint"""
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [(1, 'TSTWHS101')]
+        mock_execute_values.return_value = [(2, 'TSTDIV201')]
+        mock_write.side_effect = Exception("duplicate key")
+        mock_store.side_effect = [True, False]
+        batch = [
+            {'unit_code': 'TSTWHS101', 'elements': [{'element_num': '1'}]},
+            {'unit_code': 'TSTDIV201', 'elements': [{'element_num': '1'}]},
+        ]
+        
+        self.assertEqual(write_unit_batch(cursor, batch), 1)
+        cursor.execute.assert_any_call("ROLLBACK TO SAVEPOINT batch_write")
+        mock_store.assert_any_call(cursor, 2, batch[1]['elements'], None, None)
+        cursor.execute.assert_any_call("ROLLBACK TO SAVEPOINT unit_write")
         
-        # Verify parameters for element insert
-        mock_cursor.execute.assert_any_call(unittest.mock.ANY, (123, '1', 'Test element'))
+    @patch('scripts.tga.tp_get.execute_values')
+    def test_write_unit_batch_fallback_keeps_aspects_and_skills(self, mock_execute_values):
+        """Units retried one by one still get their critical aspects and required skills"""
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [(1, 'TSTWHS101')]
+        # The first COPY (the bulk write's unit rows) fails, forcing the fallback
+        cursor.copy_expert.side_effect = [Exception("duplicate key")] + [None] * 10
+        batch = [parse_unit_xml_file((os.path.join(FIXTURE_DIR, 'Unit_TSTWHS101_R1.xml'), 'TSTWHS101'))]
+        self.assertTrue(batch[0]['critical_aspects'])
+        self.assertTrue(batch[0]['required_skills'])
         
-        # Verify parameters for PC insert
-        mock_cursor.execute.assert_any_call(unittest.mock.ANY, (1, 123, '1.1', 'Test PC'))
+        self.assertEqual(write_unit_batch(cursor, batch), 1)
+        cursor.execute.assert_any_call("ROLLBACK TO SAVEPOINT batch_write")
+        cursor.execute.assert_any_call("RELEASE SAVEPOINT unit_write")
+        copied = {
+            call.args[0].split()[1]: call.args[1].getvalue()
+            for call in cursor.copy_expert.call_args_list[1:]
+        }
+        self.assertEqual(copied['stage_units'], "1\tt\tt\tt\n")
+        aspect = batch[0]['critical_aspects'][0]
+        self.assertIn(f"1\t0\t{aspect['section']}\t{aspect['text']}\n", copied['stage_unit_aspects'])
+        skill = batch[0]['required_skills'][0]
+        self.assertIn(f"1\t0\t{skill['skill_type']}\t{skill['section']}\t{skill['text']}\n",
+                      copied['stage_unit_skills'])
 
 if __name__ == '__main__':
     unittest.main()
@@ -16,114 +16,116 @@ import models.tables as models
 from services.download_manager import download_manager
 
 
-class TestUnitsBulkAPI:
-    """Test cases for units bulk download API endpoints"""
-    
-    @pytest.fixture
-    def client(self):
-        """Test client fixture"""
-        return TestClient(app)
-    
-    @pytest.fixture
-    def admin_user(self, db_session):
-        """Create admin user for testing"""
-        # Create admin role
-        admin_role = models.Role(name="admin", description="Administrator")
-        db_session.add(admin_role)
-        db_session.commit()
-        
-        # Create admin user
-        admin_user = models.User(
-            username="admin_test",
-            email="admin@test.com",
-            hashed_password="hashed_password",
-            role_id=admin_role.id
-        )
-        db_session.add(admin_user)
-        db_session.commit()
-        return admin_user
-    
-    @pytest.fixture
-    def regular_user(self, db_session):
-        """Create regular user for testing"""
-        # Create user role
-        user_role = models.Role(name="user", description="Regular User")
-        db_session.add(user_role)
-        db_session.commit()
-        
-        # Create regular user
-        regular_user = models.User(
-            username="user_test",
-            email="user@test.com",
-            hashed_password="hashed_password",
-            role_id=user_role.id
-        )
-        db_session.add(regular_user)
-        db_session.commit()
-        return regular_user
-    
-    @pytest.fixture
-    def admin_token(self, admin_user):
-        """Generate JWT token for admin user"""
-        from auth.auth_handler import signJWT
-        return signJWT(admin_user.id)["access_token"]
-    
-    @pytest.fixture
-    def user_token(self, regular_user):
-        """Generate JWT token for regular user"""
-        from auth.auth_handler import signJWT
-        return signJWT(regular_user.id)["access_token"]
-    
-    @pytest.fixture
-    def sample_unit(self, db_session):
-        """Create sample unit with elements and performance criteria"""
-        unit = models.Unit(
-            code="TESTICT418",
-            title="Test ICT Unit",
-            description="Test unit for comprehensive testing",
-            status="Current",
-            visible=True
-        )
-        db_session.add(unit)
-        db_session.commit()
-        
-        # Add elements
-        element1 = models.UnitElement(
-            unit_id=unit.id,
-            element_num="1",
-            element_text="Test Element 1"
-        )
-        element2 = models.UnitElement(
-            unit_id=unit.id,
-            element_num="2", 
-            element_text="Test Element 2"
-        )
-        db_session.add_all([element1, element2])
-        db_session.commit()
-        
-        # Add performance criteria
-        pc1 = models.UnitPerformanceCriteria(
-            unit_id=unit.id,
-            element_id=element1.id,
-            pc_num="1.1",
-            pc_text="Test Performance Criteria 1.1"
-        )
-        pc2 = models.UnitPerformanceCriteria(
-            unit_id=unit.id,
-            element_id=element1.id,
-            pc_num="1.2",
-            pc_text="Test Performance Criteria 1.2"
-        )
-        pc3 = models.UnitPerformanceCriteria(
-            unit_id=unit.id,
-            element_id=element2.id,
-            pc_num="2.1",
-            pc_text="Test Performance Criteria 2.1"
-        )
-        db_session.add_all([pc1, pc2, pc3])
-        db_session.commit()
-        
-        return unit
+@pytest.fixture
+def db_session(db):
+    """The test database session, shared with the app through the client fixture"""
+    return db
+
+
+@pytest.fixture
+def admin_user(db_session):
+    """Create admin user for testing"""
+    # Create admin role
+    admin_role = models.Role(name="admin", description="Administrator")
+    db_session.add(admin_role)
+    db_session.commit()
+
+    # Create admin user
+    admin_user = models.User(
+        username="admin_test",
+        email="admin@test.com",
+        hashed_password="hashed_password",
+        role_id=admin_role.id
+    )
+    db_session.add(admin_user)
+    db_session.commit()
+    return admin_user
+
+
+@pytest.fixture
+def regular_user(db_session):
+    """Create regular user for testing"""
+    # Create user role
+    user_role = models.Role(name="user", description="Regular User")
+    db_session.add(user_role)
+    db_session.commit()
+
+    # Create regular user
+    regular_user = models.User(
+        username="user_test",
+        email="user@test.com",
+        hashed_password="hashed_password",
+        role_id=user_role.id
+    )
+    db_session.add(regular_user)
+    db_session.commit()
+    return regular_user
+
+
+@pytest.fixture
+def admin_token(admin_user):
+    """Generate JWT token for admin user"""
+    from auth.auth_handler import signJWT
+    return signJWT(admin_user.id)["access_token"]
+
+
+@pytest.fixture
+def user_token(regular_user):
+    """Generate JWT token for regular user"""
+    from auth.auth_handler import signJWT
+    return signJWT(regular_user.id)["access_token"]
+
+
+@pytest.fixture
+def sample_unit(db_session):
+    """Create sample unit with elements and performance criteria"""
+    unit = models.Unit(
+        code="TESTICT418",
+        title="Test ICT Unit",
+        description="Test unit for comprehensive testing",
+        status="Current",
+        visible=True
+    )
+    db_session.add(unit)
+    db_session.commit()
+
+    # Add elements
+    element1 = models.UnitElement(
+        unit_id=unit.id,
+        element_num="1",
+        element_text="Test Element 1"
+    )
+    element2 = models.UnitElement(
+        unit_id=unit.id,
+        element_num="2",
+        element_text="Test Element 2"
+    )
+    db_session.add_all([element1, element2])
+    db_session.commit()
+
+    # Add performance criteria
+    pc1 = models.UnitPerformanceCriteria(
+        unit_id=unit.id,
+        element_id=element1.id,
+        pc_num="1.1",
+        pc_text="Test Performance Criteria 1.1"
+    )
+    pc2 = models.UnitPerformanceCriteria(
+        unit_id=unit.id,
+        element_id=element1.id,
+        pc_num="1.2",
+        pc_text="Test Performance Criteria 1.2"
+    )
+    pc3 = models.UnitPerformanceCriteria(
+        unit_id=unit.id,
+        element_id=element2.id,
+        pc_num="2.1",
+        pc_text="Test Performance Criteria 2.1"
+    )
+    db_session.add_all([pc1, pc2, pc3])
+    db_session.commit()
+
+    return unit
 
 
 class TestAvailableUnits:
@@ -285,14 +287,13 @@ class TestUnitElements:
         response = client.get(f"/api/units/{sample_unit.id}/elements")
         
         assert response.status_code == status.HTTP_200_OK
-        data = response.json()
-        assert data["unit_code"] == "TESTICT418"
-        assert data["unit_title"] == "Test ICT Unit"
-        assert len(data["elements"]) == 2
-        assert data["elements"][0]["element_num"] == "1"
-        assert data["elements"][0]["element_text"] == "Test Element 1"
-        assert data["elements"][1]["element_num"] == "2"
-        assert data["elements"][1]["element_text"] == "Test Element 2"
+        elements = sorted(response.json(), key=lambda element: element["element_num"])
+        assert len(elements) == 2
+        assert all(element["unit_id"] == sample_unit.id for element in elements)
+        assert elements[0]["element_num"] == "1"
+        assert elements[0]["element_text"] == "Test Element 1"
+        assert elements[1]["element_num"] == "2"
+        assert elements[1]["element_text"] == "Test Element 2"
     
     def test_get_unit_elements_not_found(self, client):
         """Test elements for non-existent unit"""
@@ -309,19 +310,14 @@ class TestUnitPerformanceCriteria:
         response = client.get(f"/api/units/{sample_unit.id}/performance-criteria")
         
         assert response.status_code == status.HTTP_200_OK
-        data = response.json()
-        assert data["unit_code"] == "TESTICT418"
-        assert data["unit_title"] == "Test ICT Unit"
-        assert len(data["performance_criteria"]) == 3
-        
-        # Verify performance criteria are ordered by element and PC number
-        pc_data = data["performance_criteria"]
-        assert pc_data[0]["element_num"] == "1"
-        assert pc_data[0]["pc_num"] == "1.1"
-        assert pc_data[1]["element_num"] == "1"
-        assert pc_data[1]["pc_num"] == "1.2"
-        assert pc_data[2]["element_num"] == "2"
-        assert pc_data[2]["pc_num"] == "2.1"
+        pc_data = sorted(response.json(), key=lambda pc: pc["pc_num"])
+        assert len(pc_data) == 3
+        assert all(pc["unit_id"] == sample_unit.id for pc in pc_data)
+        
+        # PCs 1.1 and 1.2 belong to element 1, PC 2.1 to element 2
+        assert [pc["pc_num"] for pc in pc_data] == ["1.1", "1.2", "2.1"]
+        assert pc_data[0]["element_id"] == pc_data[1]["element_id"]
+        assert pc_data[2]["element_id"] != pc_data[0]["element_id"]
     
     def test_get_unit_performance_criteria_not_found(self, client):
         """Test performance criteria for non-existent unit"""
@@ -363,10 +359,71 @@ class TestUnitComprehensive:
         assert len(element2["performance_criteria"]) == 1
         assert element2["performance_criteria"][0]["pc_num"] == "2.1"
         
-        # Verify critical aspects and required skills (empty for now)
+        # No critical aspects or required skills stored for this unit
         assert data["critical_aspects"] == []
         assert data["required_skills"] == []
     
+    def test_get_unit_comprehensive_aspects_and_skills(self, client, sample_unit, db_session):
+        """Critical aspects and required skills come from their child tables"""
+        db_session.add_all([
+            models.UnitCriticalAspect(
+                unit_id=sample_unit.id,
+                section="Performance Evidence",
+                critical_aspect="Complete two tasks"
+            ),
+            models.UnitRequiredSkill(
+                unit_id=sample_unit.id,
+                skill_type="knowledge",
+                skill_section="Knowledge Evidence",
+                skill_text="Hazard types"
+            ),
+        ])
+        db_session.commit()
+        
+        response = client.get(f"/api/units/{sample_unit.id}/comprehensive")
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["critical_aspects"][0]["section"] == "Performance Evidence"
+        assert data["critical_aspects"][0]["critical_aspect"] == "Complete two tasks"
+        assert data["required_skills"][0]["skill_type"] == "knowledge"
+        assert data["required_skills"][0]["skill_text"] == "Hazard types"
+    
+    def test_get_unit_comprehensive_etag(self, client, sample_unit):
+        """Repeat requests with the ETag are answered with 304"""
+        response = client.get(f"/api/units/{sample_unit.id}/comprehensive")
+        etag = response.headers["ETag"]
+        
+        response = client.get(
+            f"/api/units/{sample_unit.id}/comprehensive",
+            headers={"If-None-Match": etag}
+        )
+        
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.headers["ETag"] == etag
+    
+    def test_get_unit_comprehensive_etag_changes_with_document(self, client, sample_unit, db_session):
+        """A rebuilt document (e.g. after a pack import) gets a new ETag"""
+        etag = client.get(f"/api/units/{sample_unit.id}/comprehensive").headers["ETag"]
+        
+        # A row written outside the sync paths, with its document marked stale
+        db_session.add(models.UnitCriticalAspect(
+            unit_id=sample_unit.id,
+            section="Performance Evidence",
+            critical_aspect="Complete two tasks"
+        ))
+        sample_unit.content_version = None
+        db_session.commit()
+        
+        response = client.get(
+            f"/api/units/{sample_unit.id}/comprehensive",
+            headers={"If-None-Match": etag}
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["ETag"] != etag
+        assert response.json()["critical_aspects"][0]["critical_aspect"] == "Complete two tasks"
+    
     def test_get_unit_comprehensive_not_found(self, client):
         """Test comprehensive data for non-existent unit"""
         response = client.get("/api/units/99999/comprehensive")
@@ -408,7 +465,7 @@ class TestUnitsSearch:
         # Make search request
         response = client.post(
             "/api/units/search",
-            json={
+            params={
                 "query": "test",
                 "page": 1,
                 "page_size": 20
@@ -444,7 +501,7 @@ class TestUnitsSearch:
         # Make search request with training package filter
         response = client.post(
             "/api/units/search",
-            json={
+            params={
                 "query": "test",
                 "training_package_code": "ICT40120",
                 "page": 1,